@@ -0,0 +1,143 @@
+"""Serveur SSH paramiko en boucle locale pour les bancs d'essai.
+
+Stratégie :
+- Le serveur tourne dans un processus séparé : le CPU et la mémoire mesurés
+  dans le processus du banc d'essai sont ceux du client (la sauvegarde)
+- Chaque `exec` lance `sh -c <commande>` localement, dans le dossier du site
+  synthétique, avec un PATH préfixé (faux `mysqldump`)
+- stdout et stderr sont relayés sur le canal par blocs, puis le code de
+  sortie : le client voit un vrai serveur (fenêtres, paquets, chiffrement)
+- Authentification par mot de passe, clé d'hôte RSA générée au démarrage
+"""
+
+import multiprocessing
+import os
+import socket
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import paramiko
+
+USERNAME = "bench"
+PASSWORD = "bench"
+CHUNK_SIZE = 256 * 1024
+
+
+class _ExecServer(paramiko.ServerInterface):
+    """Accepte une session et lance les commandes `exec` reçues."""
+
+    def __init__(self, cwd: str, env: Dict[str, str]):
+        self.cwd = cwd
+        self.env = env
+
+    def check_channel_request(self, kind: str, chanid: int) -> int:
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def get_allowed_auths(self, username: str) -> str:
+        return "password"
+
+    def check_auth_password(self, username: str, password: str) -> int:
+        if (username, password) == (USERNAME, PASSWORD):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_exec_request(self, channel: paramiko.Channel, command: bytes) -> bool:
+        threading.Thread(
+            target=_run_exec, args=(channel, command.decode("utf-8"), self.cwd, self.env),
+            daemon=True,
+        ).start()
+        return True
+
+
+def _pump(fd: int, send) -> None:
+    while True:
+        chunk = os.read(fd, CHUNK_SIZE)
+        if not chunk:
+            break
+        send(chunk)
+
+
+def _run_exec(channel: paramiko.Channel, command: str, cwd: str, env: Dict[str, str]) -> None:
+    process = subprocess.Popen(
+        ["sh", "-c", command], cwd=cwd, env=env,
+        stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    errors = threading.Thread(
+        target=_pump, args=(process.stderr.fileno(), channel.sendall_stderr), daemon=True
+    )
+    errors.start()
+    try:
+        _pump(process.stdout.fileno(), channel.sendall)
+    except (OSError, EOFError, paramiko.SSHException):
+        # Client parti : la commande est arrêtée
+        process.kill()
+    errors.join()
+    returncode = process.wait()
+    try:
+        channel.send_exit_status(returncode)
+        channel.close()
+    except (OSError, EOFError, paramiko.SSHException):
+        pass
+
+
+def _serve(ready: "multiprocessing.Queue", cwd: str, env: Dict[str, str]) -> None:
+    host_key = paramiko.RSAKey.generate(2048)
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(8)
+    ready.put(listener.getsockname()[1])
+
+    while True:
+        connection, _ = listener.accept()
+        transport = paramiko.Transport(connection)
+        transport.add_server_key(host_key)
+        transport.start_server(server=_ExecServer(cwd, env))
+
+
+class LoopbackSSHServer:
+    """Serveur SSH local, dans un processus séparé, le temps d'un `with`."""
+
+    def __init__(self, cwd: Path, path_prefix: Optional[Path] = None):
+        """Initialise le serveur.
+
+        Args:
+            cwd: Dossier courant des commandes exécutées
+            path_prefix: Dossier placé en tête du PATH des commandes (faux
+                binaires, ex: mysqldump)
+        """
+        self.cwd = cwd
+        self.env = dict(os.environ)
+        if path_prefix is not None:
+            self.env["PATH"] = f"{path_prefix}{os.pathsep}{self.env.get('PATH', '')}"
+        self.port: Optional[int] = None
+        self._process: Optional[multiprocessing.Process] = None
+
+    def __enter__(self) -> "LoopbackSSHServer":
+        ready = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(ready, str(self.cwd), self.env), daemon=True
+        )
+        self._process.start()
+        self.port = ready.get(timeout=60)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def connect(self) -> paramiko.SSHClient:
+        """Client SSH connecté au serveur."""
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(
+            "127.0.0.1", port=self.port, username=USERNAME, password=PASSWORD,
+            look_for_keys=False, allow_agent=False,
+        )
+        return client
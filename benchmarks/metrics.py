@@ -0,0 +1,159 @@
+"""Mesures d'une exécution de banc d'essai et comparaison de résultats.
+
+- Débit : octets écrits / durée totale
+- Premier octet : délai entre l'appel et la première donnée reçue sur un
+  canal SSH (`paramiko.Channel.recv` instrumenté le temps de la mesure)
+- Mémoire : pic de RSS du processus, échantillonné dans /proc/self/statm
+  (à défaut `ru_maxrss`, pic depuis le démarrage du processus)
+- CPU : temps CPU du processus (tous threads) pendant la mesure
+"""
+
+import os
+import resource
+import statistics
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+import paramiko
+
+SAMPLE_INTERVAL = 0.01
+
+# Métrique → True si une valeur plus grande est meilleure
+METRICS = {
+    "throughput_mb_s": True,
+    "first_byte_s": False,
+    "peak_rss_mb": False,
+    "cpu_s": False,
+}
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+@dataclass
+class Measurement:
+    """Résultat d'une exécution."""
+
+    bytes: int
+    seconds: float
+    first_byte_s: Optional[float]
+    peak_rss_mb: float
+    rss_growth_mb: float
+    cpu_s: float
+
+    @property
+    def throughput_mb_s(self) -> float:
+        return self.bytes / self.seconds / 1024 / 1024 if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "throughput_mb_s": self.throughput_mb_s}
+
+
+class Probe:
+    """Mesure une exécution (`with Probe() as probe: ...; probe.result(n)`)."""
+
+    def __init__(self):
+        self._first_byte: Optional[float] = None
+        self._stop = threading.Event()
+        self._peak = 0
+        self._baseline = 0
+
+    def _sample(self) -> None:
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            self._peak = max(self._peak, _rss_bytes() or 0)
+
+    def __enter__(self) -> "Probe":
+        original = paramiko.Channel.recv
+        probe = self
+
+        def recv(channel, nbytes):
+            data = original(channel, nbytes)
+            if data and probe._first_byte is None:
+                probe._first_byte = time.perf_counter()
+            return data
+
+        self._original_recv = original
+        paramiko.Channel.recv = recv
+        self._baseline = self._peak = _rss_bytes() or 0
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        self._cpu = time.process_time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._finished = time.perf_counter()
+        self._cpu = time.process_time() - self._cpu
+        self._stop.set()
+        self._sampler.join()
+        paramiko.Channel.recv = self._original_recv
+        self._peak = max(self._peak, _rss_bytes() or 0)
+
+    def result(self, size: int) -> Measurement:
+        """Mesures de l'exécution terminée, pour `size` octets produits."""
+        peak = self._peak
+        if not peak:
+            # ru_maxrss est en Ko sous Linux
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return Measurement(
+            bytes=size,
+            seconds=self._finished - self._started,
+            first_byte_s=(
+                self._first_byte - self._started if self._first_byte is not None else None
+            ),
+            peak_rss_mb=peak / 1024 / 1024,
+            rss_growth_mb=max(peak - self._baseline, 0) / 1024 / 1024,
+            cpu_s=self._cpu,
+        )
+
+
+def summarize(runs: List[Measurement]) -> dict:
+    """Médiane de chaque métrique sur plusieurs exécutions (et détail des exécutions)."""
+    summary = {}
+    for name in ("bytes", "seconds", "throughput_mb_s", "first_byte_s",
+                 "peak_rss_mb", "rss_growth_mb", "cpu_s"):
+        values = [getattr(run, name) for run in runs if getattr(run, name) is not None]
+        summary[name] = statistics.median(values) if values else None
+    summary["runs"] = [run.to_dict() for run in runs]
+    return summary
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[Dict[str, object]]:
+    """Compare deux fichiers de résultats, cas par cas.
+
+    Args:
+        current: Résultats de l'exécution courante
+        baseline: Résultats de référence
+        tolerance: Dégradation relative tolérée (0.1 = 10 %)
+
+    Returns:
+        Une ligne par cas et métrique présents des deux côtés : valeurs,
+        variation relative et drapeau `regression`
+    """
+    rows = []
+    for case, results in current["results"].items():
+        reference = baseline.get("results", {}).get(case)
+        if reference is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            new, old = results.get(metric), reference.get(metric)
+            if new is None or not old:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            rows.append({
+                "case": case,
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change": change,
+                "regression": worse > tolerance,
+            })
+    return rows
@@ -0,0 +1,101 @@
+"""Banc d'essai de la correction des permissions de wp-content.
+
+Compare, sur une arborescence WordPress synthétique créée localement, les
+quatre parcours historiques (`chown -R` puis trois `find -exec chmod {} \\;`)
+et le parcours unique de `permission_fix_command` (`find -exec {} +`).
+
+Pour chaque variante : nombre de parcours de l'arborescence, nombre de
+processus chown/chmod lancés (comptés par des enveloppes placées en tête du
+PATH) et durée.
+
+Usage :
+  python benchmarks/permissions.py --files 50000
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from backup_site.docker_load.wordpress import permission_fix_command
+
+COUNTED_TOOLS = ("chown", "chmod")
+
+
+def legacy_commands(root: Path, owner: str) -> List[str]:
+    """Commandes exécutées par `_configure_filesystem` avant le parcours unique."""
+    return [
+        f"chown -R {owner} '{root}'",
+        f"find '{root}' -type d ! -path '*/uploads*' -exec chmod 755 {{}} \\;",
+        f"find '{root}/uploads' -type d -exec chmod 777 {{}} \\;",
+        f"find '{root}' -type f -exec chmod 644 {{}} \\;",
+    ]
+
+
+def build_tree(root: Path, files: int) -> None:
+    """Arborescence wp-content : extensions, thèmes et uploads par mois (80 %)."""
+    uploads = files * 4 // 5
+    for index in range(files):
+        if index < uploads:
+            directory = root / "uploads" / str(2015 + index % 10) / f"{index % 12 + 1:02d}"
+        else:
+            directory = root / ("plugins" if index % 3 else "themes") / f"ext{index % 200}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"f{index}.php").write_bytes(b"<?php\n")
+
+
+def install_counters(bin_dir: Path, log: Path) -> None:
+    """Enveloppes chown/chmod qui consignent chaque lancement puis délèguent."""
+    for tool in COUNTED_TOOLS:
+        real = shutil.which(tool)
+        wrapper = bin_dir / tool
+        wrapper.write_text(f'#!/bin/sh\necho {tool} >> "{log}"\nexec {real} "$@"\n')
+        wrapper.chmod(0o755)
+
+
+def run_variant(commands: List[str], bin_dir: Path, log: Path) -> dict:
+    log.write_text("")
+    env = dict(os.environ, PATH=f"{bin_dir}:{os.environ['PATH']}")
+    started = time.perf_counter()
+    for command in commands:
+        subprocess.run(["bash", "-c", command], check=True, env=env)
+    elapsed = time.perf_counter() - started
+    launched = log.read_text().split()
+    return {
+        "walks": len(commands),
+        "processes": {tool: launched.count(tool) for tool in COUNTED_TOOLS},
+        "seconds": elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20000)
+    args = parser.parse_args()
+
+    owner = f"{os.getuid()}:{os.getgid()}"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir) / "wp-content"
+        bin_dir = Path(tmpdir) / "bin"
+        bin_dir.mkdir()
+        log = Path(tmpdir) / "launched.log"
+        install_counters(bin_dir, log)
+        build_tree(root, args.files)
+
+        variants = [
+            ("4 parcours, chmod par fichier", legacy_commands(root, owner)),
+            ("parcours unique, lots", [permission_fix_command(str(root), owner)]),
+        ]
+        print(f"{args.files} fichiers")
+        for label, commands in variants:
+            result = run_variant(commands, bin_dir, log)
+            processes = ", ".join(f"{tool} ×{count}" for tool, count in result["processes"].items())
+            print(f"{label:<32} {result['walks']} parcours  {processes:<24} {result['seconds']:7.2f} s")
+
+
+if __name__ == "__main__":
+    main()
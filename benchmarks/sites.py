@@ -0,0 +1,144 @@
+"""Sites WordPress synthétiques pour les bancs d'essai.
+
+- Arborescence : wp-admin/, wp-includes/, extensions et thèmes (texte PHP,
+  compressible), uploads/AAAA/MM/ (octets aléatoires, incompressibles) et
+  wp-content/cache/ (exclu de la sauvegarde)
+- Tailles tirées d'une loi log-normale (médiane et dispersion réglables),
+  bornées : quelques gros fichiers, beaucoup de petits, comme un vrai site
+- Dump SQL : table wp_posts de N lignes en INSERT étendus, servi par un faux
+  `mysqldump` qui se contente de le lire
+- Tout est déterministe pour une graine donnée : deux exécutions comparent
+  les mêmes données
+"""
+
+import random
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Tuple
+
+_WORDS = (
+    "function return array wp_enqueue_script add_action esc_html get_option "
+    "apply_filters $post $query echo foreach endforeach if else null true false "
+    "wp_query the_content <div class=\"entry\"> </div> <?php ?> __( 'text-domain' )"
+).split()
+
+EXCLUDED = ["wp-content/cache/"]
+
+
+@dataclass
+class SiteProfile:
+    """Forme du site synthétique."""
+
+    files: int = 2000
+    median_kb: float = 8.0
+    sigma: float = 1.6
+    max_mb: float = 16.0
+    uploads_share: float = 0.4
+    cache_files: int = 200
+    rows: int = 50_000
+    seed: int = 42
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _text_block(rng: random.Random, size: int = 1024 * 1024) -> bytes:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words).encode("utf-8")[:size]
+
+
+def _size(rng: random.Random, profile: SiteProfile) -> int:
+    size = int(rng.lognormvariate(0, profile.sigma) * profile.median_kb * 1024)
+    return max(1, min(size, int(profile.max_mb * 1024 * 1024)))
+
+
+def _text(rng: random.Random, block: bytes, size: int) -> bytes:
+    parts = []
+    while size > 0:
+        start = rng.randrange(len(block) // 2)
+        part = block[start:start + min(size, len(block) - start)]
+        parts.append(part)
+        size -= len(part)
+    return b"".join(parts)
+
+
+def generate_site(root: Path, profile: SiteProfile) -> Tuple[int, int]:
+    """Crée l'arborescence du site dans `root`.
+
+    Returns:
+        Tuple (fichiers sauvegardés, octets sauvegardés), hors cache
+    """
+    rng = random.Random(profile.seed)
+    block = _text_block(rng)
+    total = 0
+
+    for index in range(profile.files):
+        size = _size(rng, profile)
+        if rng.random() < profile.uploads_share:
+            month = f"{2016 + index % 8}/{index % 12 + 1:02d}"
+            directory = root / "wp-content" / "uploads" / month
+            name, data = f"image-{index}.jpg", rng.randbytes(size)
+        else:
+            area = rng.choice(("wp-admin", "wp-includes", "wp-content/plugins", "wp-content/themes"))
+            directory = root / area / f"module{index % 50}"
+            name, data = f"file-{index}.php", _text(rng, block, size)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / name).write_bytes(data)
+        total += size
+
+    cache = root / "wp-content" / "cache"
+    cache.mkdir(parents=True, exist_ok=True)
+    for index in range(profile.cache_files):
+        (cache / f"page-{index}.html").write_bytes(_text(rng, block, 4096))
+
+    return profile.files, total
+
+
+def generate_dump(path: Path, profile: SiteProfile, rows_per_insert: int = 500) -> int:
+    """Écrit un dump mysqldump de `profile.rows` articles.
+
+    Returns:
+        Taille du dump en octets
+    """
+    rng = random.Random(profile.seed + 1)
+    block = _text_block(rng).replace(b"'", b"").replace(b"\\", b"")
+    with open(path, "wb") as f:
+        f.write(
+            b"-- MySQL dump (synthetique)\n"
+            b"/*!40101 SET NAMES utf8mb4 */;\n"
+            b"DROP TABLE IF EXISTS `wp_posts`;\n"
+            b"CREATE TABLE `wp_posts` (\n"
+            b"  `ID` bigint(20) unsigned NOT NULL AUTO_INCREMENT,\n"
+            b"  `post_title` text NOT NULL,\n"
+            b"  `post_content` longtext NOT NULL,\n"
+            b"  `guid` varchar(255) NOT NULL DEFAULT '',\n"
+            b"  PRIMARY KEY (`ID`)\n"
+            b") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;\n"
+        )
+        for first in range(1, profile.rows + 1, rows_per_insert):
+            values = []
+            for row in range(first, min(first + rows_per_insert, profile.rows + 1)):
+                content = _text(rng, block, int(rng.lognormvariate(0, 1.0) * 1500))
+                values.append(
+                    b"(%d,'Article %d','%s','https://www.example.com/?p=%d')"
+                    % (row, row, content, row)
+                )
+            f.write(
+                b"INSERT INTO `wp_posts` (`ID`, `post_title`, `post_content`, `guid`) VALUES "
+                + b",".join(values) + b";\n"
+            )
+        f.write(b"-- Dump completed\n")
+    return path.stat().st_size
+
+
+def install_fake_mysqldump(bin_dir: Path, dump: Path) -> None:
+    """Faux `mysqldump` qui ignore ses options et renvoie le dump généré."""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    script = bin_dir / "mysqldump"
+    script.write_text(f"#!/bin/sh\nexec cat '{dump}'\n")
+    script.chmod(0o755)
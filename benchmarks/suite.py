@@ -0,0 +1,170 @@
+"""Banc d'essai des sauvegardes sur un serveur SSH local.
+
+Génère un site WordPress synthétique et un dump SQL, démarre un serveur SSH
+paramiko en boucle locale (processus séparé), puis mesure
+`FileBackup.backup_to_file` et `DatabaseBackup.backup_to_file` : débit,
+délai du premier octet, pic de RSS et CPU du client. Chaque cas est exécuté
+plusieurs fois ; la médiane est retenue.
+
+Les résultats sont écrits en JSON ; `--compare` les confronte à un fichier
+précédent et sort en erreur si une métrique se dégrade au-delà de la
+tolérance.
+
+Usage :
+  python benchmarks/suite.py --files 5000 --rows 200000 --output bench.json
+  python benchmarks/suite.py --output new.json --compare bench.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+import paramiko
+
+from backup_site.backup.compression import Compression
+from backup_site.backup.database import DatabaseBackup
+from backup_site.backup.files import FileBackup
+from backup_site.backup.transfer import TransferSettings
+
+from loopback import LoopbackSSHServer
+from metrics import Probe, compare, summarize
+from sites import EXCLUDED, SiteProfile, generate_dump, generate_site, install_fake_mysqldump
+
+
+def backup_cases(
+    client: paramiko.SSHClient,
+    site: Path,
+    compression: Compression,
+    settings: TransferSettings,
+) -> Dict[str, Callable[[Path], int]]:
+    """Cas mesurés : nom → fonction sauvegardant vers un chemin et renvoyant sa taille."""
+    files = FileBackup(
+        client, str(site), [], EXCLUDED, compression=compression, transfer=settings
+    )
+    database = DatabaseBackup(
+        client, "localhost", 3306, "wordpress", "bench", "bench",
+        compression=compression, transfer=settings,
+    )
+    return {
+        "files": lambda output: files.backup_to_file(output)[2],
+        "database": lambda output: database.backup_to_file(output)[2],
+    }
+
+
+def main() -> None:
+    defaults = SiteProfile()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=defaults.files)
+    parser.add_argument("--median-kb", type=float, default=defaults.median_kb,
+                        help="Taille médiane des fichiers (loi log-normale)")
+    parser.add_argument("--sigma", type=float, default=defaults.sigma,
+                        help="Dispersion des tailles (écart type du logarithme)")
+    parser.add_argument("--max-mb", type=float, default=defaults.max_mb)
+    parser.add_argument("--uploads-share", type=float, default=defaults.uploads_share,
+                        help="Part de fichiers incompressibles (uploads)")
+    parser.add_argument("--rows", type=int, default=defaults.rows,
+                        help="Lignes du dump SQL")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--compression", default="gzip")
+    parser.add_argument("--buffer-kb", type=int, default=1024)
+    parser.add_argument("--window-mb", type=int, default=None)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--case", action="append", choices=["files", "database"],
+                        help="Cas à mesurer (défaut: tous)")
+    parser.add_argument("--output", type=Path, help="Fichier JSON des résultats")
+    parser.add_argument("--compare", type=Path, help="Résultats de référence (JSON)")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Dégradation tolérée par --compare (0.10 = 10 %%)")
+    args = parser.parse_args()
+
+    profile = SiteProfile(
+        files=args.files, median_kb=args.median_kb, sigma=args.sigma, max_mb=args.max_mb,
+        uploads_share=args.uploads_share, rows=args.rows, seed=args.seed,
+    )
+    compression = Compression.from_name(args.compression)
+    settings = TransferSettings(
+        buffer_size=args.buffer_kb * 1024,
+        window_size=args.window_mb * 1024 * 1024 if args.window_mb else None,
+    )
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = Path(tmpdir)
+        site, bin_dir = workdir / "site", workdir / "bin"
+        started = time.perf_counter()
+        file_count, site_bytes = generate_site(site, profile)
+        dump_bytes = generate_dump(workdir / "dump.sql", profile)
+        install_fake_mysqldump(bin_dir, workdir / "dump.sql")
+        print(
+            f"Site: {file_count} fichiers, {site_bytes / 1024 / 1024:.1f} MB ; "
+            f"dump: {profile.rows} lignes, {dump_bytes / 1024 / 1024:.1f} MB "
+            f"(généré en {time.perf_counter() - started:.1f}s)"
+        )
+
+        results = {}
+        with LoopbackSSHServer(site, path_prefix=bin_dir) as server:
+            client = server.connect()
+            try:
+                cases = backup_cases(client, site, compression, settings)
+                for name in args.case or list(cases):
+                    runs = []
+                    for index in range(args.runs):
+                        output = workdir / f"{name}-{index}{compression.extension}"
+                        with Probe() as probe:
+                            size = cases[name](output)
+                        runs.append(probe.result(size))
+                        output.unlink()
+                    results[name] = summarize(runs)
+                    summary = results[name]
+                    print(
+                        f"{name:<10} {summary['throughput_mb_s']:8.1f} MB/s  "
+                        f"1er octet {summary['first_byte_s'] * 1000:7.1f} ms  "
+                        f"RSS {summary['peak_rss_mb']:6.1f} MB "
+                        f"(+{summary['rss_growth_mb']:.1f})  CPU {summary['cpu_s']:6.2f}s"
+                    )
+            finally:
+                client.close()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "paramiko": paramiko.__version__,
+            "platform": platform.platform(),
+            "profile": profile.to_dict(),
+            "site_bytes": site_bytes,
+            "dump_bytes": dump_bytes,
+            "compression": args.compression,
+            "buffer_kb": args.buffer_kb,
+            "window_mb": args.window_mb,
+            "runs": args.runs,
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Résultats écrits dans {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        reference = baseline.get("meta", {})
+        for key in ("profile", "compression", "buffer_kb", "window_mb"):
+            if reference.get(key) != report["meta"][key]:
+                print(f"Attention : {key} différent de la référence")
+        rows = compare(report, baseline, args.tolerance)
+        for row in rows:
+            flag = "RÉGRESSION" if row["regression"] else ""
+            print(
+                f"{row['case']:<10} {row['metric']:<16} {row['baseline']:10.3f} → "
+                f"{row['current']:10.3f}  {row['change']:+7.1%}  {flag}"
+            )
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Banc d'essai du téléchargement SSH : boucle série vs pipeline.
+
+Compare, sur un serveur SSH (idéalement en boucle locale), la boucle
+historique `read(64 KB) → write` et `download_to_file` avec différentes
+tailles de blocs et de fenêtre SSH.
+
+Usage :
+  python benchmarks/transfer.py --host localhost --user $USER \
+      --key ~/.ssh/id_ed25519 --size-mb 512
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import paramiko
+
+from backup_site.backup.transfer import TransferSettings, download_to_file, exec_command
+from backup_site.utils.ssh import SSHKeyValidator
+
+
+def serial_download(client: paramiko.SSHClient, command: str, output: Path) -> int:
+    """Boucle de lecture/écriture dans un seul thread (comportement historique)."""
+    stdin, stdout, stderr = client.exec_command(command)
+    written = 0
+    with open(output, "wb") as f:
+        while True:
+            chunk = stdout.read(65536)
+            if not chunk:
+                break
+            f.write(chunk)
+            written += len(chunk)
+    stdout.channel.recv_exit_status()
+    return written
+
+
+def pipelined_download(
+    client: paramiko.SSHClient,
+    command: str,
+    output: Path,
+    settings: TransferSettings,
+) -> int:
+    """Téléchargement avec lecteur et écrivain recouverts."""
+    stdin, stdout, stderr = exec_command(client, command, settings)
+    written = download_to_file(stdout, output, settings)
+    stdout.channel.recv_exit_status()
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=22)
+    parser.add_argument("--user", required=True)
+    parser.add_argument("--key", required=True, type=Path)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    client.connect(
+        hostname=args.host,
+        port=args.port,
+        username=args.user,
+        pkey=SSHKeyValidator.load_private_key(args.key),
+    )
+
+    command = f"head -c {args.size_mb * 1024 * 1024} /dev/zero"
+    variants = [
+        ("série 64 KB", lambda out: serial_download(client, command, out)),
+        ("pipeline 1 MB × 8", lambda out: pipelined_download(
+            client, command, out, TransferSettings())),
+        ("pipeline 1 MB × 8, fenêtre 16 MB", lambda out: pipelined_download(
+            client, command, out, TransferSettings(window_size=16 * 1024 * 1024))),
+        ("pipeline 4 MB × 8, fenêtre 64 MB", lambda out: pipelined_download(
+            client, command, out, TransferSettings(
+                buffer_size=4 * 1024 * 1024, window_size=64 * 1024 * 1024))),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output = Path(tmpdir) / "download.bin"
+        for label, run in variants:
+            best = None
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                written = run(output)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{label:<36} {written / best / 1024 / 1024:8.1f} MB/s")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
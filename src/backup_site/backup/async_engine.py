@@ -0,0 +1,258 @@
+"""Moteur asynchrone de sauvegarde : plusieurs canaux SSH sur une boucle asyncio.
+
+Stratégie :
+- Les canaux paramiko exposent un descripteur de scrutation (`fileno()`),
+  signalé dès que des données arrivent : `loop.add_reader()` réveille la
+  coroutine concernée, aucun thread n'est bloqué par flux
+- Lecture non bloquante (`recv` avec délai nul) ; la fenêtre SSH n'est
+  rouverte qu'au fil des lectures, donc un écrivain lent freine le serveur
+- Écriture disque découplée par une file asyncio bornée ; les appels
+  `write()` passent brièvement par le pool de threads de la boucle
+- Annulation et délai par tâche : le canal est fermé et le fichier partiel
+  supprimé
+- stderr n'a pas de descripteur dans paramiko : il est vidé à chaque réveil
+  et périodiquement, pour ne pas bloquer la fenêtre partagée avec stdout
+
+Pas de dépendance supplémentaire (asyncssh) : le Transport paramiko existant
+(et son pool de connexions) est réutilisé.
+
+Flux :
+  Transport.open_session() → exec_command → add_reader(fileno)
+      → recv → asyncio.Queue → to_thread(write) → fichier
+"""
+
+import asyncio
+import logging
+import socket
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+import paramiko
+from paramiko.ssh_exception import SSHException
+
+from .integrity import split_checksum
+from .transfer import DEFAULT_TRANSFER, TransferSettings, throttle
+
+logger = logging.getLogger(__name__)
+
+# Intervalle de vidage de stderr quand stdout reste muet
+STDERR_POLL_INTERVAL = 0.5
+
+
+class AsyncChannel:
+    """Commande distante lue de façon asynchrone."""
+
+    def __init__(self, channel: paramiko.Channel, label: str = "La commande"):
+        """Enveloppe un canal dont la commande est déjà lancée.
+
+        Args:
+            channel: Canal paramiko (exec_command déjà appelé)
+            label: Libellé utilisé dans les messages d'erreur
+        """
+        self.channel = channel
+        self.label = label
+        self.channel.settimeout(0.0)
+        self._fd = channel.fileno()
+        self._stderr = bytearray()
+
+    @classmethod
+    async def open(
+        cls,
+        ssh_client: paramiko.SSHClient,
+        command: str,
+        settings: Optional[TransferSettings] = None,
+        label: str = "La commande",
+    ) -> "AsyncChannel":
+        """Ouvre un canal et lance la commande.
+
+        L'ouverture attend la réponse du serveur : elle passe par le pool de
+        threads pour ne pas bloquer la boucle.
+        """
+        settings = settings or DEFAULT_TRANSFER
+
+        def open_channel() -> paramiko.Channel:
+            channel = ssh_client.get_transport().open_session(
+                window_size=settings.window_size,
+                max_packet_size=settings.max_packet_size,
+            )
+            channel.exec_command(settings.prioritize(command))
+            return channel
+
+        logger.debug(f"Exécution de la commande: {command}")
+        return cls(await asyncio.to_thread(open_channel), label)
+
+    def _drain_stderr(self) -> None:
+        while self.channel.recv_stderr_ready():
+            self._stderr += self.channel.recv_stderr(65536)
+
+    async def _wait_readable(self) -> None:
+        """Attend que stdout ait des données (ou soit fermé)."""
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.channel.recv_ready() or self.channel.eof_received or self.channel.closed:
+                return
+            ready = loop.create_future()
+            loop.add_reader(self._fd, lambda: ready.done() or ready.set_result(None))
+            try:
+                await asyncio.wait_for(asyncio.shield(ready), STDERR_POLL_INTERVAL)
+                return
+            except asyncio.TimeoutError:
+                self._drain_stderr()
+            finally:
+                loop.remove_reader(self._fd)
+                ready.cancel()
+
+    async def read(self, size: int) -> bytes:
+        """Lit au plus `size` octets ; renvoie b"" en fin de flux."""
+        while True:
+            await self._wait_readable()
+            self._drain_stderr()
+            try:
+                return self.channel.recv(size)
+            except socket.timeout:
+                # Réveil sans données (course avec un autre lecteur du tampon)
+                continue
+
+    async def wait(self) -> int:
+        """Attend la fin de la commande et renvoie son code de sortie."""
+        while not self.channel.exit_status_ready():
+            self._drain_stderr()
+            await asyncio.sleep(0.02)
+        self._drain_stderr()
+        return self.channel.recv_exit_status()
+
+    @property
+    def stderr_output(self) -> str:
+        return self._stderr.decode("utf-8", errors="ignore").strip()
+
+    def close(self) -> None:
+        self.channel.close()
+
+
+async def download_to_file_async(
+    ssh_client: paramiko.SSHClient,
+    command: str,
+    output_path: Path,
+    settings: Optional[TransferSettings] = None,
+    label: str = "La commande",
+    timeout: Optional[float] = None,
+    ignored_warnings: Tuple[str, ...] = (),
+    hasher: Optional[Any] = None,
+) -> int:
+    """Exécute une commande distante et écrit sa sortie dans un fichier.
+
+    Avec `hasher`, la commande doit être enveloppée par
+    `integrity.with_remote_checksum` : l'empreinte du flux reçu est comparée
+    à celle calculée par le serveur avant de rendre la main.
+
+    Args:
+        ssh_client: Client SSH connecté (Transport partageable)
+        command: Commande shell produisant le flux
+        output_path: Fichier local de destination
+        settings: Taille des blocs, profondeur de file, fenêtre SSH
+        label: Libellé utilisé dans les messages d'erreur
+        timeout: Durée maximale en secondes (None = illimitée)
+        ignored_warnings: Messages stderr à ne pas journaliser
+        hasher: Objet de hachage (interface hashlib) mis à jour au fil de
+            l'écriture, sans relecture du fichier
+
+    Returns:
+        Nombre d'octets écrits
+
+    Raises:
+        SSHException: Si la commande distante échoue
+        IOError: Si l'empreinte distante manque ou diffère
+        asyncio.TimeoutError: Si le délai est dépassé
+        asyncio.CancelledError: Si la tâche est annulée
+    """
+    settings = settings or DEFAULT_TRANSFER
+    channel = await AsyncChannel.open(ssh_client, command, settings, label)
+
+    async def transfer() -> int:
+        chunks: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=max(settings.queue_depth, 1))
+
+        async def write_loop(f) -> int:
+            written = 0
+            while True:
+                chunk = await chunks.get()
+                if not chunk:
+                    return written
+                write = asyncio.ensure_future(asyncio.to_thread(f.write, chunk))
+                try:
+                    await asyncio.shield(write)
+                except asyncio.CancelledError:
+                    # Le thread écrit encore : f ne doit pas être fermé avant
+                    await asyncio.wait({write})
+                    raise
+                if hasher is not None:
+                    hasher.update(chunk)
+                written += len(chunk)
+
+        async def put(chunk: bytes) -> None:
+            # Une erreur d'écriture arrête la lecture au lieu de la bloquer
+            # sur une file que plus personne ne vide
+            if writer.done():
+                writer.result()
+            try:
+                chunks.put_nowait(chunk)
+                return
+            except asyncio.QueueFull:
+                pass
+            pending = asyncio.ensure_future(chunks.put(chunk))
+            await asyncio.wait({pending, writer}, return_when=asyncio.FIRST_COMPLETED)
+            if not pending.done():
+                pending.cancel()
+                writer.result()
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, "wb") as f:
+            writer = asyncio.create_task(write_loop(f))
+            try:
+                with throttle(settings, ssh_client.get_transport()) as bucket:
+                    while True:
+                        if bucket is None:
+                            chunk = await channel.read(settings.buffer_size)
+                        else:
+                            chunk = await channel.read(bucket.read_size(settings.buffer_size))
+                            delay = bucket.reserve(len(chunk))
+                            if delay > 0:
+                                await asyncio.sleep(delay)
+                        # Bloque quand la file est pleine : contre-pression
+                        await put(chunk)
+                        if not chunk:
+                            break
+                bytes_written = await writer
+            finally:
+                if not writer.done():
+                    writer.cancel()
+                    await asyncio.gather(writer, return_exceptions=True)
+
+        exit_status = await channel.wait()
+        remote_digest, stderr_output = split_checksum(channel.stderr_output)
+        if stderr_output and not any(
+            warning in stderr_output for warning in ignored_warnings
+        ):
+            logger.warning(f"Avertissements SSH: {stderr_output}")
+        if exit_status != 0:
+            raise SSHException(
+                f"{label} a échoué avec le code {exit_status}. "
+                f"Erreur: {stderr_output}"
+            )
+        if hasher is not None:
+            if remote_digest is None:
+                raise IOError(f"Empreinte distante absente pour {output_path.name}")
+            if remote_digest != hasher.hexdigest():
+                raise IOError(
+                    f"Empreinte différente pour {output_path.name} "
+                    f"(serveur {remote_digest}, reçu {hasher.hexdigest()})"
+                )
+        return bytes_written
+
+    try:
+        return await asyncio.wait_for(transfer(), timeout)
+    except BaseException:
+        # Erreur, délai dépassé ou annulation : on coupe le canal et on ne
+        # laisse pas d'archive tronquée
+        channel.close()
+        output_path.unlink(missing_ok=True)
+        raise
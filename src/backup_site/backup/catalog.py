@@ -0,0 +1,275 @@
+"""Module de catalogue local des sauvegardes (SQLite).
+
+Stratégie :
+- Une base SQLite `catalog.sqlite3` à la racine du dossier de destination
+  enregistre chaque sauvegarde réussie : site, type, chemin, taille, durée,
+  empreinte et code de sortie distant
+- Les chemins sont stockés relativement à la racine : le dossier de
+  sauvegardes peut être déplacé sans invalider le catalogue
+- Un index (site, type, date) répond à « dernière sauvegarde BDD du site X
+  avant la date Y » sans parcourir ni `stat` le dossier
+- Mode WAL et une connexion par opération : les tâches simultanées de
+  l'orchestrateur écrivent sans se bloquer mutuellement
+- Les sauvegardes antérieures au catalogue (ou copiées à la main) sont
+  importées depuis l'index de rétention (`import_index`)
+
+Exemple :
+  catalog = BackupCatalog.open(Path("backups"))
+  file_backup = FileBackup(..., catalog=catalog.for_site("blog"))
+  catalog.latest("blog", "database", before=datetime(2024, 6, 1))
+"""
+
+import json
+import logging
+import sqlite3
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from .integrity import manifest_path
+
+logger = logging.getLogger(__name__)
+
+CATALOG_NAME = "catalog.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS backups (
+    id INTEGER PRIMARY KEY,
+    site TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    duration REAL,
+    algorithm TEXT,
+    checksum TEXT,
+    exit_status INTEGER,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS backups_lookup ON backups (site, kind, created_at);
+CREATE INDEX IF NOT EXISTS backups_created ON backups (created_at);
+"""
+
+_COLUMNS = "id, site, kind, path, size, duration, algorithm, checksum, exit_status, created_at"
+
+
+@dataclass
+class CatalogEntry:
+    """Sauvegarde enregistrée dans le catalogue."""
+
+    id: int
+    site: str
+    kind: str
+    path: Path
+    size: int
+    duration: Optional[float]
+    algorithm: Optional[str]
+    checksum: Optional[str]
+    exit_status: Optional[int]
+    created_at: datetime
+
+
+class BackupCatalog:
+    """Catalogue SQLite des sauvegardes d'un dossier de destination."""
+
+    def __init__(self, root: Path):
+        """Ouvre (et crée si besoin) le catalogue de `root`.
+
+        Args:
+            root: Dossier de destination des sauvegardes
+        """
+        self.root = root.resolve()
+        self.path = self.root / CATALOG_NAME
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    @classmethod
+    def open(cls, root: Path) -> "BackupCatalog":
+        return cls(root)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connexion courte, validée à la sortie du bloc."""
+        with closing(sqlite3.connect(self.path, timeout=30)) as connection:
+            with connection:
+                yield connection
+
+    def _relative(self, path: Path) -> str:
+        path = path.resolve()
+        try:
+            return str(path.relative_to(self.root))
+        except ValueError:
+            return str(path)
+
+    def _entry(self, row: tuple) -> CatalogEntry:
+        entry = CatalogEntry(*row)
+        entry.path = self.root / entry.path
+        entry.created_at = datetime.fromisoformat(row[-1])
+        return entry
+
+    def for_site(self, site: str) -> "SiteCatalog":
+        """Enregistreur lié à un site, à passer aux classes de sauvegarde."""
+        return SiteCatalog(self, site)
+
+    def record(
+        self,
+        site: str,
+        kind: str,
+        path: Path,
+        size: int,
+        duration: Optional[float] = None,
+        exit_status: Optional[int] = 0,
+        created_at: Optional[datetime] = None,
+        algorithm: Optional[str] = None,
+        checksum: Optional[str] = None,
+    ) -> int:
+        """Enregistre (ou remplace) une sauvegarde.
+
+        Sans empreinte fournie, celle du manifeste `{archive}.checksum.json`
+        est reprise s'il existe.
+
+        Returns:
+            Identifiant de la sauvegarde dans le catalogue
+        """
+        if checksum is None:
+            try:
+                manifest = json.loads(manifest_path(path).read_text())
+                algorithm, checksum = manifest["algorithm"], manifest["digest"]
+            except (OSError, ValueError, KeyError):
+                pass
+
+        created_at = created_at or datetime.now()
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "INSERT OR REPLACE INTO backups "
+                "(site, kind, path, size, duration, algorithm, checksum, exit_status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    site, kind, self._relative(path), size, duration,
+                    algorithm, checksum, exit_status, created_at.isoformat(),
+                ),
+            )
+            return cursor.lastrowid
+
+    def find(
+        self,
+        site: Optional[str] = None,
+        kind: Optional[str] = None,
+        before: Optional[datetime] = None,
+        after: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> List[CatalogEntry]:
+        """Recherche des sauvegardes, les plus récentes en premier."""
+        clauses, params = [], []
+        for column, operator, value in (
+            ("site", "=", site),
+            ("kind", "=", kind),
+            ("created_at", "<", before.isoformat() if before else None),
+            ("created_at", ">=", after.isoformat() if after else None),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {operator} ?")
+                params.append(value)
+
+        query = f"SELECT {_COLUMNS} FROM backups"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created_at DESC, id DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._connect() as connection:
+            return [self._entry(row) for row in connection.execute(query, params)]
+
+    def latest(
+        self,
+        site: str,
+        kind: str,
+        before: Optional[datetime] = None,
+    ) -> Optional[CatalogEntry]:
+        """Dernière sauvegarde d'un site et d'un type, avant une date."""
+        entries = self.find(site=site, kind=kind, before=before, limit=1)
+        return entries[0] if entries else None
+
+    def get(self, reference: str) -> Optional[CatalogEntry]:
+        """Retrouve une sauvegarde par identifiant ou par chemin."""
+        with self._connect() as connection:
+            if reference.isdigit():
+                row = connection.execute(
+                    f"SELECT {_COLUMNS} FROM backups WHERE id = ?", (int(reference),)
+                ).fetchone()
+            else:
+                row = connection.execute(
+                    f"SELECT {_COLUMNS} FROM backups WHERE path = ?",
+                    (self._relative(Path(reference)),),
+                ).fetchone()
+        return self._entry(row) if row else None
+
+    def remove(self, paths: Iterable[Path]) -> int:
+        """Retire du catalogue les sauvegardes supprimées.
+
+        Returns:
+            Nombre d'entrées retirées
+        """
+        values = [(self._relative(path),) for path in paths]
+        with self._connect() as connection:
+            before = connection.total_changes
+            connection.executemany("DELETE FROM backups WHERE path = ?", values)
+            return connection.total_changes - before
+
+    def import_index(self, index, default_site: str = "-") -> int:
+        """Ajoute les sauvegardes d'un `BackupIndex` absentes du catalogue.
+
+        Le site vaut le nom du sous-dossier (orchestrateur) ou `default_site`
+        pour les sauvegardes à la racine.
+
+        Returns:
+            Nombre de sauvegardes ajoutées
+        """
+        added = 0
+        with self._connect() as connection:
+            known = {row[0] for row in connection.execute("SELECT path FROM backups")}
+        for entry in index.entries:
+            if entry.in_progress:
+                continue
+            # L'archive principale est le chemin le plus court du groupe
+            path = min(entry.paths, key=lambda p: len(p.name))
+            if self._relative(path) in known:
+                continue
+            self.record(
+                site=entry.site or default_site,
+                kind=entry.kind,
+                path=path,
+                size=entry.size,
+                duration=None,
+                exit_status=None,
+                created_at=entry.timestamp,
+            )
+            added += 1
+        return added
+
+
+class SiteCatalog:
+    """Enregistreur du catalogue lié à un site."""
+
+    def __init__(self, catalog: BackupCatalog, site: str):
+        self.catalog = catalog
+        self.site = site
+
+    def record(
+        self,
+        kind: str,
+        path: Path,
+        size: int,
+        duration: Optional[float] = None,
+        exit_status: Optional[int] = 0,
+    ) -> None:
+        """Enregistre une sauvegarde réussie ; une erreur SQLite est seulement journalisée."""
+        try:
+            self.catalog.record(self.site, kind, path, size, duration, exit_status)
+        except sqlite3.Error as e:
+            logger.warning(f"Catalogue non mis à jour pour {path.name}: {e}")
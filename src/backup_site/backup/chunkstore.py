@@ -0,0 +1,466 @@
+"""Dépôt dédupliqué par découpage en blocs définis par le contenu.
+
+Stratégie :
+- Le flux de sauvegarde (tar ou dump SQL non compressé) est découpé en blocs
+  dont les frontières dépendent du contenu (hash roulant « gear », à la FastCDC)
+- Chaque bloc est identifié par son sha256 et stocké une seule fois (zlib)
+- Un snapshot est un manifeste JSON listant ses blocs dans l'ordre
+
+Une modification locale du flux ne déplace que les frontières voisines : les
+blocs inchangés sont réutilisés et l'espace disque croît avec le volume de
+changements, pas avec le nombre de snapshots.
+
+Structure :
+  repository/
+    config.json              paramètres du découpage
+    index                    journal des blocs connus (hash taille_stockée taille)
+    chunks/ab/abcdef...      blocs compressés
+    snapshots/<id>.json      manifestes des snapshots
+"""
+
+import hashlib
+import json
+import logging
+import os
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+REPOSITORY_VERSION = 1
+
+# Table du hash « gear » : 256 entiers 32 bits dérivés de manière déterministe,
+# pour que deux dépôts découpent un même flux de la même façon.
+GEAR_TABLE = tuple(
+    int.from_bytes(hashlib.sha256(bytes([i])).digest()[:4], "little")
+    for i in range(256)
+)
+
+# Octets 0 et 1 de chaque entrée de la table (`bytes.translate`, filtres)
+_GEAR_BYTE0 = bytes(value & 0xFF for value in GEAR_TABLE)
+_GEAR_BYTE1 = tuple((value >> 8) & 0xFF for value in GEAR_TABLE)
+
+# Le hash ne dépend que des 32 derniers octets (décalage de 1 bit par octet)
+GEAR_SPAN = 32
+# Somme des 8 derniers termes, un mot de 16 bits (+1 bit de décalage) par
+# position : aucune retenue ne déborde d'un mot sur l'autre
+_FILTER_KERNEL = sum(1 << (j * 17) for j in range(8))
+_FILTER_OVERFLOW = (17 * 8 + 16) // 8
+BOUNDARY_WINDOW = 256 * 1024
+
+
+def _gear_hash(data: bytes, start: int, index: int) -> int:
+    """Hash gear en `index`, remis à zéro en `start`."""
+    h = 0
+    for byte in data[max(start, index - GEAR_SPAN + 1):index + 1]:
+        h = ((h << 1) + GEAR_TABLE[byte]) & 0xFFFFFFFF
+    return h
+
+
+def find_boundary(data: bytes, start: int, end: int, mask: int) -> Optional[int]:
+    """Cherche la première frontière du hash gear dans `data[start:end]`.
+
+    Équivaut à faire rouler le hash octet par octet depuis `start`, sans
+    boucle Python par octet. Avec g0/g1 les octets 0 et 1 des entrées de la
+    table et A(i) la somme des `g0[data[i - j]] << j` pour j < 8, les 16 bits
+    de poids faible du hash valent `A(i) + 256 * (A(i - 8) + B(i))` (modulo
+    2**16), B(i) étant la même somme sur g1. A est calculé pour toute une
+    fenêtre par une seule multiplication d'entiers (un mot de 16 bits par
+    position) et filtre l'octet de poids faible ; les positions retenues
+    (1/256 au plus) sont filtrées sur 16 bits, puis vérifiées avec le hash
+    complet.
+
+    Args:
+        data: Données (bytes ou bytearray)
+        start: Début du hachage
+        end: Fin (exclue) de la recherche
+        mask: Masque de frontière (`h & mask == 0`), sur 32 bits au plus
+
+    Returns:
+        Position de l'octet terminant le premier bloc, ou None
+    """
+    low_mask = mask & 0xFFFF
+    byte_table = bytes(1 if value & low_mask & 0xFF else 0 for value in range(256))
+    pos = start
+    while pos < end:
+        stop = min(pos + BOUNDARY_WINDOW, end)
+        context = min(pos - start, 15)
+        base = pos - context
+        window = data[base:stop]
+        count = len(window)
+
+        words = bytearray(2 * count)
+        words[0::2] = window.translate(_GEAR_BYTE0)
+        sums = (int.from_bytes(words, "little") * _FILTER_KERNEL).to_bytes(
+            2 * count + _FILTER_OVERFLOW, "little"
+        )
+
+        candidates = sums[2 * context:2 * count:2].translate(byte_table)
+        offset = candidates.find(0)
+        while offset >= 0:
+            index = pos + offset
+            local = index - base
+            low = int.from_bytes(sums[2 * local:2 * local + 2], "little")
+            if local >= 8:
+                low += int.from_bytes(sums[2 * local - 16:2 * local - 14], "little") << 8
+            recent = data[max(start, index - 7):index + 1]
+            for shift, byte in enumerate(reversed(recent), 8):
+                low += _GEAR_BYTE1[byte] << shift
+            if not low & low_mask and not _gear_hash(data, start, index) & mask:
+                return index
+            offset = candidates.find(0, offset + 1)
+        pos = stop
+    return None
+
+
+def iter_chunks(
+    reader: BinaryIO,
+    min_size: int = 256 * 1024,
+    avg_size: int = 1024 * 1024,
+    max_size: int = 4 * 1024 * 1024,
+) -> Iterator[bytes]:
+    """Découpe un flux en blocs définis par le contenu.
+
+    Les `min_size` premiers octets de chaque bloc ne sont pas hachés (aucune
+    frontière possible), ce qui réduit d'autant le coût du hash roulant. Les
+    frontières sont calculées en bloc (`find_boundary`).
+
+    Args:
+        reader: Flux binaire lisible (fichier, ChannelFile Paramiko...)
+        min_size: Taille minimale d'un bloc
+        avg_size: Taille moyenne visée (puissance de 2)
+        max_size: Taille maximale d'un bloc
+
+    Yields:
+        Blocs successifs du flux
+    """
+    mask = (1 << max(avg_size.bit_length() - 1, 1)) - 1
+    buffer = bytearray()
+    eof = False
+
+    while True:
+        while not eof and len(buffer) < max_size:
+            data = reader.read(max_size)
+            if not data:
+                eof = True
+                break
+            buffer += data
+
+        if not buffer:
+            return
+
+        # Après remplissage, le buffer contient au moins max_size octets,
+        # sauf en fin de flux : une coupe à `limit` est donc toujours valide.
+        limit = min(len(buffer), max_size)
+        cut = limit
+        if limit > min_size:
+            boundary = find_boundary(buffer, min_size, limit, mask)
+            if boundary is not None:
+                cut = boundary + 1
+
+        yield bytes(buffer[:cut])
+        del buffer[:cut]
+
+
+@dataclass
+class Snapshot:
+    """Manifeste d'un snapshot du dépôt."""
+
+    id: str
+    name: str
+    kind: str
+    created_at: str
+    size: int
+    chunks: List[str] = field(default_factory=list)
+    metadata: Dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        """Sérialise le snapshot en dictionnaire JSON."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "kind": self.kind,
+            "created_at": self.created_at,
+            "size": self.size,
+            "chunks": self.chunks,
+            "metadata": self.metadata,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Snapshot":
+        """Construit un snapshot depuis un dictionnaire JSON."""
+        return cls(
+            id=data["id"],
+            name=data["name"],
+            kind=data["kind"],
+            created_at=data["created_at"],
+            size=int(data["size"]),
+            chunks=list(data.get("chunks", [])),
+            metadata=dict(data.get("metadata", {})),
+        )
+
+
+class ChunkRepository:
+    """Dépôt local de snapshots dédupliqués."""
+
+    def __init__(self, path: Path):
+        """Initialise le dépôt.
+
+        Args:
+            path: Dossier du dépôt (créé au premier `init`)
+        """
+        self.path = path
+        self.chunks_dir = path / "chunks"
+        self.snapshots_dir = path / "snapshots"
+        self.index_path = path / "index"
+        self.config_path = path / "config.json"
+        self._index: Optional[Dict[str, Tuple[int, int]]] = None
+        self.config = {
+            "version": REPOSITORY_VERSION,
+            "min_size": 256 * 1024,
+            "avg_size": 1024 * 1024,
+            "max_size": 4 * 1024 * 1024,
+            "compression_level": 6,
+        }
+
+    @classmethod
+    def open(cls, path: Path, create: bool = False) -> "ChunkRepository":
+        """Ouvre un dépôt existant (ou le crée si demandé).
+
+        Raises:
+            FileNotFoundError: Si le dépôt n'existe pas et create=False
+        """
+        repository = cls(path)
+        if repository.config_path.exists():
+            with open(repository.config_path, "r", encoding="utf-8") as f:
+                repository.config.update(json.load(f))
+        elif create:
+            repository.init()
+        else:
+            raise FileNotFoundError(f"Le dépôt {path} n'existe pas")
+        return repository
+
+    def init(self) -> None:
+        """Crée la structure du dépôt."""
+        self.chunks_dir.mkdir(parents=True, exist_ok=True)
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path.touch(exist_ok=True)
+        self._write_atomic(self.config_path, json.dumps(self.config).encode("utf-8"))
+        logger.info(f"Dépôt initialisé: {self.path}")
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        """Écrit un fichier de manière atomique (écriture + renommage)."""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    @property
+    def index(self) -> Dict[str, Tuple[int, int]]:
+        """Index des blocs connus : hash -> (taille stockée, taille brute)."""
+        if self._index is None:
+            self._index = {}
+            if self.index_path.exists():
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        parts = line.split()
+                        if len(parts) == 3:
+                            self._index[parts[0]] = (int(parts[1]), int(parts[2]))
+        return self._index
+
+    def _chunk_path(self, digest: str) -> Path:
+        """Retourne le chemin de stockage d'un bloc."""
+        return self.chunks_dir / digest[:2] / digest
+
+    def add_stream(
+        self,
+        reader: BinaryIO,
+        name: str,
+        kind: str,
+        metadata: Optional[Dict[str, str]] = None,
+    ) -> Tuple[Snapshot, int, int]:
+        """Ajoute un flux au dépôt sous forme de snapshot.
+
+        Args:
+            reader: Flux binaire à stocker
+            name: Nom du snapshot (ex: nom du site)
+            kind: Type de sauvegarde (files, database...)
+            metadata: Métadonnées libres enregistrées dans le manifeste
+
+        Returns:
+            Tuple (snapshot, nouveaux_blocs, octets_stockés)
+        """
+        level = int(self.config["compression_level"])
+        index = self.index
+        chunks: List[str] = []
+        size = 0
+        new_chunks = 0
+        stored_bytes = 0
+
+        with open(self.index_path, "a", encoding="utf-8") as index_file:
+            for chunk in iter_chunks(
+                reader,
+                min_size=int(self.config["min_size"]),
+                avg_size=int(self.config["avg_size"]),
+                max_size=int(self.config["max_size"]),
+            ):
+                digest = hashlib.sha256(chunk).hexdigest()
+                chunks.append(digest)
+                size += len(chunk)
+
+                if digest in index:
+                    continue
+
+                compressed = zlib.compress(chunk, level)
+                chunk_path = self._chunk_path(digest)
+                chunk_path.parent.mkdir(exist_ok=True)
+                self._write_atomic(chunk_path, compressed)
+
+                index[digest] = (len(compressed), len(chunk))
+                index_file.write(f"{digest} {len(compressed)} {len(chunk)}\n")
+                new_chunks += 1
+                stored_bytes += len(compressed)
+
+        created_at = datetime.now()
+        snapshot_hash = hashlib.sha256("".join(chunks).encode("ascii")).hexdigest()[:8]
+        snapshot = Snapshot(
+            id=f"{created_at.strftime('%Y%m%d_%H%M%S')}_{snapshot_hash}",
+            name=name,
+            kind=kind,
+            created_at=created_at.isoformat(timespec="microseconds"),
+            size=size,
+            chunks=chunks,
+            metadata=metadata or {},
+        )
+        self._write_atomic(
+            self.snapshots_dir / f"{snapshot.id}.json",
+            json.dumps(snapshot.to_dict()).encode("utf-8"),
+        )
+
+        logger.info(
+            f"Snapshot {snapshot.id} créé ({len(chunks)} blocs, "
+            f"{new_chunks} nouveaux, {stored_bytes} octets stockés)"
+        )
+        return snapshot, new_chunks, stored_bytes
+
+    def list_snapshots(
+        self,
+        name: Optional[str] = None,
+        kind: Optional[str] = None,
+    ) -> List[Snapshot]:
+        """Liste les snapshots du dépôt, du plus ancien au plus récent.
+
+        Args:
+            name: Filtre sur le nom du snapshot
+            kind: Filtre sur le type de sauvegarde
+        """
+        snapshots = []
+        for path in sorted(self.snapshots_dir.glob("*.json")):
+            with open(path, "r", encoding="utf-8") as f:
+                snapshot = Snapshot.from_dict(json.load(f))
+            if name and snapshot.name != name:
+                continue
+            if kind and snapshot.kind != kind:
+                continue
+            snapshots.append(snapshot)
+        # L'identifiant n'est précis qu'à la seconde : tri sur la date complète
+        snapshots.sort(key=lambda snapshot: snapshot.created_at)
+        return snapshots
+
+    def get_snapshot(self, snapshot_id: str) -> Snapshot:
+        """Charge un snapshot par identifiant.
+
+        Raises:
+            FileNotFoundError: Si le snapshot n'existe pas
+        """
+        path = self.snapshots_dir / f"{snapshot_id}.json"
+        if not path.exists():
+            raise FileNotFoundError(f"Le snapshot {snapshot_id} n'existe pas")
+        with open(path, "r", encoding="utf-8") as f:
+            return Snapshot.from_dict(json.load(f))
+
+    def restore(self, snapshot_id: str, writer: BinaryIO) -> int:
+        """Reconstitue le flux d'un snapshot.
+
+        Args:
+            snapshot_id: Identifiant du snapshot
+            writer: Flux binaire de sortie
+
+        Returns:
+            Nombre d'octets écrits
+
+        Raises:
+            FileNotFoundError: Si le snapshot ou un bloc est manquant
+            ValueError: Si un bloc est corrompu
+        """
+        snapshot = self.get_snapshot(snapshot_id)
+        bytes_written = 0
+
+        for digest in snapshot.chunks:
+            chunk_path = self._chunk_path(digest)
+            if not chunk_path.exists():
+                raise FileNotFoundError(f"Bloc manquant dans le dépôt: {digest}")
+            chunk = zlib.decompress(chunk_path.read_bytes())
+            if hashlib.sha256(chunk).hexdigest() != digest:
+                raise ValueError(f"Bloc corrompu dans le dépôt: {digest}")
+            writer.write(chunk)
+            bytes_written += len(chunk)
+
+        return bytes_written
+
+    def forget(self, snapshot_id: str) -> None:
+        """Supprime le manifeste d'un snapshot (les blocs restent jusqu'au gc).
+
+        Raises:
+            FileNotFoundError: Si le snapshot n'existe pas
+        """
+        path = self.snapshots_dir / f"{snapshot_id}.json"
+        if not path.exists():
+            raise FileNotFoundError(f"Le snapshot {snapshot_id} n'existe pas")
+        path.unlink()
+        logger.info(f"Snapshot {snapshot_id} oublié")
+
+    def gc(self, dry_run: bool = False) -> Tuple[int, int]:
+        """Supprime les blocs qui ne sont plus référencés par aucun snapshot.
+
+        Args:
+            dry_run: Calcule seulement ce qui serait supprimé
+
+        Returns:
+            Tuple (blocs_supprimés, octets_libérés)
+        """
+        referenced = set()
+        for snapshot in self.list_snapshots():
+            referenced.update(snapshot.chunks)
+
+        index = self.index
+        unreferenced = [digest for digest in index if digest not in referenced]
+        freed = sum(index[digest][0] for digest in unreferenced)
+
+        if dry_run:
+            return len(unreferenced), freed
+
+        for digest in unreferenced:
+            self._chunk_path(digest).unlink(missing_ok=True)
+            del index[digest]
+
+        lines = "".join(
+            f"{digest} {stored} {raw}\n" for digest, (stored, raw) in index.items()
+        )
+        self._write_atomic(self.index_path, lines.encode("utf-8"))
+
+        logger.info(f"GC: {len(unreferenced)} blocs supprimés ({freed} octets)")
+        return len(unreferenced), freed
+
+    def stats(self) -> Tuple[int, int, int]:
+        """Retourne (nombre_de_blocs, octets_stockés, octets_bruts)."""
+        index = self.index
+        return (
+            len(index),
+            sum(stored for stored, _ in index.values()),
+            sum(raw for _, raw in index.values()),
+        )
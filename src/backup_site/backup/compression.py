@@ -0,0 +1,494 @@
+"""Module de gestion des algorithmes de compression (codecs).
+
+Stratégie :
+- Traduit `BackupConfig.compression` (+ niveau et threads) en commande distante
+- Utilise les options natives de tar (-z, -j, -J) quand c'est possible, pour
+  éviter un processus supplémentaire dans le pipeline
+- Sonde le serveur (`command -v`) et se replie sur un codec disponible
+  (pigz → gzip, pzstd → zstd → gzip, ...)
+- Associe une extension à chaque codec pour que les chargeurs Docker
+  choisissent le bon décompresseur
+
+Exemples :
+  gzip            find ... | tar -czf - -T -
+  zstd niveau 3   find ... | tar -cf - -T - | zstd -q -c -3 -T4
+  mysqldump ... | pigz -p 8
+"""
+
+import bz2
+import gzip
+import io
+import logging
+import lzma
+import subprocess
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterable, List, Optional, Set
+
+import paramiko
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Codec:
+    """Description d'un algorithme de compression."""
+
+    name: str
+    binary: Optional[str]
+    extension: str
+    tar_flag: Optional[str] = None
+    threads_option: Optional[str] = None
+    # Le codec comprend 0 thread comme « autant que de cœurs » (xz -T0, zstd -T0)
+    auto_threads: bool = False
+    max_level: int = 9
+    decompress_command: str = "cat"
+    fallback: Optional[str] = None
+
+    def compress_command(
+        self,
+        level: Optional[int] = None,
+        threads: Optional[int] = None
+    ) -> str:
+        """Construit la commande de compression (lit stdin, écrit stdout).
+
+        Args:
+            level: Niveau de compression (borné au maximum du codec)
+            threads: Nombre de threads (ignoré si le codec n'est pas parallèle ;
+                0 = automatique, option omise pour pigz et pzstd qui la refusent)
+
+        Returns:
+            Commande shell, vide pour le codec `none`
+        """
+        if self.binary is None:
+            return ""
+
+        cmd = self.binary
+        if self.name in ("zstd", "pzstd"):
+            cmd += " -q -c"
+        if level is not None:
+            cmd += f" -{max(1, min(level, self.max_level))}"
+        if threads is not None and self.threads_option and (threads > 0 or self.auto_threads):
+            cmd += f" {self.threads_option}{threads}"
+        return cmd
+
+    def compress_local(self, data: bytes) -> bytes:
+        """Compresse localement un petit bloc de données.
+
+        Utilisé pour produire sans aller-retour SSH des archives vides au bon
+        format. zstd n'étant pas dans la bibliothèque standard, une trame
+        zstd « raw » (non compressée, toujours valide) est écrite.
+        """
+        if self.extension == ".gz":
+            return gzip.compress(data)
+        if self.extension == ".bz2":
+            return bz2.compress(data)
+        if self.extension == ".xz":
+            return lzma.compress(data)
+        if self.extension == ".zst":
+            return _zstd_raw_frame(data)
+        return data
+
+
+def _zstd_raw_frame(data: bytes) -> bytes:
+    """Encode des données dans une trame zstd composée de blocs « raw »."""
+    block_max = 128 * 1024
+    # Descripteur : taille de contenu sur 8 octets, pas de single segment
+    frame = bytearray(b"\x28\xb5\x2f\xfd")
+    frame.append(0xC0)
+    # Window descriptor : fenêtre de 128 KB (exposant 17 - 10)
+    frame.append((17 - 10) << 3)
+    frame += len(data).to_bytes(8, "little")
+
+    blocks = [data[i:i + block_max] for i in range(0, len(data), block_max)] or [b""]
+    for index, block in enumerate(blocks):
+        last = 1 if index == len(blocks) - 1 else 0
+        header = (len(block) << 3) | last
+        frame += header.to_bytes(3, "little")
+        frame += block
+    return bytes(frame)
+
+
+CODECS = {
+    "gzip": Codec(
+        name="gzip", binary="gzip", extension=".gz", tar_flag="z",
+        decompress_command="gzip -dc",
+    ),
+    "pigz": Codec(
+        name="pigz", binary="pigz", extension=".gz", threads_option="-p ",
+        decompress_command="gzip -dc", fallback="gzip",
+    ),
+    "bzip2": Codec(
+        name="bzip2", binary="bzip2", extension=".bz2", tar_flag="j",
+        decompress_command="bzip2 -dc", fallback="gzip",
+    ),
+    "xz": Codec(
+        name="xz", binary="xz", extension=".xz", tar_flag="J", threads_option="-T",
+        auto_threads=True, decompress_command="xz -dc", fallback="gzip",
+    ),
+    "zstd": Codec(
+        name="zstd", binary="zstd", extension=".zst", threads_option="-T",
+        auto_threads=True, max_level=19, decompress_command="zstd -dc", fallback="gzip",
+    ),
+    "pzstd": Codec(
+        name="pzstd", binary="pzstd", extension=".zst", threads_option="-p ",
+        max_level=19, decompress_command="zstd -dc", fallback="zstd",
+    ),
+    "none": Codec(name="none", binary=None, extension=""),
+}
+
+
+class Compression:
+    """Codec configuré (niveau, threads) prêt à être inséré dans un pipeline."""
+
+    def __init__(
+        self,
+        codec: Codec,
+        level: Optional[int] = None,
+        threads: Optional[int] = None,
+    ):
+        """Initialise la configuration de compression.
+
+        Args:
+            codec: Codec à utiliser
+            level: Niveau de compression (défaut du codec si None)
+            threads: Nombre de threads pour les codecs parallèles
+        """
+        self.codec = codec
+        self.level = level
+        self.threads = threads
+
+    @classmethod
+    def from_name(
+        cls,
+        name: str,
+        level: Optional[int] = None,
+        threads: Optional[int] = None,
+    ) -> "Compression":
+        """Construit une configuration depuis le nom du codec.
+
+        Raises:
+            ValueError: Si le codec est inconnu
+        """
+        if name not in CODECS:
+            raise ValueError(
+                f"Compression inconnue: {name} (valeurs possibles: {', '.join(CODECS)})"
+            )
+        return cls(CODECS[name], level=level, threads=threads)
+
+    @property
+    def extension(self) -> str:
+        """Extension des fichiers produits (ex: `.gz`)."""
+        return self.codec.extension
+
+    def pipe_command(self) -> str:
+        """Commande de compression à placer après un pipe (vide si `none`)."""
+        return self.codec.compress_command(self.level, self.threads)
+
+    def tar_create_command(self) -> str:
+        """Commande tar lisant la liste des fichiers sur stdin.
+
+        L'option native de tar est utilisée tant qu'aucun niveau ni nombre de
+        threads n'est demandé : un processus de moins dans le pipeline.
+        """
+        if self.codec.binary is None:
+            return "tar -cf - -T -"
+        if self.codec.tar_flag and self.level is None and self.threads is None:
+            return f"tar -c{self.codec.tar_flag}f - -T -"
+        return f"tar -cf - -T - | {self.pipe_command()}"
+
+
+DEFAULT_COMPRESSION = Compression(CODECS["gzip"])
+
+
+def probe_binaries(ssh_client: paramiko.SSHClient, binaries: Iterable[str]) -> Set[str]:
+    """Détecte les binaires disponibles sur le serveur distant.
+
+    Args:
+        ssh_client: Client SSH Paramiko connecté
+        binaries: Noms des binaires à tester
+
+    Returns:
+        Ensemble des binaires trouvés dans le PATH distant
+    """
+    names = " ".join(sorted(set(binaries)))
+    command = f"for b in {names}; do command -v $b >/dev/null 2>&1 && echo $b; done"
+    stdin, stdout, stderr = ssh_client.exec_command(command)
+    output = stdout.read().decode("utf-8", errors="ignore")
+    stdout.channel.recv_exit_status()
+    return {line.strip() for line in output.splitlines() if line.strip()}
+
+
+def resolve_compression(
+    ssh_client: paramiko.SSHClient,
+    name: str,
+    level: Optional[int] = None,
+    threads: Optional[int] = None,
+) -> Compression:
+    """Choisit le codec demandé ou, à défaut, le premier repli disponible.
+
+    Args:
+        ssh_client: Client SSH Paramiko connecté
+        name: Codec demandé (BackupConfig.compression)
+        level: Niveau de compression
+        threads: Nombre de threads
+
+    Returns:
+        Compression utilisable sur le serveur distant
+
+    Raises:
+        ValueError: Si le codec est inconnu
+    """
+    requested = Compression.from_name(name, level, threads).codec
+
+    chain = []
+    codec: Optional[Codec] = requested
+    while codec is not None:
+        chain.append(codec)
+        codec = CODECS[codec.fallback] if codec.fallback else None
+
+    binaries = [codec.binary for codec in chain if codec.binary]
+    if not binaries:
+        return Compression(requested, level, threads)
+
+    available = probe_binaries(ssh_client, binaries)
+    for codec in chain:
+        if codec.binary is None or codec.binary in available:
+            if codec is not requested:
+                logger.warning(
+                    f"Compression {requested.name} indisponible sur le serveur, "
+                    f"repli sur {codec.name}"
+                )
+            return Compression(codec, level, threads)
+
+    logger.warning(f"Aucun compresseur disponible pour {name}, compression désactivée")
+    return Compression(CODECS["none"])
+
+
+def codec_for_path(path: Path) -> Codec:
+    """Détermine le codec d'un fichier de sauvegarde d'après son extension.
+
+    Args:
+        path: Chemin de l'archive ou du dump
+
+    Returns:
+        Codec correspondant (`none` si l'extension n'est pas reconnue)
+    """
+    suffix = path.suffix.lower()
+    for name in ("gzip", "bzip2", "xz", "zstd"):
+        if CODECS[name].extension == suffix:
+            return CODECS[name]
+    return CODECS["none"]
+
+
+def open_decompressed(path: Path) -> BinaryIO:
+    """Ouvre localement un fichier de sauvegarde en lecture décompressée.
+
+    gzip, bzip2 et xz sont lus via la bibliothèque standard ; zstd passe par
+    le binaire `zstd` local.
+
+    Args:
+        path: Chemin du fichier compressé (ou non)
+
+    Returns:
+        Flux binaire lisible des données décompressées
+
+    Raises:
+        RuntimeError: Si le binaire zstd est introuvable
+        IOError: À la fermeture, si zstd a échoué (archive corrompue ou
+            tronquée)
+    """
+    extension = codec_for_path(path).extension
+    if extension == ".gz":
+        return gzip.open(path, "rb")
+    if extension == ".bz2":
+        return bz2.open(path, "rb")
+    if extension == ".xz":
+        return lzma.open(path, "rb")
+    if extension == ".zst":
+        return io.BufferedReader(_ProcessReader(["zstd", "-q", "-dc", str(path)], path.name))
+    return open(path, "rb")
+
+
+def decompress_stream(reader: BinaryIO, codec: Codec) -> BinaryIO:
+    """Décompresse un flux au fil de sa lecture (pendant d'`open_decompressed`).
+
+    Sert à traiter la sortie compressée d'une commande distante sans la
+    stocker d'abord dans un fichier local.
+
+    Args:
+        reader: Flux compressé (ex: stdout d'une commande SSH)
+        codec: Codec du flux
+
+    Returns:
+        Flux binaire lisible des données décompressées
+
+    Raises:
+        RuntimeError: Si le binaire zstd est introuvable
+        IOError: À la fermeture, si zstd a échoué
+    """
+    if codec.extension == ".gz":
+        return gzip.GzipFile(fileobj=reader, mode="rb")
+    if codec.extension == ".bz2":
+        return bz2.BZ2File(reader, "rb")
+    if codec.extension == ".xz":
+        return lzma.LZMAFile(reader, "rb")
+    if codec.extension == ".zst":
+        return io.BufferedReader(_ProcessReader(["zstd", "-q", "-dc"], "flux zstd", reader))
+    return reader
+
+
+class _ProcessReader(io.RawIOBase):
+    """Flux de lecture de la sortie d'un décompresseur externe.
+
+    Le code de sortie est vérifié à la fermeture quand le flux a été lu
+    jusqu'au bout : sans cela, une archive tronquée se lirait comme une fin
+    de flux normale. Un lecteur qui s'arrête juste avant la fin (bourrage
+    d'une archive tar) est complété ; fermé plus tôt, le processus est arrêté.
+    Avec `source`, l'entrée du processus est alimentée par un thread.
+    """
+
+    # Reste lu à la fermeture pour atteindre la fin du flux
+    DRAIN_LIMIT = 64 * 1024
+    FEED_SIZE = 256 * 1024
+
+    def __init__(self, command: List[str], label: str, source: Optional[BinaryIO] = None):
+        super().__init__()
+        try:
+            self._process = subprocess.Popen(
+                command,
+                stdin=subprocess.DEVNULL if source is None else subprocess.PIPE,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            )
+        except FileNotFoundError:
+            raise RuntimeError(f"Le binaire {command[0]} est requis pour lire {label}")
+        self._name = command[0]
+        self._label = label
+        self._eof = False
+        self._feed_error: Optional[BaseException] = None
+        self._feeder: Optional[threading.Thread] = None
+        if source is not None:
+            self._feeder = threading.Thread(target=self._feed, args=(source,), daemon=True)
+            self._feeder.start()
+
+    def _feed(self, source: BinaryIO) -> None:
+        try:
+            while True:
+                chunk = source.read(self.FEED_SIZE)
+                if not chunk:
+                    break
+                self._process.stdin.write(chunk)
+        except BrokenPipeError:
+            # Processus arrêté (lecteur fermé avant la fin)
+            pass
+        except BaseException as e:
+            self._feed_error = e
+        finally:
+            try:
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = self._process.stdout.readinto(buffer)
+        if not count:
+            self._eof = True
+        return count
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        super().close()
+        if not self._eof:
+            tail = self._process.stdout.read(self.DRAIN_LIMIT + 1)
+            if len(tail) <= self.DRAIN_LIMIT:
+                self._eof = True
+            else:
+                self._process.kill()
+        self._process.stdout.close()
+        error = self._process.stderr.read().decode("utf-8", errors="ignore").strip()
+        self._process.stderr.close()
+        returncode = self._process.wait()
+        if not self._eof:
+            return
+        if self._feeder is not None:
+            self._feeder.join()
+            if self._feed_error is not None:
+                # L'erreur de lecture de la source explique un flux incomplet
+                raise self._feed_error
+        if returncode != 0:
+            raise IOError(
+                f"{self._name} a échoué avec le code {returncode} "
+                f"({self._label}): {error}"
+            )
+
+
+class _ProcessWriter:
+    """Flux d'écriture vers un compresseur externe qui écrit dans un fichier."""
+
+    def __init__(self, command: List[str], path: Path):
+        self._file = open(path, "wb")
+        try:
+            self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=self._file)
+        except FileNotFoundError:
+            self._file.close()
+            raise RuntimeError(f"Le binaire {command[0]} est requis pour écrire {path.name}")
+        self._name = command[0]
+
+    def write(self, data: bytes) -> int:
+        return self._process.stdin.write(data)
+
+    def close(self) -> None:
+        try:
+            self._process.stdin.close()
+            returncode = self._process.wait()
+        finally:
+            self._file.close()
+        if returncode != 0:
+            raise IOError(f"{self._name} a échoué avec le code {returncode}")
+
+    def __enter__(self) -> "_ProcessWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_compressed(path: Path, compression: Compression) -> BinaryIO:
+    """Ouvre localement un fichier en écriture compressée (pendant d'`open_decompressed`).
+
+    Le niveau est celui de la configuration ; zstd passe par le binaire
+    `zstd` local (avec ses threads).
+
+    Args:
+        path: Chemin du fichier à écrire (extension du codec)
+        compression: Codec, niveau et threads
+
+    Returns:
+        Flux binaire dans lequel écrire les données à compresser
+
+    Raises:
+        RuntimeError: Si le binaire zstd est introuvable
+    """
+    codec = compression.codec
+    level = compression.level
+    if level is not None:
+        level = max(1, min(level, codec.max_level))
+    if codec.extension == ".gz":
+        return gzip.open(path, "wb", compresslevel=level or 6)
+    if codec.extension == ".bz2":
+        return bz2.open(path, "wb", compresslevel=level or 9)
+    if codec.extension == ".xz":
+        return lzma.open(path, "wb", preset=6 if level is None else level)
+    if codec.extension == ".zst":
+        command = ["zstd", "-q", "-c"]
+        if level is not None:
+            command.append(f"-{level}")
+        if compression.threads is not None:
+            command.append(f"-T{compression.threads}")
+        return _ProcessWriter(command, path)
+    return open(path, "wb")
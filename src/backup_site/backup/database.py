@@ -3,21 +3,35 @@
 Stratégie :
 - Utilise mysqldump pour exporter la base de données
 - Exécution via SSH tunnel (localhost:3306)
-- Compression gzip optionnelle
+- Compression optionnelle (gzip par défaut, codec configurable)
 - Compatible avec MySQL et MariaDB
 
 Flux :
   SSH → mysqldump -h localhost -u user -p db | gzip > database.sql.gz
 """
 
+import asyncio
 import io
 import logging
+import shlex
+import time
+from dataclasses import replace
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 import paramiko
 from paramiko.ssh_exception import SSHException
 
+from .async_engine import download_to_file_async
+from .catalog import SiteCatalog
+from .chunkstore import ChunkRepository
+from .compression import CODECS, DEFAULT_COMPRESSION, Codec, Compression
+from .estimate import DatabaseEstimate
+from .integrity import get_algorithm, record_checksum, split_checksum, with_remote_checksum
+from .resumable import DEFAULT_STAGING_DIR, ResumableDownload
+from .stream import RemoteStream
+from .transfer import DEFAULT_TRANSFER, TransferSettings, download_to_file, exec_command
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,6 +48,9 @@ class DatabaseBackup:
         db_password: str,
         compress: bool = True,
         ssl_enabled: bool = False,
+        compression: Optional[Compression] = None,
+        transfer: Optional[TransferSettings] = None,
+        catalog: Optional[SiteCatalog] = None,
     ):
         """Initialise le gestionnaire de sauvegarde de BDD.
         
@@ -46,6 +63,9 @@ class DatabaseBackup:
             db_password: Mot de passe de la base de données
             compress: Compresser le dump avec gzip (défaut: True)
             ssl_enabled: Utiliser SSL pour la connexion MySQL (défaut: False)
+            compression: Codec utilisé si compress=True (défaut: gzip)
+            transfer: Réglages du téléchargement (blocs, file, fenêtre SSH)
+            catalog: Catalogue du site, mis à jour après chaque sauvegarde réussie
         """
         self.ssh_client = ssh_client
         self.db_host = db_host
@@ -55,12 +75,93 @@ class DatabaseBackup:
         self.db_password = db_password
         self.compress = compress
         self.ssl_enabled = ssl_enabled
+        self.compression = compression or DEFAULT_COMPRESSION
+        self.transfer = transfer or DEFAULT_TRANSFER
+        self.catalog = catalog
+    
+    @property
+    def codec(self) -> Codec:
+        """Codec du dump produit (`none` si la compression est désactivée)."""
+        return self.compression.codec if self.compress else CODECS["none"]
+    
+    def _connection_args(self) -> str:
+        """Options de connexion communes à mysql et mysqldump."""
+        args = (
+            f"-h {self.db_host} -P {self.db_port} "
+            f"-u {self.db_user} -p{self.db_password}"
+        )
+        if not self.ssl_enabled:
+            args += " --ssl=0"
+        return args
+    
+    @staticmethod
+    def _sql_string(value: str) -> str:
+        """Littéral de chaîne SQL (guillemets et barres obliques échappés).
+        
+        Args:
+            value: Valeur à insérer dans une requête (ex: nom de base)
+        
+        Returns:
+            Littéral entre apostrophes
+        """
+        return "'" + value.replace("\\", "\\\\").replace("'", "''") + "'"
     
-    def _build_mysqldump_command(self) -> str:
+    def _run_query(self, sql: str) -> List[List[str]]:
+        """Exécute une requête SQL distante en mode batch.
+        
+        Args:
+            sql: Requête SQL
+        
+        Returns:
+            Lignes de résultat (colonnes séparées par tabulation)
+        
+        Raises:
+            SSHException: Si la requête échoue
+        """
+        command = f"mysql {self._connection_args()} -N -B -e {shlex.quote(sql)}"
+        logger.debug(f"Requête distante: {sql}")
+        stdin, stdout, stderr = self.ssh_client.exec_command(command)
+        output = stdout.read().decode("utf-8", errors="replace")
+        stderr_output = stderr.read().decode("utf-8", errors="ignore").strip()
+        
+        exit_status = stdout.channel.recv_exit_status()
+        if exit_status != 0:
+            raise SSHException(
+                f"La requête mysql a échoué avec le code {exit_status}. "
+                f"Erreur: {stderr_output}"
+            )
+        
+        return [line.split("\t") for line in output.splitlines() if line]
+
+    def estimate(self) -> DatabaseEstimate:
+        """Estime la taille du dump d'après information_schema, sans l'exporter.
+
+        Les tailles sont celles des statistiques InnoDB (approximatives,
+        comme le nombre de lignes) ; aucune table n'est parcourue.
+
+        Returns:
+            Estimation par table, triée de la plus volumineuse à la plus petite
+
+        Raises:
+            SSHException: Si la requête échoue
+        """
+        rows = self._run_query(
+            "SELECT TABLE_NAME, COALESCE(TABLE_ROWS, 0), "
+            "COALESCE(DATA_LENGTH, 0), COALESCE(INDEX_LENGTH, 0) "
+            "FROM information_schema.TABLES "
+            f"WHERE TABLE_SCHEMA = {self._sql_string(self.db_name)} AND TABLE_TYPE = 'BASE TABLE'"
+        )
+        return DatabaseEstimate.from_rows(rows)
+
+    def _build_mysqldump_command(self, compress: Optional[bool] = None) -> str:
         """Construit la commande mysqldump.
         
+        Args:
+            compress: Force (ou désactive) la compression ; par défaut
+                `self.compress`
+        
         Returns:
-            Commande mysqldump complète avec pipe gzip optionnel
+            Commande mysqldump complète avec pipe de compression optionnel
         """
         # Commande mysqldump de base
         cmd = (
@@ -82,53 +183,59 @@ class DatabaseBackup:
         # Ajoute le nom de la base
         cmd += self.db_name
         
-        # Pipe vers gzip si compression activée
-        if self.compress:
-            cmd += " | gzip"
+        # Pipe vers le compresseur si compression activée
+        if compress is None:
+            compress = self.compress
+        compress_cmd = self.compression.pipe_command()
+        if compress and compress_cmd:
+            cmd += f" | {compress_cmd}"
         
         return cmd
     
     def backup_to_file(
         self,
         output_path: Path,
-        buffer_size: int = 65536
+        buffer_size: Optional[int] = None,
+        checksum: Optional[str] = None,
     ) -> Tuple[bool, str, int]:
         """Sauvegarde la base de données dans un fichier.
         
         Args:
             output_path: Chemin local où sauvegarder le dump
-            buffer_size: Taille du buffer pour la lecture du flux (défaut: 64KB)
+            buffer_size: Taille des blocs lus (défaut: réglages de transfert, 1 MB)
+            checksum: Algorithme d'empreinte (sha256, xxh3) calculé des deux
+                côtés pendant le transfert ; écrit `{dump}.checksum.json`
             
         Returns:
             Tuple (succès, message, taille_en_bytes)
             
         Raises:
             SSHException: Si la commande SSH échoue
-            IOError: Si l'écriture du fichier échoue
+            IOError: Si l'écriture du fichier échoue ou si les empreintes diffèrent
         """
+        started = time.monotonic()
         try:
             # Construit la commande mysqldump
             mysqldump_command = self._build_mysqldump_command()
+            algorithm = get_algorithm(checksum) if checksum else None
+            if algorithm:
+                mysqldump_command = with_remote_checksum(mysqldump_command, algorithm)
             logger.debug(f"Exécution de la commande: {mysqldump_command}")
             
             # Exécute la commande SSH
-            stdin, stdout, stderr = self.ssh_client.exec_command(mysqldump_command)
+            settings = self.transfer
+            if buffer_size is not None:
+                settings = replace(settings, buffer_size=buffer_size)
+            stdin, stdout, stderr = exec_command(self.ssh_client, mysqldump_command, settings)
             
-            # Crée le répertoire de destination s'il n'existe pas
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Écrit le flux dans le fichier local
-            bytes_written = 0
-            with open(output_path, 'wb') as f:
-                while True:
-                    chunk = stdout.read(buffer_size)
-                    if not chunk:
-                        break
-                    f.write(chunk)
-                    bytes_written += len(chunk)
+            # Écrit le flux dans le fichier local (lecture réseau et écriture
+            # disque recouvertes), haché au passage
+            hasher = algorithm.new() if algorithm else None
+            bytes_written = download_to_file(stdout, output_path, settings, hasher=hasher)
             
             # Vérifie s'il y a eu des erreurs
             stderr_output = stderr.read().decode('utf-8', errors='ignore').strip()
+            remote_digest, stderr_output = split_checksum(stderr_output)
             if stderr_output:
                 # Filtre les avertissements non critiques
                 if "Deprecated program name" not in stderr_output:
@@ -146,6 +253,11 @@ class DatabaseBackup:
             if not output_path.exists():
                 raise IOError(f"Le fichier {output_path} n'a pas été créé")
             
+            if algorithm:
+                record_checksum(
+                    output_path, algorithm, hasher.hexdigest(), bytes_written, remote_digest
+                )
+            
             message = (
                 f"✓ Sauvegarde de la base de données réussie\n"
                 f"  Fichier: {output_path.name}\n"
@@ -153,6 +265,11 @@ class DatabaseBackup:
             )
             logger.info(message)
             
+            if self.catalog:
+                self.catalog.record(
+                    "database", output_path, bytes_written, time.monotonic() - started, exit_status
+                )
+            
             return True, message, bytes_written
             
         except SSHException as e:
@@ -164,47 +281,224 @@ class DatabaseBackup:
             logger.error(error_msg)
             raise
     
-    def backup_to_stream(self) -> io.BytesIO:
-        """Sauvegarde la base de données dans un flux BytesIO.
+    async def backup_to_file_async(
+        self,
+        output_path: Path,
+        buffer_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        checksum: Optional[str] = None,
+    ) -> Tuple[bool, str, int]:
+        """Sauvegarde la base de données dans un fichier, sans bloquer de thread.
+
+        Équivalent asynchrone de `backup_to_file` : plusieurs sauvegardes
+        peuvent partager une même boucle asyncio (voir `async_engine`).
+
+        Args:
+            output_path: Chemin local où sauvegarder le dump
+            buffer_size: Taille des blocs lus (défaut: réglages de transfert, 1 MB)
+            timeout: Durée maximale en secondes ; au-delà le canal est fermé
+                et le fichier partiel supprimé
+            checksum: Algorithme d'empreinte (sha256, xxh3) calculé des deux
+                côtés pendant le transfert ; écrit `{dump}.checksum.json`
+
+        Returns:
+            Tuple (succès, message, taille_en_bytes)
+
+        Raises:
+            SSHException: Si la commande SSH échoue
+            asyncio.TimeoutError: Si le délai est dépassé
+            IOError: Si les empreintes diffèrent
+        """
+        started = time.monotonic()
+        try:
+            settings = self.transfer
+            if buffer_size is not None:
+                settings = replace(settings, buffer_size=buffer_size)
+            command = self._build_mysqldump_command()
+            algorithm = get_algorithm(checksum) if checksum else None
+            if algorithm:
+                command = with_remote_checksum(command, algorithm)
+            hasher = algorithm.new() if algorithm else None
+            bytes_written = await download_to_file_async(
+                self.ssh_client,
+                command,
+                output_path,
+                settings,
+                label="La commande mysqldump",
+                timeout=timeout,
+                ignored_warnings=("Deprecated program name",),
+                hasher=hasher,
+            )
+            if algorithm:
+                # Empreintes déjà comparées par le moteur
+                digest = hasher.hexdigest()
+                record_checksum(output_path, algorithm, digest, bytes_written, digest)
+
+            message = (
+                f"✓ Sauvegarde de la base de données réussie\n"
+                f"  Fichier: {output_path.name}\n"
+                f"  Taille: {bytes_written / 1024:.2f} KB"
+            )
+            logger.info(message)
+
+            if self.catalog:
+                self.catalog.record(
+                    "database", output_path, bytes_written, time.monotonic() - started, 0
+                )
+            
+            return True, message, bytes_written
+
+        except SSHException as e:
+            logger.error(f"Erreur SSH lors de la sauvegarde BDD: {str(e)}")
+            raise
+        except asyncio.TimeoutError:
+            logger.error(f"Délai de {timeout}s dépassé pour {output_path.name}")
+            raise
+
+    def backup_resumable(
+        self,
+        output_path: Path,
+        staging_dir: str = DEFAULT_STAGING_DIR,
+    ) -> Tuple[bool, str, int]:
+        """Sauvegarde la base de données dans un fichier, avec reprise après interruption.
+
+        Le serveur produit d'abord le dump dans `staging_dir`, puis le client le
+        récupère par plages via SFTP (voir `resumable.py`). Relancer la même
+        sauvegarde vers le même `output_path` reprend au dernier offset vérifié.
+
+        Args:
+            output_path: Chemin local où sauvegarder le dump
+            staging_dir: Dossier distant des fichiers temporaires
+
+        Returns:
+            Tuple (succès, message, taille_en_bytes)
+
+        Raises:
+            SSHException: Si la commande SSH échoue
+            IOError: Si le fichier reçu ne correspond pas au fichier distant
+        """
+        started = time.monotonic()
+        download = ResumableDownload(
+            self.ssh_client,
+            self.transfer.prioritize(self._build_mysqldump_command()),
+            output_path,
+            staging_dir=staging_dir,
+            label="La commande mysqldump",
+        )
+        try:
+            size, resumed = download.run()
+        except (SSHException, IOError) as e:
+            logger.error(f"Erreur lors de la sauvegarde reprenable: {str(e)}")
+            raise
+
+        message = (
+            f"✓ Sauvegarde de la base de données réussie{' (reprise)' if resumed else ''}\n"
+            f"  Fichier: {output_path.name}\n"
+            f"  Taille: {size / 1024:.2f} KB"
+        )
+        logger.info(message)
+        if self.catalog:
+            self.catalog.record(
+                "database", output_path, size, time.monotonic() - started, 0
+            )
         
-        Utile pour les tests ou pour traiter les données en mémoire.
+        return True, message, size
+
+    def backup_to_repository(
+        self,
+        repository: ChunkRepository,
+        name: str,
+    ) -> Tuple[bool, str, int]:
+        """Sauvegarde la base de données dans un dépôt dédupliqué.
         
+        Le dump est transféré non compressé : les INSERT des tables qui n'ont
+        pas changé produisent les mêmes blocs d'un snapshot à l'autre.
+        
+        Args:
+            repository: Dépôt dédupliqué de destination
+            name: Nom du snapshot (ex: nom du site)
+            
         Returns:
-            BytesIO contenant le dump SQL (compressé si activé)
+            Tuple (succès, message, taille_du_snapshot)
             
         Raises:
             SSHException: Si la commande SSH échoue
         """
         try:
-            # Construit la commande mysqldump
-            mysqldump_command = self._build_mysqldump_command()
-            logger.debug(f"Exécution de la commande: {mysqldump_command}")
+            stream = RemoteStream(
+                self.ssh_client,
+                self._build_mysqldump_command(compress=False),
+                "La commande mysqldump",
+                ignored_warnings=("Deprecated program name",),
+                settings=self.transfer,
+            )
+            try:
+                snapshot, new_chunks, stored_bytes = repository.add_stream(
+                    stream, name=name, kind="database",
+                    metadata={"database": self.db_name},
+                )
+            except BaseException:
+                stream.abort()
+                raise
             
-            # Exécute la commande SSH
-            stdin, stdout, stderr = self.ssh_client.exec_command(mysqldump_command)
+            if stream.wait() != 0:
+                # Snapshot incomplet : on l'oublie, ses blocs partiront au gc
+                repository.forget(snapshot.id)
+            stream.close()
             
-            # Lit le flux dans un BytesIO
-            stream = io.BytesIO()
-            buffer_size = 65536
-            while True:
-                chunk = stdout.read(buffer_size)
-                if not chunk:
-                    break
-                stream.write(chunk)
+            message = (
+                f"✓ Sauvegarde de la base de données réussie (dépôt dédupliqué)\n"
+                f"  Snapshot: {snapshot.id}\n"
+                f"  Taille: {snapshot.size / 1024:.2f} KB\n"
+                f"  Nouveaux blocs: {new_chunks} / {len(snapshot.chunks)}\n"
+                f"  Stocké: {stored_bytes / 1024:.2f} KB"
+            )
+            logger.info(message)
             
-            # Vérifie s'il y a eu des erreurs
-            stderr_output = stderr.read().decode('utf-8', errors='ignore').strip()
-            if stderr_output:
-                if "Deprecated program name" not in stderr_output:
-                    logger.warning(f"Avertissements mysqldump: {stderr_output}")
+            return True, message, snapshot.size
             
-            # Vérifie le code de sortie
-            exit_status = stdout.channel.recv_exit_status()
-            if exit_status != 0:
-                raise SSHException(
-                    f"La commande mysqldump a échoué avec le code {exit_status}. "
-                    f"Erreur: {stderr_output}"
-                )
+        except SSHException as e:
+            error_msg = f"Erreur SSH lors de la sauvegarde BDD vers le dépôt: {str(e)}"
+            logger.error(error_msg)
+            raise
+    
+    def open_stream(self) -> RemoteStream:
+        """Lance mysqldump et renvoie le flux du dump, sans le stocker.
+        
+        Le flux se lit par blocs (`read`, `iter_chunks`, itération) en mémoire
+        constante ; le code de sortie de mysqldump et stderr sont vérifiés à la
+        fermeture (`close()` ou fin du bloc `with`), qui lève SSHException en
+        cas d'échec.
+        
+        Returns:
+            Flux du dump (compressé si `compress`)
+        """
+        return RemoteStream(
+            self.ssh_client,
+            self._build_mysqldump_command(),
+            "La commande mysqldump",
+            ignored_warnings=("Deprecated program name",),
+            settings=self.transfer,
+        )
+    
+    def backup_to_stream(self) -> io.BytesIO:
+        """Sauvegarde la base de données dans un flux BytesIO.
+        
+        Utile pour les tests ou pour de petites bases : tout le dump est gardé
+        en mémoire. Pour un traitement en mémoire constante, utiliser
+        `open_stream()`.
+        
+        Returns:
+            BytesIO contenant le dump SQL (compressé si activé)
+            
+        Raises:
+            SSHException: Si la commande SSH échoue
+        """
+        try:
+            stream = io.BytesIO()
+            with self.open_stream() as remote:
+                for chunk in remote.iter_chunks():
+                    stream.write(chunk)
             
             # Réinitialise la position du stream
             stream.seek(0)
@@ -0,0 +1,142 @@
+"""Module d'estimation de la taille d'une sauvegarde avant son lancement.
+
+Stratégie :
+- Fichiers : la même énumération find que la sauvegarde (motifs compilés par
+  `patterns.py`), suivie de `stat -c '%s %n'` et d'une agrégation awk sur le
+  serveur ; seuls le total et un cumul par dossier (sur `depth` niveaux)
+  reviennent par SSH, jamais la liste des fichiers
+- Base de données : tailles des données et des index lues dans
+  `information_schema.TABLES`, sans parcourir les tables ; le dump SQL est du
+  même ordre que les données (les index ne sont pas exportés, seulement leur
+  définition)
+
+`stat -c` et awk sont disponibles avec GNU coreutils comme avec BusyBox,
+contrairement à `find -printf` et `du --files0-from`.
+
+Flux :
+  find . [motifs] -exec stat -c '%s %n' {} + | awk (total, cumul par dossier)
+  → TOTAL <fichiers> <octets> / DIR <fichiers> <octets> <dossier>
+"""
+
+from dataclasses import dataclass, field
+from typing import List
+
+# Cumul par dossier tronqué à `depth` niveaux ; les tailles passent en %.0f
+# pour dépasser 2 Go avec les awk dont %d est limité à 32 bits
+_AGGREGATE_AWK = (
+    "'{ size = $1; path = $0; sub(/^[0-9]+ (\\.\\/)?/, \"\", path); "
+    "n = split(path, parts, \"/\"); dir = \".\"; "
+    "for (i = 1; i < n && i <= depth; i++) dir = (i == 1 ? parts[i] : dir \"/\" parts[i]); "
+    "files++; total += size; bytes[dir] += size; count[dir]++ } "
+    "END { printf \"TOTAL %d %.0f\\n\", files, total; "
+    "for (d in bytes) printf \"DIR %d %.0f %s\\n\", count[d], bytes[d], d }'"
+)
+
+
+def file_estimate_command(find_command: str, depth: int = 2) -> str:
+    """Commande distante agrégeant tailles et nombre des fichiers retenus.
+
+    Args:
+        find_command: Commande find de la sauvegarde (avec le `cd` initial)
+        depth: Niveaux de dossiers conservés dans le cumul
+    """
+    return (
+        f"{find_command} -exec stat -c '%s %n' {{}} + | "
+        f"awk -v depth={max(depth, 1)} {_AGGREGATE_AWK}"
+    )
+
+
+@dataclass
+class DirectoryUsage:
+    """Cumul des fichiers retenus sous un dossier."""
+
+    path: str
+    files: int
+    bytes: int
+
+
+@dataclass
+class FileEstimate:
+    """Estimation d'une sauvegarde de fichiers (avant compression)."""
+
+    files: int = 0
+    bytes: int = 0
+    directories: List[DirectoryUsage] = field(default_factory=list)
+
+    @classmethod
+    def parse(cls, output: str, top: int = 10) -> "FileEstimate":
+        """Lit la sortie de `file_estimate_command`.
+
+        Args:
+            output: Lignes TOTAL / DIR produites par awk
+            top: Nombre de dossiers les plus volumineux conservés
+        """
+        estimate = cls()
+        for line in output.splitlines():
+            kind, _, rest = line.partition(" ")
+            try:
+                if kind == "TOTAL":
+                    files, size = rest.split()
+                    estimate.files, estimate.bytes = int(files), int(float(size))
+                elif kind == "DIR":
+                    files, size, path = rest.split(" ", 2)
+                    estimate.directories.append(
+                        DirectoryUsage(path, int(files), int(float(size)))
+                    )
+            except ValueError:
+                continue
+        estimate.directories.sort(key=lambda d: d.bytes, reverse=True)
+        del estimate.directories[top:]
+        return estimate
+
+
+@dataclass
+class TableUsage:
+    """Taille d'une table d'après information_schema."""
+
+    name: str
+    rows: int
+    data_bytes: int
+    index_bytes: int
+
+    @property
+    def bytes(self) -> int:
+        return self.data_bytes + self.index_bytes
+
+
+@dataclass
+class DatabaseEstimate:
+    """Estimation d'un dump de base de données (avant compression)."""
+
+    tables: List[TableUsage] = field(default_factory=list)
+
+    @classmethod
+    def from_rows(cls, rows: List[List[str]]) -> "DatabaseEstimate":
+        """Construit l'estimation depuis les lignes (nom, lignes, données, index)."""
+        tables = []
+        for row in rows:
+            if len(row) != 4:
+                continue
+            try:
+                tables.append(TableUsage(row[0], int(row[1]), int(row[2]), int(row[3])))
+            except ValueError:
+                continue
+        tables.sort(key=lambda table: table.bytes, reverse=True)
+        return cls(tables)
+
+    @property
+    def rows(self) -> int:
+        return sum(table.rows for table in self.tables)
+
+    @property
+    def data_bytes(self) -> int:
+        """Volume des données, ordre de grandeur du dump SQL."""
+        return sum(table.data_bytes for table in self.tables)
+
+    @property
+    def index_bytes(self) -> int:
+        return sum(table.index_bytes for table in self.tables)
+
+    def largest(self, top: int = 10) -> List[TableUsage]:
+        """Tables les plus volumineuses."""
+        return self.tables[:top]
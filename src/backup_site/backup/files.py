@@ -1,34 +1,108 @@
 """Module de sauvegarde des fichiers via SSH avec compression côté serveur.
 
 Stratégie de compression :
-- Utilise `find` pour filtrer les fichiers selon les patterns d'inclusion/exclusion
-- Pipe vers `tar -czf - -T -` pour archiver et compresser
+- Utilise `find` pour filtrer les fichiers selon les patterns d'inclusion/exclusion,
+  compilés par `patterns.py` (sémantique .gitignore, dossiers exclus élagués
+  par `-prune`)
+- Pipe vers `tar -czf - -T -` pour archiver et compresser (codec configurable,
+  voir `compression.py` : gzip, pigz, bzip2, xz, zstd, pzstd, none)
 - Compatible avec GNU tar et BusyBox tar (contrairement à --include/--exclude)
 
 Avantages :
 1. Compression côté serveur : réduit la bande passante réseau
 2. Compatible avec tous les systèmes (GNU tar, BusyBox tar, etc.)
-3. Patterns flexibles via find (! -path, -path, etc.)
+3. Patterns flexibles via find (-prune, -name, -path ancrés)
 4. Pas de script serveur requis, utilise les outils natifs
 
 Flux :
   find . -type f [patterns] | tar -czf - -T - > archive.tar.gz
   
 Exemple :
-  find . -type f ! -path '*cache*' ! -path '*.log' -path '*wp-content*' | tar -czf - -T -
+  find . ! \\( -type d -path './*' \\( -path ./wp-content/cache -o -name node_modules \\) -prune \\) \\
+    -type f ! -name '*.log' \\( -path './wp-content/*' -o -path ./wp-config.php \\) \\
+    | tar -czf - -T -
+
+La durée de l'énumération find est mesurée côté serveur et rapportée à part
+du temps d'archivage.
+
+Mode incrémental :
+  find . -type f [patterns] -exec stat -c '%s %Y %n' {} +   → manifeste distant
+  diff avec le manifeste précédent                         → liste des changements
+  liste envoyée sur stdin | tar -czf - -T -                → archive incrémentale
+
+Mode parallèle (shards) :
+  le manifeste distant est réparti en N lots de tailles équilibrées, chaque lot
+  est archivé par son propre `tar` sur un canal SSH distinct du même Transport
+  → N archives backup_XXX.part01.tar.gz ... backup_XXX.partNN.tar.gz
 """
 
+import asyncio
+import heapq
 import io
 import logging
+import tarfile
+import threading
+import time
+from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import paramiko
 from paramiko.ssh_exception import SSHException
 
+from .async_engine import download_to_file_async
+from .catalog import SiteCatalog
+from .chunkstore import ChunkRepository
+from .compression import DEFAULT_COMPRESSION, Compression
+from .incremental import (
+    FileManifest,
+    ManifestEntry,
+    diff_manifests,
+    parse_sha256_output,
+    parse_stat_output,
+)
+from .estimate import FileEstimate, file_estimate_command
+from .integrity import (
+    get_algorithm,
+    manifest_path,
+    record_checksum,
+    split_checksum,
+    with_remote_checksum,
+)
+from .patterns import PatternMatcher
+from .resumable import DEFAULT_STAGING_DIR, ResumableDownload
+from .stream import RemoteStream
+from .transfer import DEFAULT_TRANSFER, TransferSettings, download_to_file, exec_command
+
 logger = logging.getLogger(__name__)
 
+ENUMERATION_MARKER = "backup-site-enumeration:"
+
+# Horloge distante au centième de seconde (/proc/uptime), à la seconde sinon
+_REMOTE_CLOCK = "$(cut -d' ' -f1 /proc/uptime 2>/dev/null || date +%s)"
+
+
+def split_enumeration_time(stderr_output: str) -> Tuple[Optional[float], str]:
+    """Extrait de stderr la durée de l'énumération find distante.
+
+    Returns:
+        Tuple (durée en secondes ou None, stderr sans la ligne de mesure)
+    """
+    duration = None
+    lines = []
+    for line in stderr_output.splitlines():
+        if line.startswith(ENUMERATION_MARKER):
+            try:
+                start, end = line[len(ENUMERATION_MARKER):].split()
+                duration = max(float(end) - float(start), 0.0)
+            except ValueError:
+                pass
+        else:
+            lines.append(line)
+    return duration, "\n".join(lines).strip()
+
 
 class FileBackup:
     """Gère la sauvegarde des fichiers via SSH avec compression côté serveur."""
@@ -39,6 +113,9 @@ class FileBackup:
         remote_path: str,
         include_patterns: list[str],
         exclude_patterns: list[str],
+        compression: Optional[Compression] = None,
+        transfer: Optional[TransferSettings] = None,
+        catalog: Optional[SiteCatalog] = None,
     ):
         """Initialise le gestionnaire de sauvegarde des fichiers.
         
@@ -47,82 +124,514 @@ class FileBackup:
             remote_path: Chemin distant des fichiers à sauvegarder
             include_patterns: Liste des motifs glob pour inclure des fichiers
             exclude_patterns: Liste des motifs glob pour exclure des fichiers
+            compression: Codec de compression (défaut: gzip via `tar -z`)
+            transfer: Réglages du téléchargement (blocs, file, fenêtre SSH)
+            catalog: Catalogue du site, mis à jour après chaque sauvegarde réussie
         """
         self.ssh_client = ssh_client
         self.remote_path = remote_path
         self.include_patterns = include_patterns
         self.exclude_patterns = exclude_patterns
+        self.compression = compression or DEFAULT_COMPRESSION
+        self.transfer = transfer or DEFAULT_TRANSFER
+        self.catalog = catalog
+        
+        for pattern in self.matcher().inexact:
+            logger.warning(
+                f"Motif {pattern!r} : la sélection distante (find) peut différer "
+                f"de la sémantique .gitignore"
+            )
+    
+    def _transfer_settings(self, buffer_size: Optional[int]) -> TransferSettings:
+        """Réglages de téléchargement, avec la taille de bloc éventuellement forcée."""
+        if buffer_size is None:
+            return self.transfer
+        return replace(self.transfer, buffer_size=buffer_size)
     
-    def _build_tar_command(self) -> str:
+    def _build_find_command(self) -> str:
+        """Construit la commande find avec les patterns d'inclusion/exclusion.
+        
+        Returns:
+            Commande find listant les fichiers à sauvegarder
+        """
+        return f"cd {self.remote_path} && {self.matcher().find_command()}"
+    
+    def matcher(self) -> PatternMatcher:
+        """Motifs compilés : expression find distante et évaluation locale."""
+        return PatternMatcher.compile(self.include_patterns, self.exclude_patterns)
+    
+    def _build_tar_command(self, compress: bool = True, timed: bool = False) -> str:
         """Construit la commande tar avec les patterns d'inclusion/exclusion.
         
         Compatible avec GNU tar et BusyBox tar.
         Utilise find pour filtrer les fichiers, puis tar pour les archiver.
         
+        Args:
+            compress: Compresse l'archive avec le codec configuré (désactivé
+                pour le dépôt dédupliqué, qui a besoin du flux tar brut)
+            timed: Mesure la durée de l'énumération find côté serveur et
+                l'écrit sur stderr (voir `split_enumeration_time`)
+        
         Returns:
-            Commande tar complète avec pipe gzip
+            Commande tar complète avec compression
         """
-        # Commande de base : find pour lister les fichiers
-        find_cmd = f"cd {self.remote_path} && find . -type f"
+        # Pipe find vers tar
+        # find génère la liste des fichiers, tar les archive et le codec les compresse
+        tar_cmd = self.compression.tar_create_command() if compress else "tar -cf - -T -"
+        if not timed:
+            return f"{self._build_find_command()} | {tar_cmd}"
+        
+        return (
+            f"cd {self.remote_path} && t0={_REMOTE_CLOCK} && "
+            f"{{ {self.matcher().find_command()}; "
+            f'echo "{ENUMERATION_MARKER} $t0 {_REMOTE_CLOCK}" >&2; }} | {tar_cmd}'
+        )
+    
+    def _build_manifest_command(self) -> str:
+        """Construit la commande listant taille et mtime des fichiers filtrés.
+        
+        `stat -c` est disponible avec GNU coreutils et BusyBox, contrairement
+        à `find -printf`.
+        
+        Returns:
+            Commande produisant une ligne `taille mtime chemin` par fichier
+        """
+        return f"{self._build_find_command()} -exec stat -c '%s %Y %n' {{}} +"
+    
+    def _build_hash_command(self) -> str:
+        """Construit la commande calculant le sha256 des fichiers filtrés.
+        
+        Returns:
+            Commande produisant une ligne `hash  chemin` par fichier
+        """
+        return f"{self._build_find_command()} -exec sha256sum {{}} +"
+    
+    def _build_tar_from_list_command(self) -> str:
+        """Construit la commande tar lisant la liste des fichiers sur stdin.
+        
+        Returns:
+            Commande tar archivant exactement les fichiers reçus sur stdin
+        """
+        return f"cd {self.remote_path} && {self.compression.tar_create_command()}"
+    
+    def _run_command(self, command: str) -> str:
+        """Exécute une commande distante et retourne sa sortie standard.
         
-        # Ajoute les patterns d'exclusion
-        for pattern in self.exclude_patterns:
-            find_cmd += f" ! -path '*{pattern}*'"
+        Args:
+            command: Commande à exécuter
+            
+        Returns:
+            Sortie standard décodée
+            
+        Raises:
+            SSHException: Si la commande échoue
+        """
+        logger.debug(f"Exécution de la commande: {command}")
+        stdin, stdout, stderr = self.ssh_client.exec_command(command)
+        output = stdout.read().decode('utf-8', errors='surrogateescape')
+        stderr_output = stderr.read().decode('utf-8', errors='ignore').strip()
         
-        # Ajoute les patterns d'inclusion (si spécifiés)
-        if self.include_patterns:
-            include_conditions = " -o ".join(
-                f"-path '*{pattern}*'" for pattern in self.include_patterns
+        exit_status = stdout.channel.recv_exit_status()
+        if exit_status != 0:
+            raise SSHException(
+                f"La commande distante a échoué avec le code {exit_status}. "
+                f"Erreur: {stderr_output}"
             )
-            find_cmd += f" \\( {include_conditions} \\)"
         
-        # Pipe find vers tar
-        # find génère la liste des fichiers, tar les archive et gzip les compresse
-        cmd = f"{find_cmd} | tar -czf - -T -"
+        return output
+    
+    def collect_manifest(self, with_hash: bool = False) -> FileManifest:
+        """Collecte le manifeste distant des fichiers à sauvegarder.
+        
+        Args:
+            with_hash: Calcule aussi le sha256 de chaque fichier (plus lent)
+            
+        Returns:
+            FileManifest décrivant l'arborescence distante filtrée
+            
+        Raises:
+            SSHException: Si la commande SSH échoue
+        """
+        entries = parse_stat_output(self._run_command(self._build_manifest_command()))
         
-        return cmd
+        if with_hash:
+            hashes = parse_sha256_output(self._run_command(self._build_hash_command()))
+            for path, digest in hashes.items():
+                if path in entries:
+                    entries[path].sha256 = digest
+        
+        logger.info(f"Manifeste distant collecté ({len(entries)} fichiers)")
+        return FileManifest(entries=entries)
+    
+    def estimate(self, top: int = 10, depth: int = 2) -> FileEstimate:
+        """Estime la sauvegarde sans rien archiver ni télécharger.
+        
+        Parcourt les mêmes fichiers que `_build_tar_command` ; les tailles
+        sont agrégées sur le serveur, seuls les totaux reviennent par SSH.
+        
+        Args:
+            top: Nombre de dossiers les plus volumineux retournés
+            depth: Profondeur des dossiers agrégés (1 = premier niveau)
+            
+        Returns:
+            Nombre de fichiers, volume brut et dossiers les plus volumineux
+            
+        Raises:
+            SSHException: Si la commande SSH échoue
+        """
+        command = file_estimate_command(self._build_find_command(), depth)
+        estimate = FileEstimate.parse(self._run_command(command), top)
+        logger.info(f"Estimation: {estimate.files} fichiers, {estimate.bytes} octets")
+        return estimate
+    
+    def _archive_file_list(
+        self,
+        paths: Iterable[str],
+        output_path: Path,
+        buffer_size: Optional[int] = None,
+        checksum: Optional[str] = None,
+    ) -> int:
+        """Archive une liste explicite de fichiers distants.
+        
+        La liste est envoyée sur stdin depuis un thread dédié : tar commence à
+        produire l'archive avant d'avoir reçu toute la liste, et lire stdout
+        pendant l'écriture évite de bloquer sur la fenêtre SSH.
+        
+        Args:
+            paths: Chemins relatifs à remote_path
+            output_path: Chemin local de l'archive
+            buffer_size: Taille des blocs lus (défaut: réglages de transfert)
+            checksum: Algorithme d'empreinte (sha256, xxh3) ; écrit
+                `{archive}.checksum.json` comme `backup_to_file`
+            
+        Returns:
+            Nombre d'octets écrits
+            
+        Raises:
+            SSHException: Si la commande SSH échoue
+            IOError: Si les empreintes diffèrent
+        """
+        settings = self._transfer_settings(buffer_size)
+        tar_command = self._build_tar_from_list_command()
+        algorithm = get_algorithm(checksum) if checksum else None
+        if algorithm:
+            tar_command = with_remote_checksum(tar_command, algorithm)
+        logger.debug(f"Exécution de la commande: {tar_command}")
+        stdin, stdout, stderr = exec_command(self.ssh_client, tar_command, settings)
+        
+        def feed() -> None:
+            try:
+                for path in paths:
+                    if "\n" in path:
+                        logger.warning(f"Fichier ignoré (nom multi-ligne): {path!r}")
+                        continue
+                    stdin.write(f"{path}\n".encode('utf-8', errors='surrogateescape'))
+            finally:
+                stdin.channel.shutdown_write()
+        
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        
+        hasher = algorithm.new() if algorithm else None
+        bytes_written = download_to_file(stdout, output_path, settings, hasher=hasher)
+        feeder.join()
+        
+        stderr_output = stderr.read().decode('utf-8', errors='ignore').strip()
+        remote_digest, stderr_output = split_checksum(stderr_output)
+        if stderr_output:
+            logger.warning(f"Avertissements SSH: {stderr_output}")
+        
+        exit_status = stdout.channel.recv_exit_status()
+        if exit_status != 0:
+            raise SSHException(
+                f"La commande tar a échoué avec le code {exit_status}. "
+                f"Erreur: {stderr_output}"
+            )
+        
+        if algorithm:
+            record_checksum(
+                output_path, algorithm, hasher.hexdigest(), bytes_written, remote_digest
+            )
+        
+        return bytes_written
+    
+    @staticmethod
+    def _partition_by_size(
+        entries: Dict[str, ManifestEntry],
+        shards: int
+    ) -> List[List[str]]:
+        """Répartit les fichiers en lots de tailles équilibrées.
+        
+        Heuristique LPT : les fichiers sont triés par taille décroissante et
+        chacun est attribué au lot le plus léger du moment.
+        
+        Args:
+            entries: Manifeste des fichiers (chemin -> métadonnées)
+            shards: Nombre de lots
+            
+        Returns:
+            Liste de lots non vides (chemins triés dans chaque lot)
+        """
+        heap = [(0, index) for index in range(shards)]
+        buckets: List[List[str]] = [[] for _ in range(shards)]
+        
+        for path, entry in sorted(
+            entries.items(), key=lambda item: item[1].size, reverse=True
+        ):
+            total, index = heapq.heappop(heap)
+            buckets[index].append(path)
+            heapq.heappush(heap, (total + entry.size, index))
+        
+        return [sorted(bucket) for bucket in buckets if bucket]
+    
+    @staticmethod
+    def shard_path(output_path: Path, index: int) -> Path:
+        """Retourne le chemin de l'archive d'un shard.
+        
+        Exemple : backup_20240101.tar.gz -> backup_20240101.part01.tar.gz
+        """
+        base, dot, extension = output_path.name.partition(".")
+        return output_path.with_name(f"{base}.part{index:02d}{dot}{extension}")
+    
+    def backup_to_shards(
+        self,
+        output_path: Path,
+        shards: int,
+        buffer_size: Optional[int] = None,
+        checksum: Optional[str] = None,
+    ) -> Tuple[bool, str, int]:
+        """Sauvegarde les fichiers en N archives produites en parallèle.
+        
+        Chaque shard est un `tar` distant indépendant exécuté sur son propre
+        canal du Transport SSH existant (`exec_command` ouvre une session par
+        appel), ce qui répartit la compression sur plusieurs cœurs distants et
+        multiplie les fenêtres SSH.
+        
+        Args:
+            output_path: Chemin de base des archives (suffixé par .partNN)
+            shards: Nombre d'archives à produire en parallèle
+            buffer_size: Taille des blocs lus (défaut: réglages de transfert, 1 MB)
+            checksum: Algorithme d'empreinte, un manifeste d'intégrité par shard
+            
+        Returns:
+            Tuple (succès, message, taille_totale_en_bytes)
+            
+        Raises:
+            SSHException: Si au moins un shard échoue (tous les shards sont
+                alors supprimés)
+            IOError: Si l'écriture d'un fichier échoue
+        """
+        started = time.monotonic()
+        shard_paths: List[Path] = []
+        try:
+            manifest = self.collect_manifest()
+            buckets = self._partition_by_size(manifest.entries, max(shards, 1))
+            
+            if not buckets:
+                raise SSHException("Aucun fichier à sauvegarder")
+            
+            shard_paths = [
+                self.shard_path(output_path, index)
+                for index in range(1, len(buckets) + 1)
+            ]
+            
+            logger.info(f"Sauvegarde en {len(buckets)} shard(s) parallèle(s)")
+            with ThreadPoolExecutor(max_workers=len(buckets)) as executor:
+                futures = [
+                    executor.submit(
+                        self._archive_file_list, bucket, path, buffer_size, checksum
+                    )
+                    for bucket, path in zip(buckets, shard_paths)
+                ]
+                errors = []
+                sizes = []
+                for path, future in zip(shard_paths, futures):
+                    try:
+                        sizes.append(future.result())
+                    except (SSHException, IOError) as e:
+                        errors.append(f"{path.name}: {e}")
+            
+            if errors:
+                raise SSHException(
+                    f"{len(errors)} shard(s) en échec: " + "; ".join(errors)
+                )
+            
+            total = sum(sizes)
+            parts = "\n".join(
+                f"    {path.name} ({len(bucket)} fichiers, {size / 1024 / 1024:.2f} MB)"
+                for path, bucket, size in zip(shard_paths, buckets, sizes)
+            )
+            message = (
+                f"✓ Sauvegarde des fichiers réussie ({len(buckets)} shards)\n"
+                f"  Archives:\n{parts}\n"
+                f"  Taille: {total / 1024 / 1024:.2f} MB"
+            )
+            logger.info(message)
+            
+            if self.catalog:
+                # Une ligne par archive réelle : celles que la rétention supprime
+                duration = time.monotonic() - started
+                for path, size in zip(shard_paths, sizes):
+                    self.catalog.record("files", path, size, duration, 0)
+            
+            return True, message, total
+            
+        except SSHException as e:
+            error_msg = f"Erreur SSH lors de la sauvegarde parallèle: {str(e)}"
+            logger.error(error_msg)
+            self._remove_shards(shard_paths)
+            raise
+        except IOError as e:
+            error_msg = f"Erreur d'écriture du fichier: {str(e)}"
+            logger.error(error_msg)
+            self._remove_shards(shard_paths)
+            raise
+    
+    @staticmethod
+    def _remove_shards(shard_paths: List[Path]) -> None:
+        """Supprime les shards (terminés ou partiels) d'une sauvegarde en échec.
+        
+        Un jeu incomplet serait sinon regroupé par la rétention comme une
+        sauvegarde valide.
+        """
+        for path in shard_paths:
+            path.unlink(missing_ok=True)
+            manifest_path(path).unlink(missing_ok=True)
+    
+    def backup_incremental(
+        self,
+        output_path: Path,
+        previous_manifest_path: Optional[Path] = None,
+        with_hash: bool = False,
+        buffer_size: Optional[int] = None,
+        checksum: Optional[str] = None,
+    ) -> Tuple[bool, str, int]:
+        """Sauvegarde uniquement les fichiers modifiés depuis la sauvegarde précédente.
+        
+        Sans manifeste précédent, une sauvegarde complète est réalisée. Dans
+        tous les cas, le manifeste courant est enregistré à côté de l'archive
+        (`<archive>.manifest.json`) pour servir de base à la suivante.
+        
+        Args:
+            output_path: Chemin local où sauvegarder l'archive
+            previous_manifest_path: Manifeste de la sauvegarde précédente
+            with_hash: Compare les fichiers par sha256 plutôt que taille/mtime
+            buffer_size: Taille des blocs lus (défaut: réglages de transfert, 1 MB)
+            checksum: Algorithme d'empreinte de l'archive (sha256, xxh3)
+            
+        Returns:
+            Tuple (succès, message, taille_en_bytes)
+            
+        Raises:
+            SSHException: Si la commande SSH échoue
+            IOError: Si l'écriture du fichier échoue
+        """
+        started = time.monotonic()
+        try:
+            manifest = self.collect_manifest(with_hash=with_hash)
+            manifest.archive = output_path.name
+            
+            if previous_manifest_path is not None:
+                previous = FileManifest.load(previous_manifest_path)
+                diff = diff_manifests(previous, manifest)
+                manifest.kind = "incremental"
+                manifest.parent = previous_manifest_path.name
+                manifest.changed = diff.changed
+                manifest.deleted = diff.deleted
+            else:
+                manifest.changed = sorted(manifest.entries)
+            
+            if manifest.changed:
+                bytes_written = self._archive_file_list(
+                    manifest.changed, output_path, buffer_size, checksum
+                )
+            else:
+                # Rien à archiver : archive vide locale, sans aller-retour SSH
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                empty_tar = io.BytesIO()
+                with tarfile.open(fileobj=empty_tar, mode='w'):
+                    pass
+                archive = self.compression.codec.compress_local(empty_tar.getvalue())
+                output_path.write_bytes(archive)
+                bytes_written = len(archive)
+                if checksum:
+                    # Archive produite localement : une seule empreinte
+                    algorithm = get_algorithm(checksum)
+                    hasher = algorithm.new()
+                    hasher.update(archive)
+                    digest = hasher.hexdigest()
+                    record_checksum(output_path, algorithm, digest, bytes_written, digest)
+            
+            manifest.save(FileManifest.path_for(output_path))
+            
+            message = (
+                f"✓ Sauvegarde des fichiers réussie ({manifest.kind})\n"
+                f"  Archive: {output_path.name}\n"
+                f"  Fichiers archivés: {len(manifest.changed)} / {len(manifest.entries)}\n"
+                f"  Fichiers supprimés: {len(manifest.deleted)}\n"
+                f"  Taille: {bytes_written / 1024 / 1024:.2f} MB"
+            )
+            logger.info(message)
+            
+            if self.catalog:
+                self.catalog.record(
+                    "files", output_path, bytes_written, time.monotonic() - started, 0
+                )
+            
+            return True, message, bytes_written
+            
+        except SSHException as e:
+            error_msg = f"Erreur SSH lors de la sauvegarde incrémentale: {str(e)}"
+            logger.error(error_msg)
+            raise
+        except IOError as e:
+            error_msg = f"Erreur d'écriture du fichier: {str(e)}"
+            logger.error(error_msg)
+            raise
     
     def backup_to_file(
         self,
         output_path: Path,
-        buffer_size: int = 65536
+        buffer_size: Optional[int] = None,
+        checksum: Optional[str] = None,
     ) -> Tuple[bool, str, int]:
         """Sauvegarde les fichiers dans une archive compressée.
         
         Args:
             output_path: Chemin local où sauvegarder l'archive
-            buffer_size: Taille du buffer pour la lecture du flux (défaut: 64KB)
+            buffer_size: Taille des blocs lus (défaut: réglages de transfert, 1 MB)
+            checksum: Algorithme d'empreinte (sha256, xxh3) calculé des deux
+                côtés pendant le transfert ; écrit `{archive}.checksum.json`
             
         Returns:
             Tuple (succès, message, taille_en_bytes)
             
         Raises:
             SSHException: Si la commande SSH échoue
-            IOError: Si l'écriture du fichier échoue
+            IOError: Si l'écriture du fichier échoue ou si les empreintes diffèrent
         """
+        started = time.monotonic()
         try:
             # Construit la commande tar
-            tar_command = self._build_tar_command()
+            tar_command = self._build_tar_command(timed=True)
+            algorithm = get_algorithm(checksum) if checksum else None
+            if algorithm:
+                tar_command = with_remote_checksum(tar_command, algorithm)
             logger.debug(f"Exécution de la commande: {tar_command}")
             
             # Exécute la commande SSH
-            stdin, stdout, stderr = self.ssh_client.exec_command(tar_command)
+            settings = self._transfer_settings(buffer_size)
+            stdin, stdout, stderr = exec_command(self.ssh_client, tar_command, settings)
             
-            # Crée le répertoire de destination s'il n'existe pas
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Écrit le flux compressé dans le fichier local
-            bytes_written = 0
-            with open(output_path, 'wb') as f:
-                while True:
-                    chunk = stdout.read(buffer_size)
-                    if not chunk:
-                        break
-                    f.write(chunk)
-                    bytes_written += len(chunk)
+            # Écrit le flux compressé dans le fichier local (lecture réseau et
+            # écriture disque recouvertes), haché au passage
+            hasher = algorithm.new() if algorithm else None
+            bytes_written = download_to_file(stdout, output_path, settings, hasher=hasher)
             
             # Vérifie s'il y a eu des erreurs
             stderr_output = stderr.read().decode('utf-8', errors='ignore').strip()
+            remote_digest, stderr_output = split_checksum(stderr_output)
+            enumeration, stderr_output = split_enumeration_time(stderr_output)
             if stderr_output:
                 logger.warning(f"Avertissements SSH: {stderr_output}")
             
@@ -138,13 +647,29 @@ class FileBackup:
             if not output_path.exists():
                 raise IOError(f"Le fichier {output_path} n'a pas été créé")
             
+            if algorithm:
+                record_checksum(
+                    output_path, algorithm, hasher.hexdigest(), bytes_written, remote_digest
+                )
+            
+            duration = time.monotonic() - started
             message = (
                 f"✓ Sauvegarde des fichiers réussie\n"
                 f"  Archive: {output_path.name}\n"
                 f"  Taille: {bytes_written / 1024 / 1024:.2f} MB"
             )
+            if enumeration is not None:
+                # find et tar se recouvrent : le reste est le temps d'archivage
+                # et de transfert après la fin de l'énumération
+                message += (
+                    f"\n  Énumération distante: {enumeration:.2f}s, "
+                    f"archivage: {max(duration - enumeration, 0.0):.2f}s"
+                )
             logger.info(message)
             
+            if self.catalog:
+                self.catalog.record("files", output_path, bytes_written, duration, exit_status)
+            
             return True, message, bytes_written
             
         except SSHException as e:
@@ -156,46 +681,220 @@ class FileBackup:
             logger.error(error_msg)
             raise
     
-    def backup_to_stream(self) -> io.BytesIO:
-        """Sauvegarde les fichiers dans un flux BytesIO.
+    async def backup_to_file_async(
+        self,
+        output_path: Path,
+        buffer_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        checksum: Optional[str] = None,
+    ) -> Tuple[bool, str, int]:
+        """Sauvegarde les fichiers dans une archive compressée, sans bloquer de thread.
+
+        Équivalent asynchrone de `backup_to_file` : plusieurs sauvegardes
+        peuvent partager une même boucle asyncio (voir `async_engine`).
+
+        Args:
+            output_path: Chemin local où sauvegarder l'archive
+            buffer_size: Taille des blocs lus (défaut: réglages de transfert, 1 MB)
+            timeout: Durée maximale en secondes ; au-delà le canal est fermé
+                et le fichier partiel supprimé
+            checksum: Algorithme d'empreinte (sha256, xxh3) calculé des deux
+                côtés pendant le transfert ; écrit `{archive}.checksum.json`
+
+        Returns:
+            Tuple (succès, message, taille_en_bytes)
+
+        Raises:
+            SSHException: Si la commande SSH échoue
+            asyncio.TimeoutError: Si le délai est dépassé
+            IOError: Si les empreintes diffèrent
+        """
+        started = time.monotonic()
+        try:
+            settings = self._transfer_settings(buffer_size)
+            command = self._build_tar_command()
+            algorithm = get_algorithm(checksum) if checksum else None
+            if algorithm:
+                command = with_remote_checksum(command, algorithm)
+            hasher = algorithm.new() if algorithm else None
+            bytes_written = await download_to_file_async(
+                self.ssh_client,
+                command,
+                output_path,
+                settings,
+                label="La commande tar",
+                timeout=timeout,
+                hasher=hasher,
+            )
+            if algorithm:
+                # Empreintes déjà comparées par le moteur
+                digest = hasher.hexdigest()
+                record_checksum(output_path, algorithm, digest, bytes_written, digest)
+
+            message = (
+                f"✓ Sauvegarde des fichiers réussie\n"
+                f"  Archive: {output_path.name}\n"
+                f"  Taille: {bytes_written / 1024 / 1024:.2f} MB"
+            )
+            logger.info(message)
+
+            if self.catalog:
+                self.catalog.record(
+                    "files", output_path, bytes_written, time.monotonic() - started, 0
+                )
+            
+            return True, message, bytes_written
+
+        except SSHException as e:
+            logger.error(f"Erreur SSH lors de la sauvegarde: {str(e)}")
+            raise
+        except asyncio.TimeoutError:
+            logger.error(f"Délai de {timeout}s dépassé pour {output_path.name}")
+            raise
+
+    def backup_resumable(
+        self,
+        output_path: Path,
+        staging_dir: str = DEFAULT_STAGING_DIR,
+    ) -> Tuple[bool, str, int]:
+        """Sauvegarde les fichiers dans une archive, avec reprise après interruption.
+
+        Le serveur produit d'abord l'archive dans `staging_dir`, puis le client le
+        récupère par plages via SFTP (voir `resumable.py`). Relancer la même
+        sauvegarde vers le même `output_path` reprend au dernier offset vérifié.
+
+        Args:
+            output_path: Chemin local où sauvegarder l'archive
+            staging_dir: Dossier distant des fichiers temporaires
+
+        Returns:
+            Tuple (succès, message, taille_en_bytes)
+
+        Raises:
+            SSHException: Si la commande SSH échoue
+            IOError: Si le fichier reçu ne correspond pas au fichier distant
+        """
+        started = time.monotonic()
+        download = ResumableDownload(
+            self.ssh_client,
+            self.transfer.prioritize(self._build_tar_command()),
+            output_path,
+            staging_dir=staging_dir,
+            label="La commande tar",
+        )
+        try:
+            size, resumed = download.run()
+        except (SSHException, IOError) as e:
+            logger.error(f"Erreur lors de la sauvegarde reprenable: {str(e)}")
+            raise
+
+        message = (
+            f"✓ Sauvegarde des fichiers réussie{' (reprise)' if resumed else ''}\n"
+            f"  Archive: {output_path.name}\n"
+            f"  Taille: {size / 1024 / 1024:.2f} MB"
+        )
+        logger.info(message)
+        if self.catalog:
+            self.catalog.record(
+                "files", output_path, size, time.monotonic() - started, 0
+            )
         
-        Utile pour les tests ou pour traiter les données en mémoire.
+        return True, message, size
+
+    def backup_to_repository(
+        self,
+        repository: ChunkRepository,
+        name: str,
+    ) -> Tuple[bool, str, int]:
+        """Sauvegarde les fichiers dans un dépôt dédupliqué.
+        
+        Le flux tar est transféré non compressé pour que les blocs inchangés
+        d'un snapshot à l'autre soient reconnus ; les blocs sont compressés
+        individuellement à leur entrée dans le dépôt.
         
+        Args:
+            repository: Dépôt dédupliqué de destination
+            name: Nom du snapshot (ex: nom du site)
+            
         Returns:
-            BytesIO contenant l'archive compressée
+            Tuple (succès, message, taille_du_snapshot)
             
         Raises:
             SSHException: Si la commande SSH échoue
         """
         try:
-            # Construit la commande tar
-            tar_command = self._build_tar_command()
-            logger.debug(f"Exécution de la commande: {tar_command}")
+            stream = RemoteStream(
+                self.ssh_client,
+                self._build_tar_command(compress=False),
+                "La commande tar",
+                settings=self.transfer,
+            )
+            try:
+                snapshot, new_chunks, stored_bytes = repository.add_stream(
+                    stream, name=name, kind="files",
+                    metadata={"remote_path": self.remote_path},
+                )
+            except BaseException:
+                stream.abort()
+                raise
             
-            # Exécute la commande SSH
-            stdin, stdout, stderr = self.ssh_client.exec_command(tar_command)
+            if stream.wait() != 0:
+                # Snapshot incomplet : on l'oublie, ses blocs partiront au gc
+                repository.forget(snapshot.id)
+            stream.close()
             
-            # Lit le flux compressé dans un BytesIO
-            stream = io.BytesIO()
-            buffer_size = 65536
-            while True:
-                chunk = stdout.read(buffer_size)
-                if not chunk:
-                    break
-                stream.write(chunk)
+            message = (
+                f"✓ Sauvegarde des fichiers réussie (dépôt dédupliqué)\n"
+                f"  Snapshot: {snapshot.id}\n"
+                f"  Taille: {snapshot.size / 1024 / 1024:.2f} MB\n"
+                f"  Nouveaux blocs: {new_chunks} / {len(snapshot.chunks)}\n"
+                f"  Stocké: {stored_bytes / 1024 / 1024:.2f} MB"
+            )
+            logger.info(message)
             
-            # Vérifie s'il y a eu des erreurs
-            stderr_output = stderr.read().decode('utf-8', errors='ignore').strip()
-            if stderr_output:
-                logger.warning(f"Avertissements SSH: {stderr_output}")
+            return True, message, snapshot.size
             
-            # Vérifie le code de sortie
-            exit_status = stdout.channel.recv_exit_status()
-            if exit_status != 0:
-                raise SSHException(
-                    f"La commande tar a échoué avec le code {exit_status}. "
-                    f"Erreur: {stderr_output}"
-                )
+        except SSHException as e:
+            error_msg = f"Erreur SSH lors de la sauvegarde vers le dépôt: {str(e)}"
+            logger.error(error_msg)
+            raise
+    
+    def open_stream(self) -> RemoteStream:
+        """Lance l'archivage et renvoie le flux compressé, sans le stocker.
+        
+        Le flux se lit par blocs (`read`, `iter_chunks`, itération) en mémoire
+        constante ; le code de sortie de tar et stderr sont vérifiés à la
+        fermeture (`close()` ou fin du bloc `with`), qui lève SSHException en
+        cas d'échec.
+        
+        Returns:
+            Flux de l'archive compressée
+        """
+        return RemoteStream(
+            self.ssh_client,
+            self._build_tar_command(),
+            "La commande tar",
+            settings=self.transfer,
+        )
+    
+    def backup_to_stream(self) -> io.BytesIO:
+        """Sauvegarde les fichiers dans un flux BytesIO.
+        
+        Utile pour les tests ou pour de petites archives : toute l'archive est
+        gardée en mémoire. Pour un traitement en mémoire constante, utiliser
+        `open_stream()`.
+        
+        Returns:
+            BytesIO contenant l'archive compressée
+            
+        Raises:
+            SSHException: Si la commande SSH échoue
+        """
+        try:
+            stream = io.BytesIO()
+            with self.open_stream() as remote:
+                for chunk in remote.iter_chunks():
+                    stream.write(chunk)
             
             # Réinitialise la position du stream
             stream.seek(0)
@@ -0,0 +1,332 @@
+"""Module de gestion des sauvegardes incrémentales de fichiers.
+
+Stratégie :
+- Collecte un manifeste distant (chemin, taille, mtime, hash optionnel)
+- Compare ce manifeste avec celui stocké à côté de la sauvegarde précédente
+- N'archive que les fichiers nouveaux ou modifiés et enregistre les suppressions
+- Restaure une vue à un instant T en chaînant l'archive complète et ses incrémentales
+
+Stockage :
+  backup_20240101_020000.tar.gz
+  backup_20240101_020000.tar.gz.manifest.json   (kind = full)
+  backup_20240102_020000.tar.gz
+  backup_20240102_020000.tar.gz.manifest.json   (kind = incremental, parent = ...)
+"""
+
+import json
+import logging
+import shutil
+import tarfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .compression import open_decompressed
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class ManifestEntry:
+    """Métadonnées d'un fichier distant."""
+
+    size: int
+    mtime: int
+    sha256: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        """Sérialise l'entrée en dictionnaire compact."""
+        data = {"size": self.size, "mtime": self.mtime}
+        if self.sha256:
+            data["sha256"] = self.sha256
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ManifestEntry":
+        """Construit une entrée depuis un dictionnaire."""
+        return cls(
+            size=int(data["size"]),
+            mtime=int(data["mtime"]),
+            sha256=data.get("sha256"),
+        )
+
+
+@dataclass
+class FileManifest:
+    """Manifeste d'une sauvegarde de fichiers.
+
+    `entries` décrit toujours l'état complet de l'arborescence distante au
+    moment de la sauvegarde, même pour une incrémentale : c'est la référence
+    utilisée par la sauvegarde suivante.
+    """
+
+    entries: Dict[str, ManifestEntry] = field(default_factory=dict)
+    kind: str = "full"
+    archive: Optional[str] = None
+    parent: Optional[str] = None
+    changed: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    created_at: str = field(
+        default_factory=lambda: datetime.now().isoformat(timespec="seconds")
+    )
+
+    @property
+    def total_size(self) -> int:
+        """Taille cumulée des fichiers du manifeste."""
+        return sum(entry.size for entry in self.entries.values())
+
+    def to_dict(self) -> dict:
+        """Sérialise le manifeste en dictionnaire JSON."""
+        return {
+            "version": MANIFEST_VERSION,
+            "kind": self.kind,
+            "archive": self.archive,
+            "parent": self.parent,
+            "created_at": self.created_at,
+            "changed": self.changed,
+            "deleted": self.deleted,
+            "entries": {path: entry.to_dict() for path, entry in self.entries.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FileManifest":
+        """Construit un manifeste depuis un dictionnaire JSON."""
+        return cls(
+            entries={
+                path: ManifestEntry.from_dict(entry)
+                for path, entry in data.get("entries", {}).items()
+            },
+            kind=data.get("kind", "full"),
+            archive=data.get("archive"),
+            parent=data.get("parent"),
+            changed=list(data.get("changed", [])),
+            deleted=list(data.get("deleted", [])),
+            created_at=data.get("created_at", ""),
+        )
+
+    def save(self, path: Path) -> None:
+        """Enregistre le manifeste au format JSON."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: Path) -> "FileManifest":
+        """Charge un manifeste depuis un fichier JSON.
+
+        Raises:
+            FileNotFoundError: Si le manifeste n'existe pas
+            ValueError: Si le manifeste est invalide
+        """
+        if not path.exists():
+            raise FileNotFoundError(f"Le manifeste {path} n'existe pas")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls.from_dict(json.load(f))
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            raise ValueError(f"Manifeste invalide {path}: {e}")
+
+    @staticmethod
+    def path_for(archive_path: Path) -> Path:
+        """Retourne le chemin du manifeste associé à une archive."""
+        return archive_path.with_name(archive_path.name + MANIFEST_SUFFIX)
+
+
+@dataclass
+class ManifestDiff:
+    """Différences entre deux manifestes."""
+
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> List[str]:
+        """Fichiers à archiver (nouveaux + modifiés), triés."""
+        return sorted(self.added + self.modified)
+
+    @property
+    def is_empty(self) -> bool:
+        """Indique s'il n'y a aucun changement."""
+        return not (self.added or self.modified or self.deleted)
+
+
+def diff_manifests(previous: FileManifest, current: FileManifest) -> ManifestDiff:
+    """Compare deux manifestes.
+
+    Si les deux entrées ont un hash, il fait foi (un simple `touch` ne
+    déclenche pas de ré-archivage). Sinon taille et mtime sont comparés.
+
+    Args:
+        previous: Manifeste de la sauvegarde précédente
+        current: Manifeste distant courant
+
+    Returns:
+        ManifestDiff listant fichiers ajoutés, modifiés et supprimés
+    """
+    diff = ManifestDiff()
+
+    for path, entry in current.entries.items():
+        old = previous.entries.get(path)
+        if old is None:
+            diff.added.append(path)
+        elif entry.sha256 and old.sha256:
+            if entry.sha256 != old.sha256:
+                diff.modified.append(path)
+        elif entry.size != old.size or entry.mtime != old.mtime:
+            diff.modified.append(path)
+
+    diff.deleted = sorted(set(previous.entries) - set(current.entries))
+    return diff
+
+
+def parse_stat_output(output: str) -> Dict[str, ManifestEntry]:
+    """Parse la sortie de `stat -c '%s %Y %n'`.
+
+    Args:
+        output: Sortie texte, une ligne par fichier
+
+    Returns:
+        Dictionnaire chemin -> ManifestEntry
+    """
+    entries: Dict[str, ManifestEntry] = {}
+    for line in output.splitlines():
+        parts = line.split(" ", 2)
+        if len(parts) != 3:
+            continue
+        size, mtime, path = parts
+        try:
+            entries[path] = ManifestEntry(size=int(size), mtime=int(mtime))
+        except ValueError:
+            logger.warning(f"Ligne de manifeste ignorée: {line!r}")
+    return entries
+
+
+def parse_sha256_output(output: str) -> Dict[str, str]:
+    """Parse la sortie de `sha256sum` (format `hash  chemin`)."""
+    hashes: Dict[str, str] = {}
+    for line in output.splitlines():
+        digest, sep, path = line.partition("  ")
+        if sep and len(digest) == 64:
+            hashes[path] = digest
+    return hashes
+
+
+def find_latest_manifest(directory: Path) -> Optional[Path]:
+    """Trouve le manifeste le plus récent d'un dossier de sauvegardes.
+
+    Args:
+        directory: Dossier de destination des sauvegardes
+
+    Returns:
+        Chemin du manifeste le plus récent, ou None
+    """
+    if not directory.exists():
+        return None
+
+    latest: Optional[Tuple[str, Path]] = None
+    for path in directory.glob(f"*{MANIFEST_SUFFIX}"):
+        try:
+            created_at = FileManifest.load(path).created_at
+        except (ValueError, FileNotFoundError):
+            logger.warning(f"Manifeste illisible ignoré: {path}")
+            continue
+        key = (created_at, path)
+        if latest is None or key > latest:
+            latest = key
+
+    return latest[1] if latest else None
+
+
+def resolve_chain(manifest_path: Path) -> List[Tuple[Path, FileManifest]]:
+    """Résout la chaîne complète -> incrémentales menant à un manifeste.
+
+    Args:
+        manifest_path: Manifeste de la sauvegarde cible
+
+    Returns:
+        Liste (chemin, manifeste) ordonnée de la sauvegarde complète à la cible
+
+    Raises:
+        ValueError: Si la chaîne est cassée ou cyclique
+    """
+    chain: List[Tuple[Path, FileManifest]] = []
+    seen = set()
+    current: Optional[Path] = manifest_path
+
+    while current is not None:
+        if current in seen:
+            raise ValueError(f"Chaîne de manifestes cyclique sur {current}")
+        seen.add(current)
+
+        manifest = FileManifest.load(current)
+        chain.append((current, manifest))
+
+        if manifest.kind == "full":
+            break
+        if not manifest.parent:
+            raise ValueError(f"Le manifeste incrémental {current} n'a pas de parent")
+        current = current.with_name(manifest.parent)
+
+    chain.reverse()
+    return chain
+
+
+def restore_chain(manifest_path: Path, destination: Path) -> Tuple[bool, str, int]:
+    """Restaure une vue à un instant T en chaînant complète et incrémentales.
+
+    Les archives sont extraites dans l'ordre, puis les suppressions de chaque
+    incrémentale sont appliquées.
+
+    Args:
+        manifest_path: Manifeste de la sauvegarde cible
+        destination: Dossier local de restauration
+
+    Returns:
+        Tuple (succès, message, nombre_de_fichiers)
+
+    Raises:
+        FileNotFoundError: Si une archive de la chaîne est manquante
+        ValueError: Si la chaîne est invalide
+    """
+    chain = resolve_chain(manifest_path)
+    destination.mkdir(parents=True, exist_ok=True)
+    root = destination.resolve()
+
+    for path, manifest in chain:
+        if not manifest.archive:
+            raise ValueError(f"Le manifeste {path} ne référence aucune archive")
+        archive_path = path.with_name(manifest.archive)
+        if not archive_path.exists():
+            raise FileNotFoundError(f"L'archive {archive_path} est introuvable")
+
+        logger.debug(f"Extraction de {archive_path.name} ({manifest.kind})")
+        # Lecture en flux : tarfile ne sait pas décompresser zstd lui-même
+        with open_decompressed(archive_path) as stream:
+            with tarfile.open(fileobj=stream, mode="r|") as tar:
+                tar.extractall(root, filter="data")
+
+        for deleted in manifest.deleted:
+            target = (root / deleted).resolve()
+            if root not in target.parents:
+                logger.warning(f"Suppression hors destination ignorée: {deleted}")
+                continue
+            if target.is_dir():
+                shutil.rmtree(target)
+            else:
+                target.unlink(missing_ok=True)
+
+    files_count = len(chain[-1][1].entries)
+    message = (
+        f"✓ Restauration de la chaîne réussie\n"
+        f"  Archives: {len(chain)} (1 complète + {len(chain) - 1} incrémentale(s))\n"
+        f"  Fichiers: {files_count}\n"
+        f"  Destination: {destination}"
+    )
+    logger.info(message)
+
+    return True, message, files_count
@@ -0,0 +1,258 @@
+"""Module de vérification d'intégrité des sauvegardes.
+
+Stratégie :
+- Côté serveur, la sortie de la commande de sauvegarde passe par `tee` vers
+  une fifo lue par `sha256sum` (ou `xxhsum -H3`) : l'empreinte est calculée
+  sur le flux émis, sans relire l'archive ; elle revient sur stderr
+- Côté client, le flux reçu est haché au fil de l'écriture (aucune lecture
+  supplémentaire du fichier)
+- Les deux empreintes sont comparées, puis consignées dans un manifeste JSON
+  `{archive}.checksum.json` à côté de l'archive
+- `backup-site verify` recalcule les empreintes des archives en parallèle, en
+  lisant les fichiers par projection mémoire (mmap)
+
+Flux :
+  SSH: commande | tee fifo → client (hash + écriture)
+       fifo → sha256sum → stderr "backup-site-checksum: <empreinte>"
+  → comparaison → archive.checksum.json
+
+Le code de sortie de la commande est conservé malgré `tee`, et la commande
+n'utilise que des outils POSIX (mktemp, mkfifo, tee), disponibles aussi avec
+BusyBox.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHECKSUM_MARKER = "backup-site-checksum:"
+MANIFEST_SUFFIX = ".checksum.json"
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def _xxh3() -> Any:
+    try:
+        import xxhash
+    except ImportError:
+        raise ValueError(
+            "L'algorithme xxh3 nécessite le module Python xxhash (pip install xxhash)"
+        )
+    return xxhash.xxh3_64()
+
+
+@dataclass(frozen=True)
+class ChecksumAlgorithm:
+    """Algorithme d'empreinte disponible des deux côtés du transfert."""
+
+    name: str
+    remote_command: str
+    factory: Callable[[], Any]
+
+    def new(self) -> Any:
+        """Crée un objet de hachage (interface hashlib)."""
+        return self.factory()
+
+
+ALGORITHMS: Dict[str, ChecksumAlgorithm] = {
+    "sha256": ChecksumAlgorithm("sha256", "sha256sum", hashlib.sha256),
+    "xxh3": ChecksumAlgorithm("xxh3", "xxhsum -H3", _xxh3),
+}
+
+
+def get_algorithm(name: str) -> ChecksumAlgorithm:
+    """Renvoie l'algorithme correspondant à un nom de configuration.
+
+    Raises:
+        ValueError: Si l'algorithme est inconnu
+    """
+    try:
+        return ALGORITHMS[name]
+    except KeyError:
+        raise ValueError(
+            f"Algorithme d'empreinte inconnu: {name} "
+            f"(disponibles: {', '.join(ALGORITHMS)})"
+        )
+
+
+def with_remote_checksum(command: str, algorithm: ChecksumAlgorithm) -> str:
+    """Enveloppe une commande pour hacher sa sortie côté serveur.
+
+    stdout reste inchangé ; l'empreinte est écrite sur stderr après la fin de
+    la commande, précédée de `CHECKSUM_MARKER`. Le code de sortie est celui
+    de la commande d'origine.
+    """
+    return (
+        'd=$(mktemp -d) || exit 1; mkfifo "$d/f" || exit 1; '
+        f'{algorithm.remote_command} < "$d/f" > "$d/sum" & '
+        f'{{ ( {command} ); echo $? > "$d/rc"; }} | tee "$d/f"; '
+        'wait; rc=$(cat "$d/rc" 2>/dev/null || echo 1); '
+        f'echo "{CHECKSUM_MARKER} $(cut -d" " -f1 "$d/sum")" >&2; '
+        'rm -rf "$d"; exit $rc'
+    )
+
+
+def split_checksum(stderr_output: str) -> Tuple[Optional[str], str]:
+    """Extrait l'empreinte distante de stderr.
+
+    Returns:
+        Tuple (empreinte ou None, stderr sans la ligne d'empreinte)
+    """
+    digest = None
+    lines = []
+    for line in stderr_output.splitlines():
+        if line.startswith(CHECKSUM_MARKER):
+            value = line[len(CHECKSUM_MARKER):].strip()
+            # xxhsum préfixe ses empreintes XXH3 par "XXH3_"
+            digest = value.split("_")[-1].lower() or None
+        else:
+            lines.append(line)
+    return digest, "\n".join(lines).strip()
+
+
+def manifest_path(archive: Path) -> Path:
+    """Chemin du manifeste d'intégrité d'une archive."""
+    return archive.with_name(archive.name + MANIFEST_SUFFIX)
+
+
+def record_checksum(
+    archive: Path,
+    algorithm: ChecksumAlgorithm,
+    digest: str,
+    size: int,
+    remote_digest: Optional[str],
+) -> Path:
+    """Compare les empreintes et écrit le manifeste de l'archive.
+
+    Args:
+        archive: Archive locale
+        algorithm: Algorithme utilisé
+        digest: Empreinte calculée à la réception
+        size: Taille reçue en octets
+        remote_digest: Empreinte calculée par le serveur
+
+    Returns:
+        Chemin du manifeste
+
+    Raises:
+        IOError: Si l'empreinte distante manque ou diffère
+    """
+    if remote_digest is None:
+        raise IOError(f"Empreinte distante absente pour {archive.name}")
+    if remote_digest != digest:
+        raise IOError(
+            f"Empreinte différente pour {archive.name} "
+            f"(serveur {remote_digest}, reçu {digest})"
+        )
+
+    path = manifest_path(archive)
+    path.write_text(json.dumps({
+        "archive": archive.name,
+        "algorithm": algorithm.name,
+        "digest": digest,
+        "size": size,
+        "created_at": datetime.now().isoformat(),
+    }, indent=2))
+    logger.debug(f"{archive.name}: {algorithm.name} {digest}")
+    return path
+
+
+def hash_file(
+    path: Path,
+    algorithm: ChecksumAlgorithm,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> str:
+    """Calcule l'empreinte d'un fichier lu par projection mémoire.
+
+    Les blocs sont passés au hachage sans copie (memoryview) ; hashlib
+    relâche le GIL sur les gros blocs, ce qui permet de vérifier plusieurs
+    archives en parallèle dans des threads.
+    """
+    hasher = algorithm.new()
+    with open(path, "rb") as f:
+        if path.stat().st_size == 0:
+            return hasher.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, len(view), chunk_size):
+                    hasher.update(view[offset:offset + chunk_size])
+            finally:
+                view.release()
+    return hasher.hexdigest()
+
+
+@dataclass
+class VerifyResult:
+    """Résultat de la vérification d'une archive."""
+
+    archive: Path
+    success: bool
+    error: Optional[str] = None
+    size: int = 0
+
+
+def verify_archive(archive: Path) -> VerifyResult:
+    """Vérifie une archive contre son manifeste."""
+    try:
+        manifest = json.loads(manifest_path(archive).read_text())
+        algorithm = get_algorithm(manifest["algorithm"])
+        size = archive.stat().st_size
+        if size != manifest["size"]:
+            return VerifyResult(
+                archive, False, f"taille {size} au lieu de {manifest['size']}", size
+            )
+        digest = hash_file(archive, algorithm)
+        if digest != manifest["digest"]:
+            return VerifyResult(
+                archive, False, f"empreinte {digest} au lieu de {manifest['digest']}", size
+            )
+        return VerifyResult(archive, True, size=size)
+    except (OSError, ValueError, KeyError) as e:
+        return VerifyResult(archive, False, str(e))
+
+
+def find_archives(paths: Iterable[Path]) -> List[Path]:
+    """Liste les archives possédant un manifeste.
+
+    Args:
+        paths: Archives, manifestes ou dossiers (parcourus récursivement)
+    """
+    archives = []
+    for path in paths:
+        if path.is_dir():
+            manifests = sorted(path.rglob(f"*{MANIFEST_SUFFIX}"))
+        elif path.name.endswith(MANIFEST_SUFFIX):
+            manifests = [path]
+        else:
+            manifests = [manifest_path(path)]
+        archives.extend(
+            manifest.with_name(manifest.name[:-len(MANIFEST_SUFFIX)]) for manifest in manifests
+        )
+    return archives
+
+
+def verify_archives(
+    archives: Iterable[Path],
+    jobs: int = 4,
+    on_result: Optional[Callable[[VerifyResult], None]] = None,
+) -> List[VerifyResult]:
+    """Vérifie plusieurs archives en parallèle.
+
+    Returns:
+        Résultats dans l'ordre des archives
+    """
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        results = []
+        for result in executor.map(verify_archive, archives):
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return results
@@ -0,0 +1,449 @@
+"""Module d'orchestration des sauvegardes de plusieurs sites.
+
+Stratégie :
+- Charge toutes les configurations (*.yaml, *.yml) d'un dossier
+- Crée une tâche `files` et une tâche `database` par site
+- Exécute les tâches dans un pool de threads borné : le travail lourd
+  (tar, mysqldump, compression) tourne sur les serveurs distants, le client
+  ne fait qu'attendre le réseau et écrire sur le disque
+- Limite le nombre de tâches simultanées par hôte SSH pour ne pas saturer un
+  même serveur mutualisé ; une tâche dont l'hôte est saturé n'occupe pas de
+  place dans le pool (pas de blocage en tête de file)
+- Chaque site écrit dans `{destination}/{nom_du_site}/`
+- Chaque sauvegarde réussie est inscrite au catalogue de la racine
+- Après la passe, la rétention de chaque site (`auto_prune`) est appliquée
+  aux seuls sites dont toutes les sauvegardes ont réussi
+- Mode asynchrone (`run_async`) : les flux simples partagent une seule
+  boucle asyncio au lieu d'un thread chacun (voir `async_engine.py`), ce qui
+  permet des centaines de sauvegardes simultanées avec un délai par tâche
+- Les connexions SSH viennent d'un pool : les tâches fichiers et BDD d'un
+  même site (et les sites d'un même compte) partagent une seule poignée de
+  main ; le résumé distingue temps de connexion et temps de transfert
+
+Flux :
+  config/*.yaml → tâches → pool (N threads, M par hôte) → résultats → résumé
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from backup_site.config import SiteConfig, load_config
+from backup_site.utils.ssh import SSHConnectionPool
+
+from .catalog import BackupCatalog
+from .compression import resolve_compression
+from .database import DatabaseBackup
+from .files import FileBackup
+from .retention import PruneResult, RetentionPolicy, backup_stem, prune
+from .transfer import TransferSettings
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = ("files", "database")
+
+
+@dataclass
+class BackupJob:
+    """Sauvegarde d'une partie (fichiers ou base) d'un site."""
+
+    site: str
+    kind: str
+    config: SiteConfig
+
+    @property
+    def host(self) -> str:
+        """Hôte SSH servant de clé pour la limite de concurrence."""
+        return f"{self.config.ssh.host}:{self.config.ssh.port}"
+
+
+@dataclass
+class JobResult:
+    """Résultat d'une tâche de sauvegarde."""
+
+    site: str
+    kind: str
+    success: bool
+    duration: float
+    bytes_written: int = 0
+    output: Optional[Path] = None
+    error: Optional[str] = None
+    connect_time: float = 0.0
+
+    @property
+    def transfer_time(self) -> float:
+        """Durée hors établissement de la connexion SSH."""
+        return max(self.duration - self.connect_time, 0.0)
+
+
+def load_site_configs(config_dir: Path) -> Tuple[List[SiteConfig], List[JobResult]]:
+    """Charge toutes les configurations d'un dossier.
+
+    Args:
+        config_dir: Dossier contenant les fichiers YAML
+
+    Returns:
+        Tuple (configurations valides, résultats en échec des fichiers invalides)
+    """
+    configs: List[SiteConfig] = []
+    failures: List[JobResult] = []
+
+    paths = sorted(config_dir.glob("*.yaml")) + sorted(config_dir.glob("*.yml"))
+    for path in paths:
+        try:
+            configs.append(load_config(path))
+        except (ValueError, FileNotFoundError) as e:
+            logger.error(f"Configuration ignorée {path.name}: {e}")
+            failures.append(JobResult(
+                site=path.stem, kind="config", success=False, duration=0.0, error=str(e),
+            ))
+    return configs, failures
+
+
+class BackupOrchestrator:
+    """Exécute les sauvegardes de plusieurs sites en parallèle."""
+
+    def __init__(
+        self,
+        configs: Iterable[SiteConfig],
+        workers: int = 4,
+        per_host: int = 2,
+        kinds: Iterable[str] = JOB_KINDS,
+        destination: Optional[Path] = None,
+        passphrase: Optional[str] = None,
+        pool: Optional[SSHConnectionPool] = None,
+    ):
+        """Initialise l'orchestrateur.
+
+        Args:
+            configs: Configurations des sites
+            workers: Nombre maximal de tâches simultanées
+            per_host: Nombre maximal de tâches simultanées par hôte SSH
+            kinds: Types de sauvegarde à exécuter (`files`, `database`)
+            destination: Dossier racine des sauvegardes (défaut: `backup.destination`
+                de chaque site)
+            passphrase: Passphrase des clés SSH
+            pool: Pool de connexions à utiliser (fermé par l'appelant) ; par
+                défaut un pool propre à `run()`, fermé à la fin
+        """
+        self.configs = list(configs)
+        self.workers = max(workers, 1)
+        self.per_host = max(per_host, 1)
+        self.kinds = [kind for kind in JOB_KINDS if kind in set(kinds)]
+        self.destination = destination
+        self.passphrase = passphrase
+        self.pool = pool or SSHConnectionPool()
+        self._owns_pool = pool is None
+        self._catalogs: Dict[Path, BackupCatalog] = {}
+        self._catalogs_lock = threading.Lock()
+
+    def build_jobs(self) -> List[BackupJob]:
+        """Construit la liste des tâches, sites entrelacés par type."""
+        return [
+            BackupJob(site=config.site["name"], kind=kind, config=config)
+            for kind in self.kinds
+            for config in self.configs
+        ]
+
+    def output_dir(self, config: SiteConfig) -> Path:
+        """Dossier de sortie d'un site."""
+        root = self.destination or Path(config.backup.destination)
+        return root / config.site["name"]
+
+    def catalog(self, config: SiteConfig) -> BackupCatalog:
+        """Catalogue du dossier racine d'un site (partagé entre les tâches)."""
+        root = self.output_dir(config).parent
+        with self._catalogs_lock:
+            if root not in self._catalogs:
+                self._catalogs[root] = BackupCatalog.open(root)
+            return self._catalogs[root]
+
+    def _compression(self, job: BackupJob, ssh_client):
+        backup = job.config.backup
+        return resolve_compression(
+            ssh_client,
+            backup.compression,
+            level=backup.compression_level,
+            threads=backup.compression_threads,
+        )
+
+    def _file_backup(self, job: BackupJob, ssh_client, timestamp: str) -> Tuple[FileBackup, Path]:
+        """Prépare la sauvegarde des fichiers d'un site et son archive de sortie."""
+        config = job.config
+        compression = self._compression(job, ssh_client)
+        file_backup = FileBackup(
+            ssh_client=ssh_client,
+            remote_path=str(config.files.remote_path),
+            include_patterns=config.files.include_patterns,
+            exclude_patterns=config.files.exclude_patterns,
+            compression=compression,
+            transfer=TransferSettings.from_config(config.backup),
+            catalog=self.catalog(config).for_site(job.site),
+        )
+        stem = backup_stem(config.backup.prefix, "files", timestamp)
+        output_path = self.output_dir(config) / f"{stem}.tar{compression.extension}"
+        return file_backup, output_path
+
+    def _database_arguments(self, job: BackupJob, ssh_client) -> dict:
+        """Arguments communs à DatabaseBackup et ParallelDatabaseBackup."""
+        config = job.config
+        db_config = config.database
+        return dict(
+            ssh_client=ssh_client,
+            db_host=db_config.host,
+            db_port=db_config.port,
+            db_name=db_config.name,
+            db_user=db_config.user,
+            db_password=db_config.password.get_secret_value(),
+            compression=self._compression(job, ssh_client),
+            transfer=TransferSettings.from_config(config.backup),
+            catalog=self.catalog(config).for_site(job.site),
+        )
+
+    def _run_files(self, job: BackupJob, ssh_client, timestamp: str) -> Tuple[Path, int]:
+        """Sauvegarde les fichiers d'un site."""
+        file_backup, output_path = self._file_backup(job, ssh_client, timestamp)
+        checksum = job.config.backup.checksum_algorithm
+        if job.config.files.shards > 1:
+            _, _, size = file_backup.backup_to_shards(
+                output_path, job.config.files.shards, checksum=checksum
+            )
+        else:
+            _, _, size = file_backup.backup_to_file(output_path, checksum=checksum)
+        return output_path, size
+
+    def _run_database(self, job: BackupJob, ssh_client, timestamp: str) -> Tuple[Path, int]:
+        """Sauvegarde la base de données d'un site."""
+        config = job.config
+        db_config = config.database
+        arguments = self._database_arguments(job, ssh_client)
+        compression = arguments["compression"]
+        stem = backup_stem(config.backup.prefix, "database", timestamp)
+
+        if db_config.parallel_jobs > 1:
+            from .parallel_dump import ParallelDatabaseBackup
+
+            output_path = self.output_dir(config) / stem
+            parallel_backup = ParallelDatabaseBackup(
+                jobs=db_config.parallel_jobs,
+                split_threshold=db_config.split_threshold_mb * 1024 * 1024,
+                consistent=db_config.consistent,
+                **arguments,
+            )
+            _, _, size = parallel_backup.backup_to_directory(output_path)
+        else:
+            output_path = self.output_dir(config) / f"{stem}.sql{compression.extension}"
+            _, _, size = DatabaseBackup(**arguments).backup_to_file(
+                output_path, checksum=config.backup.checksum_algorithm
+            )
+        return output_path, size
+
+    def run_job(self, job: BackupJob) -> JobResult:
+        """Exécute une tâche sur la connexion SSH (partagée) de son hôte.
+
+        Les erreurs sont capturées dans le résultat : l'échec d'un site
+        n'interrompt pas les autres.
+        """
+        started = time.monotonic()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        connect_time = 0.0
+        try:
+            ssh = job.config.ssh
+            ssh_client, connect_time = self.pool.get(
+                ssh.host, ssh.user, ssh.private_key_path, ssh.port, self.passphrase
+            )
+            runner = self._run_files if job.kind == "files" else self._run_database
+            output, size = runner(job, ssh_client, timestamp)
+            return JobResult(
+                site=job.site, kind=job.kind, success=True,
+                duration=time.monotonic() - started, bytes_written=size, output=output,
+                connect_time=connect_time,
+            )
+        except Exception as e:
+            logger.error(f"Échec de la sauvegarde {job.kind} de {job.site}: {e}")
+            return JobResult(
+                site=job.site, kind=job.kind, success=False,
+                duration=time.monotonic() - started, error=str(e),
+                connect_time=connect_time,
+            )
+
+    def run(
+        self,
+        on_result: Optional[Callable[[JobResult], None]] = None,
+    ) -> List[JobResult]:
+        """Exécute toutes les tâches en respectant les limites de concurrence.
+
+        Args:
+            on_result: Appelé à la fin de chaque tâche (affichage de progression)
+
+        Returns:
+            Résultats dans l'ordre de fin d'exécution
+        """
+        pending = self.build_jobs()
+        running: Dict[Future, BackupJob] = {}
+        active: Counter = Counter()
+        results: List[JobResult] = []
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                while pending or running:
+                    # Démarre les tâches dont l'hôte a encore de la capacité
+                    for job in list(pending):
+                        if len(running) >= self.workers:
+                            break
+                        if active[job.host] >= self.per_host:
+                            continue
+                        pending.remove(job)
+                        active[job.host] += 1
+                        running[executor.submit(self.run_job, job)] = job
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job = running.pop(future)
+                        active[job.host] -= 1
+                        result = future.result()
+                        results.append(result)
+                        if on_result:
+                            on_result(result)
+        finally:
+            if self._owns_pool:
+                self.pool.close_all()
+
+        return results
+
+    def _is_single_stream(self, job: BackupJob) -> bool:
+        """Indique si la tâche tient dans un seul canal SSH (moteur asynchrone)."""
+        if job.kind == "files":
+            return job.config.files.shards <= 1
+        return job.config.database.parallel_jobs <= 1
+
+    async def run_job_async(self, job: BackupJob, timeout: Optional[float] = None) -> JobResult:
+        """Exécute une tâche sur la boucle asyncio.
+
+        Les sauvegardes en un seul flux passent par le moteur asynchrone ;
+        shards et dumps parallèles gèrent déjà leurs canaux par threads et
+        sont délégués au pool de threads de la boucle (sans délai maximal).
+
+        Args:
+            job: Tâche à exécuter
+            timeout: Durée maximale du transfert en secondes
+        """
+        if not self._is_single_stream(job):
+            return await asyncio.to_thread(self.run_job, job)
+
+        started = time.monotonic()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        connect_time = 0.0
+        try:
+            ssh = job.config.ssh
+            ssh_client, connect_time = await asyncio.to_thread(
+                self.pool.get, ssh.host, ssh.user, ssh.private_key_path, ssh.port, self.passphrase
+            )
+            # La détection du codec exécute une commande distante : hors boucle
+            if job.kind == "files":
+                backup, output = await asyncio.to_thread(
+                    self._file_backup, job, ssh_client, timestamp
+                )
+            else:
+                arguments = await asyncio.to_thread(self._database_arguments, job, ssh_client)
+                extension = arguments["compression"].extension
+                stem = backup_stem(job.config.backup.prefix, "database", timestamp)
+                output = self.output_dir(job.config) / f"{stem}.sql{extension}"
+                backup = DatabaseBackup(**arguments)
+            _, _, size = await backup.backup_to_file_async(
+                output, timeout=timeout, checksum=job.config.backup.checksum_algorithm
+            )
+            return JobResult(
+                site=job.site, kind=job.kind, success=True,
+                duration=time.monotonic() - started, bytes_written=size, output=output,
+                connect_time=connect_time,
+            )
+        except Exception as e:
+            error = str(e)
+            if isinstance(e, asyncio.TimeoutError):
+                error = f"Délai de {timeout}s dépassé"
+            logger.error(f"Échec de la sauvegarde {job.kind} de {job.site}: {error}")
+            return JobResult(
+                site=job.site, kind=job.kind, success=False,
+                duration=time.monotonic() - started, error=error,
+                connect_time=connect_time,
+            )
+
+    async def run_async(
+        self,
+        on_result: Optional[Callable[[JobResult], None]] = None,
+        timeout: Optional[float] = None,
+    ) -> List[JobResult]:
+        """Équivalent asynchrone de `run()`.
+
+        Une tâche attend d'abord une place sur son hôte, puis une place
+        globale : une tâche bloquée par son hôte n'occupe pas de place
+        globale (pas de blocage en tête de file). Annuler la coroutine ferme
+        les canaux en cours.
+
+        Args:
+            on_result: Appelé à la fin de chaque tâche (affichage de progression)
+            timeout: Durée maximale de chaque transfert en secondes
+
+        Returns:
+            Résultats dans l'ordre de fin d'exécution
+        """
+        slots = asyncio.Semaphore(self.workers)
+        host_slots: Dict[str, asyncio.Semaphore] = {}
+        results: List[JobResult] = []
+
+        async def run_one(job: BackupJob) -> None:
+            host = host_slots.setdefault(job.host, asyncio.Semaphore(self.per_host))
+            async with host, slots:
+                result = await self.run_job_async(job, timeout)
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+        try:
+            await asyncio.gather(*(run_one(job) for job in self.build_jobs()))
+        finally:
+            if self._owns_pool:
+                self.pool.close_all()
+
+        return results
+
+    def prune_succeeded(
+        self,
+        results: Iterable[JobResult],
+        dry_run: bool = False,
+    ) -> Dict[str, PruneResult]:
+        """Applique la rétention aux sites dont toutes les tâches ont réussi.
+
+        Un site en échec garde toutes ses anciennes sauvegardes.
+
+        Args:
+            results: Résultats de `run()` ou `run_async()`
+            dry_run: N'efface rien, renvoie seulement ce qui serait supprimé
+
+        Returns:
+            Résultat de la purge par site
+        """
+        failed = {result.site for result in results if not result.success}
+        pruned: Dict[str, PruneResult] = {}
+        for config in self.configs:
+            site = config.site["name"]
+            if site in failed or not config.backup.auto_prune:
+                continue
+            output_dir = self.output_dir(config)
+            pruned[site] = prune(
+                output_dir.parent,
+                RetentionPolicy.from_config(config.backup),
+                prefix=config.backup.prefix,
+                site=output_dir.name,
+                dry_run=dry_run,
+                catalog=self.catalog(config),
+            )
+        return pruned
@@ -0,0 +1,856 @@
+"""Module de sauvegarde parallèle de la base de données, table par table.
+
+Stratégie :
+- Liste les tables via information_schema (taille données + index, lignes)
+- Exporte le schéma (sans données ni triggers) puis les routines/triggers/events
+- Exporte les données dans `jobs` sessions mysql concurrentes (chaque
+  `exec_command` ouvre un canal sur le même Transport) ; le flux de chaque
+  session est découpé en un fichier par tâche au fil de sa réception
+- Découpe les plus grosses tables par plage de clé primaire entière
+- Écrit un dossier par dump avec un manifeste consommable par le chargeur
+
+Cohérence (approche de mydumper) :
+  En mode `consistent`, une session de contrôle pose un verrou global en
+  lecture (FLUSH TABLES WITH READ LOCK, à défaut LOCK TABLES ... READ) avec
+  un délai maximal : un FTWRL en attente derrière une longue requête
+  bloquerait toutes les écritures. Le verrou n'est tenu que le temps que
+  chaque session d'export ouvre START TRANSACTION WITH CONSISTENT SNAPSHOT ;
+  UNLOCK TABLES libère ensuite les écritures avant le transfert des données.
+  Chaque session exécute ses SELECT (table entière ou plage de clé primaire)
+  dans sa transaction : toutes voient les mêmes données. Les lignes sont
+  rendues en littéraux SQL côté serveur et regroupées localement en INSERT
+  étendus, comme ceux de mysqldump.
+
+Structure :
+  database_20240101_020000/
+    manifest.json
+    schema.sql.gz          CREATE TABLE / VIEW
+    data/wp_options.sql.gz
+    data/wp_postmeta.part001.sql.gz ...
+    routines.sql.gz        triggers, procédures, events (chargés en dernier)
+"""
+
+import heapq
+import io
+import json
+import logging
+import re
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+import paramiko
+from paramiko.ssh_exception import SSHException
+
+from .catalog import SiteCatalog
+from .compression import Compression, decompress_stream, open_compressed
+from .database import DatabaseBackup
+from .transfer import (
+    ThrottledReader,
+    TransferSettings,
+    channel_transport,
+    download_to_file,
+    exec_command,
+    throttle,
+)
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = "backup-site-parallel-dump"
+LOCK_MARKER = "BACKUP_SITE_LOCKED"
+SNAPSHOT_MARKER = "BACKUP_SITE_SNAPSHOT"
+TASK_MARKER = "BACKUP_SITE_TASK"
+DONE_MARKER = "BACKUP_SITE_DONE"
+
+# Délai maximal (secondes) pour poser le verrou et ouvrir les snapshots
+LOCK_TIMEOUT = 60
+# Marge laissée au serveur pour abandonner le verrou avant de couper la session
+LOCK_TIMEOUT_MARGIN = 5
+# Taille maximale d'un INSERT étendu (net_buffer_length de mysqldump)
+STATEMENT_SIZE = 1024 * 1024
+
+INTEGER_TYPES = {"tinyint", "smallint", "mediumint", "int", "integer", "bigint"}
+BINARY_TYPES = {
+    "binary", "varbinary", "tinyblob", "blob", "mediumblob", "longblob",
+    "geometry", "point", "linestring", "polygon", "multipoint",
+    "multilinestring", "multipolygon", "geometrycollection", "geomcollection",
+}
+
+# En-tête des fichiers de données (mêmes réglages que le chargement d'un mysqldump)
+DATA_HEADER = (
+    b"/*!40101 SET NAMES utf8mb4 */;\n"
+    b"/*!40103 SET TIME_ZONE='+00:00' */;\n"
+    b"/*!40101 SET SQL_MODE='NO_AUTO_VALUE_ON_ZERO' */;\n"
+    b"/*!40014 SET FOREIGN_KEY_CHECKS=0 */;\n"
+)
+
+
+@dataclass
+class TableInfo:
+    """Métadonnées d'une table issues d'information_schema."""
+
+    name: str
+    bytes: int = 0
+    rows: int = 0
+    primary_key: Optional[str] = None
+    # (nom, type) des colonnes exportées, colonnes générées exclues
+    columns: List[Tuple[str, str]] = field(default_factory=list)
+
+
+@dataclass
+class DumpTask:
+    """Export d'une table (ou d'une plage de clé primaire d'une table)."""
+
+    table: str
+    filename: str
+    where: Optional[str] = None
+    estimated_bytes: int = 0
+    size: int = 0
+
+
+@dataclass
+class DumpSession:
+    """Session mysql d'export et tâches qui lui sont confiées."""
+
+    tasks: List[DumpTask] = field(default_factory=list)
+    # (stdin, stdout, stderr) du canal SSH une fois la session ouverte
+    channel: Optional[Tuple] = None
+
+
+@dataclass
+class DumpManifest:
+    """Manifeste d'un dump parallèle."""
+
+    database: str
+    extension: str
+    consistency: str
+    schema: str
+    routines: str
+    tables: List[dict] = field(default_factory=list)
+    created_at: str = field(
+        default_factory=lambda: datetime.now().isoformat(timespec="seconds")
+    )
+
+    def to_dict(self) -> dict:
+        """Sérialise le manifeste en dictionnaire JSON."""
+        return {
+            "format": MANIFEST_FORMAT,
+            "version": 1,
+            "database": self.database,
+            "extension": self.extension,
+            "consistency": self.consistency,
+            "created_at": self.created_at,
+            "schema": self.schema,
+            "routines": self.routines,
+            "tables": self.tables,
+        }
+
+    @classmethod
+    def load(cls, path: Path) -> "DumpManifest":
+        """Charge un manifeste de dump parallèle.
+
+        Raises:
+            FileNotFoundError: Si le manifeste n'existe pas
+            ValueError: Si le fichier n'est pas un manifeste de dump parallèle
+        """
+        if not path.exists():
+            raise FileNotFoundError(f"Le manifeste {path} n'existe pas")
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") != MANIFEST_FORMAT:
+            raise ValueError(f"{path} n'est pas un manifeste de dump parallèle")
+        return cls(
+            database=data["database"],
+            extension=data.get("extension", ""),
+            consistency=data.get("consistency", "per-table"),
+            schema=data["schema"],
+            routines=data["routines"],
+            tables=list(data.get("tables", [])),
+            created_at=data.get("created_at", ""),
+        )
+
+    def save(self, path: Path) -> None:
+        """Enregistre le manifeste au format JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def safe_filename(table: str) -> str:
+    """Transforme un nom de table en nom de fichier sûr."""
+    return re.sub(r"[^A-Za-z0-9_$-]", "_", table)
+
+
+def quote_identifier(name: str) -> str:
+    """Entoure un identifiant MySQL d'accents graves."""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def value_expression(column: str, data_type: str) -> str:
+    """Expression SQL rendant une colonne en littéral SQL sur une seule ligne.
+
+    Les colonnes binaires sont rendues en hexadécimal (`X'...'`), les BIT en
+    entier, les autres via QUOTE() en utf8mb4 (NULL compris), sauts de ligne
+    échappés : un enregistrement par ligne de sortie.
+    """
+    name = quote_identifier(column)
+    if data_type == "bit":
+        return f"IF({name} IS NULL, 'NULL', {name} + 0)"
+    if data_type in BINARY_TYPES:
+        return f"IF({name} IS NULL, 'NULL', CONCAT('X''', HEX({name}), ''''))"
+    return (
+        f"REPLACE(REPLACE(QUOTE(CONVERT({name} USING utf8mb4)), "
+        r"'\n', '\\n'), '\r', '\\r')"
+    )
+
+
+class ParallelDatabaseBackup(DatabaseBackup):
+    """Gère la sauvegarde parallèle, table par table, de la base MySQL."""
+
+    def __init__(
+        self,
+        ssh_client: paramiko.SSHClient,
+        db_host: str,
+        db_port: int,
+        db_name: str,
+        db_user: str,
+        db_password: str,
+        jobs: int = 4,
+        split_threshold: int = 512 * 1024 * 1024,
+        max_parts: int = 16,
+        consistent: bool = True,
+        lock_timeout: int = LOCK_TIMEOUT,
+        ssl_enabled: bool = False,
+        compression: Optional[Compression] = None,
+        transfer: Optional[TransferSettings] = None,
+        catalog: Optional[SiteCatalog] = None,
+    ):
+        """Initialise le gestionnaire de sauvegarde parallèle.
+
+        Args:
+            ssh_client: Client SSH Paramiko connecté
+            db_host: Hôte de la base de données
+            db_port: Port de la base de données
+            db_name: Nom de la base de données
+            db_user: Utilisateur de la base de données
+            db_password: Mot de passe de la base de données
+            jobs: Nombre d'exports simultanés (canaux SSH)
+            split_threshold: Taille (données + index) au-delà de laquelle une
+                table est découpée par plage de clé primaire
+            max_parts: Nombre maximal de plages par table
+            consistent: Pose un verrou global en lecture le temps d'ouvrir
+                les snapshots des sessions d'export
+            lock_timeout: Délai maximal (secondes) pour poser le verrou et
+                ouvrir les snapshots
+            ssl_enabled: Utiliser SSL pour la connexion MySQL
+            compression: Codec de compression des fichiers (défaut: gzip)
+            transfer: Réglages du téléchargement (blocs, file, fenêtre SSH)
+            catalog: Catalogue du site, mis à jour après chaque sauvegarde réussie
+        """
+        super().__init__(
+            ssh_client=ssh_client,
+            db_host=db_host,
+            db_port=db_port,
+            db_name=db_name,
+            db_user=db_user,
+            db_password=db_password,
+            compress=True,
+            ssl_enabled=ssl_enabled,
+            compression=compression,
+            transfer=transfer,
+            catalog=catalog,
+        )
+        self.jobs = max(jobs, 1)
+        self.split_threshold = split_threshold
+        self.max_parts = max(max_parts, 1)
+        self.consistent = consistent
+        self.lock_timeout = max(lock_timeout, 1)
+
+    def list_tables(self) -> List[TableInfo]:
+        """Liste les tables de la base avec leur taille et leur clé primaire.
+
+        Seules les clés primaires composées d'une unique colonne entière sont
+        retenues : ce sont les seules découpables en plages simples. Les
+        colonnes (hors colonnes générées) servent à construire les SELECT.
+
+        Returns:
+            Tables (hors vues) triées par taille décroissante
+        """
+        schema = self._sql_string(self.db_name)
+        rows = self._run_query(
+            "SELECT TABLE_NAME, COALESCE(DATA_LENGTH, 0) + COALESCE(INDEX_LENGTH, 0), "
+            "COALESCE(TABLE_ROWS, 0) FROM information_schema.TABLES "
+            f"WHERE TABLE_SCHEMA = {schema} AND TABLE_TYPE = 'BASE TABLE'"
+        )
+        tables = {
+            row[0]: TableInfo(name=row[0], bytes=int(row[1]), rows=int(row[2]))
+            for row in rows
+            if len(row) == 3
+        }
+
+        key_rows = self._run_query(
+            "SELECT k.TABLE_NAME, k.COLUMN_NAME, c.DATA_TYPE "
+            "FROM information_schema.KEY_COLUMN_USAGE k "
+            "JOIN information_schema.COLUMNS c ON c.TABLE_SCHEMA = k.TABLE_SCHEMA "
+            "AND c.TABLE_NAME = k.TABLE_NAME AND c.COLUMN_NAME = k.COLUMN_NAME "
+            f"WHERE k.TABLE_SCHEMA = {schema} AND k.CONSTRAINT_NAME = 'PRIMARY'"
+        )
+        key_columns: Dict[str, List[Tuple[str, str]]] = {}
+        for row in key_rows:
+            if len(row) == 3:
+                key_columns.setdefault(row[0], []).append((row[1], row[2].lower()))
+
+        for name, columns in key_columns.items():
+            if name in tables and len(columns) == 1 and columns[0][1] in INTEGER_TYPES:
+                tables[name].primary_key = columns[0][0]
+
+        column_rows = self._run_query(
+            "SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS "
+            f"WHERE TABLE_SCHEMA = {schema} AND EXTRA NOT LIKE '%GENERATED%' "
+            "ORDER BY TABLE_NAME, ORDINAL_POSITION"
+        )
+        for row in column_rows:
+            if len(row) == 3 and row[0] in tables:
+                tables[row[0]].columns.append((row[1], row[2].lower()))
+
+        return sorted(tables.values(), key=lambda table: table.bytes, reverse=True)
+
+    def _primary_key_bounds(self, table: TableInfo) -> Optional[Tuple[int, int]]:
+        """Retourne (min, max) de la clé primaire, ou None si la table est vide."""
+        column = quote_identifier(table.primary_key)
+        rows = self._run_query(
+            f"SELECT MIN({column}), MAX({column}) "
+            f"FROM {quote_identifier(self.db_name)}.{quote_identifier(table.name)}"
+        )
+        if not rows or rows[0][0] == "NULL":
+            return None
+        return int(rows[0][0]), int(rows[0][1])
+
+    def plan_tasks(self, tables: List[TableInfo]) -> List[DumpTask]:
+        """Planifie les exports : une tâche par table, plusieurs pour les grosses.
+
+        Args:
+            tables: Tables à exporter
+
+        Returns:
+            Tâches triées par taille estimée décroissante (les plus longues
+            démarrent en premier)
+        """
+        tasks: List[DumpTask] = []
+
+        for table in tables:
+            base = safe_filename(table.name)
+            parts = 1
+            if table.primary_key and self.split_threshold > 0:
+                parts = min(-(-table.bytes // self.split_threshold), self.max_parts)
+
+            bounds = self._primary_key_bounds(table) if parts > 1 else None
+            if bounds is None or bounds[1] - bounds[0] < parts:
+                tasks.append(DumpTask(
+                    table=table.name,
+                    filename=f"{base}.sql",
+                    estimated_bytes=table.bytes,
+                ))
+                continue
+
+            low, high = bounds
+            step = -(-(high - low + 1) // parts)
+            column = quote_identifier(table.primary_key)
+            for index in range(parts):
+                start = low + index * step
+                end = start + step
+                if index == 0:
+                    where = f"{column} < {end}"
+                elif index == parts - 1:
+                    where = f"{column} >= {start}"
+                else:
+                    where = f"{column} >= {start} AND {column} < {end}"
+                tasks.append(DumpTask(
+                    table=table.name,
+                    filename=f"{base}.part{index + 1:03d}.sql",
+                    where=where,
+                    estimated_bytes=table.bytes // parts,
+                ))
+
+        return sorted(tasks, key=lambda task: task.estimated_bytes, reverse=True)
+
+    def _compress_suffix(self) -> str:
+        """Pipe de compression à ajouter aux commandes mysqldump."""
+        compress_cmd = self.compression.pipe_command()
+        return f" | {compress_cmd}" if compress_cmd else ""
+
+    def _build_schema_command(self) -> str:
+        """Commande d'export du schéma (tables et vues, sans triggers)."""
+        return (
+            f"mysqldump {self._connection_args()} --single-transaction "
+            f"--no-data --skip-triggers {self.db_name}{self._compress_suffix()}"
+        )
+
+    def _build_routines_command(self) -> str:
+        """Commande d'export des triggers, procédures et events."""
+        return (
+            f"mysqldump {self._connection_args()} --single-transaction "
+            f"--no-data --no-create-info --routines --triggers --events "
+            f"{self.db_name}{self._compress_suffix()}"
+        )
+
+    def _build_task_query(self, task: DumpTask, table: TableInfo) -> str:
+        """Requête d'export d'une tâche : une ligne `(v1,v2,...)` par enregistrement."""
+        values = ", ',', ".join(
+            value_expression(name, data_type) for name, data_type in table.columns
+        )
+        query = (
+            f"SELECT CONCAT('(', {values}, ')') "
+            f"FROM {quote_identifier(self.db_name)}.{quote_identifier(task.table)}"
+        )
+        if task.where:
+            query += f" WHERE {task.where}"
+        return query
+
+    @staticmethod
+    def _insert_prefix(table: TableInfo) -> bytes:
+        """Début des INSERT étendus d'une table (liste de colonnes complète)."""
+        columns = ", ".join(quote_identifier(name) for name, _ in table.columns)
+        return f"INSERT INTO {quote_identifier(table.name)} ({columns}) VALUES ".encode("utf-8")
+
+    def _build_session_command(self) -> str:
+        """Commande d'une session d'export (requêtes lues sur stdin).
+
+        La première ligne (confirmation du snapshot) est relayée telle quelle
+        avant la compression du reste du flux, pour être lue pendant le verrou.
+        """
+        command = (
+            f"mysql {self._connection_args()} --default-character-set=utf8mb4 "
+            f"--raw --unbuffered -N -B {self.db_name}"
+        )
+        compress_cmd = self.compression.pipe_command()
+        if compress_cmd:
+            command += (
+                f" | {{ IFS= read -r line && printf '%s\\n' \"$line\" && exec {compress_cmd}; }}"
+            )
+        return command
+
+    def _build_session_script(
+        self,
+        session: DumpSession,
+        tables: Dict[str, TableInfo],
+    ) -> str:
+        """Script d'une session : snapshot, puis les SELECT de ses tâches."""
+        statements = [
+            "SET SESSION sql_mode = ''",
+            "SET SESSION time_zone = '+00:00'",
+            "SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ",
+            "START TRANSACTION WITH CONSISTENT SNAPSHOT",
+            f"SELECT '{SNAPSHOT_MARKER}'",
+        ]
+        for index, task in enumerate(session.tasks):
+            statements.append(f"SELECT '{TASK_MARKER} {index}'")
+            statements.append(self._build_task_query(task, tables[task.table]))
+        statements += [f"SELECT '{DONE_MARKER}'", "COMMIT"]
+        return "".join(f"{statement};\n" for statement in statements)
+
+    def _open_sessions(
+        self,
+        tasks: List[DumpTask],
+        tables: List[TableInfo],
+    ) -> List[DumpSession]:
+        """Ouvre les sessions d'export et attend que chacune tienne son snapshot.
+
+        Les tâches (triées par taille décroissante) sont réparties d'avance sur
+        la session la moins chargée ; chaque session reçoit tout son script
+        d'un coup et enchaîne ses requêtes dans la même transaction.
+
+        Returns:
+            Sessions ouvertes, dont la sortie reste à lire
+
+        Raises:
+            SSHException: Si une session ne confirme pas son snapshot à temps
+        """
+        count = min(self.jobs, len(tasks))
+        sessions = [DumpSession() for _ in range(count)]
+        # (octets estimés, nombre de tâches, session) : aucune session vide
+        loads = [(0, 0, index) for index in range(count)]
+        for task in tasks:
+            load, assigned, index = heapq.heappop(loads)
+            sessions[index].tasks.append(task)
+            heapq.heappush(loads, (load + task.estimated_bytes, assigned + 1, index))
+
+        by_name = {table.name: table for table in tables}
+        try:
+            for session in sessions:
+                session.channel = exec_command(
+                    self.ssh_client, self._build_session_command(), self.transfer
+                )
+                stdin, stdout, stderr = session.channel
+                stdin.write(self._build_session_script(session, by_name).encode("utf-8"))
+                stdin.flush()
+                stdin.channel.shutdown_write()
+
+            for session in sessions:
+                stdin, stdout, stderr = session.channel
+                stdout.channel.settimeout(self.lock_timeout)
+                try:
+                    line = stdout.readline()
+                except socket.timeout:
+                    raise SSHException(
+                        f"Snapshot d'export non ouvert après {self.lock_timeout} s"
+                    )
+                stdout.channel.settimeout(None)
+                line = line.decode("utf-8", errors="ignore") if isinstance(line, bytes) else line
+                if line.strip() != SNAPSHOT_MARKER:
+                    error = stderr.read().decode("utf-8", errors="ignore").strip()
+                    raise SSHException(f"Impossible d'ouvrir une session d'export: {error}")
+        except Exception:
+            self._close_sessions(sessions)
+            raise
+
+        return sessions
+
+    @staticmethod
+    def _close_sessions(sessions: List[DumpSession]) -> None:
+        """Ferme les canaux des sessions d'export."""
+        for session in sessions:
+            if session.channel is not None:
+                session.channel[0].channel.close()
+
+    def _split_stream(
+        self,
+        stream: BinaryIO,
+        session: DumpSession,
+        data_dir: Path,
+        tables: Dict[str, TableInfo],
+    ) -> bool:
+        """Découpe le flux d'une session en un fichier de données par tâche.
+
+        Les lignes `(v1,v2,...)` sont regroupées en INSERT étendus d'au plus
+        STATEMENT_SIZE octets, écrits au fil de la lecture.
+
+        Returns:
+            True si le flux va jusqu'au marqueur de fin (export complet)
+        """
+        extension = self.compression.extension
+        task: Optional[DumpTask] = None
+        writer = None
+        prefix = b""
+        rows: List[bytes] = []
+        pending = 0
+
+        def flush() -> None:
+            nonlocal pending
+            if rows:
+                writer.write(prefix + b",".join(rows) + b";\n")
+                rows.clear()
+                pending = 0
+
+        def close_task() -> None:
+            nonlocal writer
+            if writer is not None:
+                flush()
+                writer.close()
+                writer = None
+                task.size = (data_dir / f"{task.filename}{extension}").stat().st_size
+
+        try:
+            for line in stream:
+                line = line[:-1] if line.endswith(b"\n") else line
+                if line.startswith(b"("):
+                    rows.append(line)
+                    pending += len(line) + 1
+                    if pending >= STATEMENT_SIZE:
+                        flush()
+                    continue
+
+                close_task()
+                marker = line.decode("utf-8", errors="replace")
+                if marker == DONE_MARKER:
+                    return True
+                name, _, index = marker.partition(" ")
+                if name != TASK_MARKER:
+                    raise SSHException(f"Ligne inattendue dans l'export: {marker[:80]}")
+                task = session.tasks[int(index)]
+                writer = open_compressed(
+                    data_dir / f"{task.filename}{extension}", self.compression
+                )
+                writer.write(DATA_HEADER)
+                prefix = self._insert_prefix(tables[task.table])
+        finally:
+            if writer is not None:
+                writer.close()
+        return False
+
+    def _download_session(
+        self,
+        session: DumpSession,
+        data_dir: Path,
+        tables: Dict[str, TableInfo],
+        buffer_size: Optional[int] = None,
+    ) -> List[DumpTask]:
+        """Découpe le flux d'une session par tâche au fil de sa réception.
+
+        Le flux est décompressé et réparti dans les fichiers des tâches
+        pendant le transfert, dans le thread de la session : ni fichier
+        intermédiaire, ni recompression sérialisée après coup.
+
+        Raises:
+            SSHException: Si l'export s'arrête avant la fin (erreur mysql)
+        """
+        settings = self.transfer
+        if buffer_size is not None:
+            settings = replace(settings, buffer_size=buffer_size)
+        stdin, stdout, stderr = session.channel
+
+        try:
+            with throttle(settings, channel_transport(stdout)) as bucket:
+                source = io.BufferedReader(
+                    ThrottledReader(stdout, bucket), settings.buffer_size
+                )
+                with decompress_stream(source, self.compression.codec) as stream:
+                    complete = self._split_stream(stream, session, data_dir, tables)
+        except EOFError:
+            # Flux compressé coupé avant sa fin
+            complete = False
+        stderr_output = stderr.read().decode("utf-8", errors="ignore").strip()
+        exit_status = stdout.channel.recv_exit_status()
+
+        if not complete or exit_status != 0:
+            names = ", ".join(sorted({task.table for task in session.tasks}))
+            raise SSHException(
+                f"L'export mysql a échoué avec le code {exit_status} ({names}). "
+                f"Erreur: {stderr_output}"
+            )
+        if stderr_output and "Using a password" not in stderr_output:
+            logger.warning(f"Avertissements mysql (export): {stderr_output}")
+
+        for task in session.tasks:
+            logger.debug(f"✓ {task.filename}{self.compression.extension} ({task.size} octets)")
+        return session.tasks
+
+    def _dump_to_file(
+        self,
+        command: str,
+        output_path: Path,
+        buffer_size: Optional[int] = None,
+    ) -> int:
+        """Exécute un export distant et l'écrit dans un fichier local.
+
+        Raises:
+            SSHException: Si la commande échoue
+        """
+        settings = self.transfer
+        if buffer_size is not None:
+            settings = replace(settings, buffer_size=buffer_size)
+        stdin, stdout, stderr = exec_command(self.ssh_client, command, settings)
+        bytes_written = download_to_file(stdout, output_path, settings)
+
+        stderr_output = stderr.read().decode("utf-8", errors="ignore").strip()
+        if stderr_output and "Deprecated program name" not in stderr_output:
+            logger.warning(f"Avertissements mysqldump ({output_path.name}): {stderr_output}")
+
+        exit_status = stdout.channel.recv_exit_status()
+        if exit_status != 0:
+            raise SSHException(
+                f"La commande mysqldump a échoué avec le code {exit_status} "
+                f"({output_path.name}). Erreur: {stderr_output}"
+            )
+
+        return bytes_written
+
+    def _acquire_read_lock(
+        self,
+        tables: List[TableInfo],
+    ) -> Tuple[Optional[Tuple], str]:
+        """Ouvre la session de contrôle et pose un verrou global en lecture.
+
+        Tente FLUSH TABLES WITH READ LOCK (privilège RELOAD), puis
+        LOCK TABLES ... READ (privilège LOCK TABLES, courant en mutualisé).
+        Chaque tentative est bornée par `lock_wait_timeout` côté serveur et
+        par un délai de lecture côté client : un verrou en attente derrière
+        une longue requête bloquerait les écritures du site.
+
+        Returns:
+            Tuple (session_de_contrôle ou None, mode_de_cohérence)
+        """
+        table_locks = ", ".join(f"{quote_identifier(table.name)} READ" for table in tables)
+        attempts = [("global-read-lock", "FLUSH TABLES WITH READ LOCK")]
+        if tables:
+            attempts.append(("table-read-locks", f"LOCK TABLES {table_locks}"))
+
+        for mode, statement in attempts:
+            session = self.ssh_client.exec_command(
+                f"mysql {self._connection_args()} --unbuffered -N -B {self.db_name}"
+            )
+            stdin, stdout, stderr = session
+            stdin.write(
+                f"SET SESSION lock_wait_timeout = {self.lock_timeout};\n"
+                f"{statement};\nSELECT '{LOCK_MARKER}';\n".encode("utf-8")
+            )
+            stdin.flush()
+
+            stdout.channel.settimeout(self.lock_timeout + LOCK_TIMEOUT_MARGIN)
+            try:
+                line = stdout.readline()
+            except socket.timeout:
+                line = ""
+                error = f"délai de {self.lock_timeout} s dépassé"
+            else:
+                error = None
+            stdout.channel.settimeout(None)
+            line = line.decode("utf-8", errors="ignore") if isinstance(line, bytes) else line
+            if line.strip() == LOCK_MARKER:
+                logger.info(f"Verrou en lecture posé ({mode})")
+                return session, mode
+
+            if error is None:
+                error = stderr.read().decode("utf-8", errors="ignore").strip()
+            logger.warning(f"Impossible de poser le verrou ({statement.split()[0]}): {error}")
+            stdin.channel.close()
+
+        logger.warning("Aucun verrou possible : cohérence par table uniquement")
+        return None, "per-table"
+
+    @staticmethod
+    def _release_read_lock(session: Tuple) -> None:
+        """Libère le verrou et ferme la session de contrôle."""
+        stdin, stdout, stderr = session
+        try:
+            stdin.write(b"UNLOCK TABLES;\n")
+            stdin.flush()
+            stdin.channel.shutdown_write()
+            stdout.channel.recv_exit_status()
+        finally:
+            stdin.channel.close()
+        logger.info("Verrou en lecture libéré")
+
+    def backup_to_directory(
+        self,
+        output_dir: Path,
+        buffer_size: Optional[int] = None
+    ) -> Tuple[bool, str, int]:
+        """Sauvegarde la base de données en parallèle dans un dossier.
+
+        Args:
+            output_dir: Dossier local du dump (créé si nécessaire)
+            buffer_size: Taille des blocs lus (défaut: réglages de transfert)
+
+        Returns:
+            Tuple (succès, message, taille_totale_en_bytes)
+
+        Raises:
+            SSHException: Si une commande SSH échoue
+            IOError: Si l'écriture d'un fichier échoue
+        """
+        started = time.monotonic()
+        extension = self.compression.extension
+        data_dir = output_dir / "data"
+        lock_session = None
+        sessions: List[DumpSession] = []
+
+        try:
+            data_dir.mkdir(parents=True, exist_ok=True)
+
+            tables = self.list_tables()
+            tasks = self.plan_tasks(tables)
+            logger.info(
+                f"Export parallèle de {len(tables)} tables en {len(tasks)} tâches "
+                f"({self.jobs} simultanées)"
+            )
+
+            consistency = "per-table"
+            if self.consistent:
+                lock_session, consistency = self._acquire_read_lock(tables)
+
+            # Verrou tenu le temps d'ouvrir les snapshots, pas pendant l'export
+            sessions = self._open_sessions(tasks, tables)
+            if lock_session is not None:
+                self._release_read_lock(lock_session)
+                lock_session = None
+
+            schema_name = f"schema.sql{extension}"
+            total = self._dump_to_file(
+                self._build_schema_command(), output_dir / schema_name, buffer_size
+            )
+
+            by_name = {table.name: table for table in tables}
+            with ThreadPoolExecutor(max_workers=max(len(sessions), 1)) as executor:
+                done = [
+                    task
+                    for session_tasks in executor.map(
+                        lambda session: self._download_session(
+                            session, data_dir, by_name, buffer_size
+                        ),
+                        sessions,
+                    )
+                    for task in session_tasks
+                ]
+
+            routines_name = f"routines.sql{extension}"
+            total += self._dump_to_file(
+                self._build_routines_command(), output_dir / routines_name, buffer_size
+            )
+
+            files_by_table: Dict[str, List[dict]] = {}
+            for task in done:
+                total += task.size
+                files_by_table.setdefault(task.table, []).append({
+                    "path": f"data/{task.filename}{extension}",
+                    "where": task.where,
+                    "size": task.size,
+                })
+
+            manifest = DumpManifest(
+                database=self.db_name,
+                extension=extension,
+                consistency=consistency,
+                schema=schema_name,
+                routines=routines_name,
+                tables=[
+                    {
+                        "name": table.name,
+                        "rows": table.rows,
+                        "bytes": table.bytes,
+                        "primary_key": table.primary_key,
+                        "files": sorted(
+                            files_by_table.get(table.name, []),
+                            key=lambda item: item["path"],
+                        ),
+                    }
+                    for table in tables
+                ],
+            )
+            manifest.save(output_dir / MANIFEST_NAME)
+
+            message = (
+                f"✓ Sauvegarde parallèle de la base de données réussie\n"
+                f"  Dossier: {output_dir.name}\n"
+                f"  Tables: {len(tables)} ({len(tasks)} fichiers de données)\n"
+                f"  Cohérence: {consistency}\n"
+                f"  Taille: {total / 1024 / 1024:.2f} MB"
+            )
+            logger.info(message)
+
+            if self.catalog:
+                self.catalog.record(
+                    "database", output_dir, total, time.monotonic() - started, 0
+                )
+            
+            return True, message, total
+
+        except SSHException as e:
+            error_msg = f"Erreur SSH lors de la sauvegarde BDD parallèle: {str(e)}"
+            logger.error(error_msg)
+            raise
+        except IOError as e:
+            error_msg = f"Erreur d'écriture du fichier: {str(e)}"
+            logger.error(error_msg)
+            raise
+        finally:
+            if lock_session is not None:
+                try:
+                    self._release_read_lock(lock_session)
+                except Exception:
+                    logger.warning("Impossible de libérer proprement le verrou")
+            self._close_sessions(sessions)
@@ -0,0 +1,385 @@
+"""Module des motifs d'inclusion/exclusion : moteur local et expression `find`.
+
+Sémantique (celle de .gitignore) :
+- Un motif sans `/` (`*.log`, `.env`) porte sur le nom, à toute profondeur
+- Un motif contenant un `/` (`wp-content/cache`) est ancré à la racine
+  (`remote_path`) ; `**/` en tête le rend valable à toute profondeur
+- `*`, `?` et `[...]` ne traversent pas les `/` ; `**` couvre zéro ou
+  plusieurs dossiers (`wp-content/**/*.php`)
+- Un `/` final (ou `/**`) limite le motif aux dossiers : leur contenu est
+  écarté sans être parcouru
+- `!motif` réinclut ce qu'une exclusion précédente a écarté ; la dernière
+  règle qui correspond l'emporte, et rien n'est réinclus sous un dossier exclu
+- Les inclusions sont toujours ancrées à la racine. Une inclusion de dossier
+  (`wp-content/`, `wp-content/**`) ou un nom sans joker (`wp-content`)
+  inclut tout le contenu du dossier ; une inclusion avec jokers sans `/`
+  final (`*.php`) ne vise que des fichiers. Sans inclusion, tout est retenu
+
+Une même compilation s'évalue de deux façons :
+- `PatternMatcher.selects(chemin)` : évaluation locale (expressions
+  régulières), par exemple sur un manifeste
+- `PatternMatcher.find_command()` : expression find POSIX (compatible
+  BusyBox) ; les dossiers exclus et les dossiers de premier niveau hors de
+  portée des inclusions sont élagués par `-prune`
+
+Rendu find :
+  find . ! \\( -type d -path './*' \\( <dossiers exclus> \\) -prune \\) -type f
+         ! -name '*.log' ... \\( -path './wp-content/*' -o -path ./index.php ... \\)
+
+`find -path` laisse `*` traverser les `/` : un motif ancré contenant des
+jokers est donc borné en profondeur (`! -path './*/*/*'`), ce qui rend le
+rendu exact. Les jokers d'un motif qui contient aussi `**` (hormis la forme
+`dossier/**/*.ext`), ou d'une inclusion de dossier ailleurs qu'en fin de
+motif (`wp-*/`), ne se traduisent qu'approximativement : ces motifs sont
+signalés par `PatternMatcher.inexact`.
+"""
+
+import re
+import shlex
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_WILDCARDS = re.compile(r"[*?\[]")
+
+
+def _segment_regex(segment: str) -> str:
+    """Expression régulière d'un segment de motif (les jokers s'arrêtent aux `/`)."""
+    out = []
+    i, n = 0, len(segment)
+    while i < n:
+        c = segment[i]
+        i += 1
+        if c == "*":
+            while i < n and segment[i] == "*":
+                i += 1
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = i
+            if j < n and segment[j] in "!^":
+                j += 1
+            if j < n and segment[j] == "]":
+                j += 1
+            while j < n and segment[j] != "]":
+                j += 1
+            if j >= n:
+                out.append(re.escape(c))
+                continue
+            chars = segment[i:j]
+            i = j + 1
+            negated = chars[:1] in ("!", "^")
+            if negated:
+                chars = chars[1:]
+            chars = chars.replace("\\", "\\\\").replace("[", "\\[")
+            out.append(f"[^{chars}/]" if negated else f"[{chars}]")
+        elif c == "\\" and i < n:
+            out.append(re.escape(segment[i]))
+            i += 1
+        else:
+            out.append(re.escape(c))
+    return "".join(out)
+
+
+def _glob_regex(segments: List[str], anchored: bool) -> "re.Pattern":
+    parts = []
+    for i, segment in enumerate(segments):
+        last = i == len(segments) - 1
+        if segment == "**":
+            parts.append(".*" if last else "(?:[^/]+/)*")
+        else:
+            parts.append(_segment_regex(segment) + ("" if last else "/"))
+    return re.compile(("" if anchored else "(?:.*/)?") + "".join(parts))
+
+
+def _globstar_variants(segments: List[str]) -> List[str]:
+    """Traductions `find -path` d'un motif : chaque `**` vaut zéro ou un `*`."""
+    variants: List[List[str]] = [[]]
+    for segment in segments:
+        if segment == "**":
+            variants = [v + extra for v in variants for extra in ([], ["*"])]
+        else:
+            variants = [v + [re.sub(r"\*+", "*", segment)] for v in variants]
+    unique = []
+    for variant in ("/".join(v) for v in variants):
+        if variant not in unique:
+            unique.append(variant)
+    return unique
+
+
+def _any_of(tests: List[str]) -> str:
+    return tests[0] if len(tests) == 1 else f"\\( {' -o '.join(tests)} \\)"
+
+
+@dataclass
+class Pattern:
+    """Motif compilé."""
+
+    source: str
+    segments: List[str]
+    anchored: bool
+    dir_only: bool = False
+    negated: bool = False
+    regex: "re.Pattern" = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.regex = _glob_regex(self.segments, self.anchored)
+
+    @classmethod
+    def parse(cls, raw: str, anchored: bool = False) -> Optional["Pattern"]:
+        """Compile un motif de la configuration.
+
+        Args:
+            raw: Motif (`*.log`, `wp-content/cache/`, `!important.log`...)
+            anchored: Ancre le motif même sans `/` (inclusions)
+
+        Returns:
+            Pattern, ou None pour un motif vide
+        """
+        text = raw.strip()
+        negated = text.startswith("!")
+        if negated or text.startswith("\\!"):
+            text = text[1:]
+        while text.startswith("./"):
+            text = text[2:]
+
+        dir_only = False
+        if text.endswith("/**"):
+            text, dir_only = text[:-3], True
+        if text.endswith("/"):
+            text, dir_only = text.rstrip("/"), True
+
+        if text.startswith("**/"):
+            while text.startswith("**/"):
+                text = text[3:]
+            anchored = False
+        else:
+            anchored = anchored or "/" in text
+        text = text.lstrip("/")
+        if not text:
+            return None
+
+        return cls(raw, text.split("/"), anchored, dir_only, negated)
+
+    @property
+    def body(self) -> str:
+        return "/".join(self.segments)
+
+    @property
+    def wild(self) -> bool:
+        return _WILDCARDS.search(self.body) is not None
+
+    @property
+    def covers_content(self) -> bool:
+        """Inclusion valant pour tout le contenu des dossiers correspondants."""
+        return self.dir_only or not self.wild
+
+    def matches(self, path: str, is_dir: bool = False) -> bool:
+        """Indique si un chemin relatif (sans `./`) correspond au motif."""
+        if self.dir_only and not is_dir:
+            return False
+        return self.regex.fullmatch(path) is not None
+
+    def find_test(self) -> Tuple[str, bool]:
+        """Test find équivalent.
+
+        Returns:
+            Tuple (test, rendu exact)
+        """
+        wild = any(
+            _WILDCARDS.search(segment) for segment in self.segments if segment != "**"
+        )
+        if not self.anchored and len(self.segments) == 1:
+            return f"-name {shlex.quote(_globstar_variants(self.segments)[0])}", True
+
+        prefix = "./" if self.anchored else "*/"
+        variants = _globstar_variants(self.segments)
+        tests = [f"-path {shlex.quote(prefix + variant)}" for variant in variants]
+        if wild and self.anchored and "**" not in self.segments:
+            # Borne de profondeur : aucun joker ne peut alors absorber un `/`
+            bound = "./" + "/".join(["*"] * (len(self.segments) + 1))
+            return f"\\( {tests[0]} ! -path {shlex.quote(bound)} \\)", True
+        # `dossier/**/*.ext` : le `*` de tête peut absorber des `/` sans changer
+        # le résultat, puisque `**` les aurait couverts
+        last = self.segments[-1]
+        tail_only = (
+            len(self.segments) > 1 and self.segments[-2] == "**"
+            and last.startswith("*") and not _WILDCARDS.search(last.lstrip("*"))
+            and not any(_WILDCARDS.search(segment) for segment in self.segments[:-2])
+        )
+        return _any_of(tests), not wild or tail_only
+
+    def content_test(self) -> Tuple[str, bool]:
+        """Test find des fichiers situés sous un dossier correspondant au motif."""
+        prefix = "./" if self.anchored else "*/"
+        tests = [
+            f"-path {shlex.quote(prefix + variant + '/*')}"
+            for variant in _globstar_variants(self.segments)
+        ]
+        # Un `*` final peut absorber des `/` : le dossier parent correspond alors
+        # lui aussi, le résultat ne change pas
+        last = self.segments[-1]
+        exact = not any(_WILDCARDS.search(segment) for segment in self.segments[:-1]) and (
+            not _WILDCARDS.search(last) or not _WILDCARDS.search(last[:-1]) and last.endswith("*")
+        )
+        return _any_of(tests), exact
+
+
+class PatternMatcher:
+    """Motifs d'inclusion et d'exclusion d'une sauvegarde de fichiers."""
+
+    def __init__(self, include: List[Pattern], exclude: List[Pattern]):
+        self.include = include
+        self.exclude = exclude
+        self._pruned: Dict[str, bool] = {}
+        self._included: Dict[str, bool] = {}
+
+    @classmethod
+    def compile(
+        cls,
+        include_patterns: Iterable[str],
+        exclude_patterns: Iterable[str],
+    ) -> "PatternMatcher":
+        """Compile les motifs de la configuration.
+
+        Args:
+            include_patterns: Motifs à inclure, ancrés à la racine
+            exclude_patterns: Motifs à exclure (prioritaires), `!` pour réinclure
+        """
+        # Les doublons n'ajouteraient que des tests à chaque fichier
+        include = [Pattern.parse(raw, anchored=True) for raw in dict.fromkeys(include_patterns)]
+        exclude = [Pattern.parse(raw) for raw in exclude_patterns]
+        return cls(
+            [p for p in include if p is not None and not p.negated],
+            [p for p in exclude if p is not None],
+        )
+
+    # Évaluation locale
+
+    def excluded(self, path: str, is_dir: bool = False) -> bool:
+        """Indique si les règles d'exclusion écartent ce chemin (seul)."""
+        result = False
+        for pattern in self.exclude:
+            if result == pattern.negated and pattern.matches(path, is_dir):
+                result = not pattern.negated
+        return result
+
+    def _dir_pruned(self, directory: str) -> bool:
+        cached = self._pruned.get(directory)
+        if cached is None:
+            parent = directory.rpartition("/")[0]
+            cached = (bool(parent) and self._dir_pruned(parent)) or self.excluded(directory, True)
+            self._pruned[directory] = cached
+        return cached
+
+    def _dir_included(self, directory: str) -> bool:
+        cached = self._included.get(directory)
+        if cached is None:
+            parent = directory.rpartition("/")[0]
+            cached = (bool(parent) and self._dir_included(parent)) or any(
+                pattern.covers_content and pattern.matches(directory, True)
+                for pattern in self.include
+            )
+            self._included[directory] = cached
+        return cached
+
+    def selects(self, path: str) -> bool:
+        """Indique si un fichier (chemin relatif à la racine) est sauvegardé."""
+        while path.startswith("./"):
+            path = path[2:]
+        parent = path.rpartition("/")[0]
+        if parent and self._dir_pruned(parent):
+            return False
+        if self.excluded(path):
+            return False
+        if not self.include:
+            return True
+        if parent and self._dir_included(parent):
+            return True
+        return any(pattern.matches(path) for pattern in self.include)
+
+    def filter(self, paths: Iterable[str]) -> List[str]:
+        """Fichiers retenus parmi `paths` (par exemple les entrées d'un manifeste)."""
+        return [path for path in paths if self.selects(path)]
+
+    # Rendu find
+
+    @property
+    def inexact(self) -> List[str]:
+        """Motifs dont la traduction find n'est qu'approchée."""
+        sources = [p.source for p in self.exclude if not p.find_test()[1]]
+        for pattern in self.include:
+            exact = not pattern.covers_content or pattern.content_test()[1]
+            if not pattern.dir_only:
+                exact = exact and pattern.find_test()[1]
+            if not exact:
+                sources.append(pattern.source)
+        return sources
+
+    def _exclusion(self, patterns: List[Pattern]) -> Optional[str]:
+        """Expression vraie pour un chemin exclu (la dernière règle l'emporte)."""
+        expression = None
+        for pattern in patterns:
+            test = pattern.find_test()[0]
+            if not pattern.negated:
+                expression = test if expression is None else f"{expression} -o {test}"
+            elif expression is not None:
+                expression = f"\\( {expression} \\) ! {test}"
+        return expression
+
+    def _kept(self, patterns: List[Pattern]) -> Optional[str]:
+        """Expression vraie pour un chemin conservé (None : toujours vrai)."""
+        expression = None
+        for pattern in patterns:
+            test = pattern.find_test()[0]
+            if not pattern.negated:
+                expression = f"! {test}" if expression is None else f"{expression} ! {test}"
+            elif expression is not None:
+                expression = f"\\( {expression} -o {test} \\)"
+        return expression
+
+    def prune_expression(self) -> str:
+        """Clause d'élagage seule (vide si aucun dossier n'est à élaguer)."""
+        prune = []
+        excluded = self._exclusion(self.exclude)
+        if excluded:
+            prune.append(excluded)
+        if self.include and all(p.anchored for p in self.include):
+            # Dossiers de premier niveau hors de portée des inclusions
+            roots = []
+            for pattern in self.include:
+                root = _globstar_variants(pattern.segments[:1])[0]
+                if root not in roots:
+                    roots.append(root)
+            outside = " ".join(f"! -name {shlex.quote(root)}" for root in roots)
+            prune.append(f"\\( ! -path './*/*' {outside} \\)")
+        if not prune:
+            return ""
+        return f"! \\( -type d -path './*' \\( {' -o '.join(prune)} \\) -prune \\)"
+
+    def expression(self) -> str:
+        """Expression find (sans l'action) listant les fichiers retenus."""
+        parts = []
+        prune = self.prune_expression()
+        if prune:
+            parts.append(prune)
+
+        parts.append("-type f")
+        kept = self._kept([p for p in self.exclude if not p.dir_only])
+        if kept:
+            parts.append(kept)
+
+        if self.include:
+            tests = []
+            for pattern in self.include:
+                if not pattern.dir_only:
+                    tests.append(pattern.find_test()[0])
+                if pattern.covers_content:
+                    tests.append(pattern.content_test()[0])
+            parts.append(f"\\( {' -o '.join(tests)} \\)")
+
+        return " ".join(parts)
+
+    def find_command(self) -> str:
+        """Commande find complète, depuis le dossier courant."""
+        return f"find . {self.expression()}"
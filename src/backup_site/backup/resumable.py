@@ -0,0 +1,280 @@
+"""Module de téléchargement reprenable des sauvegardes.
+
+Stratégie :
+- La commande de sauvegarde (tar, mysqldump) écrit d'abord dans un fichier
+  temporaire côté serveur ; sa taille et son sha256 sont relevés à la fin
+- Le client récupère ce fichier par plages via SFTP (`seek` + préchargement
+  de la plage seule, pour borner la mémoire quand le disque est plus lent
+  que le réseau) dans `{archive}.part`
+- Après chaque plage, les données sont synchronisées sur disque (`fsync`)
+  puis l'offset atteint est inscrit dans un journal `{archive}.journal`
+- Une nouvelle exécution relit le journal, vérifie que le fichier distant est
+  toujours là avec la même taille, tronque `.part` au dernier offset vérifié
+  et reprend à partir de là
+- À la fin, le sha256 local est comparé à celui du serveur avant de renommer
+  `.part` en archive et de supprimer le fichier distant ; il est consigné
+  dans `{archive}.checksum.json` (voir `integrity.py`)
+
+Flux :
+  SSH: commande > staging/fichier ; wc -c ; sha256sum
+  SFTP: seek(offset) → plages → .part (+ journal) → vérification → archive
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shlex
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import paramiko
+from paramiko.ssh_exception import SSHException
+
+from .integrity import ALGORITHMS, record_checksum
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STAGING_DIR = ".backup-site/staging"
+DEFAULT_RANGE_SIZE = 8 * 1024 * 1024
+READ_SIZE = 256 * 1024
+
+
+@dataclass
+class TransferJournal:
+    """État d'un téléchargement reprenable, persisté à côté de l'archive."""
+
+    remote_path: str
+    size: int
+    sha256: str
+    command_sha256: str
+    offset: int = 0
+
+    @staticmethod
+    def path_for(output_path: Path) -> Path:
+        return output_path.with_name(output_path.name + ".journal")
+
+    @classmethod
+    def load(cls, output_path: Path) -> Optional["TransferJournal"]:
+        """Relit le journal d'une archive (None s'il est absent ou illisible)."""
+        path = cls.path_for(output_path)
+        try:
+            return cls(**json.loads(path.read_text()))
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Journal de reprise illisible {path.name}: {e}")
+            return None
+
+    def save(self, output_path: Path) -> None:
+        """Écrit le journal de façon atomique."""
+        path = self.path_for(output_path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(self), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+
+def part_path(output_path: Path) -> Path:
+    """Fichier recevant les données en cours de téléchargement."""
+    return output_path.with_name(output_path.name + ".part")
+
+
+def find_interrupted(directory: Path, pattern: str = "*") -> List[Path]:
+    """Liste les archives dont le téléchargement a été interrompu.
+
+    Args:
+        directory: Dossier des sauvegardes
+        pattern: Motif du nom d'archive (ex: "backup_*.tar*")
+
+    Returns:
+        Chemins des archives à reprendre, les plus récentes en premier
+    """
+    journals = directory.glob(f"{pattern}.journal") if directory.exists() else []
+    outputs = [journal.with_name(journal.name[:-len(".journal")]) for journal in journals]
+    return sorted(outputs, key=lambda path: path.name, reverse=True)
+
+
+class ResumableDownload:
+    """Sauvegarde mise en attente sur le serveur puis récupérée par plages."""
+
+    def __init__(
+        self,
+        ssh_client: paramiko.SSHClient,
+        command: str,
+        output_path: Path,
+        staging_dir: str = DEFAULT_STAGING_DIR,
+        range_size: int = DEFAULT_RANGE_SIZE,
+        label: str = "La commande",
+    ):
+        """Initialise le téléchargement.
+
+        Args:
+            ssh_client: Client SSH Paramiko connecté
+            command: Commande produisant l'archive sur stdout
+            output_path: Archive locale finale
+            staging_dir: Dossier distant des fichiers temporaires (relatif au home)
+            range_size: Taille des plages entre deux points de reprise
+            label: Libellé utilisé dans les messages d'erreur
+        """
+        self.ssh_client = ssh_client
+        self.command = command
+        self.output_path = output_path
+        self.staging_dir = staging_dir.rstrip("/")
+        self.range_size = max(range_size, READ_SIZE)
+        self.label = label
+
+    @property
+    def command_sha256(self) -> str:
+        return hashlib.sha256(self.command.encode()).hexdigest()
+
+    def _run(self, command: str) -> str:
+        """Exécute une commande courte et renvoie sa sortie standard."""
+        stdin, stdout, stderr = self.ssh_client.exec_command(command)
+        output = stdout.read().decode("utf-8", errors="ignore")
+        stderr_output = stderr.read().decode("utf-8", errors="ignore").strip()
+        exit_status = stdout.channel.recv_exit_status()
+        if exit_status != 0:
+            raise SSHException(
+                f"{self.label} a échoué avec le code {exit_status}. "
+                f"Erreur: {stderr_output}"
+            )
+        return output
+
+    def stage(self) -> TransferJournal:
+        """Produit l'archive dans un fichier temporaire distant.
+
+        Returns:
+            Journal initial (taille et sha256 du fichier distant, offset 0)
+        """
+        remote_path = f"{self.staging_dir}/{self.output_path.name}"
+        quoted = shlex.quote(remote_path)
+        logger.info(f"Préparation de {remote_path} sur le serveur...")
+        output = self._run(
+            f"umask 077 && mkdir -p {shlex.quote(self.staging_dir)} && "
+            f"({self.command}) > {quoted}.tmp && mv {quoted}.tmp {quoted} && "
+            f"wc -c < {quoted} && sha256sum {quoted}"
+        )
+        lines = output.split()
+        try:
+            size, sha256 = int(lines[0]), lines[1]
+        except (IndexError, ValueError):
+            raise SSHException(f"Taille ou empreinte illisible pour {remote_path}: {output!r}")
+        return TransferJournal(
+            remote_path=remote_path,
+            size=size,
+            sha256=sha256,
+            command_sha256=self.command_sha256,
+        )
+
+    def _remote_size(self, remote_path: str) -> Optional[int]:
+        """Taille du fichier distant, ou None s'il n'existe plus."""
+        try:
+            output = self._run(f"wc -c < {shlex.quote(remote_path)}")
+        except SSHException:
+            return None
+        try:
+            return int(output.strip())
+        except ValueError:
+            return None
+
+    def _resume_journal(self) -> Optional[TransferJournal]:
+        """Renvoie le journal d'un téléchargement encore reprenable."""
+        journal = TransferJournal.load(self.output_path)
+        if journal is None:
+            return None
+        if journal.command_sha256 != self.command_sha256:
+            logger.info("Commande modifiée depuis l'interruption : nouvelle sauvegarde")
+            return None
+        if self._remote_size(journal.remote_path) != journal.size:
+            logger.info(f"{journal.remote_path} absent ou modifié : nouvelle sauvegarde")
+            return None
+        return journal
+
+    def _discard(self) -> None:
+        part_path(self.output_path).unlink(missing_ok=True)
+        TransferJournal.path_for(self.output_path).unlink(missing_ok=True)
+
+    def run(self) -> Tuple[int, bool]:
+        """Télécharge l'archive, en reprenant un transfert interrompu si possible.
+
+        Returns:
+            Tuple (taille_en_bytes, repris)
+
+        Raises:
+            SSHException: Si la commande distante échoue
+            IOError: Si l'archive reçue ne correspond pas au fichier distant
+        """
+        journal = self._resume_journal()
+        resumed = journal is not None
+        if journal is None:
+            self._discard()
+            journal = self.stage()
+            journal.save(self.output_path)
+
+        part = part_path(self.output_path)
+        part.parent.mkdir(parents=True, exist_ok=True)
+        hasher = hashlib.sha256()
+
+        with open(part, "a+b") as f:
+            # Les octets au-delà du dernier offset journalisé ne sont pas garantis
+            f.truncate(journal.offset)
+            f.seek(0)
+            remaining = journal.offset
+            while remaining:
+                data = f.read(min(READ_SIZE, remaining))
+                hasher.update(data)
+                remaining -= len(data)
+            if resumed:
+                logger.info(
+                    f"Reprise de {self.output_path.name} à "
+                    f"{journal.offset / 1024 / 1024:.1f}/{journal.size / 1024 / 1024:.1f} MB"
+                )
+
+            sftp = self.ssh_client.open_sftp()
+            try:
+                with sftp.open(journal.remote_path, "rb") as remote:
+                    while journal.offset < journal.size:
+                        end = min(journal.offset + self.range_size, journal.size)
+                        position = journal.offset
+                        # paramiko garde en mémoire tout ce qui est préchargé
+                        # jusqu'à sa lecture : une plage à la fois
+                        remote.seek(position)
+                        remote.prefetch(end)
+                        while position < end:
+                            data = remote.read(min(READ_SIZE, end - position))
+                            if not data:
+                                raise IOError(
+                                    f"{journal.remote_path} tronqué à {position} octets"
+                                )
+                            f.write(data)
+                            hasher.update(data)
+                            position += len(data)
+                        f.flush()
+                        os.fsync(f.fileno())
+                        journal.offset = position
+                        journal.save(self.output_path)
+            finally:
+                sftp.close()
+
+        if hasher.hexdigest() != journal.sha256:
+            self._discard()
+            raise IOError(
+                f"Empreinte différente pour {self.output_path.name} "
+                f"(attendu {journal.sha256}, reçu {hasher.hexdigest()})"
+            )
+
+        os.replace(part, self.output_path)
+        record_checksum(
+            self.output_path, ALGORITHMS["sha256"], journal.sha256, journal.size, journal.sha256
+        )
+        TransferJournal.path_for(self.output_path).unlink(missing_ok=True)
+        try:
+            self._run(f"rm -f {shlex.quote(journal.remote_path)}")
+        except SSHException as e:
+            logger.warning(f"Fichier temporaire distant non supprimé: {e}")
+
+        return journal.size, resumed
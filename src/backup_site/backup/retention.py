@@ -0,0 +1,322 @@
+"""Module de rétention et de purge des sauvegardes locales.
+
+Stratégie :
+- Nommage commun des sauvegardes : `{prefix}_{horodatage}.tar.*` pour les
+  fichiers, `{prefix}_database_{horodatage}.sql.*` (ou dossier pour un dump
+  parallèle) pour la base ; les anciens dumps `database_{horodatage}` sont
+  reconnus quel que soit le préfixe
+- Un seul parcours (`os.scandir`) du dossier de destination et de ses
+  sous-dossiers de sites construit l'index : chaque sauvegarde regroupe tous
+  ses fichiers (archive, shards, manifestes, empreintes)
+- Politique GFS : une sauvegarde est conservée si elle a moins de
+  `retention_days` jours, ou si elle est la plus récente de l'un des
+  `keep_daily` derniers jours, des `keep_weekly` dernières semaines ou des
+  `keep_monthly` derniers mois ; la plus récente est toujours conservée
+- Les bases d'une chaîne incrémentale conservée sont conservées ; une
+  sauvegarde en cours de téléchargement reprenable (journal) n'est jamais
+  supprimée
+- Suppression groupée à partir de l'index, sans relire le dossier
+
+Flux :
+  scandir(destination[/site]) → index (site, type, horodatage) → politique
+  → à supprimer → unlink / rmtree (ou simulation)
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+_NAME_PATTERN = re.compile(
+    r"^(?P<prefix>.+?)_(?:(?P<database>database)_)?"
+    r"(?P<timestamp>\d{8}_\d{6})(?P<suffix>(?:\..*)?)$"
+)
+
+
+def backup_stem(prefix: str, kind: str, timestamp: str) -> str:
+    """Nom de base (sans extension) d'une sauvegarde.
+
+    Exemple : backup_stem("blog", "database", "20240101_020000")
+    -> "blog_database_20240101_020000"
+    """
+    if kind == "database":
+        return f"{prefix}_database_{timestamp}"
+    return f"{prefix}_{timestamp}"
+
+
+def parse_backup_name(name: str) -> Optional[Tuple[Optional[str], str, datetime]]:
+    """Analyse un nom de fichier de sauvegarde.
+
+    Returns:
+        Tuple (préfixe ou None pour un ancien dump, type, horodatage), ou None
+        si le nom ne correspond pas à une sauvegarde
+    """
+    match = _NAME_PATTERN.match(name)
+    if not match:
+        return None
+    try:
+        timestamp = datetime.strptime(match["timestamp"], TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+    prefix = match["prefix"]
+    if match["database"]:
+        return prefix, "database", timestamp
+    if prefix == "database":
+        # Ancien nommage `database_{horodatage}`, antérieur au préfixe
+        return None, "database", timestamp
+    return prefix, "files", timestamp
+
+
+@dataclass
+class BackupEntry:
+    """Sauvegarde locale et l'ensemble des chemins qui la composent."""
+
+    site: str
+    kind: str
+    prefix: Optional[str]
+    timestamp: datetime
+    paths: List[Path] = field(default_factory=list)
+
+    @property
+    def in_progress(self) -> bool:
+        """Téléchargement reprenable pas encore terminé."""
+        return any(path.name.endswith((".journal", ".part")) for path in self.paths)
+
+    @property
+    def size(self) -> int:
+        total = 0
+        for path in self.paths:
+            if path.is_dir():
+                total += sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+            elif path.exists():
+                total += path.stat().st_size
+        return total
+
+    def parent_names(self) -> List[str]:
+        """Archives dont dépend cette sauvegarde (chaîne incrémentale)."""
+        parents = []
+        for path in self.paths:
+            if not path.name.endswith(".manifest.json"):
+                continue
+            try:
+                parent = json.loads(path.read_text()).get("parent")
+            except (OSError, ValueError):
+                continue
+            if parent:
+                parents.append(parent)
+        return parents
+
+
+@dataclass
+class RetentionPolicy:
+    """Règles de conservation (âge et rotation GFS)."""
+
+    days: int = 30
+    daily: int = 0
+    weekly: int = 0
+    monthly: int = 0
+
+    @classmethod
+    def from_config(cls, backup_config) -> "RetentionPolicy":
+        """Construit la politique depuis `BackupConfig`."""
+        return cls(
+            days=backup_config.retention_days,
+            daily=backup_config.keep_daily,
+            weekly=backup_config.keep_weekly,
+            monthly=backup_config.keep_monthly,
+        )
+
+    def select(self, entries: List[BackupEntry], now: Optional[datetime] = None) -> Set[int]:
+        """Indices des sauvegardes conservées parmi celles d'une même série.
+
+        Args:
+            entries: Sauvegardes d'un même site et d'un même type
+            now: Date de référence (défaut: maintenant)
+        """
+        now = now or datetime.now()
+        ordered = sorted(range(len(entries)), key=lambda i: entries[i].timestamp, reverse=True)
+        keep: Set[int] = set(ordered[:1])
+
+        limit = now - timedelta(days=self.days)
+        keep.update(i for i in ordered if entries[i].timestamp >= limit)
+
+        buckets = (
+            (self.daily, lambda t: t.date()),
+            (self.weekly, lambda t: tuple(t.isocalendar())[:2]),
+            (self.monthly, lambda t: (t.year, t.month)),
+        )
+        for count, bucket_of in buckets:
+            seen = set()
+            for i in ordered:
+                if len(seen) >= count:
+                    break
+                bucket = bucket_of(entries[i].timestamp)
+                if bucket not in seen:
+                    seen.add(bucket)
+                    keep.add(i)
+        return keep
+
+
+class BackupIndex:
+    """Index des sauvegardes d'un dossier de destination."""
+
+    def __init__(self, root: Path, entries: List[BackupEntry]):
+        self.root = root
+        self.entries = entries
+
+    @classmethod
+    def scan(cls, root: Path) -> "BackupIndex":
+        """Indexe `root` et ses sous-dossiers de sites en un seul parcours.
+
+        Les sauvegardes directement dans `root` ont un site vide ; celles de
+        `root/{site}/` (orchestrateur) portent le nom du dossier.
+        """
+        groups: Dict[Tuple[str, Optional[str], str, datetime], BackupEntry] = {}
+
+        def add(site: str, path: Path) -> None:
+            parsed = parse_backup_name(path.name)
+            if parsed is None:
+                return
+            prefix, kind, timestamp = parsed
+            key = (site, prefix, kind, timestamp)
+            entry = groups.get(key)
+            if entry is None:
+                entry = groups[key] = BackupEntry(site, kind, prefix, timestamp)
+            entry.paths.append(path)
+
+        if not root.is_dir():
+            return cls(root, [])
+
+        with os.scandir(root) as top:
+            for item in top:
+                if not item.is_dir(follow_symlinks=False):
+                    add("", Path(item.path))
+                elif parse_backup_name(item.name):
+                    # Dossier d'un dump parallèle
+                    add("", Path(item.path))
+                else:
+                    with os.scandir(item.path) as site_items:
+                        for site_item in site_items:
+                            add(item.name, Path(site_item.path))
+
+        entries = sorted(groups.values(), key=lambda e: (e.site, e.kind, e.timestamp))
+        return cls(root, entries)
+
+    def series(
+        self,
+        prefix: Optional[str] = None,
+        site: Optional[str] = None,
+    ) -> Dict[Tuple[str, str], List[BackupEntry]]:
+        """Regroupe les sauvegardes par (site, type).
+
+        Args:
+            prefix: Ne garde que ce préfixe (et les anciens dumps sans préfixe)
+            site: Ne garde que ce site
+        """
+        series: Dict[Tuple[str, str], List[BackupEntry]] = defaultdict(list)
+        for entry in self.entries:
+            if prefix is not None and entry.prefix not in (prefix, None):
+                continue
+            if site is not None and entry.site != site:
+                continue
+            series[(entry.site, entry.kind)].append(entry)
+        return series
+
+
+@dataclass
+class PruneResult:
+    """Résultat d'une purge."""
+
+    kept: List[BackupEntry] = field(default_factory=list)
+    removed: List[BackupEntry] = field(default_factory=list)
+    freed_bytes: int = 0
+    dry_run: bool = False
+
+
+def plan_prune(
+    index: BackupIndex,
+    policy: RetentionPolicy,
+    prefix: Optional[str] = None,
+    site: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> PruneResult:
+    """Détermine les sauvegardes à conserver et à supprimer."""
+    result = PruneResult()
+    for entries in index.series(prefix, site).values():
+        keep = policy.select(entries, now)
+
+        # Les bases des chaînes incrémentales conservées restent nécessaires
+        by_name = {path.name: i for i, entry in enumerate(entries) for path in entry.paths}
+        pending = list(keep)
+        while pending:
+            for parent in entries[pending.pop()].parent_names():
+                i = by_name.get(parent)
+                if i is not None and i not in keep:
+                    keep.add(i)
+                    pending.append(i)
+
+        for i, entry in enumerate(entries):
+            if i in keep or entry.in_progress:
+                result.kept.append(entry)
+            else:
+                result.removed.append(entry)
+    return result
+
+
+def prune(
+    root: Path,
+    policy: RetentionPolicy,
+    prefix: Optional[str] = None,
+    site: Optional[str] = None,
+    dry_run: bool = False,
+    now: Optional[datetime] = None,
+    catalog=None,
+) -> PruneResult:
+    """Applique la politique de rétention à un dossier de destination.
+
+    Args:
+        root: Dossier de destination des sauvegardes
+        policy: Règles de conservation
+        prefix: Préfixe des sauvegardes concernées
+        site: Ne purge que ce site (sous-dossier de l'orchestrateur)
+        dry_run: N'efface rien, renvoie seulement ce qui serait supprimé
+        now: Date de référence (défaut: maintenant)
+        catalog: Catalogue (`BackupCatalog`) dont les entrées supprimées sont
+            retirées en une seule transaction
+
+    Returns:
+        Sauvegardes conservées et supprimées, espace libéré
+    """
+    result = plan_prune(BackupIndex.scan(root), policy, prefix, site, now)
+    result.dry_run = dry_run
+
+    for entry in result.removed:
+        result.freed_bytes += entry.size
+        if dry_run:
+            continue
+        for path in entry.paths:
+            try:
+                if path.is_dir():
+                    shutil.rmtree(path)
+                else:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+        logger.info(f"Sauvegarde supprimée: {entry.site or '.'}/{entry.paths[0].name}")
+
+    if catalog is not None and result.removed and not dry_run:
+        catalog.remove(path for entry in result.removed for path in entry.paths)
+
+    return result
+
@@ -0,0 +1,179 @@
+"""Module de lecture en flux d'une commande de sauvegarde distante.
+
+Stratégie :
+- Expose la sortie standard d'une commande SSH comme un objet fichier
+  (`read`, `readinto`, itération par blocs) pour la brancher directement sur
+  un consommateur (stockage, calcul d'empreinte, chargeur Docker) en mémoire
+  constante
+- Contre-pression : tant que le consommateur ne lit pas, la fenêtre SSH du
+  canal n'est pas rouverte et le serveur suspend l'envoi
+- stderr est vidé par un thread dédié : une commande bavarde ne peut pas
+  bloquer la fenêtre partagée avec stdout
+- Le code de sortie et stderr sont vérifiés à la fin du flux (`close()` ou
+  sortie du bloc `with`)
+- Réglages de transfert optionnels : fenêtre SSH, priorité distante et seau
+  à jetons (régulé selon le RTT en mode adaptatif), comme `download_to_file`
+
+Flux :
+  SSH → tar/mysqldump | codec → RemoteStream → consommateur
+
+Exemple :
+  with file_backup.open_stream() as stream:
+      for chunk in stream.iter_chunks():
+          storage.write(chunk)
+  # SSHException levée ici si tar a échoué
+"""
+
+import io
+import logging
+import threading
+from contextlib import ExitStack
+from typing import Iterator, Optional, Tuple
+
+import paramiko
+from paramiko.ssh_exception import SSHException
+
+from .transfer import TransferSettings, channel_transport, exec_command, throttle
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+class RemoteStream(io.RawIOBase):
+    """Sortie standard d'une commande distante, lue en flux."""
+
+    def __init__(
+        self,
+        ssh_client: paramiko.SSHClient,
+        command: str,
+        label: str = "La commande",
+        ignored_warnings: Tuple[str, ...] = (),
+        settings: Optional[TransferSettings] = None,
+    ):
+        """Lance la commande distante.
+
+        Args:
+            ssh_client: Client SSH Paramiko connecté
+            command: Commande shell à exécuter
+            label: Libellé utilisé dans les messages d'erreur (ex: "La commande tar")
+            ignored_warnings: Messages stderr à ne pas journaliser
+            settings: Réglages du canal, priorité distante et débit
+        """
+        super().__init__()
+        self.command = command
+        self.label = label
+        self.ignored_warnings = ignored_warnings
+        self.bytes_read = 0
+        self.exit_status: Optional[int] = None
+        self.stderr_output = ""
+
+        logger.debug(f"Exécution de la commande: {command}")
+        self._stdin, self._stdout, self._stderr = exec_command(ssh_client, command, settings)
+
+        # Le seau (et son régulateur adaptatif) vit jusqu'à la fin du flux
+        self._throttle = ExitStack()
+        self._bucket = None
+        if settings is not None:
+            self._bucket = self._throttle.enter_context(
+                throttle(settings, channel_transport(self._stdout))
+            )
+
+        self._stderr_data = b""
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._stderr_thread.start()
+
+    def _drain_stderr(self) -> None:
+        """Lit stderr jusqu'à la fin de la commande."""
+        try:
+            self._stderr_data = self._stderr.read()
+        except Exception as e:
+            logger.debug(f"Lecture de stderr interrompue: {e}")
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        """Lit au plus `size` octets (tout le flux si `size` est négatif)."""
+        if size is None or size < 0:
+            data = self._stdout.read()
+        elif self._bucket is None:
+            data = self._stdout.read(size)
+        else:
+            data = self._stdout.read(self._bucket.read_size(size))
+        if self._bucket is not None:
+            self._bucket.consume(len(data))
+        self.bytes_read += len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        """Remplit `buffer` avec les prochains octets du flux."""
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Itère sur le flux par blocs d'au plus `chunk_size` octets."""
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self.iter_chunks()
+
+    def wait(self) -> int:
+        """Attend la fin de la commande et renvoie son code de sortie.
+
+        stderr est disponible dans `stderr_output` au retour.
+        """
+        if self.exit_status is None:
+            self._throttle.close()
+            self.exit_status = self._stdout.channel.recv_exit_status()
+            self._stderr_thread.join()
+            self.stderr_output = self._stderr_data.decode('utf-8', errors='ignore').strip()
+            if self.stderr_output and not any(
+                warning in self.stderr_output for warning in self.ignored_warnings
+            ):
+                logger.warning(f"Avertissements SSH: {self.stderr_output}")
+        return self.exit_status
+
+    def close(self) -> None:
+        """Attend la fin de la commande et vérifie son code de sortie.
+
+        Raises:
+            SSHException: Si la commande distante a échoué
+        """
+        if self.closed:
+            return
+        super().close()
+
+        if self.wait() != 0:
+            raise SSHException(
+                f"{self.label} a échoué avec le code {self.exit_status}. "
+                f"Erreur: {self.stderr_output}"
+            )
+
+    def abort(self) -> None:
+        """Interrompt la commande sans vérifier son code de sortie."""
+        if self.closed:
+            return
+        super().close()
+        self._throttle.close()
+        self._stdout.channel.close()
+
+    def __del__(self) -> None:
+        # Pas de vérification du code de sortie depuis le ramasse-miettes
+        try:
+            self.abort()
+        except Exception:
+            pass
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # En cas d'erreur côté consommateur, on coupe le canal au lieu
+        # d'attendre la fin d'une commande que plus personne ne lit
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
@@ -0,0 +1,268 @@
+"""Module de limitation du débit et de la priorité des sauvegardes.
+
+Stratégie :
+- Seau à jetons sur la boucle de réception : le lecteur ne lit plus le canal
+  SSH au-delà du débit fixé, la fenêtre SSH se referme et le `tar` /
+  `mysqldump` distant se bloque sur son écriture (contre-pression jusqu'au
+  serveur, sans rien mettre en mémoire)
+- Priorité distante : le shell de la commande abaisse sa propre priorité CPU
+  (`renice`) et disque (`ionice`) avant de lancer le pipeline ; tous les
+  processus du pipeline en héritent. Les outils absents (hébergement mutualisé,
+  BusyBox sans ionice) sont ignorés sans erreur
+- Mode adaptatif (AIMD) : le RTT est mesuré pendant le transfert par des
+  requêtes `keepalive@openssh.com` sur le Transport SSH ; quand il dépasse
+  nettement le RTT de base (file d'attente qui se remplit sur le lien du
+  serveur), le débit est réduit de 30 %, puis remonte par paliers tant que le
+  RTT reste normal
+
+Flux :
+  renice/ionice $$ ; find | tar  →  canal SSH  →  seau à jetons  →  disque
+                                         ↑ RTT keepalive → débit ajusté
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+IO_CLASSES = {
+    "default": None,
+    "best-effort": "-c 2 -n 7",
+    "idle": "-c 3",
+}
+
+# Plancher du mode adaptatif : le transfert ralentit mais ne s'arrête jamais
+MIN_ADAPTIVE_RATE = 64 * 1024
+PROBE_INTERVAL = 1.0
+RTT_FACTOR = 2.0
+# Écart minimal au RTT de base : évite de réagir à la gigue d'un lien local
+RTT_MARGIN = 0.02
+BACKOFF = 0.7
+
+
+def priority_prefix(nice: int = 0, io_class: str = "default") -> str:
+    """Préfixe shell abaissant la priorité du pipeline distant.
+
+    Args:
+        nice: Gentillesse CPU (0 = inchangée, 19 = la plus basse)
+        io_class: Classe d'E/S ionice (default, best-effort, idle)
+
+    Returns:
+        Préfixe à placer devant la commande (vide si rien à changer)
+    """
+    prefix = ""
+    if nice:
+        prefix += f"renice -n {nice} -p $$ >/dev/null 2>&1; "
+    io_args = IO_CLASSES[io_class]
+    if io_args:
+        prefix += f"ionice {io_args} -p $$ >/dev/null 2>&1; "
+    return prefix
+
+
+class TokenBucket:
+    """Seau à jetons partagé par les lecteurs d'un transfert (thread-safe)."""
+
+    def __init__(self, rate: Optional[float], burst: Optional[int] = None):
+        """Initialise le seau.
+
+        Args:
+            rate: Débit en octets/s (None = illimité)
+            burst: Capacité du seau (défaut: une seconde de débit)
+        """
+        self._lock = threading.Lock()
+        self._burst = burst
+        self.rate = rate
+        self.capacity = self._capacity(rate)
+        self.tokens = self.capacity
+        self.consumed = 0
+        self._updated = time.monotonic()
+        self._controller: Optional["AdaptiveThrottle"] = None
+        self._controlled = 0
+
+    def _capacity(self, rate: Optional[float]) -> float:
+        if rate is None:
+            return 0.0
+        return float(self._burst or max(rate, 1.0))
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate: Optional[float]) -> None:
+        """Change le débit (None = illimité) sans perdre la dette en cours."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            self.capacity = self._capacity(rate)
+            self.tokens = min(self.tokens, self.capacity)
+
+    def read_size(self, size: int) -> int:
+        """Taille de lecture adaptée au débit (environ 100 ms de transfert).
+
+        Un gros bloc lu d'un coup serait suivi d'une longue pause : le débit
+        moyen serait respecté, mais en rafales.
+        """
+        rate = self.rate
+        if rate is None:
+            return size
+        return max(min(size, int(rate / 10)), 4096)
+
+    def reserve(self, size: int) -> float:
+        """Consomme `size` octets et renvoie l'attente nécessaire (secondes).
+
+        Les jetons peuvent devenir négatifs : la lecture a déjà eu lieu, c'est
+        la suivante qui attend.
+        """
+        with self._lock:
+            self.consumed += size
+            if self.rate is None:
+                return 0.0
+            self._refill(time.monotonic())
+            self.tokens -= size
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def consume(self, size: int) -> None:
+        """Consomme `size` octets en attendant si le débit est dépassé."""
+        delay = self.reserve(size)
+        if delay > 0:
+            time.sleep(delay)
+
+    @contextmanager
+    def adaptive(
+        self, probe: Callable[[], Optional[float]], ceiling: Optional[float] = None
+    ) -> Iterator["TokenBucket"]:
+        """Régule le débit selon le RTT pendant le bloc `with`.
+
+        Les transferts simultanés d'une même sauvegarde (shards, tables)
+        partagent le seau : un seul régulateur tourne, démarré par le premier
+        transfert et arrêté avec le dernier.
+        """
+        with self._lock:
+            self._controlled += 1
+            if self._controller is None:
+                self._controller = AdaptiveThrottle(self, probe, ceiling).start()
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._controlled -= 1
+                if not self._controlled and self._controller is not None:
+                    self._controller.stop()
+                    self._controller = None
+
+
+def measure_rtt(transport: Any) -> Optional[float]:
+    """Mesure un aller-retour sur le Transport SSH.
+
+    OpenSSH répond (par un refus) à `keepalive@openssh.com` : la réponse
+    emprunte la même connexion TCP que les données, le RTT mesuré inclut
+    donc l'attente dans les files du lien.
+
+    Returns:
+        Durée en secondes, ou None si le Transport est fermé
+    """
+    started = time.monotonic()
+    try:
+        transport.global_request("keepalive@openssh.com", wait=True)
+    except Exception as e:
+        logger.debug(f"Mesure du RTT impossible: {e}")
+        return None
+    if not transport.is_active():
+        return None
+    return time.monotonic() - started
+
+
+class AdaptiveThrottle:
+    """Ajuste le débit d'un seau à jetons selon le RTT observé.
+
+    Un thread de sonde mesure le RTT toutes les `interval` secondes, entre
+    `start()` et `stop()` (voir `TokenBucket.adaptive`).
+    """
+
+    def __init__(
+        self,
+        bucket: TokenBucket,
+        probe: Callable[[], Optional[float]],
+        ceiling: Optional[float] = None,
+        interval: float = PROBE_INTERVAL,
+    ):
+        """Initialise le régulateur.
+
+        Args:
+            bucket: Seau à jetons du transfert
+            probe: Mesure d'un RTT (secondes, None si impossible)
+            ceiling: Débit maximal (octets/s, None = illimité)
+            interval: Intervalle entre deux mesures (secondes)
+        """
+        self.bucket = bucket
+        self.probe = probe
+        self.ceiling = ceiling
+        self.interval = interval
+        self.baseline: Optional[float] = None
+        self._step = ceiling / 10 if ceiling else None
+        self._consumed = bucket.consumed
+        self._sampled = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def observe(self, rtt: float) -> Optional[float]:
+        """Prend en compte une mesure et renvoie le nouveau débit.
+
+        Returns:
+            Débit appliqué au seau (None = illimité)
+        """
+        now = time.monotonic()
+        elapsed = max(now - self._sampled, 1e-6)
+        throughput = (self.bucket.consumed - self._consumed) / elapsed
+        self._consumed, self._sampled = self.bucket.consumed, now
+
+        if self.baseline is None or rtt < self.baseline:
+            self.baseline = rtt
+        rate = self.bucket.rate
+        congested = rtt > self.baseline * RTT_FACTOR and rtt - self.baseline > RTT_MARGIN
+
+        if congested:
+            current = rate if rate is not None else throughput
+            rate = max(current * BACKOFF, MIN_ADAPTIVE_RATE)
+            if self._step is None:
+                self._step = max(rate / 10, MIN_ADAPTIVE_RATE)
+            logger.debug(
+                f"RTT {rtt * 1000:.0f} ms (base {self.baseline * 1000:.0f} ms): "
+                f"débit réduit à {rate / 1024:.0f} KB/s"
+            )
+        elif rate is not None and rate != self.ceiling:
+            rate += self._step
+            if self.ceiling is not None:
+                rate = min(rate, self.ceiling)
+            elif rate > throughput * 2:
+                # Le débit fixé ne limite plus rien : retour à l'illimité
+                rate = None
+        else:
+            return rate
+
+        self.bucket.set_rate(rate)
+        return rate
+
+    def _run(self) -> None:
+        # Première mesure dès le démarrage : elle fixe le RTT de base
+        rtt = self.probe()
+        while rtt is not None:
+            self.observe(rtt)
+            if self._stop.wait(self.interval):
+                return
+            rtt = self.probe()
+
+    def start(self) -> "AdaptiveThrottle":
+        """Lance le thread de sonde."""
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Arrête la sonde (la mesure en cours se termine d'elle-même)."""
+        self._stop.set()
@@ -0,0 +1,312 @@
+"""Module de téléchargement pipeliné des flux SSH vers le disque.
+
+Stratégie :
+- Un thread lecteur remplit une file bornée de gros blocs depuis le canal SSH
+  pendant que le thread appelant les écrit sur le disque : réception réseau
+  et écriture disque se recouvrent au lieu de s'alterner
+- La file bornée (profondeur × taille de bloc) plafonne la mémoire utilisée ;
+  quand le disque est plus lent que le réseau, le lecteur se bloque et la
+  fenêtre SSH se referme (contre-pression)
+- Préallocation optionnelle du fichier par extents (`posix_fallocate`) pour
+  limiter la fragmentation des grosses archives
+- Fenêtre et taille de paquet du canal réglables (`Transport.open_session`) :
+  la fenêtre par défaut de paramiko (2 MB) bride le débit dès que la latence
+  augmente
+
+- Débit et priorité distante optionnels (voir `throttle.py`) : seau à jetons
+  partagé par les canaux d'une même sauvegarde, régulé selon le RTT en mode
+  adaptatif, et pipeline distant lancé sous `renice`/`ionice`
+
+O_DIRECT n'est pas utilisé : il impose des tampons et des tailles alignés que
+les lectures SSH ne garantissent pas, pour un gain nul sur un flux séquentiel
+déjà absorbé par le cache de pages.
+"""
+
+import io
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional, Tuple
+
+import paramiko
+
+from .throttle import TokenBucket, measure_rtt, priority_prefix
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+DEFAULT_QUEUE_DEPTH = 8
+
+
+@dataclass
+class TransferSettings:
+    """Réglages du téléchargement des flux SSH."""
+
+    buffer_size: int = DEFAULT_BUFFER_SIZE
+    queue_depth: int = DEFAULT_QUEUE_DEPTH
+    window_size: Optional[int] = None
+    max_packet_size: Optional[int] = None
+    preallocate_extent: int = 0
+    rate_limit: Optional[int] = None
+    adaptive: bool = False
+    nice: int = 0
+    io_class: str = "default"
+    # Partagé par les copies (`dataclasses.replace`) : les canaux simultanés
+    # d'une sauvegarde se répartissent le même débit
+    bucket: Optional[TokenBucket] = field(default=None, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.bucket is None and (self.rate_limit or self.adaptive):
+            self.bucket = TokenBucket(self.rate_limit or None)
+
+    def prioritize(self, command: str) -> str:
+        """Préfixe la commande pour abaisser sa priorité CPU et disque distante."""
+        return priority_prefix(self.nice, self.io_class) + command
+
+    @classmethod
+    def from_config(cls, backup_config: Any) -> "TransferSettings":
+        """Construit les réglages depuis `BackupConfig`."""
+        return cls(
+            buffer_size=backup_config.transfer_buffer_kb * 1024,
+            queue_depth=backup_config.transfer_queue_depth,
+            window_size=(
+                backup_config.ssh_window_mb * 1024 * 1024
+                if backup_config.ssh_window_mb else None
+            ),
+            max_packet_size=(
+                backup_config.ssh_max_packet_kb * 1024
+                if backup_config.ssh_max_packet_kb else None
+            ),
+            preallocate_extent=backup_config.preallocate_mb * 1024 * 1024,
+            rate_limit=(
+                backup_config.bandwidth_limit_kb * 1024
+                if backup_config.bandwidth_limit_kb else None
+            ),
+            adaptive=backup_config.adaptive_bandwidth,
+            nice=backup_config.remote_nice,
+            io_class=backup_config.remote_io_class,
+        )
+
+
+DEFAULT_TRANSFER = TransferSettings()
+
+
+def exec_command(
+    ssh_client: paramiko.SSHClient,
+    command: str,
+    settings: Optional[TransferSettings] = None,
+) -> Tuple[Any, Any, Any]:
+    """Exécute une commande distante, avec fenêtre et paquets réglés si demandé.
+
+    La commande est lancée avec la priorité distante des réglages.
+
+    Args:
+        ssh_client: Client SSH Paramiko connecté
+        command: Commande shell à exécuter
+        settings: Réglages du canal (défaut de paramiko si non précisés)
+
+    Returns:
+        Tuple (stdin, stdout, stderr) comme `SSHClient.exec_command`
+    """
+    if settings is not None:
+        command = settings.prioritize(command)
+    if settings is None or (settings.window_size is None and settings.max_packet_size is None):
+        return ssh_client.exec_command(command)
+
+    channel = ssh_client.get_transport().open_session(
+        window_size=settings.window_size,
+        max_packet_size=settings.max_packet_size,
+    )
+    channel.exec_command(command)
+    return (
+        channel.makefile_stdin("wb"),
+        channel.makefile("rb"),
+        channel.makefile_stderr("rb"),
+    )
+
+
+@contextmanager
+def throttle(settings: TransferSettings, transport: Any) -> Iterator[Optional[TokenBucket]]:
+    """Seau à jetons du transfert, régulé selon le RTT en mode adaptatif.
+
+    Args:
+        settings: Réglages du transfert
+        transport: Transport SSH sondé en mode adaptatif (None = pas de sonde)
+
+    Yields:
+        Seau à consommer à chaque lecture, ou None si le débit est libre
+    """
+    bucket = settings.bucket
+    if bucket is None or not settings.adaptive or transport is None:
+        yield bucket
+        return
+    with bucket.adaptive(lambda: measure_rtt(transport), settings.rate_limit):
+        yield bucket
+
+
+def channel_transport(reader: Any) -> Any:
+    """Transport SSH d'un flux de canal paramiko (None pour un autre flux)."""
+    channel = getattr(reader, "channel", None)
+    if not isinstance(channel, paramiko.Channel):
+        return None
+    return channel.get_transport()
+
+
+class ThrottledReader(io.RawIOBase):
+    """Flux lu sous le débit d'un seau à jetons (voir `throttle`)."""
+
+    def __init__(self, reader: BinaryIO, bucket: Optional[TokenBucket]):
+        """Enveloppe un flux.
+
+        Args:
+            reader: Flux à lire (stdout d'une commande SSH)
+            bucket: Seau consommé à chaque lecture (None = débit libre)
+        """
+        super().__init__()
+        self._reader = reader
+        self._bucket = bucket
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = len(buffer)
+        if self._bucket is not None:
+            size = self._bucket.read_size(size)
+        data = self._reader.read(size)
+        if self._bucket is not None:
+            self._bucket.consume(len(data))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+_END = object()
+
+
+def download_to_file(
+    reader: BinaryIO,
+    output_path: Path,
+    settings: Optional[TransferSettings] = None,
+    hasher: Optional[Any] = None,
+) -> int:
+    """Copie un flux dans un fichier avec lecture et écriture recouvertes.
+
+    Args:
+        reader: Flux à lire (stdout d'une commande SSH)
+        output_path: Fichier local de destination
+        settings: Taille des blocs, profondeur de file, préallocation, débit
+        hasher: Objet de hachage (interface hashlib) mis à jour au fil de
+            l'écriture, sans relecture du fichier
+
+    Returns:
+        Nombre d'octets écrits
+
+    Raises:
+        IOError: Si l'écriture échoue
+        Exception: L'erreur de lecture du flux, relancée dans l'appelant
+    """
+    settings = settings or DEFAULT_TRANSFER
+    chunks: "queue.Queue[Any]" = queue.Queue(maxsize=max(settings.queue_depth, 1))
+    stop = threading.Event()
+
+    def put(item: Any) -> None:
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def read_loop() -> None:
+        try:
+            with throttle(settings, channel_transport(reader)) as bucket:
+                while not stop.is_set():
+                    if bucket is None:
+                        chunk = reader.read(settings.buffer_size)
+                    else:
+                        chunk = reader.read(bucket.read_size(settings.buffer_size))
+                        bucket.consume(len(chunk))
+                    if not chunk:
+                        break
+                    put(chunk)
+        except Exception as e:
+            put(e)
+            return
+        put(_END)
+
+    reader_thread = threading.Thread(target=read_loop, daemon=True)
+    started = time.monotonic()
+    reader_thread.start()
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    bytes_written = 0
+    allocated = 0
+    extent = settings.preallocate_extent
+    try:
+        with open(output_path, "wb") as f:
+            while True:
+                item = chunks.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+
+                if extent and bytes_written + len(item) > allocated:
+                    target = _preallocate(f, allocated, bytes_written + len(item), extent)
+                    if target is None:
+                        extent = 0
+                    else:
+                        allocated = target
+
+                f.write(item)
+                if hasher is not None:
+                    hasher.update(item)
+                bytes_written += len(item)
+
+            if allocated > bytes_written:
+                f.truncate(bytes_written)
+    except BaseException:
+        # Écriture impossible (disque plein, erreur d'E/S) : le lecteur peut
+        # rester bloqué dans une lecture SSH pendant que la commande distante
+        # continue, le canal est donc fermé
+        channel = getattr(reader, "channel", None)
+        if channel is not None:
+            channel.close()
+        raise
+    finally:
+        # Débloque le lecteur s'il attend une place dans la file ; une lecture
+        # SSH en cours se termine d'elle-même (thread démon)
+        stop.set()
+    reader_thread.join()
+
+    elapsed = time.monotonic() - started
+    if elapsed > 0:
+        logger.debug(
+            f"{output_path.name}: {bytes_written} octets en {elapsed:.2f}s "
+            f"({bytes_written / elapsed / 1024 / 1024:.1f} MB/s)"
+        )
+    return bytes_written
+
+
+def _preallocate(f: BinaryIO, allocated: int, needed: int, extent: int) -> Optional[int]:
+    """Réserve les extents suivants du fichier.
+
+    Returns:
+        Nouvelle taille allouée, ou None si la préallocation n'est pas supportée
+    """
+    if not hasattr(os, "posix_fallocate"):
+        return None
+    target = allocated
+    while target < needed:
+        target += extent
+    try:
+        os.posix_fallocate(f.fileno(), allocated, target - allocated)
+    except OSError as e:
+        logger.debug(f"Préallocation impossible: {e}")
+        return None
+    return target
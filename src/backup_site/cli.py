@@ -1,6 +1,8 @@
 """Interface en ligne de commande pour Backup Site."""
 
+import asyncio
 import sys
+import time
 from pathlib import Path
 from typing import Optional
 
@@ -9,6 +11,8 @@ from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 
+from backup_site.utils.ssh import SSHConnectionPool
+
 # Configuration du logger
 import logging
 logging.basicConfig(
@@ -32,6 +36,47 @@ def print_success(message: str) -> None:
     console.print(f"[bold green]✓[/] {message}")
 
 
+# Connexions SSH partagées par les étapes d'une même commande
+ssh_pool = SSHConnectionPool()
+
+
+def connect(ssh_config, passphrase: Optional[str]):
+    """Ouvre (ou réutilise) la connexion SSH d'un site via le pool."""
+    console.print(f"[cyan]Connexion à {ssh_config.host}:{ssh_config.port}...[/]")
+    try:
+        ssh_client, handshake = ssh_pool.get(
+            ssh_config.host,
+            ssh_config.user,
+            ssh_config.private_key_path,
+            port=ssh_config.port,
+            passphrase=passphrase,
+        )
+    except Exception as e:
+        print_error(f"Impossible de se connecter: {e}")
+    print_success(f"Connexion SSH établie ({handshake:.2f}s)")
+    return ssh_client
+
+
+def auto_prune(backup_config, directory: Path) -> None:
+    """Applique la rétention du site après une sauvegarde réussie."""
+    if not backup_config.auto_prune:
+        return
+    from backup_site.backup.catalog import BackupCatalog
+    from backup_site.backup.retention import RetentionPolicy, prune
+    
+    result = prune(
+        directory,
+        RetentionPolicy.from_config(backup_config),
+        prefix=backup_config.prefix,
+        catalog=BackupCatalog.open(directory),
+    )
+    if result.removed:
+        console.print(
+            f"[dim]Rétention: {len(result.removed)} sauvegarde(s) supprimée(s), "
+            f"{result.freed_bytes / 1024 / 1024:.2f} MB libérés[/]"
+        )
+
+
 @click.group()
 @click.version_option()
 @click.option('--verbose', '-v', is_flag=True, help="Active les logs détaillés")
@@ -144,7 +189,7 @@ def validate(config_file: str, show_secrets: bool) -> None:
         backup = config.backup
         backup_info = f"""
         Destination: {backup.destination}
-        Compression: {backup.compression}
+        Compression: {backup.compression} (niveau: {backup.compression_level or 'défaut'}, threads: {backup.compression_threads or 'défaut'})
         Rétention: {backup.retention_days} jours
         """.strip()
         table.add_row("Sauvegarde", backup_info)
@@ -156,6 +201,42 @@ def validate(config_file: str, show_secrets: bool) -> None:
         print_error(f"Configuration invalide: {e}")
 
 
+@config.command()
+@click.argument('config_file', type=click.Path(exists=True, dir_okay=False, readable=True))
+@click.option('--manifest', '-m', type=click.Path(exists=True, dir_okay=False, readable=True),
+              default=None, help="Manifeste (*.manifest.json) sur lequel évaluer les motifs")
+def patterns(config_file: str, manifest: Optional[str]) -> None:
+    """Affiche la commande find compilée depuis les motifs de fichiers.
+    
+    Avec --manifest, les motifs sont aussi évalués localement sur les fichiers
+    d'une sauvegarde incrémentale, sans connexion SSH.
+    """
+    from backup_site.backup.incremental import FileManifest
+    from backup_site.backup.patterns import PatternMatcher
+    from backup_site.config import load_config
+    
+    try:
+        config = load_config(Path(config_file))
+        matcher = PatternMatcher.compile(
+            config.files.include_patterns, config.files.exclude_patterns
+        )
+        console.print(Panel(matcher.find_command(), title="Commande find", border_style="blue"))
+        for pattern in matcher.inexact:
+            console.print(f"[yellow]⚠ Traduction find approchée pour le motif {pattern!r}[/]")
+        
+        if manifest:
+            entries = FileManifest.load(Path(manifest)).entries
+            selected = matcher.filter(entries)
+            selected_size = sum(entries[path].size for path in selected)
+            console.print(
+                f"[dim]{len(selected)}/{len(entries)} fichier(s) retenu(s), "
+                f"{selected_size / 1024 / 1024:.2f} MB[/]"
+            )
+        
+    except Exception as e:
+        print_error(f"Erreur lors de la compilation des motifs: {e}")
+
+
 @main.group()
 def backup() -> None:
     """Gestion des sauvegardes."""
@@ -165,19 +246,52 @@ def backup() -> None:
 @backup.command()
 @click.argument('config_file', type=click.Path(exists=True, dir_okay=False, readable=True))
 @click.option('--output', '-o', type=click.Path(dir_okay=False, writable=True),
-              help="Chemin de sortie de l'archive (par défaut: backups/backup-{timestamp}.tar.gz)")
+              help="Chemin de sortie de l'archive (par défaut: backups/backup-{timestamp}.tar.{ext})")
 @click.option('--passphrase', prompt=False, hide_input=True, default=None,
               help="Passphrase de la clé SSH (si elle en a une)")
-def files(config_file: str, output: Optional[str], passphrase: Optional[str]) -> None:
+@click.option('--incremental', is_flag=True,
+              help="N'archive que les fichiers modifiés depuis la dernière sauvegarde")
+@click.option('--hash', 'with_hash', is_flag=True,
+              help="Compare les fichiers par sha256 (mode incrémental, plus lent)")
+@click.option('--repository', is_flag=True,
+              help="Stocke la sauvegarde dans le dépôt dédupliqué ({destination}/repository)")
+@click.option('--shards', type=click.IntRange(1, 32), default=None,
+              help="Nombre d'archives produites en parallèle (défaut: files.shards)")
+@click.option('--resumable', is_flag=True,
+              help="Prépare l'archive sur le serveur et reprend un téléchargement interrompu")
+@click.option('--estimate', is_flag=True,
+              help="Estime le volume à sauvegarder (fichiers, taille, plus gros dossiers) sans sauvegarder")
+@click.option('--top', type=click.IntRange(1, 100), default=10,
+              help="Nombre de dossiers affichés avec --estimate")
+def files(config_file: str, output: Optional[str], passphrase: Optional[str],
+          incremental: bool, with_hash: bool, repository: bool,
+          shards: Optional[int], resumable: bool, estimate: bool, top: int) -> None:
     """Sauvegarde les fichiers d'un site web.
     
     CONFIG_FILE est le chemin vers le fichier de configuration
     """
     from datetime import datetime
     from backup_site.config import load_config
-    from backup_site.utils.ssh import SSHKeyValidator
     from backup_site.backup.files import FileBackup
-    import paramiko
+    from backup_site.backup.compression import resolve_compression
+    from backup_site.backup.catalog import BackupCatalog
+    from backup_site.backup.resumable import find_interrupted
+    from backup_site.backup.retention import backup_stem
+    from backup_site.backup.transfer import TransferSettings
+    
+    # Un seul mode de sauvegarde : les autres options seraient ignorées
+    modes = [
+        name for name, enabled in (
+            ("--incremental", incremental),
+            ("--repository", repository),
+            ("--resumable", resumable),
+            ("--shards", shards is not None and shards > 1),
+        ) if enabled
+    ]
+    if len(modes) > 1:
+        raise click.UsageError(f"Options incompatibles: {' et '.join(modes)}")
+    if with_hash and not incremental:
+        raise click.UsageError("--hash ne s'utilise qu'avec --incremental")
     
     try:
         # Charge la configuration
@@ -187,27 +301,19 @@ def files(config_file: str, output: Optional[str], passphrase: Optional[str]) ->
         files_config = config.files
         backup_config = config.backup
         
-        # Valide les clés SSH
-        console.print("[cyan]Validation des clés SSH...[/]")
-        SSHKeyValidator.validate_key_file(ssh_config.private_key_path, "private")
+        # Établit la connexion SSH (clé validée et chargée par le pool)
+        ssh_client = connect(ssh_config, passphrase)
         
-        # Établit la connexion SSH
-        console.print(f"[cyan]Connexion à {ssh_config.host}:{ssh_config.port}...[/]")
-        ssh_client = paramiko.SSHClient()
-        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        # Catalogue des sauvegardes du dossier de destination
+        catalog = BackupCatalog.open(Path(backup_config.destination))
         
-        try:
-            key = SSHKeyValidator.load_private_key(ssh_config.private_key_path, passphrase)
-            ssh_client.connect(
-                hostname=ssh_config.host,
-                port=ssh_config.port,
-                username=ssh_config.user,
-                pkey=key,
-                timeout=30
-            )
-            print_success("Connexion SSH établie")
-        except Exception as e:
-            print_error(f"Impossible de se connecter: {e}")
+        # Choisit le codec disponible sur le serveur
+        compression = resolve_compression(
+            ssh_client,
+            backup_config.compression,
+            level=backup_config.compression_level,
+            threads=backup_config.compression_threads,
+        )
         
         # Crée le gestionnaire de sauvegarde
         file_backup = FileBackup(
@@ -215,6 +321,9 @@ def files(config_file: str, output: Optional[str], passphrase: Optional[str]) ->
             remote_path=str(files_config.remote_path),
             include_patterns=files_config.include_patterns,
             exclude_patterns=files_config.exclude_patterns,
+            compression=compression,
+            transfer=TransferSettings.from_config(backup_config),
+            catalog=catalog.for_site(config.site['name']),
         )
         
         # Détermine le chemin de sortie
@@ -223,7 +332,13 @@ def files(config_file: str, output: Optional[str], passphrase: Optional[str]) ->
         else:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_dir = Path(backup_config.destination)
-            output_path = backup_dir / f"backup_{timestamp}.tar.gz"
+            stem = backup_stem(backup_config.prefix, "files", timestamp)
+            output_path = backup_dir / f"{stem}.tar{compression.extension}"
+            if resumable:
+                interrupted = find_interrupted(backup_dir, f"{backup_config.prefix}_[0-9]*")
+                if interrupted:
+                    output_path = interrupted[0]
+                    console.print(f"[yellow]Reprise du téléchargement interrompu: {output_path.name}[/]")
         
         # Lance la sauvegarde
         console.print(f"\n[cyan]Sauvegarde des fichiers...[/]")
@@ -231,38 +346,113 @@ def files(config_file: str, output: Optional[str], passphrase: Optional[str]) ->
         console.print(f"[dim]Patterns d'inclusion: {len(files_config.include_patterns)}[/]")
         console.print(f"[dim]Patterns d'exclusion: {len(files_config.exclude_patterns)}[/]")
         
-        success, message, bytes_written = file_backup.backup_to_file(output_path)
+        if estimate:
+            result = file_backup.estimate(top=top)
+            table = Table(title="Dossiers les plus volumineux")
+            table.add_column("Dossier", style="cyan")
+            table.add_column("Fichiers", justify="right")
+            table.add_column("Taille (MB)", justify="right")
+            for directory in result.directories:
+                table.add_row(
+                    directory.path, str(directory.files),
+                    f"{directory.bytes / 1024 / 1024:.2f}",
+                )
+            console.print(table)
+            console.print(
+                f"[green]{result.files} fichier(s), "
+                f"{result.bytes / 1024 / 1024:.2f} MB avant compression[/]"
+            )
+            return
+        
+        if repository:
+            from backup_site.backup.chunkstore import ChunkRepository
+            
+            repo = ChunkRepository.open(
+                Path(backup_config.destination) / "repository", create=True
+            )
+            success, message, bytes_written = file_backup.backup_to_repository(
+                repo, name=config.site['name']
+            )
+            if success:
+                console.print(f"\n{message}")
+            return
+        
+        if incremental:
+            from backup_site.backup.incremental import find_latest_manifest
+            
+            previous_manifest = find_latest_manifest(output_path.parent)
+            if previous_manifest:
+                console.print(f"[dim]Base incrémentale: {previous_manifest.name}[/]")
+            else:
+                console.print("[dim]Aucun manifeste précédent: sauvegarde complète[/]")
+            
+            success, message, bytes_written = file_backup.backup_incremental(
+                output_path,
+                previous_manifest_path=previous_manifest,
+                with_hash=with_hash,
+                checksum=backup_config.checksum_algorithm,
+            )
+        else:
+            # files.shards s'applique par défaut, sauf mode demandé explicitement
+            shards = shards or (1 if resumable else files_config.shards)
+            if shards > 1:
+                console.print(f"[dim]Shards parallèles: {shards}[/]")
+                success, message, bytes_written = file_backup.backup_to_shards(
+                    output_path, shards, checksum=backup_config.checksum_algorithm
+                )
+            elif resumable:
+                success, message, bytes_written = file_backup.backup_resumable(
+                    output_path, staging_dir=backup_config.remote_staging_dir
+                )
+            else:
+                success, message, bytes_written = file_backup.backup_to_file(
+                    output_path, checksum=backup_config.checksum_algorithm
+                )
         
         if success:
             console.print(f"\n{message}")
-            console.print(f"[green]Archive créée: {output_path}[/]")
+            console.print(f"[green]Sauvegarde créée dans: {output_path.parent}[/]")
+            if not output:
+                auto_prune(backup_config, output_path.parent)
         
     except Exception as e:
         print_error(f"Erreur lors de la sauvegarde: {e}")
     finally:
         # Ferme la connexion SSH
-        try:
-            ssh_client.close()
-        except:
-            pass
+        ssh_pool.close_all()
 
 
 @backup.command()
 @click.argument('config_file', type=click.Path(exists=True, dir_okay=False, readable=True))
 @click.option('--output', '-o', type=click.Path(dir_okay=False, writable=True),
-              help="Chemin de sortie du dump (par défaut: backups/database-{timestamp}.sql.gz)")
+              help="Chemin de sortie du dump (par défaut: backups/database-{timestamp}.sql.{ext})")
 @click.option('--passphrase', prompt=False, hide_input=True, default=None,
               help="Passphrase de la clé SSH (si elle en a une)")
-def database(config_file: str, output: Optional[str], passphrase: Optional[str]) -> None:
+@click.option('--repository', is_flag=True,
+              help="Stocke le dump dans le dépôt dédupliqué ({destination}/repository)")
+@click.option('--parallel', '-j', type=click.IntRange(1, 32), default=None,
+              help="Export table par table en parallèle (défaut: database.parallel_jobs)")
+@click.option('--resumable', is_flag=True,
+              help="Prépare le dump sur le serveur et reprend un téléchargement interrompu")
+@click.option('--estimate', is_flag=True,
+              help="Estime la taille du dump (information_schema) sans sauvegarder")
+@click.option('--top', type=click.IntRange(1, 100), default=10,
+              help="Nombre de tables affichées avec --estimate")
+def database(config_file: str, output: Optional[str], passphrase: Optional[str],
+             repository: bool, parallel: Optional[int], resumable: bool,
+             estimate: bool, top: int) -> None:
     """Sauvegarde la base de données MySQL.
     
     CONFIG_FILE est le chemin vers le fichier de configuration
     """
     from datetime import datetime
     from backup_site.config import load_config
-    from backup_site.utils.ssh import SSHKeyValidator
     from backup_site.backup.database import DatabaseBackup
-    import paramiko
+    from backup_site.backup.compression import resolve_compression
+    from backup_site.backup.catalog import BackupCatalog
+    from backup_site.backup.resumable import find_interrupted
+    from backup_site.backup.retention import backup_stem
+    from backup_site.backup.transfer import TransferSettings
     
     try:
         # Charge la configuration
@@ -272,27 +462,19 @@ def database(config_file: str, output: Optional[str], passphrase: Optional[str])
         db_config = config.database
         backup_config = config.backup
         
-        # Valide les clés SSH
-        console.print("[cyan]Validation des clés SSH...[/]")
-        SSHKeyValidator.validate_key_file(ssh_config.private_key_path, "private")
+        # Établit la connexion SSH (clé validée et chargée par le pool)
+        ssh_client = connect(ssh_config, passphrase)
         
-        # Établit la connexion SSH
-        console.print(f"[cyan]Connexion à {ssh_config.host}:{ssh_config.port}...[/]")
-        ssh_client = paramiko.SSHClient()
-        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        # Catalogue des sauvegardes du dossier de destination
+        catalog = BackupCatalog.open(Path(backup_config.destination))
         
-        try:
-            key = SSHKeyValidator.load_private_key(ssh_config.private_key_path, passphrase)
-            ssh_client.connect(
-                hostname=ssh_config.host,
-                port=ssh_config.port,
-                username=ssh_config.user,
-                pkey=key,
-                timeout=30
-            )
-            print_success("Connexion SSH établie")
-        except Exception as e:
-            print_error(f"Impossible de se connecter: {e}")
+        # Choisit le codec disponible sur le serveur
+        compression = resolve_compression(
+            ssh_client,
+            backup_config.compression,
+            level=backup_config.compression_level,
+            threads=backup_config.compression_threads,
+        )
         
         # Crée le gestionnaire de sauvegarde BDD
         db_backup = DatabaseBackup(
@@ -304,6 +486,9 @@ def database(config_file: str, output: Optional[str], passphrase: Optional[str])
             db_password=db_config.password.get_secret_value(),
             compress=True,
             ssl_enabled=False,
+            compression=compression,
+            transfer=TransferSettings.from_config(backup_config),
+            catalog=catalog.for_site(config.site['name']),
         )
         
         # Détermine le chemin de sortie
@@ -312,7 +497,13 @@ def database(config_file: str, output: Optional[str], passphrase: Optional[str])
         else:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_dir = Path(backup_config.destination)
-            output_path = backup_dir / f"database_{timestamp}.sql.gz"
+            stem = backup_stem(backup_config.prefix, "database", timestamp)
+            output_path = backup_dir / f"{stem}.sql{compression.extension}"
+            if resumable:
+                interrupted = find_interrupted(backup_dir, f"{backup_config.prefix}_database_*")
+                if interrupted:
+                    output_path = interrupted[0]
+                    console.print(f"[yellow]Reprise du téléchargement interrompu: {output_path.name}[/]")
         
         # Lance la sauvegarde
         console.print(f"\n[cyan]Sauvegarde de la base de données...[/]")
@@ -320,20 +511,533 @@ def database(config_file: str, output: Optional[str], passphrase: Optional[str])
         console.print(f"[dim]Base: {db_config.name}[/]")
         console.print(f"[dim]Utilisateur: {db_config.user}[/]")
         
-        success, message, bytes_written = db_backup.backup_to_file(output_path)
+        if estimate:
+            result = db_backup.estimate()
+            table = Table(title="Tables les plus volumineuses")
+            table.add_column("Table", style="cyan")
+            table.add_column("Lignes (approx.)", justify="right")
+            table.add_column("Données (MB)", justify="right")
+            table.add_column("Index (MB)", justify="right")
+            for usage in result.largest(top):
+                table.add_row(
+                    usage.name, str(usage.rows),
+                    f"{usage.data_bytes / 1024 / 1024:.2f}",
+                    f"{usage.index_bytes / 1024 / 1024:.2f}",
+                )
+            console.print(table)
+            console.print(
+                f"[green]{len(result.tables)} table(s), ~{result.rows} ligne(s), "
+                f"{result.data_bytes / 1024 / 1024:.2f} MB de données "
+                f"(+ {result.index_bytes / 1024 / 1024:.2f} MB d'index, non exportés)[/]"
+            )
+            return
+        
+        if repository:
+            from backup_site.backup.chunkstore import ChunkRepository
+            
+            repo = ChunkRepository.open(
+                Path(backup_config.destination) / "repository", create=True
+            )
+            success, message, bytes_written = db_backup.backup_to_repository(
+                repo, name=config.site['name']
+            )
+            if success:
+                console.print(f"\n{message}")
+            return
+        
+        jobs = parallel or db_config.parallel_jobs
+        if jobs > 1:
+            from backup_site.backup.parallel_dump import ParallelDatabaseBackup
+            
+            parallel_backup = ParallelDatabaseBackup(
+                ssh_client=ssh_client,
+                db_host=db_config.host,
+                db_port=db_config.port,
+                db_name=db_config.name,
+                db_user=db_config.user,
+                db_password=db_config.password.get_secret_value(),
+                jobs=jobs,
+                split_threshold=db_config.split_threshold_mb * 1024 * 1024,
+                consistent=db_config.consistent,
+                compression=compression,
+                transfer=TransferSettings.from_config(backup_config),
+                catalog=catalog.for_site(config.site['name']),
+            )
+            # Le dump parallèle est un dossier : on retire les extensions
+            output_dir = output_path.with_name(output_path.name.split('.')[0])
+            console.print(f"[dim]Exports simultanés: {jobs}[/]")
+            
+            success, message, bytes_written = parallel_backup.backup_to_directory(output_dir)
+            if success:
+                console.print(f"\n{message}")
+                console.print(f"[green]Dump créé: {output_dir}[/]")
+                if not output:
+                    auto_prune(backup_config, output_dir.parent)
+            return
+        
+        if resumable:
+            success, message, bytes_written = db_backup.backup_resumable(
+                output_path, staging_dir=backup_config.remote_staging_dir
+            )
+        else:
+            success, message, bytes_written = db_backup.backup_to_file(
+                output_path, checksum=backup_config.checksum_algorithm
+            )
         
         if success:
             console.print(f"\n{message}")
             console.print(f"[green]Dump créé: {output_path}[/]")
+            if not output:
+                auto_prune(backup_config, output_path.parent)
         
     except Exception as e:
         print_error(f"Erreur lors de la sauvegarde BDD: {e}")
     finally:
         # Ferme la connexion SSH
-        try:
-            ssh_client.close()
-        except:
-            pass
+        ssh_pool.close_all()
+
+
+@backup.command(name="all")
+@click.argument('config_dir', type=click.Path(exists=True, file_okay=False, readable=True))
+@click.option('--workers', '-w', type=click.IntRange(1, 64), default=4, show_default=True,
+              help="Nombre maximal de sauvegardes simultanées")
+@click.option('--per-host', type=click.IntRange(1, 16), default=2, show_default=True,
+              help="Nombre maximal de sauvegardes simultanées par serveur SSH")
+@click.option('--only', type=click.Choice(['files', 'database']), default=None,
+              help="Ne sauvegarde que les fichiers ou que les bases de données")
+@click.option('--destination', '-d', type=click.Path(file_okay=False, writable=True),
+              default=None, help="Dossier racine (défaut: backup.destination de chaque site)")
+@click.option('--passphrase', prompt=False, hide_input=True, default=None,
+              help="Passphrase des clés SSH (si elles en ont une)")
+@click.option('--async', 'use_async', is_flag=True, default=False,
+              help="Multiplexe les flux sur une boucle asyncio (un thread par flux sinon)")
+@click.option('--timeout', type=click.FloatRange(min=1), default=None,
+              help="Durée maximale de chaque transfert en secondes (avec --async)")
+def backup_all(config_dir: str, workers: int, per_host: int, only: Optional[str],
+               destination: Optional[str], passphrase: Optional[str],
+               use_async: bool, timeout: Optional[float]) -> None:
+    """Sauvegarde tous les sites d'un dossier de configurations.
+    
+    CONFIG_DIR est le dossier contenant les fichiers YAML des sites. Chaque
+    site est sauvegardé dans {destination}/{nom_du_site}/.
+    """
+    from backup_site.backup.orchestrator import BackupOrchestrator, JOB_KINDS, load_site_configs
+    
+    configs, results = load_site_configs(Path(config_dir))
+    if not configs and not results:
+        print_error(f"Aucune configuration trouvée dans {config_dir}")
+    
+    console.print(
+        f"[cyan]Sauvegarde de {len(configs)} site(s) "
+        f"({workers} simultanées, {per_host} par serveur)...[/]"
+    )
+    
+    def report(result) -> None:
+        if result.success:
+            console.print(f"[green]✓[/] {result.site} ({result.kind}) en {result.duration:.1f}s")
+        else:
+            console.print(f"[red]✗[/] {result.site} ({result.kind}): {result.error}")
+    
+    orchestrator = BackupOrchestrator(
+        configs,
+        workers=workers,
+        per_host=per_host,
+        kinds=[only] if only else JOB_KINDS,
+        destination=Path(destination) if destination else None,
+        passphrase=passphrase,
+        pool=ssh_pool,
+    )
+    started = time.monotonic()
+    try:
+        if use_async:
+            results += asyncio.run(orchestrator.run_async(on_result=report, timeout=timeout))
+        else:
+            results += orchestrator.run(on_result=report)
+    finally:
+        ssh_pool.close_all()
+    elapsed = time.monotonic() - started
+    
+    # Résumé
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("Site", style="cyan")
+    table.add_column("Type")
+    table.add_column("Statut")
+    table.add_column("Connexion", justify="right")
+    table.add_column("Transfert", justify="right")
+    table.add_column("Taille", justify="right")
+    table.add_column("Sortie / erreur")
+    
+    for result in sorted(results, key=lambda r: (r.site, r.kind)):
+        table.add_row(
+            result.site,
+            result.kind,
+            "[green]OK[/]" if result.success else "[red]ÉCHEC[/]",
+            f"{result.connect_time:.2f}s",
+            f"{result.transfer_time:.1f}s",
+            f"{result.bytes_written / 1024 / 1024:.2f} MB",
+            str(result.output) if result.success else (result.error or ""),
+        )
+    console.print(table)
+    
+    failures = [result for result in results if not result.success]
+    total_bytes = sum(result.bytes_written for result in results)
+    stats = ssh_pool.stats
+    console.print(
+        f"[dim]Durée totale: {elapsed:.1f}s, "
+        f"{total_bytes / 1024 / 1024:.2f} MB sauvegardés, "
+        f"{stats.connections} connexion(s) SSH ({stats.handshake_seconds:.2f}s), "
+        f"{stats.reuses} réutilisation(s)[/]"
+    )
+    
+    pruned = orchestrator.prune_succeeded(results)
+    removed = sum(len(result.removed) for result in pruned.values())
+    if removed:
+        freed = sum(result.freed_bytes for result in pruned.values())
+        console.print(
+            f"[dim]Rétention: {removed} sauvegarde(s) supprimée(s) sur "
+            f"{len(pruned)} site(s), {freed / 1024 / 1024:.2f} MB libérés[/]"
+        )
+    if failures:
+        print_error(f"{len(failures)} sauvegarde(s) en échec sur {len(results)}")
+    print_success(f"{len(results)} sauvegarde(s) réussie(s)")
+
+
+@backup.command()
+@click.argument('config_file', type=click.Path(exists=True, dir_okay=False, readable=True))
+@click.option('--dry-run', is_flag=True, help="Affiche les sauvegardes à supprimer sans rien effacer")
+@click.option('--site', default=None,
+              help="Ne purge que ce sous-dossier de site (sauvegardes de `backup all`)")
+def prune(config_file: str, dry_run: bool, site: Optional[str]) -> None:
+    """Applique la politique de rétention au dossier de destination.
+    
+    CONFIG_FILE est le chemin vers le fichier de configuration (retention_days,
+    keep_daily, keep_weekly, keep_monthly, prefix).
+    """
+    from backup_site.config import load_config
+    from backup_site.backup.catalog import BackupCatalog
+    from backup_site.backup.retention import RetentionPolicy, prune as prune_backups
+    
+    try:
+        backup_config = load_config(Path(config_file)).backup
+        policy = RetentionPolicy.from_config(backup_config)
+        destination = Path(backup_config.destination)
+        result = prune_backups(
+            destination,
+            policy,
+            prefix=backup_config.prefix,
+            site=site,
+            dry_run=dry_run,
+            catalog=BackupCatalog.open(destination),
+        )
+    except Exception as e:
+        print_error(f"Erreur lors de la purge: {e}")
+    
+    if not result.removed:
+        print_success(f"Aucune sauvegarde à supprimer ({len(result.kept)} conservée(s))")
+        return
+    
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("Date", style="cyan")
+    table.add_column("Site")
+    table.add_column("Type")
+    table.add_column("Fichiers", justify="right")
+    table.add_column("Sauvegarde")
+    for entry in result.removed:
+        table.add_row(
+            entry.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+            entry.site or "-",
+            entry.kind,
+            str(len(entry.paths)),
+            min(entry.paths, key=lambda path: len(path.name)).name,
+        )
+    console.print(table)
+    
+    prefix = "[Simulation] " if dry_run else ""
+    print_success(
+        f"{prefix}{len(result.removed)} sauvegarde(s) supprimée(s), "
+        f"{len(result.kept)} conservée(s), "
+        f"{result.freed_bytes / 1024 / 1024:.2f} MB libérés"
+    )
+
+
+@backup.command()
+@click.argument('manifest_file', type=click.Path(exists=True, dir_okay=False, readable=True))
+@click.argument('destination', type=click.Path(file_okay=False, writable=True))
+def extract(manifest_file: str, destination: str) -> None:
+    """Restaure localement une sauvegarde incrémentale à un instant T.
+    
+    MANIFEST_FILE est le manifeste (.manifest.json) de la sauvegarde cible.
+    L'archive complète et toutes les incrémentales de la chaîne sont extraites
+    dans l'ordre dans DESTINATION, suppressions comprises.
+    """
+    from backup_site.backup.incremental import restore_chain
+    
+    try:
+        console.print("[cyan]Restauration de la chaîne incrémentale...[/]")
+        success, message, files_count = restore_chain(Path(manifest_file), Path(destination))
+        
+        if success:
+            console.print(f"\n{message}")
+        
+    except Exception as e:
+        print_error(f"Erreur lors de la restauration: {e}")
+
+
+@main.group()
+def repo() -> None:
+    """Gestion du dépôt de sauvegardes dédupliqué."""
+    pass
+
+
+@repo.command(name="list")
+@click.argument('repository', type=click.Path(exists=True, file_okay=False, readable=True))
+@click.option('--name', '-n', default=None, help="Filtre sur le nom du site")
+@click.option('--kind', '-k', type=click.Choice(['files', 'database']), default=None,
+              help="Filtre sur le type de sauvegarde")
+def repo_list(repository: str, name: Optional[str], kind: Optional[str]) -> None:
+    """Liste les snapshots d'un dépôt dédupliqué.
+    
+    REPOSITORY est le chemin du dépôt (ex: backups/repository)
+    """
+    from backup_site.backup.chunkstore import ChunkRepository
+    
+    try:
+        repository_obj = ChunkRepository.open(Path(repository))
+        snapshots = repository_obj.list_snapshots(name=name, kind=kind)
+        
+        table = Table(show_header=True, header_style="bold magenta")
+        table.add_column("Snapshot", style="cyan")
+        table.add_column("Site")
+        table.add_column("Type")
+        table.add_column("Date")
+        table.add_column("Taille", justify="right")
+        table.add_column("Blocs", justify="right")
+        
+        for snapshot in snapshots:
+            table.add_row(
+                snapshot.id,
+                snapshot.name,
+                snapshot.kind,
+                snapshot.created_at,
+                f"{snapshot.size / 1024 / 1024:.2f} MB",
+                str(len(snapshot.chunks)),
+            )
+        
+        console.print(table)
+        
+        chunks, stored, raw = repository_obj.stats()
+        console.print(
+            f"[dim]{len(snapshots)} snapshot(s), {chunks} blocs, "
+            f"{stored / 1024 / 1024:.2f} MB stockés "
+            f"({raw / 1024 / 1024:.2f} MB dédupliqués)[/]"
+        )
+        
+    except Exception as e:
+        print_error(f"Erreur lors de la lecture du dépôt: {e}")
+
+
+@repo.command(name="restore")
+@click.argument('repository', type=click.Path(exists=True, file_okay=False, readable=True))
+@click.argument('snapshot_id')
+@click.argument('output', type=click.Path(dir_okay=False, writable=True))
+def repo_restore(repository: str, snapshot_id: str, output: str) -> None:
+    """Reconstitue un snapshot dans un fichier local.
+    
+    Les snapshots de fichiers donnent une archive .tar, ceux de base de
+    données un dump .sql (non compressés).
+    """
+    from backup_site.backup.chunkstore import ChunkRepository
+    
+    try:
+        repository_obj = ChunkRepository.open(Path(repository))
+        output_path = Path(output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with open(output_path, 'wb') as f:
+            bytes_written = repository_obj.restore(snapshot_id, f)
+        
+        print_success(
+            f"Snapshot {snapshot_id} restauré dans {output_path} "
+            f"({bytes_written / 1024 / 1024:.2f} MB)"
+        )
+        
+    except Exception as e:
+        print_error(f"Erreur lors de la restauration du snapshot: {e}")
+
+
+@repo.command(name="forget")
+@click.argument('repository', type=click.Path(exists=True, file_okay=False, readable=True))
+@click.argument('snapshot_ids', nargs=-1, required=True)
+def repo_forget(repository: str, snapshot_ids: tuple) -> None:
+    """Supprime des snapshots (l'espace est libéré par `repo gc`)."""
+    from backup_site.backup.chunkstore import ChunkRepository
+    
+    try:
+        repository_obj = ChunkRepository.open(Path(repository))
+        for snapshot_id in snapshot_ids:
+            repository_obj.forget(snapshot_id)
+            print_success(f"Snapshot {snapshot_id} supprimé")
+        
+    except Exception as e:
+        print_error(f"Erreur lors de la suppression du snapshot: {e}")
+
+
+@repo.command(name="gc")
+@click.argument('repository', type=click.Path(exists=True, file_okay=False, readable=True))
+@click.option('--dry-run', is_flag=True, help="Affiche ce qui serait supprimé sans supprimer")
+def repo_gc(repository: str, dry_run: bool) -> None:
+    """Supprime les blocs qui ne sont plus référencés par aucun snapshot."""
+    from backup_site.backup.chunkstore import ChunkRepository
+    
+    try:
+        repository_obj = ChunkRepository.open(Path(repository))
+        removed, freed = repository_obj.gc(dry_run=dry_run)
+        
+        prefix = "[Simulation] " if dry_run else ""
+        print_success(
+            f"{prefix}{removed} bloc(s) inutilisé(s), "
+            f"{freed / 1024 / 1024:.2f} MB libéré(s)"
+        )
+        
+    except Exception as e:
+        print_error(f"Erreur lors du nettoyage du dépôt: {e}")
+
+
+@main.command(name="list")
+@click.argument('destination', type=click.Path(file_okay=False, writable=True), default='backups')
+@click.option('--site', '-s', default=None, help="Filtre sur le nom du site")
+@click.option('--type', '-t', 'kind', type=click.Choice(['files', 'database']), default=None,
+              help="Filtre sur le type de sauvegarde")
+@click.option('--before', type=click.DateTime(), default=None,
+              help="Sauvegardes antérieures à cette date")
+@click.option('--after', type=click.DateTime(), default=None,
+              help="Sauvegardes postérieures à cette date")
+@click.option('--limit', '-n', type=click.IntRange(min=0), default=50, show_default=True,
+              help="Nombre maximal de sauvegardes affichées (0 = toutes)")
+@click.option('--rescan', is_flag=True,
+              help="Ajoute au catalogue les sauvegardes présentes sur disque mais absentes")
+def list_backups(destination: str, site: Optional[str], kind: Optional[str],
+                 before, after, limit: int, rescan: bool) -> None:
+    """Liste les sauvegardes enregistrées dans le catalogue local.
+    
+    DESTINATION est le dossier des sauvegardes (défaut: backups). La liste est
+    lue dans le catalogue SQLite, sans parcourir le dossier.
+    """
+    from backup_site.backup.catalog import BackupCatalog
+    from backup_site.backup.retention import BackupIndex
+    
+    try:
+        catalog = BackupCatalog.open(Path(destination))
+        if rescan:
+            added = catalog.import_index(BackupIndex.scan(catalog.root))
+            console.print(f"[dim]{added} sauvegarde(s) ajoutée(s) au catalogue[/]")
+        
+        entries = catalog.find(site=site, kind=kind, before=before, after=after, limit=limit)
+        
+        table = Table(show_header=True, header_style="bold magenta")
+        table.add_column("ID", style="cyan", justify="right")
+        table.add_column("Site")
+        table.add_column("Type")
+        table.add_column("Date")
+        table.add_column("Taille", justify="right")
+        table.add_column("Durée", justify="right")
+        table.add_column("Chemin")
+        
+        for entry in entries:
+            table.add_row(
+                str(entry.id),
+                entry.site,
+                entry.kind,
+                entry.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                f"{entry.size / 1024 / 1024:.2f} MB",
+                f"{entry.duration:.1f}s" if entry.duration is not None else "-",
+                str(entry.path.relative_to(catalog.root)
+                    if entry.path.is_relative_to(catalog.root) else entry.path),
+            )
+        
+        console.print(table)
+        console.print(f"[dim]{len(entries)} sauvegarde(s)[/]")
+        
+    except Exception as e:
+        print_error(f"Erreur lors de la lecture du catalogue: {e}")
+
+
+@main.command()
+@click.argument('reference')
+@click.option('--destination', '-d', type=click.Path(file_okay=False, writable=True),
+              default='backups', show_default=True, help="Dossier des sauvegardes")
+def show(reference: str, destination: str) -> None:
+    """Affiche le détail d'une sauvegarde du catalogue.
+    
+    REFERENCE est l'identifiant affiché par `list` ou le chemin de l'archive.
+    """
+    from backup_site.backup.catalog import BackupCatalog
+    
+    try:
+        entry = BackupCatalog.open(Path(destination)).get(reference)
+    except Exception as e:
+        print_error(f"Erreur lors de la lecture du catalogue: {e}")
+    
+    if entry is None:
+        print_error(f"Sauvegarde introuvable dans le catalogue: {reference}")
+    
+    table = Table(show_header=False, box=None)
+    table.add_column("Champ", style="cyan")
+    table.add_column("Valeur")
+    table.add_row("ID", str(entry.id))
+    table.add_row("Site", entry.site)
+    table.add_row("Type", entry.kind)
+    table.add_row("Date", entry.created_at.strftime("%Y-%m-%d %H:%M:%S"))
+    table.add_row("Chemin", str(entry.path))
+    table.add_row("Taille", f"{entry.size / 1024 / 1024:.2f} MB ({entry.size} octets)")
+    table.add_row("Durée", f"{entry.duration:.1f}s" if entry.duration is not None else "-")
+    table.add_row(
+        "Empreinte", f"{entry.algorithm} {entry.checksum}" if entry.checksum else "-"
+    )
+    table.add_row(
+        "Code de sortie", str(entry.exit_status) if entry.exit_status is not None else "-"
+    )
+    table.add_row("Présente sur disque", "oui" if entry.path.exists() else "[red]non[/]")
+    
+    console.print(Panel(table, title=f"Sauvegarde {entry.path.name}", border_style="blue"))
+
+
+@main.command()
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True, readable=True))
+@click.option('--jobs', '-j', type=click.IntRange(1, 64), default=4, show_default=True,
+              help="Nombre d'archives vérifiées simultanément")
+def verify(paths: tuple, jobs: int) -> None:
+    """Vérifie les archives contre leur manifeste d'intégrité.
+    
+    PATHS sont des archives, des manifestes (*.checksum.json) ou des dossiers
+    de sauvegardes (parcourus récursivement).
+    """
+    from backup_site.backup.integrity import find_archives, verify_archives
+    
+    archives = find_archives(Path(path) for path in paths)
+    if not archives:
+        print_error("Aucune archive avec manifeste d'intégrité trouvée")
+    
+    console.print(f"[cyan]Vérification de {len(archives)} archive(s) ({jobs} simultanées)...[/]")
+    started = time.monotonic()
+    
+    def report(result) -> None:
+        if result.success:
+            console.print(f"[green]✓[/] {result.archive}")
+        else:
+            console.print(f"[red]✗[/] {result.archive}: {result.error}")
+    
+    results = verify_archives(archives, jobs=jobs, on_result=report)
+    elapsed = time.monotonic() - started
+    
+    failures = [result for result in results if not result.success]
+    total_bytes = sum(result.size for result in results)
+    console.print(
+        f"[dim]{len(results) - len(failures)}/{len(results)} archive(s) intègre(s), "
+        f"{total_bytes / 1024 / 1024:.2f} MB en {elapsed:.1f}s[/]"
+    )
+    if failures:
+        sys.exit(1)
 
 
 @main.group()
@@ -411,22 +1115,24 @@ def load() -> None:
 
 
 @load.command()
-@click.argument('archive_file', type=click.Path(exists=True, dir_okay=False, readable=True))
+@click.argument('archive_files', nargs=-1, required=True,
+                type=click.Path(exists=True, dir_okay=False, readable=True))
 @click.option('--container', '-c', default='backup-test-wordpress',
               help="Nom du container Docker (défaut: backup-test-wordpress)")
 @click.option('--path', '-p', default='/var/www/html',
               help="Chemin dans le container (défaut: /var/www/html)")
-def files(archive_file: str, container: str, path: str) -> None:
-    """Charge les fichiers depuis une archive tar.gz dans Docker local.
+def files(archive_files: tuple, container: str, path: str) -> None:
+    """Charge les fichiers depuis une ou plusieurs archives tar.gz dans Docker local.
     
-    ARCHIVE_FILE est le chemin vers l'archive tar.gz
+    ARCHIVE_FILES est le chemin vers l'archive tar.gz (ou les archives
+    .partNN.tar.gz d'une sauvegarde parallèle)
     """
     from backup_site.docker_load.files import DockerFileLoad
     
     try:
         console.print("[cyan]Chargement des fichiers dans Docker...[/]")
         console.print(f"[dim]Container: {container}[/]")
-        console.print(f"[dim]Archive: {archive_file}[/]")
+        console.print(f"[dim]Archive(s): {', '.join(archive_files)}[/]")
         console.print(f"[dim]Destination: {path}[/]")
         
         # Crée le gestionnaire de chargement Docker
@@ -436,18 +1142,20 @@ def files(archive_file: str, container: str, path: str) -> None:
         )
         
         # Lance le chargement
-        success, message = file_load.load_from_file(Path(archive_file))
+        for archive_file in archive_files:
+            success, message = file_load.load_from_file(Path(archive_file))
+            
+            if success:
+                console.print(f"\n{message}")
         
-        if success:
-            console.print(f"\n{message}")
-            console.print(f"[green]Chargement réussi![/]")
+        console.print(f"[green]Chargement réussi![/]")
         
     except Exception as e:
         print_error(f"Erreur lors du chargement: {e}")
 
 
 @load.command()
-@click.argument('dump_file', type=click.Path(exists=True, dir_okay=False, readable=True))
+@click.argument('dump_file', type=click.Path(exists=True, readable=True))
 @click.option('--container', '-c', default='backup-test-mysql',
               help="Nom du container MySQL/MariaDB Docker (défaut: backup-test-mysql)")
 @click.option('--wordpress-container', '-w', default='backup-test-wordpress',
@@ -458,15 +1166,36 @@ def files(archive_file: str, container: str, path: str) -> None:
               help="Utilisateur de la base de données (optionnel si wordpress-container fourni)")
 @click.option('--db-password', '-p', default=None,
               help="Mot de passe de la base de données (optionnel si wordpress-container fourni)")
-def database(dump_file: str, container: str, wordpress_container: str, db_name: Optional[str], db_user: Optional[str], db_password: Optional[str]) -> None:
+@click.option('--jobs', '-j', type=click.IntRange(1, 32), default=4, show_default=True,
+              help="Nombre d'imports simultanés (dossier de dump ou --split)")
+@click.option('--split', is_flag=True,
+              help="Découpe un dump monolithique par table pour le charger en parallèle")
+@click.option('--old-url', '-o', default=None,
+              help="URL remplacée dans les données pendant le chargement (avec --new-url)")
+@click.option('--new-url', '-n', default=None,
+              help="Nouvelle URL (ex: http://localhost:8080)")
+@click.option('--rewrite-workers', type=click.IntRange(1, 64), default=1, show_default=True,
+              help="Processus réécrivant le dump (avec --old-url/--new-url)")
+def database(dump_file: str, container: str, wordpress_container: str, db_name: Optional[str], db_user: Optional[str], db_password: Optional[str], jobs: int, split: bool,
+             old_url: Optional[str], new_url: Optional[str], rewrite_workers: int) -> None:
     """Charge la base de données MySQL depuis un dump dans Docker local.
     
-    DUMP_FILE est le chemin vers le fichier dump (SQL ou SQL.GZ)
+    DUMP_FILE est le chemin vers le fichier dump (SQL ou SQL.GZ), ou vers un
+    dossier produit par `backup database --parallel` (chargé table par table
+    en parallèle, index secondaires reconstruits après les données).
     
     Les infos de la BDD sont extraites automatiquement depuis wp-config.php via wp-cli.
     Vous pouvez les spécifier manuellement avec --db-name, --db-user, --db-password.
+    
+    Avec --old-url et --new-url, les URLs sont remplacées pendant le chargement
+    (chaînes PHP sérialisées corrigées, colonnes guid ignorées) : `load setup
+    --skip-search-replace` n'a plus besoin de `wp search-replace`.
     """
     from backup_site.docker_load.database import DockerDatabaseLoad
+    from backup_site.docker_load.url_rewrite import UrlRewriter
+    
+    if bool(old_url) != bool(new_url):
+        print_error("--old-url et --new-url vont ensemble")
     
     try:
         console.print("[cyan]Chargement de la base de données dans Docker...[/]")
@@ -481,10 +1210,19 @@ def database(dump_file: str, container: str, wordpress_container: str, db_name:
             db_name=db_name,
             db_user=db_user,
             db_password=db_password,
+            url_rewriter=(
+                UrlRewriter(old_url, new_url, workers=rewrite_workers) if new_url else None
+            ),
         )
         
         # Lance le chargement
-        success, message = db_load.load_from_file(Path(dump_file))
+        dump_path = Path(dump_file)
+        if dump_path.is_dir():
+            success, message, _ = db_load.load_from_directory(dump_path, jobs=jobs)
+        elif split:
+            success, message, _ = db_load.load_from_file_parallel(dump_path, jobs=jobs)
+        else:
+            success, message = db_load.load_from_file(dump_path)
         
         if success:
             console.print(f"\n{message}")
@@ -501,7 +1239,9 @@ def database(dump_file: str, container: str, wordpress_container: str, db_name:
               help="Ancienne URL (ex: https://www.site-de-production.com)")
 @click.option('--new-url', '-n', required=True,
               help="Nouvelle URL (ex: http://localhost:8080)")
-def setup(container: str, old_url: str, new_url: str) -> None:
+@click.option('--skip-search-replace', is_flag=True,
+              help="N'exécute pas wp search-replace (URLs déjà remplacées par `load database --old-url`)")
+def setup(container: str, old_url: str, new_url: str, skip_search_replace: bool = False) -> None:
     """Configure WordPress pour Docker local après chargement.
     
     Utilise wp-cli pour :
@@ -525,7 +1265,7 @@ def setup(container: str, old_url: str, new_url: str) -> None:
         )
         
         # Configure WordPress
-        success, message = adapter.setup()
+        success, message = adapter.setup(search_replace=not skip_search_replace)
         
         if success:
             console.print(f"\n{message}")
@@ -554,5 +1294,217 @@ def adapt_urls(container: str, old_url: str, new_url: str) -> None:
     setup(container, old_url, new_url)
 
 
+@main.command()
+@click.argument('archive_files', nargs=-1,
+                type=click.Path(exists=True, dir_okay=False, readable=True))
+@click.option('--dump', '-D', 'dump_file', type=click.Path(exists=True, readable=True), default=None,
+              help="Dump SQL (ou dossier de `backup database --parallel`) à charger")
+@click.option('--wordpress-container', '-w', default='backup-test-wordpress',
+              help="Container WordPress (défaut: backup-test-wordpress)")
+@click.option('--path', '-p', default='/var/www/html',
+              help="Chemin des fichiers dans le container (défaut: /var/www/html)")
+@click.option('--db-container', '-c', default='backup-test-mysql',
+              help="Container MySQL/MariaDB (défaut: backup-test-mysql)")
+@click.option('--db-name', default=None, help="Nom de la base (défaut: lu dans wp-config.php)")
+@click.option('--db-user', default=None, help="Utilisateur de la base (défaut: lu dans wp-config.php)")
+@click.option('--db-password', default=None, help="Mot de passe de la base (défaut: lu dans wp-config.php)")
+@click.option('--jobs', '-j', type=click.IntRange(1, 32), default=4, show_default=True,
+              help="Nombre d'imports simultanés (dossier de dump ou --split)")
+@click.option('--split', is_flag=True,
+              help="Découpe un dump monolithique par table pour le charger en parallèle")
+@click.option('--old-url', '-o', default=None,
+              help="Ancienne URL (avec --new-url : configure WordPress après le chargement)")
+@click.option('--new-url', '-n', default=None,
+              help="Nouvelle URL (ex: http://localhost:8080)")
+@click.option('--wp-search-replace', is_flag=True,
+              help="Remplace les URLs avec wp search-replace après l'import plutôt que pendant le chargement")
+@click.option('--rewrite-workers', type=click.IntRange(1, 64), default=1, show_default=True,
+              help="Processus réécrivant le dump pendant le chargement")
+def restore(archive_files: tuple, dump_file: Optional[str], wordpress_container: str, path: str,
+            db_container: str, db_name: Optional[str], db_user: Optional[str],
+            db_password: Optional[str], jobs: int, split: bool,
+            old_url: Optional[str], new_url: Optional[str],
+            wp_search_replace: bool, rewrite_workers: int) -> None:
+    """Restaure un site complet dans Docker local.
+    
+    Les fichiers et la base de données sont chargés en parallèle, puis
+    WordPress est configuré (si --old-url et --new-url sont fournis). Une
+    frise des étapes est affichée à la fin.
+    
+    ARCHIVE_FILES est le chemin vers l'archive des fichiers (ou les archives
+    .partNN.tar.gz d'une sauvegarde parallèle)
+    """
+    from backup_site.docker_load.database import DockerDatabaseLoad
+    from backup_site.docker_load.files import DockerFileLoad
+    from backup_site.docker_load.restore import DockerRestore
+    from backup_site.docker_load.url_rewrite import UrlRewriter
+    from backup_site.docker_load.wordpress import DockerWordPressAdapter
+    
+    if not archive_files and not dump_file:
+        print_error("Rien à restaurer : indiquer des archives et/ou --dump")
+        return
+    if bool(old_url) != bool(new_url):
+        print_error("--old-url et --new-url vont ensemble")
+        return
+    
+    try:
+        console.print("[cyan]Restauration dans Docker...[/]")
+        console.print(f"[dim]Archive(s): {', '.join(archive_files) or '-'}[/]")
+        console.print(f"[dim]Dump: {dump_file or '-'}[/]")
+        
+        adapter = None
+        url_rewriter = None
+        if new_url:
+            adapter = DockerWordPressAdapter(
+                container_name=wordpress_container,
+                old_url=old_url,
+                new_url=new_url,
+            )
+            if not wp_search_replace:
+                url_rewriter = UrlRewriter(old_url, new_url, workers=rewrite_workers)
+        pipeline = DockerRestore(
+            file_load=DockerFileLoad(container_name=wordpress_container, remote_path=path),
+            db_load=DockerDatabaseLoad(
+                container_name=db_container,
+                wordpress_container=wordpress_container,
+                db_name=db_name,
+                db_user=db_user,
+                db_password=db_password,
+                url_rewriter=url_rewriter,
+            ),
+            adapter=adapter,
+            jobs=jobs,
+            split=split,
+        )
+        
+        timeline = pipeline.run(
+            [Path(archive) for archive in archive_files],
+            Path(dump_file) if dump_file else None,
+        )
+        
+        table = Table(title=f"Restauration ({timeline.total:.1f}s)")
+        table.add_column("Étape", style="cyan")
+        table.add_column("Début", justify="right")
+        table.add_column("Durée", justify="right")
+        table.add_column("Frise")
+        for stage in sorted(timeline.stages, key=lambda stage: stage.started):
+            style = "red" if stage.error else "green"
+            table.add_row(
+                stage.name, f"{stage.started:.1f}s", f"{stage.duration:.1f}s",
+                f"[{style}]{timeline.bar(stage)}[/]",
+            )
+        console.print(table)
+        
+        if timeline.failed:
+            for stage in timeline.failed:
+                console.print(f"[red]✗ {stage.name}: {stage.error}[/]")
+            print_error("Restauration incomplète")
+        console.print(f"[green]Restauration réussie![/]")
+        
+    except Exception as e:
+        print_error(f"Erreur lors de la restauration: {e}")
+
+
+@main.command()
+@click.argument('config_file', type=click.Path(exists=True, dir_okay=False, readable=True))
+@click.option('--passphrase', prompt=False, hide_input=True, default=None,
+              help="Passphrase de la clé SSH (si elle en a une)")
+@click.option('--wordpress-container', '-w', default='backup-test-wordpress',
+              help="Container WordPress recevant les fichiers (défaut: backup-test-wordpress)")
+@click.option('--path', '-p', default='/var/www/html',
+              help="Chemin des fichiers dans le container (défaut: /var/www/html)")
+@click.option('--db-container', '-c', default='backup-test-mysql',
+              help="Container MySQL/MariaDB recevant la base (défaut: backup-test-mysql)")
+@click.option('--skip-files', is_flag=True, help="Ne clone pas les fichiers")
+@click.option('--skip-database', is_flag=True, help="Ne clone pas la base de données")
+def clone(config_file: str, passphrase: Optional[str], wordpress_container: str,
+          path: str, db_container: str, skip_files: bool, skip_database: bool) -> None:
+    """Clone un site distant directement dans Docker local.
+    
+    La sortie SSH de tar et de mysqldump est envoyée sur l'entrée standard
+    de `docker exec -i` : aucune archive n'est écrite sur le disque local.
+    
+    CONFIG_FILE est le chemin vers le fichier de configuration
+    """
+    from backup_site.config import load_config
+    from backup_site.backup.files import FileBackup
+    from backup_site.backup.database import DatabaseBackup
+    from backup_site.backup.compression import resolve_compression
+    from backup_site.backup.transfer import TransferSettings
+    from backup_site.docker_load.files import DockerFileLoad
+    from backup_site.docker_load.database import DockerDatabaseLoad
+    
+    try:
+        # Charge la configuration
+        console.print("[cyan]Chargement de la configuration...[/]")
+        config = load_config(Path(config_file))
+        ssh_config = config.ssh
+        backup_config = config.backup
+        
+        # Établit la connexion SSH (clé validée et chargée par le pool)
+        ssh_client = connect(ssh_config, passphrase)
+        
+        # Choisit le codec disponible sur le serveur
+        compression = resolve_compression(
+            ssh_client,
+            backup_config.compression,
+            level=backup_config.compression_level,
+            threads=backup_config.compression_threads,
+        )
+        # Débit, priorité distante et fenêtre SSH, comme pour les sauvegardes
+        transfer = TransferSettings.from_config(backup_config)
+        
+        # Fichiers en premier : le wp-config.php fournit ensuite les infos BDD
+        if not skip_files:
+            console.print(f"\n[cyan]Clonage des fichiers vers {wordpress_container}:{path}...[/]")
+            file_backup = FileBackup(
+                ssh_client=ssh_client,
+                remote_path=str(config.files.remote_path),
+                include_patterns=config.files.include_patterns,
+                exclude_patterns=config.files.exclude_patterns,
+                compression=compression,
+                transfer=transfer,
+            )
+            file_load = DockerFileLoad(container_name=wordpress_container, remote_path=path)
+            
+            with file_backup.open_stream() as stream:
+                success, message, _ = file_load.load_from_reader(stream, compression.codec)
+            if success:
+                console.print(f"\n{message}")
+        
+        if not skip_database:
+            console.print(f"\n[cyan]Clonage de la base de données vers {db_container}...[/]")
+            db_config = config.database
+            db_backup = DatabaseBackup(
+                ssh_client=ssh_client,
+                db_host=db_config.host,
+                db_port=db_config.port,
+                db_name=db_config.name,
+                db_user=db_config.user,
+                db_password=db_config.password.get_secret_value(),
+                compress=True,
+                ssl_enabled=False,
+                compression=compression,
+                transfer=transfer,
+            )
+            db_load = DockerDatabaseLoad(
+                container_name=db_container,
+                wordpress_container=wordpress_container,
+            )
+            
+            with db_backup.open_stream() as stream:
+                success, message, _ = db_load.load_from_reader(stream, db_backup.codec)
+            if success:
+                console.print(f"\n{message}")
+        
+        console.print(f"[green]Clonage réussi![/]")
+        
+    except Exception as e:
+        print_error(f"Erreur lors du clonage: {e}")
+    finally:
+        # Ferme la connexion SSH
+        ssh_pool.close_all()
+
+
 if __name__ == "__main__":
     main()
@@ -54,6 +54,12 @@ class FilesConfig(BaseModel):
         default_factory=list,
         description="Liste des motifs glob pour exclure des fichiers (prioritaire sur include_patterns)"
     )
+    shards: int = Field(
+        1,
+        description="Nombre d'archives tar produites en parallèle (canaux SSH distincts)",
+        ge=1,
+        le=32
+    )
     
     @field_validator('remote_path')
     @classmethod
@@ -72,6 +78,21 @@ class DatabaseConfig(BaseModel):
     name: str = Field(..., description="Nom de la base de données")
     user: str = Field(..., description="Utilisateur de la base de données")
     password: SecretStr = Field(..., description="Mot de passe de la base de données")
+    parallel_jobs: int = Field(
+        1,
+        description="Nombre d'exports de tables simultanés (1 = mysqldump unique)",
+        ge=1,
+        le=32
+    )
+    split_threshold_mb: int = Field(
+        512,
+        description="Taille (Mo) au-delà de laquelle une table est découpée par clé primaire",
+        ge=1
+    )
+    consistent: bool = Field(
+        True,
+        description="Verrou global en lecture pendant l'export parallèle (cohérence inter-tables)"
+    )
     
     @property
     def connection_string(self) -> str:
@@ -91,8 +112,80 @@ class BackupConfig(BaseModel):
     )
     compression: str = Field(
         "gzip",
-        description="Type de compression (gzip, bzip2, xz, none)",
-        pattern=r"^(gzip|bzip2|xz|none)$"
+        description="Type de compression (gzip, pigz, bzip2, xz, zstd, pzstd, none)",
+        pattern=r"^(gzip|pigz|bzip2|xz|zstd|pzstd|none)$"
+    )
+    compression_level: Optional[int] = Field(
+        None,
+        description="Niveau de compression (défaut du codec si absent)",
+        ge=1,
+        le=19
+    )
+    compression_threads: Optional[int] = Field(
+        None,
+        description="Nombre de threads des codecs parallèles (pigz, xz, zstd, pzstd ; 0 = autant que de cœurs)",
+        ge=0,
+        le=64
+    )
+    transfer_buffer_kb: int = Field(
+        1024,
+        description="Taille des blocs lus sur le canal SSH (KB)",
+        ge=16,
+        le=65536
+    )
+    transfer_queue_depth: int = Field(
+        8,
+        description="Nombre de blocs en attente d'écriture disque",
+        ge=1,
+        le=64
+    )
+    ssh_window_mb: Optional[int] = Field(
+        None,
+        description="Fenêtre SSH des canaux de transfert (MB, défaut paramiko: 2)",
+        ge=1,
+        le=1024
+    )
+    ssh_max_packet_kb: Optional[int] = Field(
+        None,
+        description="Taille maximale des paquets SSH (KB, défaut paramiko: 32)",
+        ge=4,
+        le=256
+    )
+    preallocate_mb: int = Field(
+        0,
+        description="Préallocation des fichiers par extents de N MB (0 = désactivée)",
+        ge=0,
+        le=4096
+    )
+    bandwidth_limit_kb: Optional[int] = Field(
+        None,
+        description="Débit maximal de téléchargement d'une sauvegarde (KB/s, partagé entre ses canaux)",
+        ge=16
+    )
+    adaptive_bandwidth: bool = Field(
+        False,
+        description="Réduit le débit quand le RTT SSH augmente (lien du serveur saturé)"
+    )
+    remote_nice: int = Field(
+        0,
+        description="Priorité CPU des commandes de sauvegarde distantes (nice, 0 = inchangée)",
+        ge=0,
+        le=19
+    )
+    remote_io_class: str = Field(
+        "default",
+        description="Classe d'E/S disque des commandes distantes (default, best-effort, idle)",
+        pattern=r"^(default|best-effort|idle)$"
+    )
+    checksum: str = Field(
+        "sha256",
+        description="Empreinte calculée pendant le transfert et consignée à côté de l'archive (sha256, xxh3, none)",
+        pattern=r"^(sha256|xxh3|none)$"
+    )
+    remote_staging_dir: str = Field(
+        ".backup-site/staging",
+        description="Dossier distant des archives préparées pour un téléchargement reprenable (relatif au home SSH)",
+        min_length=1
     )
     retention_days: int = Field(
         30,
@@ -106,6 +199,36 @@ class BackupConfig(BaseModel):
         min_length=1,
         max_length=50
     )
+    keep_daily: int = Field(
+        0,
+        description="Au-delà de retention_days, conserve la dernière sauvegarde des N derniers jours",
+        ge=0,
+        le=3650
+    )
+    keep_weekly: int = Field(
+        0,
+        description="Au-delà de retention_days, conserve la dernière sauvegarde des N dernières semaines",
+        ge=0,
+        le=520
+    )
+    keep_monthly: int = Field(
+        0,
+        description="Au-delà de retention_days, conserve la dernière sauvegarde des N derniers mois",
+        ge=0,
+        le=120
+    )
+    auto_prune: bool = Field(
+        False,
+        description=(
+            "Applique la rétention après chaque sauvegarde réussie "
+            "(désactivé par défaut : aucune sauvegarde n'est supprimée sans opt-in)"
+        )
+    )
+    
+    @property
+    def checksum_algorithm(self) -> Optional[str]:
+        """Algorithme d'empreinte, ou None si désactivé."""
+        return None if self.checksum == "none" else self.checksum
     
     @field_validator('destination')
     @classmethod
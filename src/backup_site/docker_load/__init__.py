@@ -3,5 +3,6 @@
 from .files import DockerFileLoad
 from .database import DockerDatabaseLoad
 from .wordpress import DockerWordPressAdapter
+from .restore import DockerRestore
 
-__all__ = ["DockerFileLoad", "DockerDatabaseLoad", "DockerWordPressAdapter"]
+__all__ = ["DockerFileLoad", "DockerDatabaseLoad", "DockerWordPressAdapter", "DockerRestore"]
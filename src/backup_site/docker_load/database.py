@@ -11,13 +11,42 @@ Flux :
   1. Extraire DB_NAME, DB_USER, DB_PASSWORD depuis wp-config.php via wp-cli
   2. Créer la base de données et l'utilisateur dans MySQL
   3. docker cp dump.sql.gz mysql_container:/tmp/
-  4. docker exec mysql_container bash -c "gunzip < /tmp/dump.sql.gz | mysql ..."
+  4. docker exec mysql_container bash -c "gzip -dc < /tmp/dump.sql.gz | mysql ..."
+
+Chargement parallèle (dossier produit par `backup database --parallel`, ou dump
+monolithique découpé sur les CREATE TABLE) :
+  1. schéma sans index secondaires
+  2. données table par table, N `docker exec -i ... mariadb` simultanés
+  3. reconstruction des index secondaires (un ALTER TABLE par table)
+  4. triggers, procédures et events
+
+Flux direct (sans fichier intermédiaire, ex: `backup-site clone`) :
+  flux → docker exec -i mysql_container sh -c "gzip -dc | mariadb ..."
+
+Le décompresseur est choisi d'après l'extension du dump (.gz, .bz2, .xz, .zst).
+
+Remplacement d'URL (option `url_rewriter`, voir `url_rewrite.py`) : le dump est
+alors décompressé localement et réécrit pendant son envoi :
+  dump → décompression → UrlRewriter → docker exec -i mysql_container mariadb
 """
 
+import io
+import json
 import logging
+import shlex
 import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import BinaryIO, Dict, List, Tuple, Optional, Union
+
+from backup_site.backup.compression import CODECS, Codec, codec_for_path, open_decompressed
+from backup_site.backup.parallel_dump import MANIFEST_NAME, DumpManifest
+
+from .pipe import DEFAULT_BUFFER_SIZE, pipe_to_container
+from .sql_dump import build_index_statements, defer_secondary_indexes, split_sql_dump
+from .url_rewrite import UrlRewriter
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +61,7 @@ class DockerDatabaseLoad:
         db_name: Optional[str] = None,
         db_user: Optional[str] = None,
         db_password: Optional[str] = None,
+        url_rewriter: Optional[UrlRewriter] = None,
     ):
         """Initialise le gestionnaire de chargement de BDD.
         
@@ -41,12 +71,15 @@ class DockerDatabaseLoad:
             db_name: Nom de la base de données (optionnel si wordpress_container fourni)
             db_user: Utilisateur de la base de données (optionnel si wordpress_container fourni)
             db_password: Mot de passe de la base de données (optionnel si wordpress_container fourni)
+            url_rewriter: Remplacement d'URL appliqué aux données pendant
+                le chargement (remplace `wp search-replace`)
         """
         self.container_name = container_name
         self.wordpress_container = wordpress_container
         self.db_name = db_name
         self.db_user = db_user
         self.db_password = db_password
+        self.url_rewriter = url_rewriter
     
     def _extract_db_config_from_wordpress(self) -> Tuple[str, str, str]:
         """Extrait les infos de la BDD depuis wp-config.php via wp-cli.
@@ -63,38 +96,28 @@ class DockerDatabaseLoad:
         logger.info(f"Extraction des infos BDD depuis {self.wordpress_container} via wp-cli")
         
         try:
-            # Extrait DB_NAME
-            result = subprocess.run(
-                ["docker", "exec", self.wordpress_container, "wp", "--allow-root", "config", "get", "DB_NAME"],
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            db_name = result.stdout.strip()
-            
-            # Extrait DB_USER
+            # Les trois constantes en un seul appel (un seul démarrage de PHP)
             result = subprocess.run(
-                ["docker", "exec", self.wordpress_container, "wp", "--allow-root", "config", "get", "DB_USER"],
+                ["docker", "exec", self.wordpress_container, "wp", "--allow-root", "config", "list",
+                 "DB_NAME", "DB_USER", "DB_PASSWORD", "--strict", "--format=json"],
                 check=True,
                 capture_output=True,
                 text=True
             )
-            db_user = result.stdout.strip()
-            
-            # Extrait DB_PASSWORD
-            result = subprocess.run(
-                ["docker", "exec", self.wordpress_container, "wp", "--allow-root", "config", "get", "DB_PASSWORD"],
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            db_password = result.stdout.strip()
-            
-            logger.info(f"✓ Infos BDD extraites: {db_name} / {db_user}")
-            return db_name, db_user, db_password
-            
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"Erreur lors de l'extraction via wp-cli: {e.stderr}")
+        
+        try:
+            values = {entry["name"]: entry["value"] for entry in json.loads(result.stdout)}
+        except (ValueError, TypeError, KeyError):
+            raise RuntimeError(f"Sortie wp-cli illisible: {result.stdout.strip()}")
+        missing = [name for name in ("DB_NAME", "DB_USER", "DB_PASSWORD") if name not in values]
+        if missing:
+            raise RuntimeError(f"Constantes absentes de wp-config.php: {', '.join(missing)}")
+        
+        db_name, db_user, db_password = values["DB_NAME"], values["DB_USER"], values["DB_PASSWORD"]
+        logger.info(f"✓ Infos BDD extraites: {db_name} / {db_user}")
+        return db_name, db_user, db_password
     
     def _create_database_and_user(self, db_name: str, db_user: str, db_password: str) -> None:
         """Crée la base de données et l'utilisateur dans MySQL.
@@ -127,12 +150,30 @@ class DockerDatabaseLoad:
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"Erreur lors de la création de la base: {e.stderr}")
     
-    def _build_load_command(self, dump_file: str, is_compressed: bool) -> str:
+    def _prepare_database(self) -> None:
+        """Résout les infos BDD puis crée la base et l'utilisateur.
+        
+        Raises:
+            RuntimeError: Si les infos BDD sont manquantes ou si la création échoue
+        """
+        # Extrait les infos BDD si wordpress_container est fourni
+        if self.wordpress_container:
+            db_name, db_user, db_password = self._extract_db_config_from_wordpress()
+            self.db_name = db_name
+            self.db_user = db_user
+            self.db_password = db_password
+        elif not (self.db_name and self.db_user and self.db_password):
+            raise RuntimeError("Infos BDD manquantes (wordpress_container ou db_name/db_user/db_password requis)")
+        
+        # Crée la base de données et l'utilisateur
+        self._create_database_and_user(self.db_name, self.db_user, self.db_password)
+    
+    def _build_load_command(self, dump_file: str, codec: Codec) -> str:
         """Construit la commande de chargement MySQL/MariaDB.
         
         Args:
             dump_file: Chemin du fichier dump dans le container
-            is_compressed: Si le fichier est compressé (gzip)
+            codec: Codec du fichier (`none` si non compressé)
             
         Returns:
             Commande de chargement complète
@@ -142,9 +183,9 @@ class DockerDatabaseLoad:
             f"mariadb -u {self.db_user} -p{self.db_password} {self.db_name}"
         )
         
-        # Si le fichier est compressé, ajoute gunzip
-        if is_compressed:
-            cmd = f"gunzip < {dump_file} | {db_cmd}"
+        # Si le fichier est compressé, ajoute le décompresseur du codec
+        if codec.binary is not None:
+            cmd = f"{codec.decompress_command} < {dump_file} | {db_cmd}"
         else:
             cmd = f"{db_cmd} < {dump_file}"
         
@@ -178,20 +219,17 @@ class DockerDatabaseLoad:
             if not dump_path.exists():
                 raise FileNotFoundError(f"Le dump {dump_path} n'existe pas")
             
-            # Étape 0 : Extrait les infos BDD si wordpress_container est fourni
-            if self.wordpress_container:
-                db_name, db_user, db_password = self._extract_db_config_from_wordpress()
-                self.db_name = db_name
-                self.db_user = db_user
-                self.db_password = db_password
-            elif not (self.db_name and self.db_user and self.db_password):
-                raise RuntimeError("Infos BDD manquantes (wordpress_container ou db_name/db_user/db_password requis)")
+            if self.url_rewriter is not None:
+                # Réécriture locale : le dump passe en flux, sans docker cp
+                with open_decompressed(dump_path) as source:
+                    success, message, _ = self.load_from_reader(source, CODECS["none"])
+                return success, message
             
-            # Étape 1 : Crée la base de données et l'utilisateur
-            self._create_database_and_user(self.db_name, self.db_user, self.db_password)
+            # Étapes 0 et 1 : Infos BDD, création de la base et de l'utilisateur
+            self._prepare_database()
             
-            # Détecte si le fichier est compressé
-            is_compressed = dump_path.suffix == '.gz'
+            # Détecte le codec du fichier d'après son extension
+            codec = codec_for_path(dump_path)
             
             dump_name = dump_path.name
             temp_dump = f"/tmp/{dump_name}"
@@ -212,7 +250,7 @@ class DockerDatabaseLoad:
             
             # Étape 3 : Charge le dump via docker exec
             logger.debug(f"Chargement du dump {temp_dump}")
-            load_cmd = self._build_load_command(temp_dump, is_compressed)
+            load_cmd = self._build_load_command(temp_dump, codec)
             try:
                 subprocess.run(
                     ["docker", "exec", self.container_name, "bash", "-c", load_cmd],
@@ -260,6 +298,261 @@ class DockerDatabaseLoad:
             logger.error(error_msg)
             raise
     
+    def _build_stream_load_command(
+        self,
+        codec: Optional[Codec] = None,
+        fast: bool = False,
+    ) -> str:
+        """Construit la commande de chargement d'un script SQL lu sur stdin.
+        
+        Args:
+            codec: Codec du script, décompressé dans le container
+            fast: Désactive les vérifications de clés étrangères et d'unicité
+                pendant l'import
+            
+        Returns:
+            Commande de chargement complète
+        """
+        db_cmd = f"mariadb -u {self.db_user} -p{self.db_password}"
+        if fast:
+            init = "SET SESSION foreign_key_checks=0, unique_checks=0"
+            db_cmd += f" --init-command={shlex.quote(init)}"
+        db_cmd += f" {self.db_name}"
+        if codec is not None and codec.binary is not None:
+            db_cmd = f"{codec.decompress_command} | {db_cmd}"
+        return db_cmd
+    
+    def _exec_sql(
+        self,
+        source: Union[Path, bytes],
+        codec: Optional[Codec] = None,
+        fast: bool = False,
+    ) -> None:
+        """Envoie un script SQL sur l'entrée standard de mariadb dans le container.
+        
+        Args:
+            source: Fichier local (lu en flux) ou script SQL en mémoire
+            codec: Codec du fichier, décompressé dans le container
+            fast: Désactive les vérifications de clés étrangères et d'unicité
+                pendant l'import
+            
+        Raises:
+            RuntimeError: Si le chargement échoue
+        """
+        command = self._build_stream_load_command(codec, fast)
+        if isinstance(source, Path):
+            with open(source, 'rb') as f:
+                pipe_to_container(self.container_name, command, f)
+        else:
+            pipe_to_container(self.container_name, command, io.BytesIO(source))
+    
+    def _exec_rewritten(self, path: Path, fast: bool = False) -> None:
+        """Comme `_exec_sql`, en appliquant `url_rewriter` au fichier.
+        
+        Le fichier est décompressé localement pour être réécrit en flux.
+        
+        Raises:
+            RuntimeError: Si le chargement échoue
+        """
+        command = self._build_stream_load_command(None, fast)
+        with open_decompressed(path) as f:
+            reader = self.url_rewriter.wrap(f)
+            try:
+                pipe_to_container(self.container_name, command, reader)
+            finally:
+                reader.close()
+    
+    def load_from_reader(
+        self,
+        reader: BinaryIO,
+        codec: Optional[Codec] = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ) -> Tuple[bool, str, int]:
+        """Charge dans le container un dump lu en flux.
+        
+        Le dump est envoyé sur l'entrée standard de `docker exec -i ... mariadb`
+        au fur et à mesure de sa lecture : rien n'est écrit sur le disque local.
+        
+        Args:
+            reader: Objet fichier binaire lisible (fichier, flux SSH, ...)
+            codec: Codec du dump (défaut: gzip)
+            buffer_size: Taille des blocs envoyés
+            
+        Returns:
+            Tuple (succès, message, taille_en_bytes)
+            
+        Raises:
+            RuntimeError: Si le chargement échoue
+        """
+        codec = codec or CODECS["gzip"]
+        
+        rewriting = None
+        if self.url_rewriter is not None:
+            if codec.binary is not None:
+                raise RuntimeError(
+                    "Le remplacement d'URL nécessite un dump décompressé "
+                    f"(codec reçu: {codec.name})"
+                )
+            rewriting = self.url_rewriter.wrap(reader)
+            reader = rewriting
+        
+        try:
+            self._prepare_database()
+            logger.info(f"Chargement en flux vers {self.container_name}:{self.db_name}")
+            bytes_sent = pipe_to_container(
+                self.container_name,
+                self._build_stream_load_command(codec),
+                reader,
+                buffer_size,
+            )
+        except RuntimeError as e:
+            error_msg = f"Erreur lors du chargement: {str(e)}"
+            logger.error(error_msg)
+            raise RuntimeError(error_msg)
+        finally:
+            if rewriting is not None:
+                rewriting.close()
+        
+        message = (
+            f"✓ Chargement de la base de données réussi (flux direct)\n"
+            f"  Container: {self.container_name}\n"
+            f"  Base: {self.db_name}\n"
+            f"  Utilisateur: {self.db_user}\n"
+            f"  Taille: {bytes_sent / 1024:.2f} KB"
+        )
+        if rewriting is not None:
+            message += f"\n  URL remplacée: {self.url_rewriter.old.decode()} → {self.url_rewriter.new.decode()}"
+        logger.info(message)
+        
+        return True, message, bytes_sent
+    
+    def load_from_directory(
+        self,
+        dump_dir: Path,
+        jobs: int = 4,
+    ) -> Tuple[bool, str, Dict[str, float]]:
+        """Charge en parallèle un dump découpé par table.
+        
+        Stratégie :
+        1. Crée la base et l'utilisateur
+        2. Charge le schéma sans les index secondaires
+        3. Charge les fichiers de données avec `jobs` imports simultanés
+        4. Reconstruit les index secondaires (en parallèle, un ALTER par table)
+        5. Charge triggers, procédures et events
+        
+        Args:
+            dump_dir: Dossier contenant manifest.json
+            jobs: Nombre d'imports simultanés
+            
+        Returns:
+            Tuple (succès, message, durées_par_table_en_secondes)
+            
+        Raises:
+            FileNotFoundError: Si le dossier ou le manifeste n'existe pas
+            RuntimeError: Si une commande Docker échoue
+        """
+        try:
+            manifest = DumpManifest.load(dump_dir / MANIFEST_NAME)
+            started = time.monotonic()
+            
+            self._prepare_database()
+            
+            # Schéma sans index secondaires
+            with open_decompressed(dump_dir / manifest.schema) as f:
+                schema = f.read().decode('utf-8', errors='surrogateescape')
+            if self.url_rewriter is not None:
+                # Position des colonnes guid pour les INSERT sans liste de colonnes
+                self.url_rewriter.track_schema(schema.encode('utf-8', errors='surrogateescape'))
+            schema, deferred = defer_secondary_indexes(schema)
+            self._exec_sql(schema.encode('utf-8', errors='surrogateescape'))
+            logger.info(f"✓ Schéma chargé ({len(deferred)} tables aux index différés)")
+            
+            # Données : les plus gros fichiers d'abord
+            files: List[Tuple[str, Path]] = []
+            for table in manifest.tables:
+                for item in table.get("files", []):
+                    files.append((table["name"], dump_dir / item["path"]))
+            files.sort(key=lambda item: item[1].stat().st_size, reverse=True)
+            
+            timings: Dict[str, float] = {}
+            
+            def load_data(item: Tuple[str, Path]) -> Tuple[str, float]:
+                table, path = item
+                start = time.monotonic()
+                if self.url_rewriter is not None:
+                    self._exec_rewritten(path, fast=True)
+                else:
+                    self._exec_sql(path, codec_for_path(path), fast=True)
+                return table, time.monotonic() - start
+            
+            def build_indexes(item: Tuple[str, str]) -> Tuple[str, float]:
+                table, statement = item
+                start = time.monotonic()
+                self._exec_sql(statement.encode('utf-8'), fast=True)
+                return table, time.monotonic() - start
+            
+            with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+                for table, elapsed in executor.map(load_data, files):
+                    timings[table] = timings.get(table, 0.0) + elapsed
+                data_elapsed = time.monotonic() - started
+                logger.info(f"✓ Données chargées ({len(files)} fichiers)")
+                
+                index_statements = build_index_statements(deferred)
+                for table, elapsed in executor.map(build_indexes, index_statements.items()):
+                    timings[table] = timings.get(table, 0.0) + elapsed
+                logger.info(f"✓ Index secondaires reconstruits ({len(index_statements)} tables)")
+            
+            # Triggers, procédures et events en dernier
+            routines_path = dump_dir / manifest.routines
+            if routines_path.exists():
+                self._exec_sql(routines_path, codec_for_path(routines_path))
+            
+            total = time.monotonic() - started
+            slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)[:5]
+            details = "\n".join(f"    {table}: {elapsed:.1f}s" for table, elapsed in slowest)
+            message = (
+                f"✓ Chargement parallèle de la base de données réussi\n"
+                f"  Dossier: {dump_dir.name}\n"
+                f"  Container: {self.container_name}\n"
+                f"  Base: {self.db_name}\n"
+                f"  Tables: {len(manifest.tables)} ({len(files)} fichiers, {jobs} imports simultanés)\n"
+                f"  Durée: {total:.1f}s (données: {data_elapsed:.1f}s)\n"
+                f"  Tables les plus lentes:\n{details}"
+            )
+            logger.info(message)
+            
+            return True, message, timings
+            
+        except FileNotFoundError as e:
+            error_msg = f"Erreur: {str(e)}"
+            logger.error(error_msg)
+            raise
+        except RuntimeError as e:
+            error_msg = f"Erreur lors du chargement: {str(e)}"
+            logger.error(error_msg)
+            raise
+    
+    def load_from_file_parallel(
+        self,
+        dump_path: Path,
+        jobs: int = 4,
+    ) -> Tuple[bool, str, Dict[str, float]]:
+        """Découpe un dump monolithique par table puis le charge en parallèle.
+        
+        Args:
+            dump_path: Dump SQL (compressé ou non)
+            jobs: Nombre d'imports simultanés
+            
+        Returns:
+            Tuple (succès, message, durées_par_table_en_secondes)
+        """
+        if not dump_path.exists():
+            raise FileNotFoundError(f"Le dump {dump_path} n'existe pas")
+        
+        with tempfile.TemporaryDirectory(prefix="backup-site-split-") as tmpdir:
+            split_sql_dump(dump_path, Path(tmpdir))
+            return self.load_from_directory(Path(tmpdir), jobs=jobs)
+    
     def load_from_stream(
         self,
         dump_data: bytes,
@@ -280,19 +573,9 @@ class DockerDatabaseLoad:
             RuntimeError: Si une commande Docker échoue
         """
         try:
-            # Crée un fichier temporaire local
-            import tempfile
-            suffix = ".sql.gz" if is_compressed else ".sql"
-            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
-                tmp.write(dump_data)
-                tmp_path = Path(tmp.name)
-            
-            try:
-                # Utilise load_from_file pour faire le travail
-                return self.load_from_file(tmp_path)
-            finally:
-                # Nettoie le fichier temporaire
-                tmp_path.unlink(missing_ok=True)
+            codec = CODECS["gzip"] if is_compressed else CODECS["none"]
+            success, message, _ = self.load_from_reader(io.BytesIO(dump_data), codec)
+            return success, message
             
         except Exception as e:
             error_msg = f"Erreur lors du chargement depuis un flux: {str(e)}"
@@ -8,12 +8,23 @@ Stratégie :
 Flux :
   docker cp archive.tar.gz container:/tmp/
   docker exec container tar -xzf /tmp/archive.tar.gz -C destination
+
+Flux direct (sans fichier intermédiaire, ex: `backup-site clone`) :
+  flux → docker exec -i container tar -xzf - -C destination
+
+Le décompresseur est choisi d'après l'extension de l'archive (.gz, .bz2, .xz,
+.zst ou .tar non compressé).
 """
 
+import io
 import logging
 import subprocess
 from pathlib import Path
-from typing import Tuple
+from typing import BinaryIO, Optional, Tuple
+
+from backup_site.backup.compression import CODECS, Codec, codec_for_path
+
+from .pipe import DEFAULT_BUFFER_SIZE, pipe_to_container
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +46,86 @@ class DockerFileLoad:
         self.container_name = container_name
         self.remote_path = remote_path
     
+    def _build_extract_command(self, archive_file: str, archive_path: Path) -> str:
+        """Construit la commande d'extraction adaptée au codec de l'archive.
+        
+        Args:
+            archive_file: Chemin de l'archive dans le container
+            archive_path: Chemin local de l'archive (pour détecter le codec)
+            
+        Returns:
+            Commande d'extraction complète
+        """
+        codec = codec_for_path(archive_path)
+        
+        if codec.binary is None:
+            return f"tar -xf {archive_file} -C {self.remote_path}"
+        if codec.tar_flag:
+            return f"tar -x{codec.tar_flag}f {archive_file} -C {self.remote_path}"
+        return f"{codec.decompress_command} < {archive_file} | tar -xf - -C {self.remote_path}"
+    
+    def _build_stream_extract_command(self, codec: Codec) -> str:
+        """Construit la commande d'extraction d'une archive lue sur stdin.
+        
+        Args:
+            codec: Codec de l'archive
+            
+        Returns:
+            Commande d'extraction complète
+        """
+        if codec.binary is None:
+            return f"tar -xf - -C {self.remote_path}"
+        if codec.tar_flag:
+            return f"tar -x{codec.tar_flag}f - -C {self.remote_path}"
+        return f"{codec.decompress_command} | tar -xf - -C {self.remote_path}"
+    
+    def load_from_reader(
+        self,
+        reader: BinaryIO,
+        codec: Optional[Codec] = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ) -> Tuple[bool, str, int]:
+        """Extrait dans le container une archive lue en flux.
+        
+        L'archive est envoyée sur l'entrée standard de `docker exec -i ... tar`
+        au fur et à mesure de sa lecture : rien n'est écrit sur le disque local.
+        
+        Args:
+            reader: Objet fichier binaire lisible (fichier, flux SSH, ...)
+            codec: Codec de l'archive (défaut: gzip)
+            buffer_size: Taille des blocs envoyés
+            
+        Returns:
+            Tuple (succès, message, taille_en_bytes)
+            
+        Raises:
+            RuntimeError: Si l'extraction échoue
+        """
+        codec = codec or CODECS["gzip"]
+        logger.info(f"Extraction en flux vers {self.container_name}:{self.remote_path}")
+        
+        try:
+            bytes_sent = pipe_to_container(
+                self.container_name,
+                self._build_stream_extract_command(codec),
+                reader,
+                buffer_size,
+            )
+        except RuntimeError as e:
+            error_msg = f"Erreur lors de l'extraction: {str(e)}"
+            logger.error(error_msg)
+            raise RuntimeError(error_msg)
+        
+        message = (
+            f"✓ Chargement des fichiers réussi (flux direct)\n"
+            f"  Container: {self.container_name}\n"
+            f"  Destination: {self.remote_path}\n"
+            f"  Taille: {bytes_sent / 1024 / 1024:.2f} MB"
+        )
+        logger.info(message)
+        
+        return True, message, bytes_sent
+    
     def load_from_file(
         self,
         archive_path: Path,
@@ -80,7 +171,7 @@ class DockerFileLoad:
             
             # Étape 2 : Extrait l'archive dans le container
             logger.debug(f"Extraction de {temp_archive} vers {self.remote_path}")
-            extract_cmd = f"tar -xzf {temp_archive} -C {self.remote_path}"
+            extract_cmd = self._build_extract_command(temp_archive, archive_path)
             try:
                 subprocess.run(
                     ["docker", "exec", self.container_name, "bash", "-c", extract_cmd],
@@ -145,18 +236,10 @@ class DockerFileLoad:
             RuntimeError: Si une commande Docker échoue
         """
         try:
-            # Crée un fichier temporaire local
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix=".tar.gz", delete=False) as tmp:
-                tmp.write(archive_data)
-                tmp_path = Path(tmp.name)
-            
-            try:
-                # Utilise load_from_file pour faire le travail
-                return self.load_from_file(tmp_path)
-            finally:
-                # Nettoie le fichier temporaire
-                tmp_path.unlink(missing_ok=True)
+            success, message, _ = self.load_from_reader(
+                io.BytesIO(archive_data), CODECS["gzip"]
+            )
+            return success, message
             
         except Exception as e:
             error_msg = f"Erreur lors du chargement depuis un flux: {str(e)}"
@@ -0,0 +1,76 @@
+"""Envoi d'un flux sur l'entrée standard d'une commande dans un container.
+
+Stratégie :
+- `docker exec -i container sh -c "<commande>"` lit le flux sur stdin : aucun
+  fichier n'est écrit sur le disque local ni copié via `docker cp`
+- La lecture du flux source et l'écriture vers docker se font par blocs, en
+  mémoire constante
+- stderr est redirigé vers un fichier temporaire pour ne jamais bloquer le
+  processus pendant l'envoi
+"""
+
+import logging
+import subprocess
+import tempfile
+from typing import BinaryIO
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+
+def pipe_to_container(
+    container_name: str,
+    command: str,
+    reader: BinaryIO,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+) -> int:
+    """Envoie le contenu de `reader` sur stdin d'une commande du container.
+
+    Args:
+        container_name: Nom du container Docker
+        command: Commande shell exécutée dans le container
+        reader: Objet fichier binaire lisible (`read(n)`)
+        buffer_size: Taille des blocs envoyés
+
+    Returns:
+        Nombre d'octets envoyés
+
+    Raises:
+        RuntimeError: Si la commande se termine en erreur
+    """
+    logger.debug(f"docker exec -i {container_name}: {command}")
+
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(
+            ["docker", "exec", "-i", container_name, "sh", "-c", command],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=stderr_file,
+        )
+
+        bytes_sent = 0
+        try:
+            while True:
+                chunk = reader.read(buffer_size)
+                if not chunk:
+                    break
+                process.stdin.write(chunk)
+                bytes_sent += len(chunk)
+        except BrokenPipeError:
+            # La commande s'est arrêtée avant la fin du flux : son code de
+            # sortie et stderr expliquent pourquoi
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            returncode = process.wait()
+
+        if returncode != 0:
+            stderr_file.seek(0)
+            stderr = stderr_file.read().decode('utf-8', errors='ignore').strip()
+            raise RuntimeError(f"La commande a échoué avec le code {returncode}: {stderr}")
+
+    return bytes_sent
@@ -0,0 +1,268 @@
+"""Module de restauration complète d'un site dans Docker local.
+
+Stratégie :
+- Fichiers et base de données visent deux containers distincts : leur
+  chargement est lancé en parallèle (`DockerFileLoad` et `DockerDatabaseLoad`
+  dans deux threads)
+- La base a besoin des identifiants de wp-config.php, qui n'existent dans le
+  container WordPress qu'une fois l'archive extraite : ils sont lus localement
+  dans l'archive (lecture en flux, arrêtée dès que wp-config.php est trouvé),
+  sans attendre l'extraction. À défaut, le chargement de la base attend les
+  fichiers et interroge wp-cli comme `load database`
+- `DockerWordPressAdapter.setup` démarre dès que les deux chargements sont
+  terminés ; si le dump a été réécrit au chargement (`url_rewriter`), il
+  n'exécute pas `wp search-replace`
+- Chaque étape est chronométrée : la frise obtenue montre où passe le temps
+  de restauration
+
+Flux :
+  fichiers   ──────────────────────┐
+  wp-config ─┬ base de données ────┴─ configuration WordPress
+"""
+
+import logging
+import re
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from backup_site.backup.compression import open_decompressed
+
+from .database import DockerDatabaseLoad
+from .files import DockerFileLoad
+from .wordpress import DockerWordPressAdapter
+
+logger = logging.getLogger(__name__)
+
+WP_CONFIG = "wp-config.php"
+
+_DEFINE_PATTERN = re.compile(
+    r"""define\(\s*['"](DB_NAME|DB_USER|DB_PASSWORD)['"]\s*,\s*(['"])((?:\\.|(?!\2).)*)\2\s*\)"""
+)
+
+
+def parse_wp_config(content: str) -> Dict[str, str]:
+    """Extrait DB_NAME, DB_USER et DB_PASSWORD d'un wp-config.php.
+
+    Seules les constantes définies par une chaîne littérale sont reconnues
+    (pas de `getenv()` ni de concaténation).
+
+    Returns:
+        Constantes trouvées (éventuellement incomplètes)
+    """
+    values = {}
+    for name, _, value in _DEFINE_PATTERN.findall(content):
+        values[name] = re.sub(r"\\(.)", r"\1", value)
+    return values
+
+
+def read_wp_config(archives: Sequence[Path]) -> Optional[Dict[str, str]]:
+    """Lit les identifiants de la base dans le wp-config.php d'une archive.
+
+    L'archive est lue en flux et la lecture s'arrête au premier wp-config.php
+    situé à la racine du site.
+
+    Args:
+        archives: Archives de fichiers (une seule, ou les shards d'une
+            sauvegarde parallèle)
+
+    Returns:
+        DB_NAME, DB_USER et DB_PASSWORD, ou None s'ils sont introuvables
+    """
+    for archive in archives:
+        with open_decompressed(archive) as raw, tarfile.open(fileobj=raw, mode="r|") as tar:
+            for member in tar:
+                if not member.isfile() or member.name.removeprefix("./") != WP_CONFIG:
+                    continue
+                content = tar.extractfile(member).read().decode("utf-8", errors="replace")
+                values = parse_wp_config(content)
+                if len(values) == 3:
+                    return values
+                logger.warning(f"Identifiants BDD incomplets dans {archive.name}:{member.name}")
+                return None
+    return None
+
+
+@dataclass
+class StageTiming:
+    """Durée d'une étape de restauration (secondes depuis le début)."""
+
+    name: str
+    started: float
+    finished: float
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+
+@dataclass
+class RestoreTimeline:
+    """Frise des étapes d'une restauration."""
+
+    stages: List[StageTiming] = field(default_factory=list)
+
+    @property
+    def total(self) -> float:
+        return max((stage.finished for stage in self.stages), default=0.0)
+
+    @property
+    def failed(self) -> List[StageTiming]:
+        return [stage for stage in self.stages if stage.error]
+
+    def bar(self, stage: StageTiming, width: int = 40) -> str:
+        """Barre de la frise d'une étape, à l'échelle de la durée totale."""
+        scale = width / self.total if self.total else 0.0
+        start = int(stage.started * scale)
+        length = max(int(round(stage.finished * scale)) - start, 1)
+        return " " * start + "█" * min(length, width - start)
+
+
+class DockerRestore:
+    """Restaure fichiers et base de données en parallèle, puis configure WordPress."""
+
+    def __init__(
+        self,
+        file_load: DockerFileLoad,
+        db_load: DockerDatabaseLoad,
+        adapter: Optional[DockerWordPressAdapter] = None,
+        jobs: int = 4,
+        split: bool = False,
+    ):
+        """Initialise la restauration.
+
+        Args:
+            file_load: Chargeur des fichiers (container WordPress)
+            db_load: Chargeur de la base (container MySQL/MariaDB) ; sans
+                identifiants explicites, ils sont lus dans l'archive
+            adapter: Configuration WordPress lancée après les deux chargements
+                (None = pas de configuration)
+            jobs: Imports simultanés d'un dump découpé par table
+            split: Découpe un dump monolithique pour le charger en parallèle
+        """
+        self.file_load = file_load
+        self.db_load = db_load
+        self.adapter = adapter
+        self.jobs = jobs
+        self.split = split
+        self._lock = threading.Lock()
+
+    def _stage(
+        self, timeline: RestoreTimeline, origin: float, name: str, action: Callable[[], None]
+    ) -> bool:
+        """Exécute et chronomètre une étape ; une erreur est consignée, pas levée."""
+        started = time.monotonic() - origin
+        error = None
+        try:
+            action()
+        except Exception as e:
+            error = str(e)
+            logger.error(f"Étape '{name}' en échec: {error}")
+        stage = StageTiming(name, started, time.monotonic() - origin, error)
+        with self._lock:
+            timeline.stages.append(stage)
+        return error is None
+
+    def _load_files(self, archives: Sequence[Path]) -> None:
+        for archive in archives:
+            self.file_load.load_from_file(archive)
+
+    def _load_database(self, dump: Path) -> None:
+        if dump.is_dir():
+            self.db_load.load_from_directory(dump, jobs=self.jobs)
+        elif self.split:
+            self.db_load.load_from_file_parallel(dump, jobs=self.jobs)
+        else:
+            self.db_load.load_from_file(dump)
+
+    def _resolve_credentials(self, archives: Sequence[Path]) -> bool:
+        """Renseigne les identifiants BDD depuis l'archive si nécessaire.
+
+        Returns:
+            False si le chargement de la base doit attendre les fichiers
+            (identifiants lus ensuite par wp-cli)
+        """
+        db_load = self.db_load
+        values = read_wp_config(archives)
+        if values is None:
+            if not db_load.wordpress_container:
+                raise RuntimeError(f"{WP_CONFIG} introuvable dans l'archive")
+            logger.warning(f"{WP_CONFIG} illisible dans l'archive : attente des fichiers")
+            return False
+        db_load.db_name = values["DB_NAME"]
+        db_load.db_user = values["DB_USER"]
+        db_load.db_password = values["DB_PASSWORD"]
+        db_load.wordpress_container = None
+        return True
+
+    def run(self, archives: Sequence[Path], dump: Optional[Path]) -> RestoreTimeline:
+        """Lance la restauration et renvoie sa frise.
+
+        Une étape en échec est consignée dans la frise (`RestoreTimeline.failed`)
+        et empêche la configuration WordPress ; l'autre chargement va à son
+        terme.
+
+        Args:
+            archives: Archives de fichiers (vide = fichiers non restaurés)
+            dump: Dump ou dossier de dump (None = base non restaurée)
+
+        Returns:
+            Frise des étapes exécutées
+        """
+        timeline = RestoreTimeline()
+        origin = time.monotonic()
+        files_done = threading.Event()
+
+        def files_branch() -> bool:
+            try:
+                return self._stage(
+                    timeline, origin, "Fichiers", lambda: self._load_files(archives)
+                )
+            finally:
+                files_done.set()
+
+        def database_branch() -> bool:
+            outcome = {"ready": True}
+
+            def credentials() -> None:
+                outcome["ready"] = self._resolve_credentials(archives)
+
+            db_load = self.db_load
+            if db_load.db_name and db_load.db_user and db_load.db_password:
+                # Identifiants explicites : prioritaires sur wp-config.php
+                db_load.wordpress_container = None
+            elif archives and not self._stage(
+                timeline, origin, "Identifiants (wp-config)", credentials
+            ):
+                return False
+            if not outcome["ready"]:
+                files_done.wait()
+            return self._stage(
+                timeline, origin, "Base de données", lambda: self._load_database(dump)
+            )
+
+        branches = []
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            if archives:
+                branches.append(executor.submit(files_branch))
+            else:
+                files_done.set()
+            if dump is not None:
+                branches.append(executor.submit(database_branch))
+            succeeded = all([branch.result() for branch in branches])
+
+        if self.adapter is not None and succeeded:
+            # URLs déjà remplacées pendant le chargement : pas de search-replace
+            rewritten = dump is not None and self.db_load.url_rewriter is not None
+            self._stage(
+                timeline, origin, "Configuration WordPress",
+                lambda: self.adapter.setup(search_replace=not rewritten),
+            )
+
+        logger.info(f"Restauration terminée en {timeline.total:.1f}s")
+        return timeline
@@ -0,0 +1,201 @@
+"""Outils de manipulation des dumps SQL pour le chargement parallèle.
+
+Stratégie :
+- Découpe un dump mysqldump monolithique en un dossier schéma / données par
+  table / routines, au même format que `ParallelDatabaseBackup`
+- Retire les index secondaires des CREATE TABLE pour les reconstruire après
+  l'import des données (un seul tri par index au lieu d'une mise à jour ligne
+  à ligne)
+
+Repères utilisés dans la sortie de mysqldump :
+  -- Table structure for table `x`      → schéma
+  -- Dumping data for table `x`         → données de x
+  UNLOCK TABLES;                        → fin des données (triggers ensuite)
+  -- Dumping routines / events          → routines
+"""
+
+import logging
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from backup_site.backup.compression import open_decompressed
+from backup_site.backup.parallel_dump import MANIFEST_NAME, DumpManifest, safe_filename
+
+logger = logging.getLogger(__name__)
+
+TABLE_MARKER = re.compile(r"^-- (?:Table structure|Temporary (?:table|view) structure|Final view structure) for (?:table|view) `(.+)`")
+DATA_MARKER = re.compile(r"^-- Dumping data for table `(.+)`")
+ROUTINES_MARKER = re.compile(r"^-- Dumping (?:routines|events) for database")
+CREATE_TABLE = re.compile(r"^CREATE TABLE `((?:[^`]|``)+)` \(")
+SECONDARY_KEY = re.compile(r"^\s*(?:UNIQUE |FULLTEXT |SPATIAL )?KEY ")
+AUTO_INCREMENT_COLUMN = re.compile(r"^\s*`((?:[^`]|``)+)` .*\bAUTO_INCREMENT\b")
+FIRST_KEY_COLUMN = re.compile(r"\(`((?:[^`]|``)+)`")
+
+
+def _first_key_column(definition: str) -> Optional[str]:
+    """Première colonne d'une définition d'index (`KEY `nom` (`col`,...)`)."""
+    match = FIRST_KEY_COLUMN.search(definition)
+    return match.group(1) if match else None
+
+
+def defer_secondary_indexes(schema: str) -> Tuple[str, Dict[str, List[str]]]:
+    """Retire les index secondaires des CREATE TABLE d'un schéma.
+
+    Les tables avec contraintes de clé étrangère sont laissées intactes. La
+    colonne AUTO_INCREMENT doit ouvrir un index dès la création (InnoDB) :
+    si la clé primaire ne commence pas par elle, les index qui commencent
+    par elle sont conservés.
+
+    Args:
+        schema: Script SQL de création du schéma
+
+    Returns:
+        Tuple (schéma_modifié, {table: [définitions d'index]})
+    """
+    output: List[str] = []
+    deferred: Dict[str, List[str]] = {}
+    lines = schema.split("\n")
+    index = 0
+
+    while index < len(lines):
+        line = lines[index]
+        match = CREATE_TABLE.match(line)
+        if not match:
+            output.append(line)
+            index += 1
+            continue
+
+        table = match.group(1).replace("``", "`")
+        body: List[str] = []
+        index += 1
+        while index < len(lines) and not lines[index].startswith(")"):
+            body.append(lines[index])
+            index += 1
+        closing = lines[index] if index < len(lines) else ")"
+        index += 1
+
+        has_foreign_keys = any(item.strip().startswith("CONSTRAINT") for item in body)
+        keys = [item for item in body if SECONDARY_KEY.match(item)]
+
+        auto_increment = next(
+            (m.group(1) for m in map(AUTO_INCREMENT_COLUMN.match, body) if m), None
+        )
+        primary = next(
+            (item for item in body if item.strip().startswith("PRIMARY KEY")), None
+        )
+        if auto_increment is not None and (
+            primary is None or _first_key_column(primary) != auto_increment
+        ):
+            keys = [item for item in keys if _first_key_column(item) != auto_increment]
+
+        if keys and not has_foreign_keys:
+            kept = [item.rstrip().rstrip(",") for item in body if item not in keys]
+            deferred[table] = [item.strip().rstrip(",") for item in keys]
+            body = [f"{item}," for item in kept[:-1]] + kept[-1:]
+
+        output.append(line)
+        output.extend(body)
+        output.append(closing)
+
+    return "\n".join(output), deferred
+
+
+def build_index_statements(deferred: Dict[str, List[str]]) -> Dict[str, str]:
+    """Construit un ALTER TABLE par table recréant tous ses index d'un coup."""
+    return {
+        table: (
+            f"ALTER TABLE `{table.replace('`', '``')}` "
+            + ", ".join(f"ADD {definition}" for definition in definitions)
+            + ";"
+        )
+        for table, definitions in deferred.items()
+    }
+
+
+def split_sql_dump(dump_path: Path, output_dir: Path) -> DumpManifest:
+    """Découpe un dump mysqldump monolithique en dossier de dump parallèle.
+
+    L'en-tête du dump (SET NAMES, sql_mode...) est recopié en tête de chaque
+    fichier pour que chacun puisse être chargé indépendamment. Les fichiers
+    produits ne sont pas compressés.
+
+    Args:
+        dump_path: Dump SQL (compressé ou non)
+        output_dir: Dossier de destination
+
+    Returns:
+        Manifeste du dossier produit
+    """
+    data_dir = output_dir / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    header: List[bytes] = []
+    schema_file = open(output_dir / "schema.sql", "wb")
+    routines_file = open(output_dir / "routines.sql", "wb")
+    data_files: Dict[str, Tuple[Path, object]] = {}
+    current: Optional[object] = None
+    in_header = True
+
+    def open_data_file(table: str):
+        if table not in data_files:
+            path = data_dir / f"{safe_filename(table)}.sql"
+            handle = open(path, "wb")
+            handle.write(b"".join(header))
+            data_files[table] = (path, handle)
+        return data_files[table][1]
+
+    try:
+        with open_decompressed(dump_path) as source:
+            for raw_line in source:
+                if raw_line.startswith(b"-- "):
+                    text = raw_line.decode("utf-8", errors="replace")
+                    table_match = TABLE_MARKER.match(text)
+                    data_match = DATA_MARKER.match(text)
+                    if table_match or data_match or ROUTINES_MARKER.match(text):
+                        if in_header:
+                            in_header = False
+                            schema_file.write(b"".join(header))
+                            routines_file.write(b"".join(header))
+                        if table_match:
+                            current = schema_file
+                        elif data_match:
+                            current = open_data_file(data_match.group(1))
+                        else:
+                            current = routines_file
+
+                if in_header:
+                    header.append(raw_line)
+                    continue
+
+                current.write(raw_line)
+                if raw_line.startswith(b"UNLOCK TABLES;") and current is not schema_file:
+                    # Les triggers d'une table suivent ses données
+                    current = routines_file
+    finally:
+        schema_file.close()
+        routines_file.close()
+        for path, handle in data_files.values():
+            handle.close()
+
+    manifest = DumpManifest(
+        database="",
+        extension="",
+        consistency="single-dump",
+        schema="schema.sql",
+        routines="routines.sql",
+        tables=[
+            {
+                "name": table,
+                "files": [{
+                    "path": f"data/{path.name}",
+                    "where": None,
+                    "size": path.stat().st_size,
+                }],
+            }
+            for table, (path, handle) in data_files.items()
+        ],
+    )
+    manifest.save(output_dir / MANIFEST_NAME)
+    logger.info(f"Dump découpé en {len(data_files)} fichiers de données: {output_dir}")
+    return manifest
@@ -0,0 +1,378 @@
+"""Remplacement d'URL dans un dump SQL pendant son chargement.
+
+Stratégie :
+- Le dump est réécrit au fil de son envoi vers `docker exec -i ... mariadb`,
+  par lots de lignes complètes : plus de `wp search-replace` ligne à ligne en
+  PHP après l'import
+- Un lot sans l'ancienne URL est transmis tel quel (cas de la plupart des
+  lots) ; seules les chaînes `'...'` des lignes INSERT qui la contiennent
+  sont décodées
+- Même sémantique que `wp search-replace --skip-columns=guid` :
+  - les colonnes `guid` ne sont pas modifiées (position lue dans la liste de
+    colonnes de l'INSERT, ou dans le CREATE TABLE qui précède)
+  - les valeurs PHP sérialisées sont parcourues selon leurs longueurs
+    d'origine, les longueurs `s:NN:"..."` sont recalculées (en octets) ; les
+    clés de tableau, noms de propriétés et objets `C:` ne sont pas modifiés ;
+    une chaîne sérialisée dans une chaîne sérialisée est traitée récursivement
+  - une valeur qui ne se désérialise pas est remplacée telle quelle
+- Option multi-processus : les lots sont réécrits par un pool de processus,
+  dans l'ordre d'envoi ; le suivi des CREATE TABLE reste dans le processus
+  principal
+
+mysqldump écrit une instruction par ligne et échappe les retours à la ligne
+des chaînes (`\\n`) : un lot découpé sur `\\n` ne coupe jamais une chaîne.
+
+Flux :
+  dump → lots de lignes → [pool de processus] → réécriture → mariadb
+"""
+
+import logging
+import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import BinaryIO, Deque, Dict, Iterator, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 4 * 1024 * 1024
+
+_LITERAL = re.compile(rb"'(?:[^'\\]|\\.)*'", re.S)
+_TOKEN = re.compile(rb"'(?:[^'\\]|\\.)*'|[(),]|[^'(),]+", re.S)
+_INSERT = re.compile(
+    rb"^(?:INSERT|REPLACE)(?: IGNORE)? INTO `((?:[^`]|``)+)`(?: \(([^)]*)\))? VALUES "
+)
+_CREATE_TABLE = re.compile(rb"^CREATE TABLE `((?:[^`]|``)+)` \(")
+_COLUMN = re.compile(rb"^\s+`((?:[^`]|``)+)` ")
+
+_SQL_UNESCAPES = {
+    b"0": b"\x00", b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"Z": b"\x1a",
+}
+_SQL_ESCAPE = re.compile(rb"[\x00\n\r\\'\"\x1a]")
+_SQL_ESCAPES = {
+    b"\x00": b"\\0", b"\n": b"\\n", b"\r": b"\\r", b"\\": b"\\\\",
+    b"'": b"\\'", b'"': b'\\"', b"\x1a": b"\\Z",
+}
+
+
+def sql_unescape(data: bytes) -> bytes:
+    """Décode le contenu d'une chaîne SQL échappée par mysqldump."""
+    if b"\\" not in data:
+        return data
+    return re.sub(
+        rb"\\(.)", lambda match: _SQL_UNESCAPES.get(match.group(1), match.group(1)),
+        data, flags=re.S,
+    )
+
+
+def sql_escape(data: bytes) -> bytes:
+    """Échappe une valeur comme mysqldump (mysql_real_escape_string)."""
+    return _SQL_ESCAPE.sub(lambda match: _SQL_ESCAPES[match.group()], data)
+
+
+def _column_list(columns: bytes) -> list:
+    return [name.strip().strip(b"`").replace(b"``", b"`") for name in columns.split(b",")]
+
+
+class UrlRewriter:
+    """Remplace une URL dans les données d'un dump SQL.
+
+    Les instances sont envoyées aux processus du pool : elles ne contiennent
+    que des octets et des dictionnaires.
+    """
+
+    def __init__(
+        self,
+        old_url: str,
+        new_url: str,
+        skip_columns: Sequence[str] = ("guid",),
+        workers: int = 1,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        """Initialise le remplacement.
+
+        Args:
+            old_url: URL à remplacer (ex: https://www.site-de-production.com)
+            new_url: Nouvelle URL (ex: http://localhost:8080)
+            skip_columns: Colonnes jamais modifiées
+            workers: Processus réécrivant les lots (1 = dans le processus courant)
+            batch_size: Taille approximative des lots (octets)
+        """
+        self.old = old_url.encode("utf-8")
+        self.new = new_url.encode("utf-8")
+        self.escaped_old = sql_escape(self.old)
+        self.skip_columns = frozenset(name.encode("utf-8") for name in skip_columns)
+        self.workers = max(workers, 1)
+        self.batch_size = batch_size
+        # Position de la colonne ignorée de chaque table connue par son CREATE TABLE
+        self.skips: Dict[bytes, int] = {}
+        self._creating: Optional[bytes] = None
+        self._columns: list = []
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["skips"] = {}
+        return state
+
+    # --- Valeurs -------------------------------------------------------------
+
+    def rewrite_value(self, value: bytes) -> bytes:
+        """Remplace l'URL dans une valeur décodée, sérialisée PHP ou non."""
+        if self.old not in value:
+            return value
+        if value[:2] in (b"a:", b"O:", b"C:", b"s:"):
+            try:
+                rewritten, end = self._serialized(value, 0)
+                if end == len(value):
+                    return rewritten
+            except (ValueError, IndexError):
+                pass
+        return value.replace(self.old, self.new)
+
+    def _scalar(self, data: bytes, pos: int) -> Tuple[bytes, int]:
+        end = data.index(b";", pos) + 1
+        return data[pos:end], end
+
+    def _string(self, data: bytes, pos: int, replace: bool) -> Tuple[bytes, int]:
+        # s:NN:"...";  (NN octets, guillemets non échappés)
+        colon = data.index(b":", pos + 2)
+        length = int(data[pos + 2:colon])
+        if data[colon + 1:colon + 2] != b'"':
+            raise ValueError("chaîne sérialisée invalide")
+        start = colon + 2
+        end = start + length
+        if data[end:end + 2] != b'";':
+            raise ValueError("longueur sérialisée incohérente")
+        if not replace:
+            return data[pos:end + 2], end + 2
+        value = self.rewrite_value(data[start:end])
+        return b's:%d:"%s";' % (len(value), value), end + 2
+
+    def _members(self, data: bytes, pos: int, count: int) -> Tuple[bytes, int]:
+        """Paires clé/valeur d'un tableau ou d'un objet, entre `{` et `}`."""
+        if data[pos:pos + 1] != b"{":
+            raise ValueError("accolade attendue")
+        parts = [b"{"]
+        pos += 1
+        for _ in range(count):
+            key, pos = self._serialized(data, pos, replace=False)
+            value, pos = self._serialized(data, pos)
+            parts += (key, value)
+        if data[pos:pos + 1] != b"}":
+            raise ValueError("accolade fermante attendue")
+        parts.append(b"}")
+        return b"".join(parts), pos + 1
+
+    def _serialized(self, data: bytes, pos: int, replace: bool = True) -> Tuple[bytes, int]:
+        """Réécrit la valeur sérialisée commençant à `pos`.
+
+        Returns:
+            Tuple (valeur réécrite, position suivant la valeur)
+
+        Raises:
+            ValueError: Si la valeur n'est pas une sérialisation PHP valide
+        """
+        kind = data[pos:pos + 1]
+        if kind == b"s":
+            return self._string(data, pos, replace)
+        if kind == b"a":
+            colon = data.index(b":", pos + 2)
+            members, end = self._members(data, colon + 1, int(data[pos + 2:colon]))
+            return data[pos:colon + 1] + members, end
+        if kind in (b"O", b"C", b"E"):
+            # O:len:"Classe":N:{...}  C:len:"Classe":N:{données}  E:len:"Classe:Cas";
+            colon = data.index(b":", pos + 2)
+            name_end = colon + 2 + int(data[pos + 2:colon])
+            if data[colon + 1:colon + 2] != b'"' or data[name_end:name_end + 1] != b'"':
+                raise ValueError("nom de classe invalide")
+            if kind == b"E":
+                if data[name_end + 1:name_end + 2] != b";":
+                    raise ValueError("enum invalide")
+                return data[pos:name_end + 2], name_end + 2
+            count_end = data.index(b":", name_end + 2)
+            count = int(data[name_end + 2:count_end])
+            if kind == b"C":
+                # Sérialisation propre à la classe : contenu opaque
+                end = count_end + 1 + count + 2
+                if data[count_end + 1:count_end + 2] != b"{" or data[end - 1:end] != b"}":
+                    raise ValueError("objet C: invalide")
+                return data[pos:end], end
+            members, end = self._members(data, count_end + 1, count)
+            return data[pos:count_end + 1] + members, end
+        if kind in (b"i", b"d", b"b", b"r", b"R") and data[pos + 1:pos + 2] == b":":
+            return self._scalar(data, pos)
+        if kind == b"N" and data[pos + 1:pos + 2] == b";":
+            return b"N;", pos + 2
+        raise ValueError("type sérialisé inconnu")
+
+    def _literal(self, literal: bytes) -> bytes:
+        """Réécrit une chaîne SQL `'...'` (échappée) si elle contient l'URL."""
+        if self.escaped_old not in literal:
+            return literal
+        value = sql_unescape(literal[1:-1])
+        rewritten = self.rewrite_value(value)
+        if rewritten == value:
+            return literal
+        return b"'" + sql_escape(rewritten) + b"'"
+
+    # --- Lignes ----------------------------------------------------------------
+
+    def track_schema(self, data: bytes) -> None:
+        """Relève la position des colonnes ignorées dans les CREATE TABLE.
+
+        Appelé sur chaque lot, dans l'ordre du flux (processus principal).
+        """
+        if self._creating is None and b"CREATE TABLE" not in data:
+            return
+        for line in data.split(b"\n"):
+            if self._creating is None:
+                match = _CREATE_TABLE.match(line)
+                if match:
+                    self._creating = match.group(1).replace(b"``", b"`")
+                    self._columns = []
+                continue
+            column = _COLUMN.match(line)
+            if column:
+                self._columns.append(column.group(1).replace(b"``", b"`"))
+                continue
+            if line.startswith(b")"):
+                for index, name in enumerate(self._columns):
+                    if name in self.skip_columns:
+                        self.skips[self._creating] = index
+                self._creating = None
+
+    def _insert(self, line: bytes, skips: Dict[bytes, int]) -> bytes:
+        match = _INSERT.match(line)
+        if not match:
+            return line
+        skip = None
+        if match.group(2) is not None:
+            for index, name in enumerate(_column_list(match.group(2))):
+                if name in self.skip_columns:
+                    skip = index
+        else:
+            skip = skips.get(match.group(1).replace(b"``", b"`"))
+
+        head, values = line[:match.end()], line[match.end():]
+        if skip is None:
+            return head + _LITERAL.sub(lambda m: self._literal(m.group()), values)
+
+        parts = [head]
+        column = 0
+        for token in _TOKEN.finditer(values):
+            token = token.group()
+            if token == b"(":
+                column = 0
+            elif token == b",":
+                column += 1
+            elif token[:1] == b"'" and column != skip:
+                token = self._literal(token)
+            parts.append(token)
+        return b"".join(parts)
+
+    def rewrite_lines(self, data: bytes, skips: Optional[Dict[bytes, int]] = None) -> bytes:
+        """Réécrit un lot de lignes complètes.
+
+        Args:
+            data: Lignes du dump (terminées par `\\n`, sauf la dernière du flux)
+            skips: Position de la colonne ignorée par table (défaut: `self.skips`)
+
+        Returns:
+            Lignes réécrites
+        """
+        if self.escaped_old not in data:
+            return data
+        skips = self.skips if skips is None else skips
+        return b"\n".join(
+            self._insert(line, skips) if self.escaped_old in line else line
+            for line in data.split(b"\n")
+        )
+
+    def wrap(self, reader: BinaryIO) -> "RewritingReader":
+        """Flux lisible appliquant le remplacement à `reader`."""
+        return RewritingReader(reader, self)
+
+
+class RewritingReader:
+    """Flux lisible (`read(n)`) réécrivant un dump par lots de lignes."""
+
+    def __init__(self, reader: BinaryIO, rewriter: UrlRewriter):
+        """Initialise le flux.
+
+        Args:
+            reader: Dump SQL décompressé
+            rewriter: Remplacement à appliquer
+        """
+        self.reader = reader
+        self.rewriter = rewriter
+        self.bytes_read = 0
+        self._buffer = bytearray()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._output = self._rewritten()
+
+    def _batches(self) -> Iterator[bytes]:
+        """Lots d'environ `batch_size` octets, coupés après un `\\n`."""
+        pending = b""
+        while True:
+            chunk = self.reader.read(self.rewriter.batch_size)
+            if not chunk:
+                break
+            self.bytes_read += len(chunk)
+            cut = chunk.rfind(b"\n")
+            if cut < 0:
+                pending += chunk
+                continue
+            yield pending + chunk[:cut + 1]
+            pending = chunk[cut + 1:]
+        if pending:
+            yield pending
+
+    def _rewritten(self) -> Iterator[bytes]:
+        rewriter = self.rewriter
+        if rewriter.workers == 1:
+            for batch in self._batches():
+                rewriter.track_schema(batch)
+                yield rewriter.rewrite_lines(batch)
+            return
+
+        # Lots en cours, dans l'ordre du flux : déjà prêts (sans l'URL) ou en
+        # cours de réécriture dans le pool
+        pending: Deque[Union[bytes, Future]] = deque()
+        self._pool = ProcessPoolExecutor(max_workers=rewriter.workers)
+        try:
+            for batch in self._batches():
+                rewriter.track_schema(batch)
+                if rewriter.escaped_old in batch:
+                    pending.append(
+                        self._pool.submit(rewriter.rewrite_lines, batch, dict(rewriter.skips))
+                    )
+                else:
+                    pending.append(batch)
+                while len(pending) > rewriter.workers * 2:
+                    yield self._result(pending.popleft())
+            while pending:
+                yield self._result(pending.popleft())
+        finally:
+            self.close()
+
+    @staticmethod
+    def _result(item: Union[bytes, Future]) -> bytes:
+        return item if isinstance(item, bytes) else item.result()
+
+    def read(self, size: int = -1) -> bytes:
+        """Lit au plus `size` octets réécrits (tout le flux si `size` < 0)."""
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._output, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def close(self) -> None:
+        """Arrête le pool de processus (les lots en attente sont abandonnés)."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
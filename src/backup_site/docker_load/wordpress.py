@@ -4,6 +4,8 @@ Stratégie :
 - Utilise wp-cli pour adapter les URLs
 - Fait un search-replace sur le contenu
 - Pas de SSH, accès direct au container Docker via docker exec
+- Les commandes wp-cli successives sont groupées dans un seul processus
+  (`WpCliBatch`) : WordPress n'est démarré qu'une fois
 
 Flux :
   1. Adapter siteurl et home avec wp-cli
@@ -12,11 +14,36 @@ Flux :
 """
 
 import logging
+import shlex
 import subprocess
-from typing import Tuple
+from typing import List, Sequence, Tuple
+
+from .wp_cli import WpCliBatch
 
 logger = logging.getLogger(__name__)
 
+WP_CONTENT = "/var/www/html/wp-content"
+
+
+def permission_fix_command(root: str = WP_CONTENT, owner: str = "www-data:www-data") -> str:
+    """Commande corrigeant propriétaire et permissions de `root` en un seul parcours.
+
+    - propriétaire `owner` partout (liens symboliques compris, sans les suivre)
+    - dossiers de `root`/uploads : 777, autres dossiers : 755
+    - fichiers : 644
+
+    `find ... -exec {} +` regroupe les chemins : chown et chmod sont lancés
+    une fois par lot de fichiers, pas une fois par fichier.
+    """
+    root = shlex.quote(root.rstrip("/"))
+    uploads = f"{root}/uploads"
+    return (
+        f"find {root} -exec chown -h {shlex.quote(owner)} {{}} + "
+        f"\\( \\( -path {uploads} -o -path {uploads}/'*' \\) -type d -exec chmod 777 {{}} + "
+        f"-o -type d -exec chmod 755 {{}} + "
+        f"-o -type f -exec chmod 644 {{}} + \\)"
+    )
+
 
 class DockerWordPressAdapter:
     """Gère l'adaptation de la configuration WordPress pour Docker local."""
@@ -63,6 +90,24 @@ class DockerWordPressAdapter:
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"Erreur wp-cli: {e.stderr}")
     
+    def _run_wp_cli_batch(self, *commands: Sequence[str]) -> List[str]:
+        """Exécute plusieurs commandes wp-cli dans un seul processus.
+        
+        Args:
+            *commands: Arguments de chaque commande wp-cli
+            
+        Returns:
+            Sortie de chaque commande
+            
+        Raises:
+            RuntimeError: Si une commande échoue (les suivantes ne sont pas
+                exécutées)
+        """
+        batch = WpCliBatch(self.container_name)
+        for args in commands:
+            batch.add(*args)
+        return [result.stdout for result in batch.run()]
+    
     def _configure_filesystem(self) -> None:
         """Configure le système de fichiers WordPress pour permettre les mises à jour.
         
@@ -104,56 +149,16 @@ class DockerWordPressAdapter:
                 logger.info(f"✓ FS_METHOD configuré")
             
             # Étape 2 : Corriger les permissions de wp-content/ pour que www-data puisse écrire
+            # (un seul parcours de l'arborescence, chown/chmod groupés par lots)
             logger.debug("Correction des permissions de wp-content/")
             
-            # Changer l'owner en www-data:www-data pour tout wp-content/
-            # Cela permet à WordPress (qui s'exécute en tant que www-data) d'écrire partout
-            cmd_chown = [
-                "docker", "exec", self.container_name, "bash", "-c",
-                "chown -R www-data:www-data /var/www/html/wp-content"
-            ]
-            
-            subprocess.run(
-                cmd_chown,
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            
-            # Dossiers : 755 (rwxr-xr-x) - sauf uploads qui doit être 777
-            cmd_dirs = [
+            cmd_permissions = [
                 "docker", "exec", self.container_name, "bash", "-c",
-                "find /var/www/html/wp-content -type d ! -path '*/uploads*' -exec chmod 755 {} \\;"
+                permission_fix_command(WP_CONTENT)
             ]
             
             subprocess.run(
-                cmd_dirs,
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            
-            # uploads/ : 777 (rwxrwxrwx) - writable par tout le monde
-            cmd_uploads_dirs = [
-                "docker", "exec", self.container_name, "bash", "-c",
-                "find /var/www/html/wp-content/uploads -type d -exec chmod 777 {} \\;"
-            ]
-            
-            subprocess.run(
-                cmd_uploads_dirs,
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            
-            # Fichiers : 644 (rw-r--r--)
-            cmd_files = [
-                "docker", "exec", self.container_name, "bash", "-c",
-                "find /var/www/html/wp-content -type f -exec chmod 644 {} \\;"
-            ]
-            
-            subprocess.run(
-                cmd_files,
+                cmd_permissions,
                 check=True,
                 capture_output=True,
                 text=True
@@ -164,7 +169,7 @@ class DockerWordPressAdapter:
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"Erreur lors de la configuration du filesystem: {e.stderr}")
     
-    def setup(self) -> Tuple[bool, str]:
+    def setup(self, search_replace: bool = True) -> Tuple[bool, str]:
         """Configure WordPress pour Docker local.
         
         Étapes :
@@ -174,6 +179,10 @@ class DockerWordPressAdapter:
         4. Mettre à jour home
         5. Faire search-replace sur le contenu
         
+        Args:
+            search_replace: Lance `wp search-replace` (inutile si les URLs ont
+                été remplacées pendant le chargement, voir `url_rewrite.py`)
+        
         Returns:
             Tuple (succès, message)
             
@@ -199,26 +208,27 @@ class DockerWordPressAdapter:
             subprocess.run(cmd, check=True, capture_output=True, text=True)
             logger.info(f"✓ DB_HOST configuré pour Docker")
             
-            # Étape 3 : Mettre à jour siteurl
-            logger.debug(f"Étape 3 : Mise à jour de siteurl")
-            self._run_wp_cli_command("option", "update", "siteurl", self.new_url)
-            logger.info(f"✓ siteurl mis à jour")
-            
-            # Étape 4 : Mettre à jour home
-            logger.debug(f"Étape 4 : Mise à jour de home")
-            self._run_wp_cli_command("option", "update", "home", self.new_url)
-            logger.info(f"✓ home mis à jour")
-            
-            # Étape 5 : Faire search-replace sur le contenu
-            logger.debug(f"Étape 5 : Search-replace sur le contenu")
-            self._run_wp_cli_command(
-                "search-replace",
-                self.old_url,
-                self.new_url,
-                "--all-tables",
-                "--skip-columns=guid"
-            )
-            logger.info(f"✓ Search-replace complété")
+            # Étapes 3 à 5 : siteurl, home et search-replace en un seul
+            # démarrage de WordPress
+            logger.debug(f"Étapes 3 à 5 : siteurl, home et search-replace")
+            commands = [
+                ("option", "update", "siteurl", self.new_url),
+                ("option", "update", "home", self.new_url),
+            ]
+            if search_replace:
+                commands.append((
+                    "search-replace",
+                    self.old_url,
+                    self.new_url,
+                    "--all-tables",
+                    "--skip-columns=guid"
+                ))
+            self._run_wp_cli_batch(*commands)
+            logger.info(f"✓ siteurl et home mis à jour")
+            if search_replace:
+                logger.info(f"✓ Search-replace complété")
+            else:
+                logger.info(f"✓ Search-replace inutile (URLs remplacées au chargement)")
             
             message = (
                 f"✓ Configuration de WordPress réussie\n"
@@ -260,12 +270,12 @@ class DockerWordPressAdapter:
         try:
             logger.info(f"Vérification de l'adaptation")
             
-            # Vérifier siteurl
-            siteurl = self._run_wp_cli_command("option", "get", "siteurl")
+            # Lire siteurl et home
+            siteurl, home = self._run_wp_cli_batch(
+                ("option", "get", "siteurl"),
+                ("option", "get", "home"),
+            )
             logger.debug(f"siteurl: {siteurl}")
-            
-            # Vérifier home
-            home = self._run_wp_cli_command("option", "get", "home")
             logger.debug(f"home: {home}")
             
             # Vérifier que les URLs correspondent
@@ -0,0 +1,160 @@
+"""Exécution groupée de commandes wp-cli dans un container.
+
+Stratégie :
+- Chaque `docker exec ... wp` paie le démarrage de PHP et de WordPress
+  (environ 1 s) : une suite de commandes est exécutée dans un seul processus
+  via `wp eval-file -`, le script PHP étant envoyé sur stdin
+- Le script appelle `WP_CLI::runcommand()` sans relancer de processus
+  (`launch => false`) et capture la sortie de chaque commande
+- Les résultats sont renvoyés en JSON après un marqueur, pour ignorer ce que
+  WordPress ou une extension écrirait sur la sortie standard
+- La suite s'arrête à la première commande en échec, comme des appels
+  successifs
+
+Flux :
+  commandes → script PHP → docker exec -i wordpress wp eval-file - → JSON
+"""
+
+import base64
+import json
+import logging
+import subprocess
+from dataclasses import dataclass
+from typing import List, Sequence
+
+logger = logging.getLogger(__name__)
+
+RESULTS_MARKER = "__BACKUP_SITE_WP_CLI_RESULTS__"
+
+_SCRIPT = r"""<?php
+$commands = json_decode(base64_decode('@COMMANDS@'), true);
+$results = array();
+foreach ($commands as $command) {
+    $result = WP_CLI::runcommand($command, array(
+        'return' => 'all',
+        'launch' => false,
+        'exit_error' => false,
+    ));
+    $results[] = array(
+        'stdout' => $result->stdout,
+        'stderr' => $result->stderr,
+        'return_code' => $result->return_code,
+    );
+    if ($result->return_code) {
+        break;
+    }
+}
+echo "\n@MARKER@" . json_encode($results) . "\n";
+"""
+
+
+def _quote(arg: str) -> str:
+    # WP_CLI::runcommand découpe la commande sur les espaces et retire une
+    # paire de guillemets englobante (sans échappement)
+    if arg.startswith("--") and "=" in arg:
+        name, value = arg.split("=", 1)
+        return f"{name}={_quote(value)}" if value else arg
+    if arg and not any(char.isspace() or char in "'\"" for char in arg):
+        return arg
+    for quote in ('"', "'"):
+        if quote not in arg and not arg.endswith("\\"):
+            return f"{quote}{arg}{quote}"
+    raise ValueError(f"Argument wp-cli impossible à transmettre: {arg!r}")
+
+
+def format_command(args: Sequence[str]) -> str:
+    """Ligne de commande wp-cli (sans `wp`) lisible par `WP_CLI::runcommand`.
+
+    Raises:
+        ValueError: Si un argument contient les deux types de guillemets
+    """
+    return " ".join(_quote(str(arg)) for arg in args)
+
+
+@dataclass
+class WpCliResult:
+    """Résultat d'une commande d'un lot."""
+
+    command: str
+    stdout: str
+    stderr: str
+    return_code: int
+
+    @property
+    def ok(self) -> bool:
+        return self.return_code == 0
+
+
+class WpCliBatch:
+    """Suite de commandes wp-cli exécutées dans un seul processus PHP."""
+
+    def __init__(self, container_name: str):
+        """Initialise le lot.
+
+        Args:
+            container_name: Nom du container WordPress Docker
+        """
+        self.container_name = container_name
+        self.commands: List[str] = []
+
+    def add(self, *args: str) -> "WpCliBatch":
+        """Ajoute une commande (arguments de `wp`, ex: "option", "get", "home")."""
+        self.commands.append(format_command(args))
+        return self
+
+    def script(self) -> str:
+        """Script PHP exécutant le lot."""
+        payload = base64.b64encode(json.dumps(self.commands).encode("utf-8")).decode("ascii")
+        return _SCRIPT.replace("@COMMANDS@", payload).replace("@MARKER@", RESULTS_MARKER)
+
+    def run(self, check: bool = True) -> List[WpCliResult]:
+        """Exécute le lot.
+
+        Args:
+            check: Lève une erreur si une commande échoue
+
+        Returns:
+            Résultats dans l'ordre des commandes (sorties sans espaces
+            englobants) ; arrêtés à la première commande en échec
+
+        Raises:
+            RuntimeError: Si wp-cli échoue, si sa sortie est illisible ou si
+                une commande échoue (avec `check`)
+        """
+        if not self.commands:
+            return []
+        logger.debug(f"wp-cli ({self.container_name}), {len(self.commands)} commandes groupées")
+
+        try:
+            process = subprocess.run(
+                ["docker", "exec", "-i", self.container_name, "wp", "--allow-root", "eval-file", "-"],
+                input=self.script(),
+                check=True,
+                capture_output=True,
+                text=True
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Erreur wp-cli: {e.stderr}")
+
+        _, found, payload = process.stdout.rpartition(RESULTS_MARKER)
+        try:
+            if not found:
+                raise ValueError("marqueur absent")
+            raw_results = json.loads(payload.strip())
+        except ValueError:
+            raise RuntimeError(f"Sortie wp-cli illisible: {process.stdout[-500:]}")
+
+        results = [
+            WpCliResult(
+                command=command,
+                stdout=(raw["stdout"] or "").strip(),
+                stderr=(raw["stderr"] or "").strip(),
+                return_code=int(raw["return_code"]),
+            )
+            for command, raw in zip(self.commands, raw_results)
+        ]
+        if check:
+            for result in results:
+                if not result.ok:
+                    raise RuntimeError(f"Erreur wp-cli ({result.command}): {result.stderr}")
+        return results
@@ -1,14 +1,15 @@
 """Utilitaires et fonctions d'aide.
 
 Ce module fournit des utilitaires pour :
-- Gestion sécurisée des clés SSH
+- Gestion sécurisée des clés SSH et pool de connexions
 - Validation des configurations
 - Utilitaires de sauvegarde
 """
 
-from .ssh import SSHKeyValidator, print_ssh_setup_guide
+from .ssh import SSHConnectionPool, SSHKeyValidator, print_ssh_setup_guide
 
 __all__ = [
+    'SSHConnectionPool',
     'SSHKeyValidator',
     'print_ssh_setup_guide',
 ]
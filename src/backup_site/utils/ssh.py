@@ -1,14 +1,19 @@
-"""Utilitaires pour la gestion sécurisée des clés SSH."""
+"""Utilitaires pour la gestion sécurisée des clés SSH et des connexions."""
 
+import logging
 import os
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 import paramiko
 from paramiko.ssh_exception import SSHException, AuthenticationException
 from rich.console import Console
 
 console = Console()
+logger = logging.getLogger(__name__)
 
 
 class SSHKeyValidator:
@@ -144,6 +149,140 @@ class SSHKeyValidator:
             return False, f"Erreur de connexion: {e}"
 
 
+PoolKey = Tuple[str, int, str, str]
+
+
+@dataclass
+class PoolStats:
+    """Compteurs d'un pool de connexions SSH."""
+    
+    connections: int = 0
+    reuses: int = 0
+    handshake_seconds: float = 0.0
+
+
+class SSHConnectionPool:
+    """Pool de connexions SSH authentifiées, partagées entre les sauvegardes.
+    
+    Une connexion est ouverte par (hôte, port, utilisateur, clé) puis réutilisée :
+    chaque `exec_command` ouvre un nouveau canal sur le même Transport, les
+    sauvegardes fichiers et BDD d'un site ne paient donc qu'une poignée de main.
+    Les clés chargées sont aussi gardées en cache. Un keepalive maintient les
+    connexions ouvertes entre deux tâches d'un processus longue durée ; une
+    connexion tombée est rouverte à la demande suivante.
+    """
+    
+    def __init__(
+        self,
+        keepalive: int = 30,
+        timeout: int = 30,
+    ):
+        """Initialise le pool.
+        
+        Args:
+            keepalive: Intervalle des paquets keepalive en secondes (0 = aucun)
+            timeout: Délai d'attente de connexion en secondes
+        """
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self.stats = PoolStats()
+        self._clients: Dict[PoolKey, paramiko.SSHClient] = {}
+        self._keys: Dict[Tuple[str, Optional[str]], paramiko.PKey] = {}
+        self._locks: Dict[PoolKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _is_alive(client: paramiko.SSHClient) -> bool:
+        transport = client.get_transport()
+        return transport is not None and transport.is_active() and transport.is_authenticated()
+    
+    def _load_key(self, key_path: Path, passphrase: Optional[str]) -> paramiko.PKey:
+        cache_key = (str(key_path), passphrase)
+        with self._lock:
+            if cache_key not in self._keys:
+                SSHKeyValidator.validate_key_file(key_path, "private")
+                self._keys[cache_key] = SSHKeyValidator.load_private_key(key_path, passphrase)
+            return self._keys[cache_key]
+    
+    def get(
+        self,
+        host: str,
+        username: str,
+        key_path: Path,
+        port: int = 22,
+        passphrase: Optional[str] = None,
+    ) -> Tuple[paramiko.SSHClient, float]:
+        """Renvoie une connexion ouverte, en la créant si nécessaire.
+        
+        Le client renvoyé est partagé : ne pas le fermer, les connexions sont
+        fermées ensemble par `close_all()` (ou la sortie du bloc `with`).
+        
+        Args:
+            host: Adresse du serveur SSH
+            username: Nom d'utilisateur
+            key_path: Chemin vers la clé privée
+            port: Port SSH (défaut: 22)
+            passphrase: Passphrase de la clé (si elle en a une)
+            
+        Returns:
+            Tuple (client connecté, durée de connexion en secondes ; 0 si réutilisé)
+            
+        Raises:
+            FileNotFoundError: Si la clé n'existe pas
+            SSHException: Si la connexion ou l'authentification échoue
+        """
+        key = (host, port, username, str(key_path.expanduser()))
+        
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        
+        # Un verrou par hôte : deux tâches simultanées ne négocient pas deux fois
+        with lock:
+            client = self._clients.get(key)
+            if client is not None and self._is_alive(client):
+                with self._lock:
+                    self.stats.reuses += 1
+                return client, 0.0
+            if client is not None:
+                logger.info(f"Connexion SSH à {host}:{port} perdue, reconnexion")
+                client.close()
+            
+            started = time.monotonic()
+            pkey = self._load_key(key_path, passphrase)
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect(
+                hostname=host,
+                port=port,
+                username=username,
+                pkey=pkey,
+                timeout=self.timeout
+            )
+            if self.keepalive:
+                client.get_transport().set_keepalive(self.keepalive)
+            elapsed = time.monotonic() - started
+            
+            with self._lock:
+                self._clients[key] = client
+                self.stats.connections += 1
+                self.stats.handshake_seconds += elapsed
+            logger.debug(f"Connexion SSH à {host}:{port} établie en {elapsed:.2f}s")
+            return client, elapsed
+    
+    def close_all(self) -> None:
+        """Ferme toutes les connexions du pool."""
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+    
+    def __enter__(self) -> "SSHConnectionPool":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close_all()
+
+
 def print_ssh_setup_guide() -> None:
     """Affiche un guide pour configurer les clés SSH avec FOURNISSEUR_HEBERGEMENT."""
     from rich.panel import Panel
@@ -0,0 +1,277 @@
+"""Tests pour le moteur asynchrone de sauvegarde."""
+
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+from paramiko.ssh_exception import SSHException
+
+from backup_site.backup.async_engine import download_to_file_async
+from backup_site.backup.files import FileBackup
+from backup_site.backup.transfer import TransferSettings
+
+
+class FakeChannel:
+    """Canal paramiko minimal : stdout signalé par un pipe comme `Channel.fileno()`."""
+
+    def __init__(self, exit_status=0, stderr=b""):
+        self._read_fd, self._write_fd = os.pipe()
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._stderr = bytearray(stderr)
+        self.exit_status = exit_status
+        self.eof_received = False
+        self.closed = False
+
+    def feed(self, data):
+        with self._lock:
+            self._buffer += data
+            os.write(self._write_fd, b"x")
+
+    def finish(self):
+        with self._lock:
+            self.eof_received = True
+            os.write(self._write_fd, b"x")
+
+    def fileno(self):
+        return self._read_fd
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv_ready(self):
+        return bool(self._buffer)
+
+    def recv(self, size):
+        with self._lock:
+            if not self._buffer and not self.eof_received:
+                raise socket.timeout()
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+            if not self._buffer and not self.eof_received:
+                os.read(self._read_fd, 65536)
+            return data
+
+    def recv_stderr_ready(self):
+        return bool(self._stderr)
+
+    def recv_stderr(self, size):
+        data = bytes(self._stderr[:size])
+        del self._stderr[:size]
+        return data
+
+    def exit_status_ready(self):
+        return self.eof_received
+
+    def recv_exit_status(self):
+        return self.exit_status
+
+    def exec_command(self, command):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeFile:
+    """Fichier de destination dont l'écriture échoue ou dure `delay` secondes."""
+
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.writing = False
+        self.closed_while_writing = None
+
+    def write(self, data):
+        if self.error:
+            raise self.error
+        self.writing = True
+        time.sleep(self.delay)
+        self.writing = False
+        return len(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.closed_while_writing = self.writing
+
+
+def make_client(channel):
+    client = Mock()
+    client.get_transport.return_value.open_session.return_value = channel
+    return client
+
+
+def serve(channel, data, chunk_size=1000):
+    """Envoie `data` par blocs depuis un thread, comme le Transport paramiko."""
+    def run():
+        for offset in range(0, len(data), chunk_size):
+            channel.feed(data[offset:offset + chunk_size])
+        channel.finish()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+class TestDownloadToFileAsync:
+    """Tests pour la fonction download_to_file_async."""
+
+    def test_many_channels_share_one_loop(self):
+        """Teste plusieurs flux simultanés sur une même boucle."""
+        payloads = [os.urandom(20000 + i) for i in range(20)]
+        channels = [FakeChannel() for _ in payloads]
+        settings = TransferSettings(buffer_size=4096, queue_depth=2)
+
+        async def run_all(tmpdir):
+            for channel, data in zip(channels, payloads):
+                serve(channel, data)
+            return await asyncio.gather(*(
+                download_to_file_async(make_client(channel), "tar", Path(tmpdir) / f"{i}.tar", settings)
+                for i, channel in enumerate(channels)
+            ))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            sizes = asyncio.run(run_all(tmpdir))
+
+            assert sizes == [len(data) for data in payloads]
+            for i, data in enumerate(payloads):
+                assert (Path(tmpdir) / f"{i}.tar").read_bytes() == data
+
+    def test_failure_removes_partial_file(self):
+        """Teste qu'une commande en échec remonte stderr sans laisser de fichier."""
+        channel = FakeChannel(exit_status=2, stderr=b"tar: wp-content: Permission denied")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = Path(tmpdir) / "backup.tar.gz"
+            serve(channel, b"x" * 5000)
+
+            with pytest.raises(SSHException) as exc_info:
+                asyncio.run(download_to_file_async(
+                    make_client(channel), "tar", output, label="La commande tar"
+                ))
+
+            assert "La commande tar a échoué avec le code 2" in str(exc_info.value)
+            assert "Permission denied" in str(exc_info.value)
+            assert not output.exists()
+
+    def test_timeout_closes_channel(self):
+        """Teste qu'un flux bloqué est coupé à l'expiration du délai."""
+        channel = FakeChannel()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = Path(tmpdir) / "backup.tar.gz"
+            channel.feed(b"debut")
+
+            with pytest.raises(asyncio.TimeoutError):
+                asyncio.run(download_to_file_async(
+                    make_client(channel), "tar", output, timeout=0.2
+                ))
+
+            assert channel.closed is True
+            assert not output.exists()
+
+    def test_write_error_stops_reader(self):
+        """Teste qu'une erreur d'écriture remonte au lieu de bloquer le lecteur."""
+        channel = FakeChannel()
+        settings = TransferSettings(buffer_size=1000, queue_depth=1)
+        target = FakeFile(error=OSError(28, "No space left on device"))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            serve(channel, b"x" * 50000)
+
+            with patch("backup_site.backup.async_engine.open", return_value=target, create=True):
+                with pytest.raises(OSError, match="No space left"):
+                    asyncio.run(asyncio.wait_for(download_to_file_async(
+                        make_client(channel), "tar", Path(tmpdir) / "backup.tar", settings
+                    ), 5))
+
+            assert channel.closed is True
+
+    def test_cancel_waits_for_pending_write(self):
+        """Teste que le fichier n'est fermé qu'après l'écriture en cours."""
+        channel = FakeChannel()
+        target = FakeFile(delay=0.5)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            channel.feed(b"debut")
+
+            with patch("backup_site.backup.async_engine.open", return_value=target, create=True):
+                with pytest.raises(asyncio.TimeoutError):
+                    asyncio.run(download_to_file_async(
+                        make_client(channel), "tar", Path(tmpdir) / "backup.tar", timeout=0.2
+                    ))
+
+            assert target.closed_while_writing is False
+
+    def test_file_backup_async(self):
+        """Teste l'équivalent asynchrone de FileBackup.backup_to_file."""
+        channel = FakeChannel()
+        client = make_client(channel)
+        backup = FileBackup(
+            ssh_client=client,
+            remote_path="/var/www/html",
+            include_patterns=[],
+            exclude_patterns=[],
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = Path(tmpdir) / "backup.tar.gz"
+            serve(channel, b"archive" * 1000)
+
+            success, _, size = asyncio.run(backup.backup_to_file_async(output))
+
+            assert success is True
+            assert size == 7000
+            assert output.read_bytes() == b"archive" * 1000
+
+    def test_backup_to_file_async_checksum(self):
+        """Teste l'empreinte comparée au serveur et le manifeste en mode asynchrone."""
+        data = b"archive" * 1000
+        digest = hashlib.sha256(data).hexdigest()
+        channel = FakeChannel(stderr=f"backup-site-checksum: {digest}\n".encode())
+        backup = FileBackup(
+            ssh_client=make_client(channel),
+            remote_path="/var/www/html",
+            include_patterns=[],
+            exclude_patterns=[],
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = Path(tmpdir) / "backup.tar.gz"
+            serve(channel, data)
+
+            asyncio.run(backup.backup_to_file_async(output, checksum="sha256"))
+
+            manifest = json.loads((Path(tmpdir) / "backup.tar.gz.checksum.json").read_text())
+            assert manifest["digest"] == digest
+            assert manifest["size"] == len(data)
+
+    def test_checksum_mismatch_removes_file(self):
+        """Teste qu'une empreinte différente fait échouer le transfert."""
+        channel = FakeChannel(stderr=b"backup-site-checksum: 0000\n")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = Path(tmpdir) / "backup.tar"
+            serve(channel, b"data" * 100)
+
+            with pytest.raises(IOError) as exc_info:
+                asyncio.run(download_to_file_async(
+                    make_client(channel), "tar", output, hasher=hashlib.sha256()
+                ))
+
+            assert "Empreinte différente" in str(exc_info.value)
+            assert not output.exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,113 @@
+"""Tests pour le catalogue local des sauvegardes."""
+
+import json
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from backup_site.backup.catalog import BackupCatalog
+from backup_site.backup.files import FileBackup
+from backup_site.backup.retention import BackupIndex, RetentionPolicy, prune
+
+
+class TestBackupCatalog:
+    """Tests pour la classe BackupCatalog."""
+
+    def test_find_and_latest_before(self):
+        """Teste la recherche de la dernière sauvegarde avant une date."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            catalog = BackupCatalog.open(root)
+            for day in (1, 2, 3):
+                catalog.record(
+                    "blog", "database", root / f"blog_database_2024010{day}_020000.sql.gz",
+                    size=day * 100, created_at=datetime(2024, 1, day, 2),
+                )
+            catalog.record("shop", "database", root / "shop.sql.gz", 50,
+                           created_at=datetime(2024, 1, 5))
+
+            latest = catalog.latest("blog", "database", before=datetime(2024, 1, 3))
+
+            assert latest.size == 200
+            assert latest.path == root.resolve() / "blog_database_20240102_020000.sql.gz"
+            assert [e.size for e in catalog.find(site="blog")] == [300, 200, 100]
+            assert len(catalog.find(limit=2)) == 2
+            assert catalog.latest("blog", "files") is None
+
+    def test_record_reads_checksum_manifest(self):
+        """Teste la reprise de l'empreinte du manifeste d'intégrité."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            archive = root / "backup_20240101_020000.tar.gz"
+            archive.write_bytes(b"archive")
+            Path(f"{archive}.checksum.json").write_text(json.dumps({
+                "algorithm": "sha256", "digest": "abc123", "size": 7,
+            }))
+            catalog = BackupCatalog.open(root)
+
+            entry_id = catalog.record("blog", "files", archive, 7, duration=1.5)
+            entry = catalog.get(str(entry_id))
+
+            assert (entry.algorithm, entry.checksum) == ("sha256", "abc123")
+            assert catalog.get(str(archive)).id == entry_id
+            assert entry.duration == 1.5
+
+    def test_import_index_and_prune_remove(self):
+        """Teste l'import des sauvegardes existantes et leur retrait à la purge."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "blog").mkdir()
+            for name in ("backup_20240101_020000.tar.gz", "backup_20240301_020000.tar.gz"):
+                (root / "blog" / name).write_bytes(b"x" * 10)
+            catalog = BackupCatalog.open(root)
+
+            assert catalog.import_index(BackupIndex.scan(root)) == 2
+            assert catalog.import_index(BackupIndex.scan(root)) == 0
+
+            prune(root, RetentionPolicy(days=30), now=datetime(2024, 3, 2), catalog=catalog)
+
+            entries = catalog.find()
+            assert [e.path.name for e in entries] == ["backup_20240301_020000.tar.gz"]
+            assert entries[0].site == "blog"
+            assert entries[0].created_at == datetime(2024, 3, 1, 2)
+
+    def test_file_backup_records_success(self):
+        """Teste l'inscription d'une sauvegarde de fichiers réussie."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            catalog = BackupCatalog.open(root)
+            backup = FileBackup(
+                ssh_client=Mock(),
+                remote_path="/var/www/html",
+                include_patterns=[],
+                exclude_patterns=[],
+                catalog=catalog.for_site("blog"),
+            )
+            output = root / "backup_20240101_020000.tar.gz"
+
+            stdout, stderr = Mock(), Mock()
+            stdout.channel.recv_exit_status.return_value = 0
+            stderr.read.return_value = b""
+
+            def download(stream, path, settings, hasher=None):
+                path.write_bytes(b"x" * 1234)
+                return 1234
+
+            with patch("backup_site.backup.files.exec_command",
+                       return_value=(Mock(), stdout, stderr)), \
+                 patch("backup_site.backup.files.download_to_file", side_effect=download):
+                success, _, _ = backup.backup_to_file(output)
+
+            entry = catalog.latest("blog", "files")
+            assert success is True
+            assert entry.path == output.resolve()
+            assert entry.size == 1234
+            assert entry.exit_status == 0
+            assert entry.duration is not None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
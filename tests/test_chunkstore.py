@@ -0,0 +1,156 @@
+"""Tests pour le dépôt dédupliqué."""
+
+import io
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import Mock, MagicMock
+
+import pytest
+from paramiko.ssh_exception import SSHException
+
+from backup_site.backup.chunkstore import (
+    GEAR_TABLE,
+    ChunkRepository,
+    find_boundary,
+    iter_chunks,
+)
+from backup_site.backup.files import FileBackup
+from backup_site.backup.transfer import TransferSettings
+
+
+class TestChunking:
+    """Tests pour le découpage défini par le contenu."""
+
+    def test_chunks_roundtrip(self):
+        """Teste que la concaténation des blocs redonne le flux."""
+        data = os.urandom(300 * 1024)
+        chunks = list(iter_chunks(io.BytesIO(data), 4096, 16384, 65536))
+
+        assert b"".join(chunks) == data
+        assert all(len(chunk) <= 65536 for chunk in chunks)
+
+    def test_insertion_only_shifts_neighbouring_chunks(self):
+        """Teste qu'une insertion ne change que les blocs voisins."""
+        data = os.urandom(300 * 1024)
+        modified = data[:1000] + b"inserted" + data[1000:]
+
+        before = list(iter_chunks(io.BytesIO(data), 4096, 16384, 65536))
+        after = list(iter_chunks(io.BytesIO(modified), 4096, 16384, 65536))
+
+        assert len(set(before) & set(after)) >= len(before) - 2
+
+    @pytest.mark.parametrize("mask", [0, 0x3F, 0x3FFF, 0xFFFFF])
+    def test_find_boundary_matches_rolling_hash(self, mask):
+        """Teste que le calcul en bloc trouve la frontière du hash roulant."""
+        rng = random.Random(mask)
+        for data in (rng.randbytes(1 << 20), b"a" * 70000, bytes(range(256)) * 400):
+            for start in (0, 5, 1000):
+                expected = None
+                h = 0
+                for index in range(start, len(data)):
+                    h = ((h << 1) + GEAR_TABLE[data[index]]) & 0xFFFFFFFF
+                    if not h & mask:
+                        expected = index
+                        break
+                assert find_boundary(data, start, len(data), mask) == expected
+
+    def test_chunking_throughput_floor(self):
+        """Teste que le découpage dépasse le débit d'un lien à 15 MB/s."""
+        data = os.urandom(16 * 1024 * 1024)
+
+        started = time.perf_counter()
+        total = sum(len(chunk) for chunk in iter_chunks(io.BytesIO(data)))
+        elapsed = time.perf_counter() - started
+
+        assert total == len(data)
+        assert total / elapsed >= 15 * 1024 * 1024
+
+
+class TestChunkRepository:
+    """Tests pour la classe ChunkRepository."""
+
+    @pytest.fixture
+    def repository(self):
+        """Crée un dépôt temporaire avec de petits blocs."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repository = ChunkRepository(Path(tmpdir) / "repo")
+            repository.config.update(min_size=4096, avg_size=16384, max_size=65536)
+            repository.init()
+            yield repository
+
+    def test_add_restore_and_dedup(self, repository):
+        """Teste la restauration et la déduplication entre deux snapshots."""
+        data = os.urandom(200 * 1024)
+
+        first, first_new, _ = repository.add_stream(io.BytesIO(data), "site", "files")
+        second, second_new, _ = repository.add_stream(
+            io.BytesIO(data + b"tail"), "site", "files"
+        )
+
+        assert first_new == len(first.chunks)
+        assert second_new <= 1
+
+        output = io.BytesIO()
+        assert repository.restore(first.id, output) == len(data)
+        assert output.getvalue() == data
+
+        reopened = ChunkRepository.open(repository.path)
+        assert [s.id for s in reopened.list_snapshots(name="site")] == [first.id, second.id]
+
+    def test_gc_removes_unreferenced_chunks(self, repository):
+        """Teste que le gc ne supprime que les blocs orphelins."""
+        kept, _, _ = repository.add_stream(io.BytesIO(os.urandom(100 * 1024)), "a", "files")
+        dropped, _, _ = repository.add_stream(io.BytesIO(os.urandom(100 * 1024)), "b", "files")
+
+        repository.forget(dropped.id)
+        removed, freed = repository.gc()
+
+        assert removed == len(set(dropped.chunks))
+        assert freed > 0
+        assert repository.restore(kept.id, io.BytesIO()) > 0
+        assert ChunkRepository.open(repository.path).stats()[0] == len(set(kept.chunks))
+
+    def test_file_backup_streams_uncompressed_tar(self, repository):
+        """Teste que FileBackup envoie un flux tar non compressé au dépôt."""
+        mock_ssh_client = Mock()
+        mock_stdout = io.BytesIO(b"tar stream")
+        mock_stdout.channel = MagicMock()
+        mock_stdout.channel.recv_exit_status.return_value = 0
+        mock_stderr = MagicMock()
+        mock_stderr.read.return_value = b""
+        mock_ssh_client.exec_command.return_value = (None, mock_stdout, mock_stderr)
+
+        file_backup = FileBackup(mock_ssh_client, "/www", [], [])
+        success, _, size = file_backup.backup_to_repository(repository, "site")
+
+        command = mock_ssh_client.exec_command.call_args.args[0]
+        assert "tar -cf - -T -" in command
+        assert success is True
+        assert size == len(b"tar stream")
+
+    def test_file_backup_failure_forgets_snapshot(self, repository):
+        """Teste qu'un tar en échec ne laisse pas de snapshot, avec la priorité distante."""
+        mock_ssh_client = Mock()
+        mock_stdout = io.BytesIO(b"partial")
+        mock_stdout.channel = MagicMock()
+        mock_stdout.channel.recv_exit_status.return_value = 2
+        mock_stderr = MagicMock()
+        mock_stderr.read.return_value = b"tar: read error"
+        mock_ssh_client.exec_command.return_value = (None, mock_stdout, mock_stderr)
+
+        file_backup = FileBackup(
+            mock_ssh_client, "/www", [], [], transfer=TransferSettings(nice=10)
+        )
+        with pytest.raises(SSHException) as exc_info:
+            file_backup.backup_to_repository(repository, "site")
+
+        assert "tar: read error" in str(exc_info.value)
+        assert mock_ssh_client.exec_command.call_args.args[0].startswith("renice -n 10 ")
+        assert repository.list_snapshots() == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,151 @@
+"""Tests pour le module de gestion des codecs de compression."""
+
+import gzip
+import shutil
+import tarfile
+import io
+from pathlib import Path
+from unittest.mock import Mock, MagicMock
+
+import pytest
+
+from backup_site.backup.compression import (
+    CODECS,
+    Compression,
+    codec_for_path,
+    decompress_stream,
+    open_compressed,
+    open_decompressed,
+    resolve_compression,
+)
+from backup_site.backup.database import DatabaseBackup
+from backup_site.backup.files import FileBackup
+
+
+def mock_probe(ssh_client, available):
+    """Mock la sonde `command -v` du serveur distant."""
+    mock_stdout = MagicMock()
+    mock_stdout.read.return_value = "\n".join(available).encode()
+    mock_stdout.channel.recv_exit_status.return_value = 0
+    ssh_client.exec_command.return_value = (None, mock_stdout, MagicMock())
+
+
+class TestCompression:
+    """Tests pour la classe Compression et la résolution des codecs."""
+
+    def test_gzip_uses_native_tar_flag(self):
+        """Teste que gzip sans option utilise `tar -z`."""
+        assert Compression.from_name("gzip").tar_create_command() == "tar -czf - -T -"
+
+    def test_level_and_threads_use_pipe(self):
+        """Teste qu'un niveau ou des threads passent par un pipe."""
+        compression = Compression.from_name("zstd", level=3, threads=4)
+
+        assert compression.tar_create_command() == "tar -cf - -T - | zstd -q -c -3 -T4"
+        assert compression.extension == ".zst"
+        assert Compression.from_name("pigz", threads=8).pipe_command() == "pigz -p 8"
+
+    def test_zero_threads_means_auto(self):
+        """Teste threads=0 : -T0 pour xz/zstd, option omise pour pigz/pzstd."""
+        assert Compression.from_name("zstd", threads=0).pipe_command() == "zstd -q -c -T0"
+        assert Compression.from_name("xz", threads=0).pipe_command() == "xz -T0"
+        assert Compression.from_name("pigz", threads=0).pipe_command() == "pigz"
+        assert Compression.from_name("pzstd", threads=0).pipe_command() == "pzstd -q -c"
+
+    def test_unknown_codec(self):
+        """Teste l'erreur sur un codec inconnu."""
+        with pytest.raises(ValueError):
+            Compression.from_name("lz4")
+
+    def test_resolve_falls_back(self):
+        """Teste le repli pzstd → zstd → gzip selon les binaires distants."""
+        ssh_client = Mock()
+
+        mock_probe(ssh_client, ["zstd", "gzip"])
+        assert resolve_compression(ssh_client, "pzstd").codec.name == "zstd"
+
+        mock_probe(ssh_client, ["gzip"])
+        assert resolve_compression(ssh_client, "pzstd").codec.name == "gzip"
+
+    def test_codec_for_path(self):
+        """Teste la détection du codec d'après l'extension."""
+        assert codec_for_path(Path("backup.tar.gz")).name == "gzip"
+        assert codec_for_path(Path("backup.tar.zst")).name == "zstd"
+        assert codec_for_path(Path("database.sql.xz")).name == "xz"
+        assert codec_for_path(Path("database.sql")).name == "none"
+
+    def test_compress_local_produces_valid_archives(self):
+        """Teste les archives vides produites localement."""
+        empty_tar = io.BytesIO()
+        with tarfile.open(fileobj=empty_tar, mode="w"):
+            pass
+        data = empty_tar.getvalue()
+
+        assert gzip.decompress(CODECS["gzip"].compress_local(data)) == data
+        assert CODECS["zstd"].compress_local(data).startswith(b"\x28\xb5\x2f\xfd")
+
+    @pytest.mark.parametrize("name", ["gzip", "bzip2", "xz", "none"])
+    def test_open_compressed_round_trip(self, name, tmp_path):
+        """Teste l'écriture locale compressée, relue par open_decompressed."""
+        compression = Compression.from_name(name, level=12)
+        path = tmp_path / f"data.sql{compression.extension}"
+
+        with open_compressed(path, compression) as f:
+            f.write(b"INSERT INTO t VALUES (1);\n" * 100)
+
+        assert codec_for_path(path).extension == compression.extension
+        with open_decompressed(path) as f:
+            assert f.read() == b"INSERT INTO t VALUES (1);\n" * 100
+
+    @pytest.mark.parametrize("name", [
+        "gzip", "bzip2", "xz", "none",
+        pytest.param("zstd", marks=pytest.mark.skipif(
+            shutil.which("zstd") is None, reason="zstd indisponible"
+        )),
+    ])
+    def test_decompress_stream(self, name, tmp_path):
+        """Teste la décompression d'un flux non navigable, ligne par ligne."""
+        compression = Compression.from_name(name)
+        path = tmp_path / f"data.sql{compression.extension}"
+        with open_compressed(path, compression) as f:
+            f.write(b"(1,'a')\n" * 50000)
+
+        source = io.BufferedReader(io.BytesIO(path.read_bytes()))
+        with decompress_stream(source, compression.codec) as stream:
+            lines = list(stream)
+
+        assert lines == [b"(1,'a')\n"] * 50000
+
+    @pytest.mark.skipif(shutil.which("zstd") is None, reason="zstd indisponible")
+    def test_truncated_zstd_raises(self, tmp_path):
+        """Teste qu'une archive zstd tronquée n'est pas lue comme une fin normale."""
+        compression = Compression.from_name("zstd")
+        path = tmp_path / "data.sql.zst"
+        with open_compressed(path, compression) as f:
+            f.write(b"INSERT INTO t VALUES (1);\n" * 10000)
+        with open_decompressed(path) as f:
+            assert f.read() == b"INSERT INTO t VALUES (1);\n" * 10000
+
+        path.write_bytes(path.read_bytes()[:-20])
+        with pytest.raises(IOError, match="zstd a échoué"):
+            with open_decompressed(path) as f:
+                f.read()
+        # Lecteur arrêté juste avant la fin (tar en flux) : erreur signalée aussi
+        with pytest.raises(IOError, match="zstd a échoué"):
+            with open_decompressed(path) as f:
+                f.read(1000)
+
+    def test_backups_use_configured_codec(self):
+        """Teste que les sauvegardes utilisent le codec configuré."""
+        compression = Compression.from_name("xz", threads=0)
+        file_backup = FileBackup(Mock(), "/www", [], [], compression=compression)
+        db_backup = DatabaseBackup(
+            Mock(), "localhost", 3306, "db", "user", "pass", compression=compression
+        )
+
+        assert file_backup._build_tar_command().endswith("tar -cf - -T - | xz -T0")
+        assert db_backup._build_mysqldump_command().endswith(" db | xz -T0")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
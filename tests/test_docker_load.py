@@ -0,0 +1,103 @@
+"""Tests pour le chargement en flux dans Docker."""
+
+import io
+import os
+import stat
+import subprocess
+import tarfile
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from backup_site.backup.compression import CODECS
+from backup_site.docker_load.files import DockerFileLoad
+from backup_site.docker_load.pipe import pipe_to_container
+from backup_site.docker_load.wordpress import permission_fix_command
+
+
+_popen = subprocess.Popen
+
+
+def run_locally(args, **kwargs):
+    """Exécute localement la commande passée à `docker exec -i container sh -c`."""
+    assert args[:3] == ["docker", "exec", "-i"]
+    return _popen(args[4:], **kwargs)
+
+
+def make_archive(files):
+    """Construit une archive tar.gz en mémoire."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+class TestPipeToContainer:
+    """Tests pour l'envoi d'un flux sur stdin d'un container."""
+
+    def test_stream_is_extracted_without_staging(self):
+        """Teste l'extraction d'une archive lue en flux par petits blocs."""
+        archive = make_archive({"wp-config.php": b"<?php", "index.php": b"x" * 100000})
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            loader = DockerFileLoad(container_name="wordpress", remote_path=tmpdir)
+
+            with patch("subprocess.Popen", side_effect=run_locally):
+                success, _, size = loader.load_from_reader(
+                    io.BytesIO(archive), CODECS["gzip"], buffer_size=4096
+                )
+
+            assert success is True
+            assert size == len(archive)
+            assert (Path(tmpdir) / "wp-config.php").read_bytes() == b"<?php"
+            assert (Path(tmpdir) / "index.php").stat().st_size == 100000
+
+    def test_failure_reports_stderr(self):
+        """Teste qu'une commande en échec remonte son code et stderr."""
+        with patch("subprocess.Popen", side_effect=run_locally):
+            with pytest.raises(RuntimeError) as exc_info:
+                pipe_to_container(
+                    "mysql", "echo 'ERROR 1045' >&2; exit 3", io.BytesIO(b"x" * 1000000)
+                )
+
+        assert "code 3" in str(exc_info.value)
+        assert "ERROR 1045" in str(exc_info.value)
+
+
+
+class TestPermissionFix:
+    """Tests pour la correction des permissions de wp-content."""
+
+    def test_single_pass_sets_modes(self):
+        """Teste les modes obtenus par l'unique parcours `find`."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir) / "wp content"
+            for directory in ("plugins/akismet", "uploads/2024/01", "uploads-old"):
+                (root / directory).mkdir(parents=True, mode=0o700)
+            for name in ("plugins/akismet/akismet.php", "uploads/2024/01/photo.jpg"):
+                (root / name).write_bytes(b"x")
+                (root / name).chmod(0o600)
+            (root / "uploads" / "latest").symlink_to(root / "plugins" / "akismet" / "akismet.php")
+
+            command = permission_fix_command(str(root), owner=f"{os.getuid()}:{os.getgid()}")
+            subprocess.run(["bash", "-c", command], check=True, capture_output=True)
+
+            def mode(name):
+                return stat.S_IMODE((root / name).stat().st_mode)
+
+            assert command.count("find ") == 1
+            assert mode("plugins/akismet") == 0o755
+            assert mode("uploads-old") == 0o755
+            assert mode("uploads") == 0o777
+            assert mode("uploads/2024/01") == 0o777
+            assert mode("plugins/akismet/akismet.php") == 0o644
+            assert mode("uploads/2024/01/photo.jpg") == 0o644
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
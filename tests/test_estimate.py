@@ -0,0 +1,116 @@
+"""Tests pour l'estimation des sauvegardes avant leur lancement."""
+
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from backup_site.backup.database import DatabaseBackup
+from backup_site.backup.estimate import FileEstimate
+from backup_site.backup.files import FileBackup
+
+
+def make_local_client():
+    """Client SSH qui exécute les commandes localement."""
+    client = Mock()
+
+    def exec_command(command):
+        result = subprocess.run(command, shell=True, capture_output=True)
+        stdout = Mock()
+        stdout.read.return_value = result.stdout
+        stdout.channel.recv_exit_status.return_value = result.returncode
+        stderr = Mock()
+        stderr.read.return_value = result.stderr
+        return None, stdout, stderr
+
+    client.exec_command.side_effect = exec_command
+    return client
+
+
+@pytest.mark.skipif(shutil.which("awk") is None, reason="awk indisponible")
+class TestFileEstimate:
+    """Tests de l'estimation des fichiers."""
+
+    def test_estimate_matches_selected_files(self):
+        """Teste le total et le cumul par dossier des seuls fichiers retenus."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            files = {
+                "index.php": 100,
+                "wp-config.php": 50,
+                "wp-content/uploads/2024/photo.jpg": 5000,
+                "wp-content/uploads/2024/01/big photo.jpg": 7000,
+                "wp-content/themes/style.css": 300,
+                "wp-content/cache/page.html": 9999,
+                "debug.log": 12345,
+            }
+            for path, size in files.items():
+                (root / path).parent.mkdir(parents=True, exist_ok=True)
+                (root / path).write_bytes(b"x" * size)
+            backup = FileBackup(
+                ssh_client=make_local_client(),
+                remote_path=str(root),
+                include_patterns=[],
+                exclude_patterns=["wp-content/cache/", "*.log"],
+            )
+
+            estimate = backup.estimate(top=2, depth=2)
+
+            assert estimate.files == 5
+            assert estimate.bytes == 100 + 50 + 5000 + 7000 + 300
+            assert [(d.path, d.files, d.bytes) for d in estimate.directories] == [
+                ("wp-content/uploads", 2, 12000),
+                ("wp-content/themes", 1, 300),
+            ]
+
+    def test_parse_ignores_unexpected_lines(self):
+        """Teste la lecture d'une sortie vide ou bruitée."""
+        estimate = FileEstimate.parse("TOTAL 3 3000000000\nDIR 3 3000000000 a b\nbruit\n")
+
+        assert (estimate.files, estimate.bytes) == (3, 3000000000)
+        assert estimate.directories[0].path == "a b"
+        assert FileEstimate.parse("").files == 0
+
+
+class TestDatabaseEstimate:
+    """Tests de l'estimation du dump de base de données."""
+
+    def test_estimate_from_information_schema(self):
+        """Teste le tri des tables et les totaux."""
+        backup = DatabaseBackup(
+            ssh_client=Mock(), db_host="localhost", db_port=3306,
+            db_name="wordpress", db_user="wp", db_password="secret",
+        )
+        rows = [
+            ["wp_options", "500", "2000000", "100000"],
+            ["wp_postmeta", "90000", "40000000", "8000000"],
+            ["wp_users", "3", "16384", "32768"],
+        ]
+
+        with patch.object(DatabaseBackup, "_run_query", return_value=rows) as query:
+            estimate = backup.estimate()
+
+        assert "TABLE_SCHEMA = 'wordpress'" in query.call_args.args[0]
+        assert [t.name for t in estimate.largest(2)] == ["wp_postmeta", "wp_options"]
+        assert estimate.rows == 90503
+        assert estimate.data_bytes == 42016384
+        assert estimate.index_bytes == 8132768
+
+    def test_estimate_escapes_database_name(self):
+        """Teste l'échappement du nom de base dans la requête."""
+        backup = DatabaseBackup(
+            ssh_client=Mock(), db_host="localhost", db_port=3306,
+            db_name="wp'x\\", db_user="wp", db_password="secret",
+        )
+
+        with patch.object(DatabaseBackup, "_run_query", return_value=[]) as query:
+            backup.estimate()
+
+        assert "TABLE_SCHEMA = 'wp''x\\\\' AND" in query.call_args.args[0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
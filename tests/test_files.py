@@ -1,5 +1,6 @@
 """Tests pour le module de sauvegarde des fichiers."""
 
+import hashlib
 import io
 import tempfile
 from pathlib import Path
@@ -8,6 +9,7 @@ from unittest.mock import Mock, MagicMock, patch
 import pytest
 
 from backup_site.backup.files import FileBackup
+from backup_site.backup.integrity import CHECKSUM_MARKER
 
 
 class TestFileBackup:
@@ -34,11 +36,12 @@ class TestFileBackup:
         
         # Vérifie que la commande contient les éléments clés
         assert "cd /home/testuser/www" in cmd
-        assert "find . -type f" in cmd
-        assert "! -path '*wp-content/cache/***'" in cmd  # Les * sont ajoutés par le code
-        assert "! -path '**.log*'" in cmd  # Les * sont ajoutés par le code
-        assert "-path '*wp-content/***'" in cmd  # Les * sont ajoutés par le code
-        assert "-path '*wp-config.php*'" in cmd  # Les * sont ajoutés par le code
+        assert "find . " in cmd
+        assert "-path ./wp-content/cache" in cmd  # Dossier exclu élagué
+        assert ") -prune \\)" in cmd
+        assert "! -name '*.log'" in cmd  # Exclusion sur le nom, à toute profondeur
+        assert "-path './wp-content/*'" in cmd  # Inclusions ancrées à la racine
+        assert "-path ./wp-config.php " in cmd
         assert "tar -czf - -T -" in cmd  # tar lit depuis stdin (find)
     
     def test_build_tar_command_without_include_patterns(self, mock_ssh_client):
@@ -53,8 +56,9 @@ class TestFileBackup:
         cmd = file_backup._build_tar_command()
         
         # Sans patterns d'inclusion, la commande ne doit pas inclure -path avec conditions
-        assert "find . -type f" in cmd
-        assert "! -path '**.log*'" in cmd  # Les * sont ajoutés par le code
+        assert "find . " in cmd
+        assert cmd.count("-path") == 1  # Seule la garde de l'élagage
+        assert "! -name '*.log'" in cmd
         assert "tar -czf - -T -" in cmd
     
     def test_backup_to_file_success(self, file_backup, mock_ssh_client):
@@ -145,6 +149,110 @@ class TestFileBackup:
         
         assert "tar a échoué" in str(exc_info.value)
 
+    
+    def test_partition_by_size_is_balanced(self):
+        """Teste la répartition équilibrée des fichiers par taille."""
+        from backup_site.backup.incremental import ManifestEntry
+        
+        entries = {
+            "./big": ManifestEntry(100, 0),
+            "./medium": ManifestEntry(60, 0),
+            "./small1": ManifestEntry(30, 0),
+            "./small2": ManifestEntry(10, 0),
+        }
+        
+        buckets = FileBackup._partition_by_size(entries, 2)
+        
+        assert sorted(buckets) == [["./big"], ["./medium", "./small1", "./small2"]]
+        assert FileBackup._partition_by_size(entries, 8) == [
+            ["./big"], ["./medium"], ["./small1"], ["./small2"]
+        ]
+    
+    def test_shard_path(self):
+        """Teste le nommage des archives de shards."""
+        path = FileBackup.shard_path(Path("/backups/backup_20240101.tar.gz"), 3)
+        
+        assert path == Path("/backups/backup_20240101.part03.tar.gz")
+    
+    def test_backup_to_shards_success(self, file_backup, mock_ssh_client):
+        """Teste la sauvegarde en plusieurs archives parallèles."""
+        def make_response(chunks):
+            mock_stdout = MagicMock()
+            mock_stdout.read.side_effect = chunks
+            mock_stdout.channel.recv_exit_status.return_value = 0
+            mock_stderr = MagicMock()
+            mock_stderr.read.return_value = b""
+            return MagicMock(), mock_stdout, mock_stderr
+        
+        def exec_command(command):
+            if "stat -c" in command:
+                return make_response([b"10 1 ./a\n20 1 ./b\n"])
+            return make_response([b"part", b""])
+        
+        mock_ssh_client.exec_command.side_effect = exec_command
+        catalog = file_backup.catalog = Mock()
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = Path(tmpdir) / "backup.tar.gz"
+            
+            success, message, bytes_written = file_backup.backup_to_shards(output_path, 2)
+            
+            assert success is True
+            assert bytes_written == 8
+            assert (Path(tmpdir) / "backup.part01.tar.gz").read_bytes() == b"part"
+            assert (Path(tmpdir) / "backup.part02.tar.gz").exists()
+            assert mock_ssh_client.exec_command.call_count == 3
+            # Le catalogue référence les shards, pas le chemin de base
+            assert [c.args[1] for c in catalog.record.call_args_list] == [
+                Path(tmpdir) / "backup.part01.tar.gz",
+                Path(tmpdir) / "backup.part02.tar.gz",
+            ]
+            assert [c.args[2] for c in catalog.record.call_args_list] == [4, 4]
+
+    def test_backup_to_shards_checksum_and_cleanup(self, file_backup, mock_ssh_client):
+        """Teste un manifeste d'intégrité par shard, et la suppression de tous en cas d'échec."""
+        digest = hashlib.sha256(b"part").hexdigest()
+        
+        def make_response(exit_status=0):
+            mock_stdout = MagicMock()
+            mock_stdout.read.side_effect = [b"part", b""]
+            mock_stdout.channel.recv_exit_status.return_value = exit_status
+            mock_stderr = MagicMock()
+            mock_stderr.read.return_value = f"{CHECKSUM_MARKER} {digest}".encode()
+            return MagicMock(), mock_stdout, mock_stderr
+        
+        def exec_command(command):
+            if "stat -c" in command:
+                listing = MagicMock()
+                listing.read.side_effect = [b"10 1 ./a\n20 1 ./b\n", b""]
+                listing.channel.recv_exit_status.return_value = 0
+                return MagicMock(), listing, MagicMock()
+            calls.append(command)
+            return make_response(exit_status=2 if len(calls) == 2 and failing else 0)
+        
+        mock_ssh_client.exec_command.side_effect = exec_command
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = Path(tmpdir) / "backup.tar.gz"
+            calls, failing = [], False
+            
+            file_backup.backup_to_shards(output_path, 2, checksum="sha256")
+            
+            assert "sha256sum" in calls[0]
+            assert sorted(p.name for p in Path(tmpdir).iterdir()) == [
+                "backup.part01.tar.gz",
+                "backup.part01.tar.gz.checksum.json",
+                "backup.part02.tar.gz",
+                "backup.part02.tar.gz.checksum.json",
+            ]
+            
+            calls, failing = [], True
+            with pytest.raises(Exception, match="1 shard"):
+                file_backup.backup_to_shards(output_path, 2, checksum="sha256")
+            
+            # Le shard réussi ne doit pas survivre à l'échec de l'autre
+            assert list(Path(tmpdir).iterdir()) == []
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
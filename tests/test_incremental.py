@@ -0,0 +1,237 @@
+"""Tests pour le module de sauvegarde incrémentale."""
+
+import io
+import shutil
+import tarfile
+import tempfile
+from pathlib import Path
+from unittest.mock import Mock, MagicMock
+
+import pytest
+
+from backup_site.backup.compression import Compression, codec_for_path, open_compressed
+from backup_site.backup.files import FileBackup
+from backup_site.backup.incremental import (
+    FileManifest,
+    ManifestEntry,
+    diff_manifests,
+    find_latest_manifest,
+    parse_sha256_output,
+    parse_stat_output,
+    resolve_chain,
+    restore_chain,
+)
+
+
+def make_archive(path: Path, files: dict) -> None:
+    """Crée une archive tar contenant les fichiers donnés (codec d'après l'extension)."""
+    with open_compressed(path, Compression(codec_for_path(path))) as f:
+        with tarfile.open(fileobj=f, mode="w|") as tar:
+            for name, content in files.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                tar.addfile(info, io.BytesIO(content))
+
+
+class TestManifest:
+    """Tests pour les manifestes et leur comparaison."""
+
+    def test_parse_stat_output(self):
+        """Teste le parsing de la sortie stat, chemins avec espaces compris."""
+        entries = parse_stat_output("12 1700000000 ./a.php\n5 1700000001 ./dir/my file.txt\n")
+
+        assert entries["./a.php"] == ManifestEntry(size=12, mtime=1700000000)
+        assert entries["./dir/my file.txt"].size == 5
+
+    def test_parse_sha256_output(self):
+        """Teste le parsing de la sortie sha256sum."""
+        digest = "a" * 64
+        hashes = parse_sha256_output(f"{digest}  ./a.php\n")
+
+        assert hashes == {"./a.php": digest}
+
+    def test_diff_manifests(self):
+        """Teste la détection des ajouts, modifications et suppressions."""
+        previous = FileManifest(entries={
+            "./same": ManifestEntry(1, 100),
+            "./modified": ManifestEntry(1, 100),
+            "./deleted": ManifestEntry(1, 100),
+        })
+        current = FileManifest(entries={
+            "./same": ManifestEntry(1, 100),
+            "./modified": ManifestEntry(2, 200),
+            "./added": ManifestEntry(1, 100),
+        })
+
+        diff = diff_manifests(previous, current)
+
+        assert diff.added == ["./added"]
+        assert diff.modified == ["./modified"]
+        assert diff.deleted == ["./deleted"]
+        assert diff.changed == ["./added", "./modified"]
+
+    def test_diff_manifests_hash_wins_over_mtime(self):
+        """Teste qu'un fichier touché mais identique n'est pas ré-archivé."""
+        previous = FileManifest(entries={"./a": ManifestEntry(1, 100, "x" * 64)})
+        current = FileManifest(entries={"./a": ManifestEntry(1, 999, "x" * 64)})
+
+        assert diff_manifests(previous, current).is_empty
+
+
+class TestIncrementalBackup:
+    """Tests pour FileBackup.backup_incremental."""
+
+    @pytest.fixture
+    def mock_ssh_client(self):
+        """Crée un mock de client SSH."""
+        return Mock()
+
+    @pytest.fixture
+    def file_backup(self, mock_ssh_client):
+        """Crée une instance de FileBackup avec un mock SSH."""
+        return FileBackup(
+            ssh_client=mock_ssh_client,
+            remote_path="/home/testuser/www",
+            include_patterns=[],
+            exclude_patterns=["*.log"],
+        )
+
+    @staticmethod
+    def mock_command(stdout_chunks):
+        """Construit la réponse mockée d'un exec_command."""
+        mock_stdin = MagicMock()
+        mock_stdout = MagicMock()
+        mock_stdout.read.side_effect = list(stdout_chunks)
+        mock_stdout.channel.recv_exit_status.return_value = 0
+        mock_stderr = MagicMock()
+        mock_stderr.read.return_value = b""
+        return mock_stdin, mock_stdout, mock_stderr
+
+    def test_build_manifest_command(self, file_backup):
+        """Teste que le manifeste utilise le même filtrage que tar."""
+        cmd = file_backup._build_manifest_command()
+
+        assert cmd.startswith(file_backup._build_find_command())
+        assert "-exec stat -c '%s %Y %n' {} +" in cmd
+
+    def test_full_backup_without_previous_manifest(self, file_backup, mock_ssh_client):
+        """Teste qu'une sauvegarde sans base archive tous les fichiers."""
+        manifest_response = self.mock_command([b"3 100 ./a.php\n4 100 ./b.php\n"])
+        tar_response = self.mock_command([b"archive", b""])
+        mock_ssh_client.exec_command.side_effect = [manifest_response, tar_response]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = Path(tmpdir) / "backup.tar.gz"
+
+            success, message, bytes_written = file_backup.backup_incremental(output_path)
+
+            assert success is True
+            assert bytes_written == 7
+            written = b"".join(c.args[0] for c in tar_response[0].write.call_args_list)
+            assert written == b"./a.php\n./b.php\n"
+            tar_response[0].channel.shutdown_write.assert_called_once()
+
+            manifest = FileManifest.load(FileManifest.path_for(output_path))
+            assert manifest.kind == "full"
+            assert manifest.archive == "backup.tar.gz"
+            assert set(manifest.entries) == {"./a.php", "./b.php"}
+
+    def test_incremental_backup_only_sends_changes(self, file_backup, mock_ssh_client):
+        """Teste que seuls les fichiers modifiés sont archivés."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            previous_path = Path(tmpdir) / "prev.tar.gz.manifest.json"
+            FileManifest(entries={
+                "./a.php": ManifestEntry(3, 100),
+                "./old.php": ManifestEntry(1, 100),
+            }, archive="prev.tar.gz").save(previous_path)
+
+            manifest_response = self.mock_command([b"3 100 ./a.php\n4 200 ./b.php\n"])
+            tar_response = self.mock_command([b"delta", b""])
+            mock_ssh_client.exec_command.side_effect = [manifest_response, tar_response]
+
+            output_path = Path(tmpdir) / "backup.tar.gz"
+            file_backup.backup_incremental(output_path, previous_manifest_path=previous_path)
+
+            written = b"".join(c.args[0] for c in tar_response[0].write.call_args_list)
+            assert written == b"./b.php\n"
+
+            manifest = FileManifest.load(FileManifest.path_for(output_path))
+            assert manifest.kind == "incremental"
+            assert manifest.parent == previous_path.name
+            assert manifest.deleted == ["./old.php"]
+
+    def test_incremental_backup_without_changes(self, file_backup, mock_ssh_client):
+        """Teste qu'aucune commande tar n'est lancée sans changement."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            previous_path = Path(tmpdir) / "prev.tar.gz.manifest.json"
+            FileManifest(entries={"./a.php": ManifestEntry(3, 100)}).save(previous_path)
+
+            mock_ssh_client.exec_command.side_effect = [self.mock_command([b"3 100 ./a.php\n"])]
+
+            output_path = Path(tmpdir) / "backup.tar.gz"
+            success, _, _ = file_backup.backup_incremental(output_path, previous_path)
+
+            assert success is True
+            assert mock_ssh_client.exec_command.call_count == 1
+            with tarfile.open(output_path, "r:gz") as tar:
+                assert tar.getnames() == []
+
+
+class TestRestoreChain:
+    """Tests pour la restauration d'une chaîne complète + incrémentales."""
+
+    @pytest.mark.parametrize("extension", [
+        ".gz",
+        pytest.param(".zst", marks=pytest.mark.skipif(
+            shutil.which("zstd") is None, reason="zstd indisponible"
+        )),
+    ])
+    def test_restore_chain_applies_changes_and_deletions(self, extension):
+        """Teste la vue à un instant T reconstruite depuis la chaîne."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            full, inc = f"full.tar{extension}", f"inc.tar{extension}"
+            make_archive(root / full, {"./a.php": b"v1", "./old.php": b"x"})
+            FileManifest(
+                entries={"./a.php": ManifestEntry(2, 1), "./old.php": ManifestEntry(1, 1)},
+                archive=full,
+                created_at="2024-01-01T00:00:00",
+            ).save(root / f"{full}.manifest.json")
+
+            make_archive(root / inc, {"./a.php": b"v2"})
+            FileManifest(
+                entries={"./a.php": ManifestEntry(2, 2)},
+                kind="incremental",
+                archive=inc,
+                parent=f"{full}.manifest.json",
+                deleted=["./old.php"],
+                created_at="2024-01-02T00:00:00",
+            ).save(root / f"{inc}.manifest.json")
+
+            latest = find_latest_manifest(root)
+            assert latest == root / f"{inc}.manifest.json"
+            assert [p.name for p, _ in resolve_chain(latest)] == [
+                f"{full}.manifest.json",
+                f"{inc}.manifest.json",
+            ]
+
+            destination = root / "restore"
+            success, _, files_count = restore_chain(latest, destination)
+
+            assert success is True
+            assert files_count == 1
+            assert (destination / "a.php").read_bytes() == b"v2"
+            assert not (destination / "old.php").exists()
+
+    def test_resolve_chain_broken(self):
+        """Teste l'erreur sur une incrémentale sans parent."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "inc.tar.gz.manifest.json"
+            FileManifest(kind="incremental", archive="inc.tar.gz").save(path)
+
+            with pytest.raises(ValueError):
+                resolve_chain(path)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,125 @@
+"""Tests pour la vérification d'intégrité des sauvegardes."""
+
+import hashlib
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from backup_site.backup.files import FileBackup
+from backup_site.backup.integrity import (
+    find_archives,
+    get_algorithm,
+    manifest_path,
+    record_checksum,
+    split_checksum,
+    verify_archives,
+    with_remote_checksum,
+)
+
+
+SHA256 = get_algorithm("sha256")
+
+
+def run_remote(command):
+    """Exécute localement une commande enveloppée."""
+    return subprocess.run(["sh", "-c", command], capture_output=True)
+
+
+class TestRemoteChecksum:
+    """Tests pour l'empreinte calculée côté serveur."""
+
+    def test_stdout_and_exit_status_are_preserved(self):
+        """Teste que tee ne modifie ni le flux ni le code de sortie."""
+        result = run_remote(with_remote_checksum(
+            "printf 'dump'; echo 'mysqldump: warning' >&2; false", SHA256
+        ))
+        digest, stderr_output = split_checksum(result.stderr.decode())
+
+        assert result.returncode == 1
+        assert result.stdout == b"dump"
+        assert digest == hashlib.sha256(b"dump").hexdigest()
+        assert stderr_output == "mysqldump: warning"
+
+    def test_pipeline_digest_matches(self):
+        """Teste l'empreinte d'un flux compressé plus gros que le tampon d'une fifo."""
+        result = run_remote(with_remote_checksum("head -c 1000000 /dev/zero | gzip -1", SHA256))
+        digest, _ = split_checksum(result.stderr.decode())
+
+        assert result.returncode == 0
+        assert digest == hashlib.sha256(result.stdout).hexdigest()
+
+
+class TestBackupChecksum:
+    """Tests pour l'intégration dans FileBackup.backup_to_file."""
+
+    def make_client(self):
+        def exec_command(command):
+            result = run_remote(command.replace("tar -czf - -T -", "cat"))
+            stdout = MagicMock()
+            stdout.read.side_effect = [result.stdout, b""]
+            stdout.channel.recv_exit_status.return_value = result.returncode
+            stderr = MagicMock()
+            stderr.read.return_value = result.stderr
+            return None, stdout, stderr
+
+        client = MagicMock()
+        client.exec_command.side_effect = exec_command
+        return client
+
+    def test_manifest_written_next_to_archive(self):
+        """Teste l'écriture du manifeste quand les empreintes concordent."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            backup = FileBackup(
+                ssh_client=self.make_client(),
+                remote_path=tmpdir,
+                include_patterns=[],
+                exclude_patterns=[],
+            )
+            (Path(tmpdir) / "index.php").write_bytes(b"<?php")
+            output = Path(tmpdir) / "out" / "backup.tar.gz"
+
+            _, _, size = backup.backup_to_file(output, checksum="sha256")
+
+            manifest = json.loads(manifest_path(output).read_text())
+            assert manifest["algorithm"] == "sha256"
+            assert manifest["size"] == size
+            assert manifest["digest"] == hashlib.sha256(output.read_bytes()).hexdigest()
+
+    def test_mismatch_is_rejected(self):
+        """Teste le rejet d'une archive dont l'empreinte diffère du serveur."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            archive = Path(tmpdir) / "backup.tar.gz"
+            archive.write_bytes(b"abc")
+
+            with pytest.raises(IOError, match="Empreinte différente"):
+                record_checksum(archive, SHA256, "1" * 64, 3, "2" * 64)
+            assert not manifest_path(archive).exists()
+
+
+class TestVerify:
+    """Tests pour la revérification des archives."""
+
+    def test_detects_corruption(self):
+        """Teste la détection d'une archive modifiée après la sauvegarde."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            for name, data in [("a.tar.gz", b"a" * 100000), ("b.sql.gz", b""), ("c.sql.gz", b"c")]:
+                (root / name).write_bytes(data)
+                digest = hashlib.sha256(data).hexdigest()
+                record_checksum(root / name, SHA256, digest, len(data), digest)
+            (root / "c.sql.gz").write_bytes(b"x")
+
+            results = verify_archives(find_archives([root]), jobs=2)
+
+            assert [(r.archive.name, r.success) for r in results] == [
+                ("a.tar.gz", True), ("b.sql.gz", True), ("c.sql.gz", False),
+            ]
+            assert "empreinte" in results[2].error
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
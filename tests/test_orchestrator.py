@@ -0,0 +1,109 @@
+"""Tests pour l'orchestrateur de sauvegardes multi-sites."""
+
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+import yaml
+
+from backup_site.backup.orchestrator import BackupOrchestrator, JobResult, load_site_configs
+
+
+def write_config(directory: Path, name: str, host: str, key_path: Path) -> None:
+    """Écrit une configuration de site minimale."""
+    data = {
+        "site": {"name": name, "provider": "test", "app_type": "wordpress"},
+        "ssh": {"host": host, "user": "user", "private_key_path": str(key_path)},
+        "files": {"remote_path": "/www"},
+        "database": {"host": "localhost", "name": "wp", "user": "wp", "password": "secret"},
+        "backup": {"destination": str(directory / "backups")},
+    }
+    (directory / f"{name}.yaml").write_text(yaml.safe_dump(data))
+
+
+class TestBackupOrchestrator:
+    """Tests pour la classe BackupOrchestrator."""
+
+    @pytest.fixture
+    def config_dir(self):
+        """Crée un dossier de configurations : 4 sites sur 2 hôtes."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            directory = Path(tmpdir)
+            key_path = directory / "id_rsa"
+            key_path.write_text("key")
+            for index in range(4):
+                write_config(directory, f"site{index}", f"host{index % 2}", key_path)
+            (directory / "broken.yaml").write_text("site: [")
+            yield directory
+
+    def test_load_site_configs_reports_invalid_files(self, config_dir):
+        """Teste que les configurations invalides sont signalées sans bloquer."""
+        configs, failures = load_site_configs(config_dir)
+
+        assert [config.site["name"] for config in configs] == [
+            "site0", "site1", "site2", "site3"
+        ]
+        assert [(failure.site, failure.success) for failure in failures] == [("broken", False)]
+
+    def test_run_respects_limits(self, config_dir, monkeypatch):
+        """Teste les limites de concurrence globale et par hôte."""
+        configs, _ = load_site_configs(config_dir)
+        orchestrator = BackupOrchestrator(configs, workers=3, per_host=1)
+
+        lock = threading.Lock()
+        active = Counter()
+        peaks = {"total": 0, "host": 0}
+
+        def run_job(job):
+            with lock:
+                active[job.host] += 1
+                peaks["total"] = max(peaks["total"], sum(active.values()))
+                peaks["host"] = max(peaks["host"], active[job.host])
+            time.sleep(0.02)
+            with lock:
+                active[job.host] -= 1
+            return JobResult(site=job.site, kind=job.kind, success=True, duration=0.02)
+
+        monkeypatch.setattr(orchestrator, "run_job", run_job)
+        results = orchestrator.run()
+
+        assert len(results) == 8
+        assert peaks == {"total": 2, "host": 1}
+
+    def test_failed_job_does_not_stop_others(self, config_dir):
+        """Teste qu'un échec de connexion est capturé dans le résultat."""
+        configs, _ = load_site_configs(config_dir)
+        orchestrator = BackupOrchestrator(configs[:1], kinds=["files"])
+
+        results = orchestrator.run()
+
+        assert len(results) == 1
+        assert results[0].success is False
+        assert results[0].error
+
+    def test_sharded_files_are_hashed(self, config_dir, monkeypatch):
+        """Teste que les shards reçoivent l'algorithme d'empreinte configuré."""
+        configs, _ = load_site_configs(config_dir)
+        configs[0].files.shards = 3
+        orchestrator = BackupOrchestrator(configs[:1], kinds=["files"])
+        file_backup = Mock()
+        file_backup.backup_to_shards.return_value = (True, "", 42)
+        output_path = config_dir / "backups" / "site0" / "files.tar.gz"
+        monkeypatch.setattr(
+            orchestrator, "_file_backup", lambda job, client, timestamp: (file_backup, output_path)
+        )
+
+        orchestrator._run_files(orchestrator.build_jobs()[0], Mock(), "20240101_000000")
+
+        file_backup.backup_to_shards.assert_called_once_with(
+            output_path, 3, checksum=configs[0].backup.checksum_algorithm
+        )
+        assert configs[0].backup.checksum_algorithm == "sha256"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
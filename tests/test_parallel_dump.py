@@ -0,0 +1,328 @@
+"""Tests pour le module de sauvegarde parallèle de la base de données."""
+
+import gzip
+import io
+import re
+import shutil
+import socket
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest.mock import Mock, MagicMock
+
+import pytest
+
+from backup_site.backup.compression import Compression, open_decompressed
+from backup_site.backup.parallel_dump import (
+    DATA_HEADER,
+    LOCK_MARKER,
+    SNAPSHOT_MARKER,
+    DumpManifest,
+    DumpTask,
+    ParallelDatabaseBackup,
+    TableInfo,
+)
+
+
+def make_response(output=b"", exit_status=0, stderr=b""):
+    """Construit la réponse mockée d'un exec_command."""
+    mock_stdout = MagicMock()
+    mock_stdout.read.side_effect = [output, b""] if output else [b""]
+    mock_stdout.readline.return_value = ""
+    mock_stdout.channel.recv_exit_status.return_value = exit_status
+    mock_stderr = MagicMock()
+    mock_stderr.read.return_value = stderr
+    return MagicMock(), mock_stdout, mock_stderr
+
+
+class FakeExportSession:
+    """Session mysql d'export simulée : rejoue le script reçu sur stdin."""
+
+    def __init__(self, rows_by_table, events, fail_table=None, compress=gzip.compress):
+        self.rows_by_table = rows_by_table
+        self.compress = compress
+        self.events = events
+        self.fail_table = fail_table
+        self.script = b""
+        self.output = None
+        self.stdin = MagicMock()
+        self.stdin.write.side_effect = self._write
+        self.stdout = MagicMock()
+        self.stdout.readline.return_value = f"{SNAPSHOT_MARKER}\n".encode()
+        self.stdout.read.side_effect = self._read
+        self.stdout.channel.recv_exit_status.return_value = 0
+        self.stderr = MagicMock()
+        self.stderr.read.return_value = (
+            b"ERROR 1412 (HY000): Table definition has changed" if fail_table else b""
+        )
+
+    def _write(self, data):
+        self.script += data
+
+    def _render(self):
+        lines = []
+        for statement in self.script.decode().split(";\n"):
+            marker = re.fullmatch(r"SELECT '(BACKUP_SITE_\w+(?: \d+)?)'", statement)
+            table = re.search(r"FROM `test_wp`\.`([^`]+)`", statement)
+            if marker and marker.group(1) != SNAPSHOT_MARKER:
+                lines.append(marker.group(1).encode())
+            elif table:
+                if table.group(1) == self.fail_table:
+                    break
+                lines.extend(self.rows_by_table.get(table.group(1), []))
+        return io.BytesIO(self.compress(b"".join(line + b"\n" for line in lines)))
+
+    def _read(self, size=-1):
+        if self.output is None:
+            self.events.append("download")
+            self.output = self._render()
+        return self.output.read(size)
+
+    def response(self):
+        return self.stdin, self.stdout, self.stderr
+
+
+class TestParallelDatabaseBackup:
+    """Tests pour la classe ParallelDatabaseBackup."""
+
+    @pytest.fixture
+    def mock_ssh_client(self):
+        """Crée un mock de client SSH."""
+        return Mock()
+
+    @pytest.fixture
+    def db_backup(self, mock_ssh_client):
+        """Crée une instance de ParallelDatabaseBackup avec un mock SSH."""
+        return ParallelDatabaseBackup(
+            ssh_client=mock_ssh_client,
+            db_host="localhost",
+            db_port=3306,
+            db_name="test_wp",
+            db_user="testuser",
+            db_password="testpass",
+            jobs=3,
+            split_threshold=100,
+            max_parts=4,
+        )
+
+    def make_exec(self, events, rows_by_table, lock=False, fail_table=None,
+                  compress=gzip.compress):
+        """exec_command simulé : requêtes, session de contrôle et sessions d'export."""
+        self.sessions = []
+        self.control = []
+
+        def exec_command(command):
+            if "information_schema.TABLES" in command:
+                return make_response(b"wp_options\t10\t5\nwp_posts\t20\t3\n")
+            if "KEY_COLUMN_USAGE" in command:
+                return make_response(b"wp_posts\tID\tbigint\n")
+            if "information_schema.COLUMNS" in command:
+                return make_response(
+                    b"wp_options\toption_name\tvarchar\n"
+                    b"wp_posts\tID\tbigint\nwp_posts\tpost_title\ttext\n"
+                )
+            if "--raw" in command:
+                events.append("session")
+                session = FakeExportSession(rows_by_table, events, fail_table, compress)
+                self.sessions.append(session)
+                return session.response()
+            if command.startswith("mysql ") and "-e" not in command:
+                # Session de contrôle
+                response = make_response(exit_status=0 if lock else 1, stderr=b"Access denied")
+                response[1].readline.return_value = f"{LOCK_MARKER}\n" if lock else ""
+                response[0].write.side_effect = lambda data: events.append(data.decode())
+                self.control.append(response)
+                return response
+            return make_response(b"dump")
+
+        return exec_command
+
+    def test_plan_tasks_splits_big_tables(self, db_backup, mock_ssh_client):
+        """Teste le découpage des grosses tables par plage de clé primaire."""
+        mock_ssh_client.exec_command.return_value = make_response(b"1\t1000\n")
+        tables = [
+            TableInfo("wp_postmeta", bytes=350, primary_key="meta_id"),
+            TableInfo("wp_options", bytes=50, primary_key="option_id"),
+            TableInfo("wp_term_relationships", bytes=500),
+        ]
+
+        tasks = db_backup.plan_tasks(tables)
+        postmeta = [task for task in tasks if task.table == "wp_postmeta"]
+
+        assert [task.where for task in postmeta] == [
+            "`meta_id` < 251",
+            "`meta_id` >= 251 AND `meta_id` < 501",
+            "`meta_id` >= 501 AND `meta_id` < 751",
+            "`meta_id` >= 751",
+        ]
+        assert postmeta[0].filename == "wp_postmeta.part001.sql"
+        # Sans clé primaire entière, pas de découpage
+        assert [t.filename for t in tasks if t.table == "wp_term_relationships"] == [
+            "wp_term_relationships.sql"
+        ]
+        assert tasks[0].table == "wp_term_relationships"
+
+    def test_identifiers_are_quoted(self, db_backup, mock_ssh_client):
+        """Teste l'échappement des accents graves dans les noms de table et de colonne."""
+        mock_ssh_client.exec_command.return_value = make_response(b"1\t1000\n")
+        table = TableInfo("wp`x", bytes=350, primary_key="i`d")
+
+        tasks = db_backup.plan_tasks([table])
+
+        query = mock_ssh_client.exec_command.call_args.args[0]
+        assert "MIN(`i``d`), MAX(`i``d`) FROM `test_wp`.`wp``x`" in query
+        assert tasks[0].where == "`i``d` < 251"
+
+    def test_build_task_query(self, db_backup):
+        """Teste la requête d'export d'une plage de table, une ligne par enregistrement."""
+        table = TableInfo(
+            "wp_posts", columns=[("ID", "bigint"), ("post_title", "text"), ("thumb", "blob")]
+        )
+        query = db_backup._build_task_query(
+            DumpTask(table="wp_posts", filename="wp_posts.sql", where="`ID` >= 10"), table
+        )
+
+        assert query.startswith("SELECT CONCAT('(', ")
+        assert "QUOTE(CONVERT(`post_title` USING utf8mb4))" in query
+        # Sauts de ligne échappés dans le littéral : un enregistrement par ligne
+        assert r"'\n', '\\n'" in query
+        assert "CONCAT('X''', HEX(`thumb`), '''')" in query
+        assert query.endswith("FROM `test_wp`.`wp_posts` WHERE `ID` >= 10")
+        assert db_backup._insert_prefix(table) == (
+            b"INSERT INTO `wp_posts` (`ID`, `post_title`, `thumb`) VALUES "
+        )
+
+    def test_backup_to_directory_writes_manifest(self, db_backup, mock_ssh_client):
+        """Teste l'export complet, le regroupement en INSERT étendus et le manifeste."""
+        events = []
+        rows = {"wp_posts": [b"('1','Bonjour')", b"('2','Monde')"]}
+        mock_ssh_client.exec_command.side_effect = self.make_exec(events, rows)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_dir = Path(tmpdir) / "database_20240101_000000"
+
+            success, message, total = db_backup.backup_to_directory(output_dir)
+
+            assert success is True
+            assert (output_dir / "schema.sql.gz").read_bytes() == b"dump"
+            posts = gzip.decompress((output_dir / "data" / "wp_posts.sql.gz").read_bytes())
+            assert posts == DATA_HEADER + (
+                b"INSERT INTO `wp_posts` (`ID`, `post_title`) VALUES "
+                b"('1','Bonjour'),('2','Monde');\n"
+            )
+            options = gzip.decompress((output_dir / "data" / "wp_options.sql.gz").read_bytes())
+            assert options == DATA_HEADER
+            assert (output_dir / "routines.sql.gz").exists()
+            # Flux intermédiaires des sessions supprimés
+            assert sorted(p.name for p in (output_dir / "data").iterdir()) == [
+                "wp_options.sql.gz", "wp_posts.sql.gz",
+            ]
+
+            manifest = DumpManifest.load(output_dir / "manifest.json")
+            assert manifest.consistency == "per-table"
+            assert [table["name"] for table in manifest.tables] == ["wp_posts", "wp_options"]
+            assert manifest.tables[0]["primary_key"] == "ID"
+            assert manifest.tables[0]["files"][0]["path"] == "data/wp_posts.sql.gz"
+            sizes = sum(table["files"][0]["size"] for table in manifest.tables)
+            assert total == 2 * len(b"dump") + sizes
+
+        # Deux tâches réparties sur deux sessions, chacune dans son snapshot
+        assert len(self.sessions) == 2
+        for session in self.sessions:
+            assert b"START TRANSACTION WITH CONSISTENT SNAPSHOT" in session.script
+            session.stdin.channel.shutdown_write.assert_called_once()
+
+    @pytest.mark.skipif(shutil.which("zstd") is None, reason="zstd indisponible")
+    def test_zstd_sessions_split_while_streaming(self, db_backup, mock_ssh_client):
+        """Teste le découpage d'un flux zstd reçu, sans fichier intermédiaire."""
+        db_backup.compression = Compression.from_name("zstd")
+        events = []
+        rows = {"wp_posts": [b"('1','Bonjour')"]}
+
+        def zstd_compress(data):
+            return subprocess.run(
+                ["zstd", "-q", "-c"], input=data, capture_output=True, check=True
+            ).stdout
+
+        mock_ssh_client.exec_command.side_effect = self.make_exec(
+            events, rows, compress=zstd_compress
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_dir = Path(tmpdir) / "dump"
+            db_backup.backup_to_directory(output_dir)
+
+            with open_decompressed(output_dir / "data" / "wp_posts.sql.zst") as f:
+                assert f.read() == DATA_HEADER + (
+                    b"INSERT INTO `wp_posts` (`ID`, `post_title`) VALUES ('1','Bonjour');\n"
+                )
+            assert sorted(p.name for p in (output_dir / "data").iterdir()) == [
+                "wp_options.sql.zst", "wp_posts.sql.zst",
+            ]
+
+    def test_lock_released_before_data(self, db_backup, mock_ssh_client):
+        """Teste que le verrou n'est tenu que le temps d'ouvrir les snapshots."""
+        events = []
+        rows = {"wp_posts": [b"('1','a')"]}
+        mock_ssh_client.exec_command.side_effect = self.make_exec(events, rows, lock=True)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_backup.backup_to_directory(Path(tmpdir) / "dump")
+            manifest = DumpManifest.load(Path(tmpdir) / "dump" / "manifest.json")
+
+        assert manifest.consistency == "global-read-lock"
+        lock = next(i for i, event in enumerate(events) if "FLUSH TABLES WITH READ LOCK" in event)
+        unlock = events.index("UNLOCK TABLES;\n")
+        assert "SET SESSION lock_wait_timeout = 60;" in events[lock]
+        assert [i for i, event in enumerate(events) if event == "session"] == [lock + 1, lock + 2]
+        assert unlock < events.index("download")
+        for session in self.sessions:
+            session.stdout.channel.settimeout.assert_any_call(60)
+
+    def test_lock_timeout_falls_back(self, db_backup, mock_ssh_client):
+        """Teste qu'un verrou en attente est abandonné au bout du délai."""
+        db_backup.lock_timeout = 5
+        events = []
+        exec_command = self.make_exec(events, {}, lock=True)
+
+        def timing_out(command):
+            response = exec_command(command)
+            if self.control and response is self.control[-1]:
+                response[1].readline.side_effect = socket.timeout
+            return response
+
+        mock_ssh_client.exec_command.side_effect = timing_out
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_backup.backup_to_directory(Path(tmpdir) / "dump")
+            manifest = DumpManifest.load(Path(tmpdir) / "dump" / "manifest.json")
+
+        assert manifest.consistency == "per-table"
+        # FLUSH TABLES WITH READ LOCK puis LOCK TABLES, abandonnés tous les deux
+        assert len(self.control) == 2
+        for stdin, stdout, stderr in self.control:
+            stdout.channel.settimeout.assert_any_call(10)
+            stdin.channel.close.assert_called_once()
+            stderr.read.assert_not_called()
+
+    def test_task_failure_raises(self, db_backup, mock_ssh_client):
+        """Teste qu'un export interrompu fait échouer la sauvegarde."""
+        db_backup.consistent = False
+        events = []
+        mock_ssh_client.exec_command.side_effect = self.make_exec(
+            events, {"wp_posts": [b"('1','a')"]}, fail_table="wp_options"
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with pytest.raises(Exception) as exc_info:
+                db_backup.backup_to_directory(Path(tmpdir) / "dump")
+
+            assert "L'export mysql a échoué" in str(exc_info.value)
+            assert "Table definition has changed" in str(exc_info.value)
+            assert not list((Path(tmpdir) / "dump" / "data").glob(".*"))
+        for session in self.sessions:
+            session.stdin.channel.close.assert_called()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,152 @@
+"""Tests pour les motifs d'inclusion/exclusion (moteur local et rendu find).
+
+Le moteur local et l'expression find sont comparés sur une arborescence
+générée. Sa taille se règle par BACKUP_SITE_PATTERN_PATHS (ex: 1000000 pour
+une comparaison sur un million de chemins).
+"""
+
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from backup_site.backup.patterns import PatternMatcher
+
+TREE_PATHS = int(os.environ.get("BACKUP_SITE_PATTERN_PATHS", "3000"))
+
+DIRECTORIES = [
+    "wp-content", "wp-admin", "wp-includes", "uploads", "plugins", "themes",
+    "cache", "node_modules", ".git", "backup-2024", "old.log", "lib", "a", "b",
+]
+FILES = [
+    "index.php", "wp-config.php", ".env", ".environment.php", "debug.log",
+    "error.log", "style.css", "photo.jpg", "notes.tmp", ".htaccess", "dump.sql",
+    "x.swp", "readme.txt", "b.txt",
+]
+
+WORDPRESS_INCLUDE = [
+    "wp-content/**", "wp-config.php", ".htaccess", "index.php", "readme.txt",
+]
+WORDPRESS_EXCLUDE = [
+    "wp-content/cache/**", "wp-content/backup-*/**", "*.log", "*.tmp", "*.swp",
+    ".git/", "node_modules/", "*.sql", ".env",
+]
+
+PATTERN_SETS = {
+    "wordpress": (WORDPRESS_INCLUDE, WORDPRESS_EXCLUDE),
+    "negation": ([], ["*.log", "!debug.log", "cache/", "!wp-content/cache/", "a/b/"]),
+    "globstar": (["wp-content/**/*.php", "wp-*/index.php"], ["**/plugins/cache", "b"]),
+    "anchored-wildcards": (
+        ["*.php", "wp-content/*/*.css", "backup-*/"], ["/wp-*/[ab]/", "?.txt"]
+    ),
+    "classes": ([], ["*.[lt]og", "*.s[!q]l", "[!.]*.php"]),
+}
+
+
+def generate_tree(root: Path, count: int, seed: int = 42) -> None:
+    """Crée `count` fichiers répartis dans une arborescence aléatoire."""
+    rng = random.Random(seed)
+    for i in range(count):
+        depth = rng.choice([0, 1, 1, 2, 2, 3, 3, 4, 5])
+        directory = root.joinpath(*(rng.choice(DIRECTORIES) for _ in range(depth)))
+        directory.mkdir(parents=True, exist_ok=True)
+        name = rng.choice(FILES)
+        if i % 7 == 0:
+            name = f"{i}-{name}"
+        (directory / name).touch()
+
+
+def run_find(root: Path, command: str) -> list:
+    """Exécute une commande find locale et renvoie les chemins sans `./`."""
+    output = subprocess.run(
+        f"cd {root} && {command}", shell=True, check=True, capture_output=True, text=True,
+    ).stdout
+    return sorted(line[2:] for line in output.splitlines() if line != ".")
+
+
+@pytest.fixture(scope="module")
+def tree():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        generate_tree(root, TREE_PATHS)
+        all_files = run_find(root, "find . -type f")
+        yield root, all_files
+
+
+@pytest.mark.skipif(shutil.which("find") is None, reason="find indisponible")
+class TestFindAgainstLocalMatcher:
+    """Compare l'expression find au moteur local sur l'arborescence générée."""
+
+    @pytest.mark.parametrize("name", sorted(PATTERN_SETS))
+    def test_same_selection(self, tree, name):
+        """Teste que find et le moteur local retiennent les mêmes fichiers."""
+        root, all_files = tree
+        include, exclude = PATTERN_SETS[name]
+        matcher = PatternMatcher.compile(include, exclude)
+
+        assert matcher.inexact == []
+        remote = run_find(root, matcher.find_command())
+        local = sorted(matcher.filter(all_files))
+        assert remote == local
+        assert 0 < len(local) < len(all_files)
+
+    def test_excluded_directories_are_pruned(self, tree):
+        """Teste que find ne descend pas dans les dossiers exclus ou hors inclusions."""
+        root, _ = tree
+        matcher = PatternMatcher.compile(WORDPRESS_INCLUDE, WORDPRESS_EXCLUDE)
+
+        visited = run_find(root, f"find . {matcher.prune_expression()} -type d")
+
+        assert visited
+        assert all(path.split("/")[0] == "wp-content" for path in visited)
+        assert not any(path.startswith("wp-content/cache") for path in visited)
+        assert not any(part in (".git", "node_modules") for path in visited for part in path.split("/"))
+
+
+class TestPatternMatcher:
+    """Tests de la sémantique du moteur local."""
+
+    def test_gitignore_semantics(self):
+        """Teste ancrage, noms, dossiers seuls et `**`."""
+        matcher = PatternMatcher.compile([], [".env", "/build", "logs/", "docs/**/*.md"])
+
+        assert not matcher.selects(".env")
+        assert not matcher.selects("wp-content/themes/.env")
+        assert matcher.selects(".environment.php")
+        assert not matcher.selects("build/app.js")
+        assert matcher.selects("src/build/app.js")
+        assert not matcher.selects("a/logs/today.txt")
+        assert matcher.selects("a/logs")
+        assert not matcher.selects("docs/intro.md")
+        assert not matcher.selects("docs/a/b/intro.md")
+        assert matcher.selects("docs/a/b/intro.txt")
+
+    def test_negation_cannot_reach_inside_excluded_directory(self):
+        """Teste que la dernière règle l'emporte, sauf sous un dossier exclu."""
+        matcher = PatternMatcher.compile([], ["*.log", "!keep.log", "cache/", "!cache/keep.log"])
+
+        assert not matcher.selects("debug.log")
+        assert matcher.selects("a/keep.log")
+        assert not matcher.selects("cache/keep.log")
+
+    def test_includes_are_anchored(self):
+        """Teste qu'une inclusion sans `/` ne vise que la racine."""
+        matcher = PatternMatcher.compile(["index.php", "wp-content"], [])
+
+        assert matcher.selects("./index.php")
+        assert not matcher.selects("wp-admin/index.php")
+        assert matcher.selects("wp-content/uploads/photo.jpg")
+
+    def test_inexact_patterns_are_reported(self):
+        """Teste le signalement des motifs que find ne traduit pas exactement."""
+        matcher = PatternMatcher.compile(["w?-*/"], ["a/**/b*c", "*.log"])
+
+        assert matcher.inexact == ["a/**/b*c", "w?-*/"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,144 @@
+"""Tests pour la restauration complète dans Docker."""
+
+import io
+import tarfile
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from backup_site.docker_load.database import DockerDatabaseLoad
+from backup_site.docker_load.restore import DockerRestore, parse_wp_config, read_wp_config
+
+WP_CONFIG = b"""<?php
+define( 'DB_NAME', 'wordpress' );
+define('DB_USER', "wp_user");
+define( 'DB_PASSWORD', 'p4ss\\'word' );
+define( 'DB_HOST', 'localhost' );
+"""
+
+
+def write_archive(path, files):
+    """Écrit une archive tar.gz avec des chemins en `./` comme `find .`."""
+    with tarfile.open(path, "w:gz") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(f"./{name}")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+
+def make_pipeline(db_load=None, files_delay=0.3, db_delay=0.3, fail_files=False):
+    """Pipeline dont les chargements dorment et consignent leurs instants."""
+    events = []
+    lock = threading.Lock()
+
+    def record(name, delay, error=None):
+        def action(*args, **kwargs):
+            with lock:
+                events.append((name, "start", time.monotonic()))
+            time.sleep(delay)
+            with lock:
+                events.append((name, "end", time.monotonic()))
+            if error:
+                raise RuntimeError(error)
+            return True, "", {}
+        return action
+
+    file_load = Mock()
+    file_load.load_from_file.side_effect = record(
+        "files", files_delay, "disque plein" if fail_files else None
+    )
+    db_load = db_load or DockerDatabaseLoad(
+        container_name="mysql", db_name="wp", db_user="wp", db_password="secret"
+    )
+    db_load.load_from_file = Mock(side_effect=record("database", db_delay))
+    adapter = Mock()
+    adapter.setup.side_effect = record("setup", 0.0)
+    return DockerRestore(file_load, db_load, adapter), events
+
+
+def instant(events, name, kind):
+    return next(t for n, k, t in events if n == name and k == kind)
+
+
+class TestWpConfig:
+    """Tests de la lecture des identifiants dans l'archive."""
+
+    def test_parse_wp_config(self):
+        """Teste les guillemets simples, doubles et échappés."""
+        assert parse_wp_config(WP_CONFIG.decode()) == {
+            "DB_NAME": "wordpress", "DB_USER": "wp_user", "DB_PASSWORD": "p4ss'word",
+        }
+
+    def test_read_from_shards(self):
+        """Teste la recherche de wp-config.php à la racine, dans tous les shards."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            first, second = Path(tmpdir) / "a.part01.tar.gz", Path(tmpdir) / "a.part02.tar.gz"
+            write_archive(first, {"wp-content/plugins/x/wp-config.php": b"", "index.php": b""})
+            write_archive(second, {"wp-config.php": WP_CONFIG})
+
+            assert read_wp_config([first, second])["DB_USER"] == "wp_user"
+            assert read_wp_config([first]) is None
+
+
+class TestDockerRestore:
+    """Tests de l'ordonnancement des étapes."""
+
+    def test_loads_overlap_and_setup_waits_for_both(self):
+        """Teste le parallélisme des chargements et la configuration en dernier."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            archive, dump = Path(tmpdir) / "files.tar.gz", Path(tmpdir) / "db.sql.gz"
+            write_archive(archive, {"wp-config.php": WP_CONFIG})
+            dump.write_bytes(b"")
+            db_load = DockerDatabaseLoad(container_name="mysql", wordpress_container="wordpress")
+            pipeline, events = make_pipeline(db_load)
+
+            timeline = pipeline.run([archive], dump)
+
+        assert instant(events, "database", "start") < instant(events, "files", "end")
+        assert instant(events, "setup", "start") >= max(
+            instant(events, "files", "end"), instant(events, "database", "end")
+        )
+        assert (db_load.db_name, db_load.db_password) == ("wordpress", "p4ss'word")
+        assert db_load.wordpress_container is None
+        assert [s.name for s in sorted(timeline.stages, key=lambda s: s.finished)][-1] == (
+            "Configuration WordPress"
+        )
+        assert timeline.total < 0.3 + 0.3 + 0.25
+        assert not timeline.failed
+
+    def test_database_waits_for_files_without_wp_config(self):
+        """Teste le repli sur wp-cli quand l'archive ne contient pas wp-config.php."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            archive, dump = Path(tmpdir) / "files.tar.gz", Path(tmpdir) / "db.sql"
+            write_archive(archive, {"index.php": b"<?php"})
+            dump.write_bytes(b"")
+            db_load = DockerDatabaseLoad(container_name="mysql", wordpress_container="wordpress")
+            pipeline, events = make_pipeline(db_load, files_delay=0.2, db_delay=0.0)
+
+            pipeline.run([archive], dump)
+
+        assert instant(events, "database", "start") >= instant(events, "files", "end")
+        assert db_load.wordpress_container == "wordpress"
+
+    def test_failed_stage_skips_setup(self):
+        """Teste qu'un échec est consigné et empêche la configuration."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            archive, dump = Path(tmpdir) / "files.tar.gz", Path(tmpdir) / "db.sql"
+            write_archive(archive, {"index.php": b""})
+            dump.write_bytes(b"")
+            pipeline, events = make_pipeline(fail_files=True, files_delay=0.0, db_delay=0.0)
+
+            timeline = pipeline.run([archive], dump)
+
+        assert [(s.name, s.error) for s in timeline.failed] == [("Fichiers", "disque plein")]
+        assert "Base de données" in [s.name for s in timeline.stages]
+        pipeline.adapter.setup.assert_not_called()
+        assert all(timeline.bar(stage) for stage in timeline.stages)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,165 @@
+"""Tests pour le téléchargement reprenable."""
+
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from backup_site.backup.resumable import (
+    ResumableDownload,
+    TransferJournal,
+    find_interrupted,
+    part_path,
+)
+
+
+class LocalSFTPFile:
+    """Fichier SFTP lu localement, qui peut couper la connexion après N octets."""
+
+    def __init__(self, path, fail_after=None):
+        self._file = open(path, "rb")
+        self.fail_after = fail_after
+        self.prefetched = []
+
+    def seek(self, offset):
+        self._file.seek(offset)
+
+    def prefetch(self, file_size):
+        # Comme paramiko : préchargement de la position courante à file_size
+        self.prefetched.append((self._file.tell(), file_size))
+
+    def read(self, size):
+        if self.fail_after is not None and self._file.tell() >= self.fail_after:
+            raise EOFError("connexion perdue")
+        return self._file.read(size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self._file.close()
+
+
+def make_local_client(workdir, fail_after=None):
+    """Client SSH qui exécute les commandes dans `workdir`."""
+    client = Mock()
+    client.commands = []
+    client.files = []
+
+    def exec_command(command):
+        client.commands.append(command)
+        result = subprocess.run(command, shell=True, cwd=workdir, capture_output=True)
+        stdout = Mock()
+        stdout.read.return_value = result.stdout
+        stdout.channel.recv_exit_status.return_value = result.returncode
+        stderr = Mock()
+        stderr.read.return_value = result.stderr
+        return None, stdout, stderr
+
+    def open_sftp():
+        sftp = Mock()
+        def open_file(path, mode):
+            client.files.append(LocalSFTPFile(Path(workdir) / path, fail_after))
+            return client.files[-1]
+
+        sftp.open.side_effect = open_file
+        return sftp
+
+    client.exec_command.side_effect = exec_command
+    client.open_sftp.side_effect = open_sftp
+    return client
+
+
+class TestResumableDownload:
+    """Tests pour la classe ResumableDownload."""
+
+    def test_interrupted_download_resumes(self):
+        """Teste la reprise au dernier offset journalisé après une coupure."""
+        data = os.urandom(1000000)
+        with tempfile.TemporaryDirectory() as remote, tempfile.TemporaryDirectory() as local:
+            (Path(remote) / "source.bin").write_bytes(data)
+            output = Path(local) / "backup_1.tar.gz"
+            command = "cat source.bin"
+
+            with pytest.raises(EOFError):
+                ResumableDownload(
+                    make_local_client(remote, fail_after=600000), command, output,
+                    staging_dir="staging", range_size=256 * 1024,
+                ).run()
+
+            journal = TransferJournal.load(output)
+            assert journal.offset == 768 * 1024
+            assert find_interrupted(Path(local), "backup_*") == [output]
+
+            client = make_local_client(remote)
+            size, resumed = ResumableDownload(
+                client, command, output, staging_dir="staging", range_size=256 * 1024,
+            ).run()
+
+            assert resumed is True
+            assert size == len(data)
+            assert output.read_bytes() == data
+            # La commande de sauvegarde n'est pas relancée
+            assert not any("cat source.bin" in c for c in client.commands)
+            assert not part_path(output).exists()
+            assert TransferJournal.load(output) is None
+            assert not (Path(remote) / "staging" / output.name).exists()
+
+    def test_prefetch_is_bounded_to_one_range(self):
+        """Teste que le préchargement SFTP ne dépasse jamais la plage en cours."""
+        data = os.urandom(600000)
+        with tempfile.TemporaryDirectory() as remote, tempfile.TemporaryDirectory() as local:
+            (Path(remote) / "source.bin").write_bytes(data)
+            output = Path(local) / "backup_1.tar.gz"
+            client = make_local_client(remote)
+
+            ResumableDownload(
+                client, "cat source.bin", output, staging_dir="staging",
+                range_size=256 * 1024,
+            ).run()
+
+            assert output.read_bytes() == data
+            assert client.files[0].prefetched == [
+                (0, 256 * 1024), (256 * 1024, 512 * 1024), (512 * 1024, 600000),
+            ]
+
+    def test_changed_command_restarts(self):
+        """Teste qu'un journal d'une autre commande n'est pas repris."""
+        with tempfile.TemporaryDirectory() as remote, tempfile.TemporaryDirectory() as local:
+            output = Path(local) / "database_1.sql.gz"
+            TransferJournal(
+                remote_path="staging/database_1.sql.gz", size=3, sha256="0",
+                command_sha256="autre", offset=1,
+            ).save(output)
+
+            size, resumed = ResumableDownload(
+                make_local_client(remote), "printf 'abcdef'", output, staging_dir="staging",
+            ).run()
+
+            assert resumed is False
+            assert size == 6
+            assert output.read_bytes() == b"abcdef"
+
+    def test_checksum_mismatch_is_rejected(self):
+        """Teste qu'une archive altérée est rejetée et le journal supprimé."""
+        with tempfile.TemporaryDirectory() as remote, tempfile.TemporaryDirectory() as local:
+            output = Path(local) / "backup_1.tar.gz"
+            download = ResumableDownload(
+                make_local_client(remote), "printf 'abcdef'", output, staging_dir="staging",
+            )
+            journal = download.stage()
+            journal.sha256 = "0" * 64
+            journal.save(output)
+
+            with pytest.raises(IOError, match="Empreinte différente"):
+                download.run()
+
+            assert not output.exists()
+            assert TransferJournal.load(output) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,125 @@
+"""Tests pour la rétention des sauvegardes."""
+
+import json
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from backup_site.backup.retention import (
+    BackupIndex,
+    RetentionPolicy,
+    backup_stem,
+    parse_backup_name,
+    prune,
+)
+
+
+NOW = datetime(2024, 6, 30, 12, 0, 0)
+
+
+def make_backups(root, days, prefix="backup", kind="files", site=""):
+    """Crée une sauvegarde par jour (il y a N jours), avec son manifeste d'empreinte."""
+    directory = root / site if site else root
+    directory.mkdir(parents=True, exist_ok=True)
+    names = []
+    for day in days:
+        timestamp = (NOW - timedelta(days=day)).strftime("%Y%m%d_%H%M%S")
+        extension = ".tar.gz" if kind == "files" else ".sql.gz"
+        name = backup_stem(prefix, kind, timestamp) + extension
+        (directory / name).write_bytes(b"x" * 10)
+        (directory / (name + ".checksum.json")).write_text("{}")
+        names.append(name)
+    return names
+
+
+def remaining(root):
+    return sorted(p.name for p in root.rglob("*") if p.is_file() and not p.name.endswith(".json"))
+
+
+class TestNaming:
+    """Tests pour le nommage des sauvegardes."""
+
+    def test_parse(self):
+        """Teste la reconnaissance des noms avec et sans préfixe."""
+        assert parse_backup_name("blog_20240101_020000.tar.gz")[:2] == ("blog", "files")
+        assert parse_backup_name("blog_database_20240101_020000.sql.gz")[:2] == ("blog", "database")
+        assert parse_backup_name("database_20240101_020000.sql.gz")[:2] == (None, "database")
+        assert parse_backup_name("backup_20240101_020000.part02.tar.zst")[:2] == ("backup", "files")
+        assert parse_backup_name("notes.txt") is None
+
+
+class TestPrune:
+    """Tests pour la purge des sauvegardes."""
+
+    def test_age_only(self):
+        """Teste la suppression des sauvegardes plus anciennes que retention_days."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            make_backups(root, range(10))
+
+            result = prune(root, RetentionPolicy(days=3), prefix="backup", now=NOW)
+
+            assert len(result.kept) == 4
+            assert len(result.removed) == 6
+            assert len(remaining(root)) == 4
+            assert not list(root.glob("*0620*.checksum.json"))
+
+    def test_gfs_keeps_weekly_and_monthly(self):
+        """Teste la conservation de la dernière sauvegarde par semaine et par mois."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            make_backups(root, range(0, 120))
+
+            result = prune(
+                root, RetentionPolicy(days=1, daily=7, weekly=4, monthly=3), now=NOW, dry_run=True
+            )
+            kept = sorted(entry.timestamp for entry in result.kept)
+
+            # 7 jours, puis les dimanches des semaines précédentes, puis fins de mois
+            assert len(kept) == 7 + 3 + 2
+            assert datetime(2024, 5, 31, 12) in kept
+            assert datetime(2024, 4, 30, 12) in kept
+            assert len(remaining(root)) == 120
+
+    def test_prefix_sites_and_legacy(self):
+        """Teste le filtrage par préfixe et le regroupement par site et par type."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            make_backups(root, [0, 40], prefix="other")
+            make_backups(root, [0, 40], prefix="database", kind="files")
+            make_backups(root, [0, 40], kind="database", site="blog")
+            make_backups(root, [0, 40], site="blog")
+
+            index = BackupIndex.scan(root)
+            assert set(index.series(prefix="backup")) == {
+                ("", "database"), ("blog", "database"), ("blog", "files"),
+            }
+
+            prune(root, RetentionPolicy(days=30), prefix="backup", now=NOW)
+
+            assert len(remaining(root)) == 2 + 1 + 1 + 1
+
+    def test_incremental_parent_and_in_progress_are_kept(self):
+        """Teste la conservation des bases incrémentales et des transferts en cours."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            full, incremental = make_backups(root, [60, 0])
+            (root / (full + ".manifest.json")).write_text(json.dumps({"kind": "full"}))
+            (root / (incremental + ".manifest.json")).write_text(
+                json.dumps({"kind": "incremental", "parent": full + ".manifest.json"})
+            )
+            (pending,) = make_backups(root, [50])
+            (root / (pending + ".part")).write_bytes(b"x")
+            (root / pending).unlink()
+
+            result = prune(root, RetentionPolicy(days=7), now=NOW)
+
+            assert result.removed == []
+            assert (root / full).exists()
+            assert (root / (pending + ".part")).exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
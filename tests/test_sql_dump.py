@@ -0,0 +1,168 @@
+"""Tests pour le découpage des dumps SQL et le chargement parallèle."""
+
+import gzip
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from backup_site.backup.parallel_dump import DumpManifest
+from backup_site.docker_load.database import DockerDatabaseLoad
+from backup_site.docker_load.sql_dump import (
+    build_index_statements,
+    defer_secondary_indexes,
+    split_sql_dump,
+)
+
+
+SCHEMA = """CREATE TABLE `wp_posts` (
+  `ID` bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+  `post_name` varchar(200) NOT NULL DEFAULT '',
+  PRIMARY KEY (`ID`),
+  KEY `post_name` (`post_name`(191)),
+  UNIQUE KEY `slug` (`post_name`)
+) ENGINE=InnoDB;
+CREATE TABLE `wp_orders` (
+  `id` int NOT NULL,
+  `post_id` bigint(20) unsigned NOT NULL,
+  PRIMARY KEY (`id`),
+  KEY `post_id` (`post_id`),
+  CONSTRAINT `fk_post` FOREIGN KEY (`post_id`) REFERENCES `wp_posts` (`ID`)
+) ENGINE=InnoDB;"""
+
+DUMP = b"""-- MySQL dump 10.19
+/*!40101 SET NAMES utf8mb4 */;
+
+--
+-- Table structure for table `wp_options`
+--
+
+CREATE TABLE `wp_options` (
+  `option_id` bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+  PRIMARY KEY (`option_id`)
+) ENGINE=InnoDB;
+
+--
+-- Dumping data for table `wp_options`
+--
+
+LOCK TABLES `wp_options` WRITE;
+INSERT INTO `wp_options` VALUES (1);
+UNLOCK TABLES;
+/*!50003 CREATE TRIGGER `trg` BEFORE INSERT ON `wp_options` FOR EACH ROW SET @x = 1 */;;
+
+--
+-- Table structure for table `wp_posts`
+--
+
+CREATE TABLE `wp_posts` (
+  `ID` bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+  PRIMARY KEY (`ID`)
+) ENGINE=InnoDB;
+
+--
+-- Dumping data for table `wp_posts`
+--
+
+LOCK TABLES `wp_posts` WRITE;
+INSERT INTO `wp_posts` VALUES (1);
+UNLOCK TABLES;
+"""
+
+
+class TestSqlDump:
+    """Tests pour les outils de manipulation des dumps."""
+
+    def test_defer_secondary_indexes(self):
+        """Teste le retrait des index secondaires hors clés étrangères."""
+        schema, deferred = defer_secondary_indexes(SCHEMA)
+
+        assert deferred == {
+            "wp_posts": ["KEY `post_name` (`post_name`(191))", "UNIQUE KEY `slug` (`post_name`)"],
+        }
+        assert "  PRIMARY KEY (`ID`)\n) ENGINE=InnoDB;" in schema
+        # Table avec clé étrangère laissée intacte
+        assert "  KEY `post_id` (`post_id`)," in schema
+
+        statements = build_index_statements(deferred)
+        assert statements["wp_posts"] == (
+            "ALTER TABLE `wp_posts` ADD KEY `post_name` (`post_name`(191)), "
+            "ADD UNIQUE KEY `slug` (`post_name`);"
+        )
+
+    def test_auto_increment_index_kept(self):
+        """Teste qu'un index ouvert par la colonne AUTO_INCREMENT reste à la création."""
+        schema, deferred = defer_secondary_indexes(
+            "CREATE TABLE `wp_blog_posts` (\n"
+            "  `blog_id` int NOT NULL,\n"
+            "  `id` bigint NOT NULL AUTO_INCREMENT,\n"
+            "  `slug` varchar(200) NOT NULL,\n"
+            "  PRIMARY KEY (`blog_id`,`id`),\n"
+            "  KEY `id` (`id`),\n"
+            "  KEY `slug` (`slug`)\n"
+            ") ENGINE=InnoDB AUTO_INCREMENT=42;"
+        )
+
+        assert deferred == {"wp_blog_posts": ["KEY `slug` (`slug`)"]}
+        assert "  PRIMARY KEY (`blog_id`,`id`),\n  KEY `id` (`id`)\n)" in schema
+
+    def test_split_sql_dump(self):
+        """Teste le découpage d'un dump monolithique compressé."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dump_path = Path(tmpdir) / "database.sql.gz"
+            dump_path.write_bytes(gzip.compress(DUMP))
+            output_dir = Path(tmpdir) / "split"
+
+            manifest = split_sql_dump(dump_path, output_dir)
+
+            assert [table["name"] for table in manifest.tables] == ["wp_options", "wp_posts"]
+            schema = (output_dir / "schema.sql").read_text()
+            assert schema.startswith("-- MySQL dump")
+            assert "CREATE TABLE `wp_posts`" in schema
+            assert "INSERT" not in schema
+
+            data = (output_dir / "data" / "wp_options.sql").read_text()
+            assert "SET NAMES" in data
+            assert "INSERT INTO `wp_options`" in data
+            assert "TRIGGER" not in data
+            assert "TRIGGER" in (output_dir / "routines.sql").read_text()
+            assert DumpManifest.load(output_dir / "manifest.json").consistency == "single-dump"
+
+
+class TestDockerDatabaseLoadParallel:
+    """Tests pour le chargement parallèle dans Docker."""
+
+    def test_load_from_directory_order(self):
+        """Teste l'ordre schéma → données → index → routines."""
+        loader = DockerDatabaseLoad(
+            container_name="mysql", db_name="wp", db_user="wp", db_password="secret",
+        )
+        calls = []
+
+        def exec_sql(source, codec=None, fast=False):
+            calls.append(source.name if isinstance(source, Path) else source.decode())
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dump_path = Path(tmpdir) / "database.sql"
+            dump_path.write_bytes(DUMP.replace(
+                b"  PRIMARY KEY (`ID`)\n",
+                b"  PRIMARY KEY (`ID`),\n  KEY `k` (`ID`)\n",
+            ))
+            split_sql_dump(dump_path, Path(tmpdir) / "split")
+
+            with patch.object(loader, "_create_database_and_user"), \
+                    patch.object(loader, "_exec_sql", side_effect=exec_sql):
+                success, _, timings = loader.load_from_directory(Path(tmpdir) / "split", jobs=2)
+
+        assert success is True
+        assert "CREATE TABLE `wp_posts`" in calls[0]
+        assert "KEY `k`" not in calls[0]
+        assert sorted(calls[1:3]) == ["wp_options.sql", "wp_posts.sql"]
+        assert calls[3] == "ALTER TABLE `wp_posts` ADD KEY `k` (`ID`);"
+        assert calls[4] == "routines.sql"
+        assert set(timings) == {"wp_options", "wp_posts"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
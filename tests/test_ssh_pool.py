@@ -0,0 +1,66 @@
+"""Tests pour le pool de connexions SSH."""
+
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backup_site.utils.ssh import SSHConnectionPool
+
+
+class TestSSHConnectionPool:
+    """Tests pour la classe SSHConnectionPool."""
+
+    @pytest.fixture
+    def key_path(self):
+        """Crée un fichier de clé factice."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "id_rsa"
+            path.write_text("key")
+            path.chmod(0o600)
+            yield path
+
+    @pytest.fixture
+    def ssh_client_class(self):
+        """Remplace paramiko.SSHClient et le chargement de clé."""
+        with patch("backup_site.utils.ssh.paramiko.SSHClient") as client_class, \
+                patch("backup_site.utils.ssh.SSHKeyValidator.load_private_key") as load_key:
+            client_class.side_effect = lambda: MagicMock()
+            load_key.return_value = object()
+            yield client_class, load_key
+
+    def test_reuses_connection_and_key(self, key_path, ssh_client_class):
+        """Teste qu'une seule poignée de main est faite par hôte."""
+        client_class, load_key = ssh_client_class
+        pool = SSHConnectionPool(keepalive=15)
+
+        first, first_time = pool.get("host", "user", key_path)
+        second, second_time = pool.get("host", "user", key_path)
+        other, _ = pool.get("other", "user", key_path)
+
+        assert first is second
+        assert second_time == 0.0
+        assert other is not first
+        assert load_key.call_count == 1
+        assert pool.stats.connections == 2
+        assert pool.stats.reuses == 1
+        first.get_transport.return_value.set_keepalive.assert_called_once_with(15)
+
+    def test_reconnects_dead_transport(self, key_path, ssh_client_class):
+        """Teste la reconnexion quand le Transport est tombé."""
+        pool = SSHConnectionPool()
+
+        first, _ = pool.get("host", "user", key_path)
+        first.get_transport.return_value.is_active.return_value = False
+        second, _ = pool.get("host", "user", key_path)
+
+        assert second is not first
+        first.close.assert_called_once()
+
+        pool.close_all()
+        second.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
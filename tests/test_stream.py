@@ -0,0 +1,90 @@
+"""Tests pour la lecture en flux des commandes distantes."""
+
+import io
+import shutil
+from unittest.mock import Mock, MagicMock
+
+import pytest
+from paramiko.ssh_exception import SSHException
+
+from backup_site.backup.stream import RemoteStream
+from backup_site.backup.transfer import TransferSettings
+
+
+def make_client(data, exit_status=0, stderr=b""):
+    """Crée un client SSH mocké dont la commande renvoie `data`."""
+    mock_stdout = io.BytesIO(data)
+    mock_stdout.channel = MagicMock()
+    mock_stdout.channel.recv_exit_status.return_value = exit_status
+    mock_stderr = MagicMock()
+    mock_stderr.read.return_value = stderr
+    client = Mock()
+    client.exec_command.return_value = (None, mock_stdout, mock_stderr)
+    return client, mock_stdout
+
+
+class TestRemoteStream:
+    """Tests pour la classe RemoteStream."""
+
+    def test_iter_chunks_is_bounded(self):
+        """Teste que les blocs ne dépassent pas la taille demandée."""
+        client, _ = make_client(b"x" * 10000)
+
+        with RemoteStream(client, "tar -cf - .") as stream:
+            chunks = list(stream.iter_chunks(4096))
+
+        assert [len(chunk) for chunk in chunks] == [4096, 4096, 1808]
+        assert stream.bytes_read == 10000
+        assert stream.exit_status == 0
+
+    def test_file_like_consumers(self):
+        """Teste l'utilisation avec les outils de la bibliothèque standard."""
+        client, _ = make_client(b"dump" * 1000)
+        output = io.BytesIO()
+
+        with RemoteStream(client, "mysqldump") as stream:
+            shutil.copyfileobj(io.BufferedReader(stream, 1024), output)
+
+        assert output.getvalue() == b"dump" * 1000
+
+    def test_exit_status_checked_at_end(self):
+        """Teste que l'échec distant est signalé à la fin du flux."""
+        client, _ = make_client(b"partial", exit_status=2, stderr=b"tar: read error")
+
+        with pytest.raises(SSHException) as exc_info:
+            with RemoteStream(client, "tar", "La commande tar") as stream:
+                assert stream.read() == b"partial"
+
+        assert "code 2" in str(exc_info.value)
+        assert stream.stderr_output == "tar: read error"
+
+    def test_consumer_error_aborts_channel(self):
+        """Teste qu'une erreur du consommateur coupe le canal sans attendre."""
+        client, mock_stdout = make_client(b"data")
+
+        with pytest.raises(ValueError):
+            with RemoteStream(client, "tar"):
+                raise ValueError("disque plein")
+
+        mock_stdout.channel.close.assert_called_once()
+        mock_stdout.channel.recv_exit_status.assert_not_called()
+
+    def test_transfer_settings_applied(self):
+        """Teste la priorité distante et la limite de débit du flux."""
+        client, _ = make_client(b"x" * 10000)
+        settings = TransferSettings(nice=10, rate_limit=50000)
+        settings.bucket.consume = Mock()
+
+        with RemoteStream(client, "tar", settings=settings) as stream:
+            chunks = list(stream.iter_chunks(8192))
+
+        command = client.exec_command.call_args.args[0]
+        assert command.startswith("renice -n 10 ")
+        assert command.endswith("tar")
+        # Lectures bornées à ~100 ms de débit, toutes décomptées du seau
+        assert max(len(chunk) for chunk in chunks) == 5000
+        assert sum(call.args[0] for call in settings.bucket.consume.call_args_list) == 10000
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,141 @@
+"""Tests pour la limitation du débit et de la priorité des sauvegardes."""
+
+import io
+import shutil
+import subprocess
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from backup_site.backup.throttle import (
+    MIN_ADAPTIVE_RATE,
+    AdaptiveThrottle,
+    TokenBucket,
+    priority_prefix,
+)
+from backup_site.backup.transfer import TransferSettings, download_to_file, exec_command
+
+
+class TestTokenBucket:
+    """Tests pour le seau à jetons."""
+
+    def test_download_respects_rate(self):
+        """Teste qu'un téléchargement limité dure au moins volume / débit."""
+        data = b"x" * 200_000
+        settings = TransferSettings(
+            buffer_size=65536, rate_limit=400_000, bucket=TokenBucket(400_000, burst=4096)
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = Path(tmpdir) / "out.bin"
+            started = time.monotonic()
+            assert download_to_file(io.BytesIO(data), output, settings) == len(data)
+            elapsed = time.monotonic() - started
+            assert output.read_bytes() == data
+
+        assert 0.45 <= elapsed < 2.0
+        assert settings.bucket.consumed == len(data)
+
+    def test_copies_share_bucket(self):
+        """Teste que les réglages copiés (shards, tables) partagent le débit."""
+        settings = TransferSettings(rate_limit=1_000_000)
+        shard = replace(settings, buffer_size=4096)
+
+        assert shard.bucket is settings.bucket
+        assert TransferSettings().bucket is None
+        assert settings.bucket.read_size(1024 * 1024) == 100_000
+
+
+class TestAdaptiveThrottle:
+    """Tests pour la régulation AIMD selon le RTT."""
+
+    def test_backs_off_and_recovers_to_ceiling(self):
+        """Teste la baisse multiplicative puis la remontée par paliers."""
+        bucket = TokenBucket(1_000_000)
+        throttle = AdaptiveThrottle(bucket, probe=Mock(), ceiling=1_000_000)
+
+        assert throttle.observe(0.05) == 1_000_000
+        assert throttle.observe(0.2) == pytest.approx(700_000)
+        assert throttle.observe(0.06) == pytest.approx(800_000)
+        for _ in range(5):
+            rate = throttle.observe(0.05)
+        assert rate == 1_000_000
+        assert bucket.rate == 1_000_000
+
+    def test_jitter_on_fast_link_is_ignored(self):
+        """Teste qu'un RTT doublé mais sous la marge ne ralentit pas."""
+        bucket = TokenBucket(1_000_000)
+        throttle = AdaptiveThrottle(bucket, probe=Mock(), ceiling=1_000_000)
+
+        throttle.observe(0.001)
+        assert throttle.observe(0.008) == 1_000_000
+
+    def test_unlimited_starts_from_observed_throughput(self):
+        """Teste le passage d'un débit libre à un débit mesuré, puis le retour."""
+        bucket = TokenBucket(None)
+        throttle = AdaptiveThrottle(bucket, probe=Mock())
+
+        throttle.observe(0.05)
+        bucket.reserve(10_000_000)
+        rate = throttle.observe(0.5)
+
+        assert rate >= MIN_ADAPTIVE_RATE
+        assert bucket.rate == rate
+        # Aucune donnée ne passe : le débit fixé ne limite plus rien
+        assert throttle.observe(0.05) is None
+        assert bucket.rate is None
+
+    def test_shared_bucket_runs_one_controller(self):
+        """Teste qu'un seul régulateur tourne pour des transferts simultanés."""
+        bucket = TokenBucket(1_000_000)
+        probe = Mock(return_value=None)
+
+        with bucket.adaptive(probe):
+            first = bucket._controller
+            with bucket.adaptive(probe):
+                assert bucket._controller is first
+        assert bucket._controller is None
+
+
+class TestRemotePriority:
+    """Tests pour la priorité des commandes distantes."""
+
+    def test_exec_command_prefixes_priority(self):
+        """Teste le préfixe renice/ionice des commandes de transfert."""
+        client = Mock()
+        exec_command(client, "tar -cf - .", TransferSettings(nice=10, io_class="idle"))
+
+        command = client.exec_command.call_args.args[0]
+        assert command.startswith("renice -n 10 -p $$")
+        assert "ionice -c 3 -p $$" in command
+        assert command.endswith("; tar -cf - .")
+        assert priority_prefix() == ""
+
+    @pytest.mark.skipif(shutil.which("renice") is None, reason="renice indisponible")
+    def test_pipeline_inherits_priority(self):
+        """Teste que les processus du pipeline héritent de la priorité."""
+        command = priority_prefix(nice=7) + "true | nice"
+
+        result = subprocess.run(command, shell=True, capture_output=True, text=True)
+
+        assert result.stdout.strip() == "7"
+
+    def test_missing_tools_are_ignored(self):
+        """Teste qu'un serveur sans renice/ionice exécute quand même la commande."""
+        command = priority_prefix(nice=5, io_class="idle") + "echo ok"
+
+        result = subprocess.run(
+            command, shell=True, capture_output=True, text=True, env={"PATH": "/nonexistent"},
+        )
+
+        assert result.returncode == 0
+        assert result.stdout == "ok\n"
+        assert result.stderr == ""
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,90 @@
+"""Tests pour le téléchargement pipeliné."""
+
+import io
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from backup_site.backup.transfer import TransferSettings, download_to_file, exec_command
+
+
+class FailingReader:
+    """Flux qui échoue après quelques blocs."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def read(self, size):
+        self.calls += 1
+        if self.calls > 3:
+            raise OSError("connexion perdue")
+        return b"x" * size
+
+
+class TestDownloadToFile:
+    """Tests pour la fonction download_to_file."""
+
+    def test_copies_stream(self):
+        """Teste la copie complète avec une file plus petite que le flux."""
+        data = os.urandom(100000)
+        settings = TransferSettings(buffer_size=4096, queue_depth=2)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = Path(tmpdir) / "sub" / "backup.tar.gz"
+
+            assert download_to_file(io.BytesIO(data), output, settings) == len(data)
+            assert output.read_bytes() == data
+
+    def test_preallocation_is_truncated(self):
+        """Teste que la taille finale ne garde pas l'extent préalloué."""
+        settings = TransferSettings(buffer_size=1000, preallocate_extent=1024 * 1024)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = Path(tmpdir) / "backup.tar.gz"
+            download_to_file(io.BytesIO(b"a" * 2500), output, settings)
+
+            assert output.stat().st_size == 2500
+
+    def test_reader_error_is_raised(self):
+        """Teste que l'erreur du thread lecteur remonte à l'appelant."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with pytest.raises(OSError, match="connexion perdue"):
+                download_to_file(
+                    FailingReader(), Path(tmpdir) / "out", TransferSettings(buffer_size=10)
+                )
+
+    def test_write_error_closes_channel(self):
+        """Teste qu'une erreur d'écriture coupe le canal au lieu de laisser tourner la commande."""
+        reader = io.BytesIO(b"x" * 100000)
+        reader.channel = Mock()
+        hasher = Mock()
+        hasher.update.side_effect = OSError(28, "No space left on device")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with pytest.raises(OSError, match="No space left"):
+                download_to_file(
+                    reader, Path(tmpdir) / "backup.tar.gz",
+                    TransferSettings(buffer_size=4096), hasher=hasher,
+                )
+
+        reader.channel.close.assert_called_once()
+
+    def test_exec_command_tunes_channel(self):
+        """Teste l'ouverture d'un canal avec fenêtre et paquets réglés."""
+        client = Mock()
+        channel = client.get_transport.return_value.open_session.return_value
+
+        exec_command(client, "tar -cf - .", TransferSettings(window_size=16 * 1024 * 1024))
+
+        client.get_transport.return_value.open_session.assert_called_once_with(
+            window_size=16 * 1024 * 1024, max_packet_size=None
+        )
+        channel.exec_command.assert_called_once_with("tar -cf - .")
+        client.exec_command.assert_not_called()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,171 @@
+"""Tests pour le remplacement d'URL dans les dumps SQL."""
+
+import gzip
+import io
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from backup_site.docker_load.database import DockerDatabaseLoad
+from backup_site.docker_load.url_rewrite import UrlRewriter, sql_escape, sql_unescape
+
+OLD = "https://old.example"
+NEW = "http://localhost:8080"
+
+DUMP = (
+    b"CREATE TABLE `wp_posts` (\n"
+    b"  `ID` bigint(20) unsigned NOT NULL AUTO_INCREMENT,\n"
+    b"  `post_content` longtext NOT NULL,\n"
+    b"  `guid` varchar(255) NOT NULL DEFAULT '',\n"
+    b"  PRIMARY KEY (`ID`)\n"
+    b") ENGINE=InnoDB;\n"
+    b"INSERT INTO `wp_posts` VALUES (1,'<a href=\\\"https://old.example/a\\\">l\\'a</a>',"
+    b"'https://old.example/?p=1'),(2,'(https://old.example, ok)','https://old.example/?p=2');\n"
+    b"INSERT INTO `wp_options` VALUES (1,'siteurl','https://old.example','yes'),"
+    b"(2,'widget','a:1:{s:3:\\\"url\\\";s:19:\\\"https://old.example\\\";}','yes');\n"
+)
+
+
+def rewritten(data, **kwargs):
+    rewriter = UrlRewriter(OLD, NEW, **kwargs)
+    return rewriter.wrap(io.BytesIO(data)).read()
+
+
+class TestRewriteValue:
+    """Tests du remplacement dans une valeur décodée."""
+
+    def test_serialized_lengths_are_fixed(self):
+        """Teste le recalcul des longueurs, y compris dans une sérialisation imbriquée."""
+        rewriter = UrlRewriter(OLD, NEW)
+        inner = b's:23:"https://old.example/img";'
+        value = b'a:2:{s:19:"https://old.example";s:19:"https://old.example";i:1;s:%d:"%s";}' % (
+            len(inner), inner
+        )
+
+        result = rewriter.rewrite_value(value)
+
+        inner_new = b's:25:"http://localhost:8080/img";'
+        assert result == (
+            b'a:2:{s:19:"https://old.example";s:21:"http://localhost:8080";'
+            b'i:1;s:%d:"%s";}' % (len(inner_new), inner_new)
+        )
+
+    def test_multibyte_lengths_are_bytes(self):
+        """Teste que les longueurs sérialisées sont comptées en octets."""
+        rewriter = UrlRewriter(OLD, "http://café.test")
+        value = 's:22:"https://old.example/é";'.encode("utf-8")
+
+        assert rewriter.rewrite_value(value) == 's:20:"http://café.test/é";'.encode("utf-8")
+
+    def test_objects_keep_class_and_property_names(self):
+        """Teste les objets : propriétés réécrites, objets C: laissés tels quels."""
+        rewriter = UrlRewriter(OLD, NEW)
+        value = (
+            b'O:8:"stdClass":1:{s:19:"https://old.example";s:19:"https://old.example";}'
+        )
+        opaque = b'C:11:"ArrayObject":19:{https://old.example}'
+
+        assert rewriter.rewrite_value(value) == (
+            b'O:8:"stdClass":1:{s:19:"https://old.example";s:21:"http://localhost:8080";}'
+        )
+        assert rewriter.rewrite_value(opaque) == opaque
+
+    def test_corrupt_serialization_falls_back_to_plain_replace(self):
+        """Teste qu'une longueur incohérente donne un remplacement simple."""
+        rewriter = UrlRewriter(OLD, NEW)
+
+        assert rewriter.rewrite_value(b's:5:"https://old.example";') == (
+            b's:5:"http://localhost:8080";'
+        )
+
+    def test_sql_escape_round_trip(self):
+        """Teste l'échappement mysqldump dans les deux sens."""
+        value = b"l'a \"b\" \\ \n\r\x00\x1a"
+
+        assert sql_unescape(sql_escape(value)) == value
+        assert sql_escape(b'a"b') == b'a\\"b'
+
+
+class TestRewriteLines:
+    """Tests du remplacement dans les lignes d'un dump."""
+
+    def test_guid_skipped_from_create_table(self):
+        """Teste guid ignoré sans liste de colonnes, et les chaînes échappées."""
+        lines = rewritten(DUMP).split(b"\n")
+
+        assert lines[6] == (
+            b"INSERT INTO `wp_posts` VALUES (1,'<a href=\\\"http://localhost:8080/a\\\">l\\'a</a>',"
+            b"'https://old.example/?p=1'),(2,'(http://localhost:8080, ok)','https://old.example/?p=2');"
+        )
+        assert lines[7] == (
+            b"INSERT INTO `wp_options` VALUES (1,'siteurl','http://localhost:8080','yes'),"
+            b"(2,'widget','a:1:{s:3:\\\"url\\\";s:21:\\\"http://localhost:8080\\\";}','yes');"
+        )
+
+    def test_guid_skipped_from_column_list(self):
+        """Teste guid ignoré d'après la liste de colonnes de l'INSERT."""
+        line = (
+            b"INSERT INTO `wp_posts` (`guid`, `post_content`) VALUES "
+            b"('https://old.example/?p=1','https://old.example');\n"
+        )
+
+        assert rewritten(line) == (
+            b"INSERT INTO `wp_posts` (`guid`, `post_content`) VALUES "
+            b"('https://old.example/?p=1','http://localhost:8080');\n"
+        )
+
+    def test_only_insert_lines_are_rewritten(self):
+        """Teste que les commentaires et le schéma ne sont pas modifiés."""
+        data = b"-- Host: https://old.example\nSET @a='https://old.example';\n"
+
+        assert rewritten(data) == data
+
+    @pytest.mark.parametrize("batch_size,workers", [(1, 1), (37, 1), (1 << 20, 1), (64, 2)])
+    def test_batches_and_workers_give_same_output(self, batch_size, workers):
+        """Teste que le découpage en lots et le pool ne changent pas le résultat."""
+        data = DUMP * 20
+
+        assert rewritten(data, batch_size=batch_size, workers=workers) == rewritten(data)
+
+    def test_reader_returns_requested_sizes(self):
+        """Teste la lecture par blocs de taille fixe."""
+        reader = UrlRewriter(OLD, NEW, batch_size=16).wrap(io.BytesIO(DUMP))
+        chunks = iter(lambda: reader.read(10), b"")
+
+        assert b"".join(chunks) == rewritten(DUMP)
+        assert reader.bytes_read == len(DUMP)
+
+
+class TestDockerDatabaseLoadRewrite:
+    """Tests du remplacement pendant le chargement dans Docker."""
+
+    def test_load_from_file_streams_rewritten_dump(self):
+        """Teste que le dump compressé est décompressé et réécrit avant mariadb."""
+        loader = DockerDatabaseLoad(
+            container_name="mysql", db_name="wp", db_user="wp", db_password="secret",
+            url_rewriter=UrlRewriter(OLD, NEW),
+        )
+        sent = []
+
+        def pipe(container, command, reader, buffer_size=None):
+            sent.append((command, reader.read()))
+            return len(sent[-1][1])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dump_path = Path(tmpdir) / "dump.sql.gz"
+            dump_path.write_bytes(gzip.compress(DUMP))
+            with patch.object(loader, "_prepare_database"), \
+                    patch("backup_site.docker_load.database.pipe_to_container", side_effect=pipe):
+                success, message = loader.load_from_file(dump_path)
+
+        assert success
+        assert "URL remplacée" in message
+        command, data = sent[0]
+        assert "gzip" not in command
+        assert data == rewritten(DUMP)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,144 @@
+"""Tests pour l'exécution groupée des commandes wp-cli."""
+
+import base64
+import json
+import re
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from backup_site.docker_load.database import DockerDatabaseLoad
+from backup_site.docker_load.wordpress import DockerWordPressAdapter
+from backup_site.docker_load.wp_cli import RESULTS_MARKER, WpCliBatch, format_command
+
+
+def completed(stdout="", returncode=0):
+    return subprocess.CompletedProcess(args=[], returncode=returncode, stdout=stdout, stderr="")
+
+
+def batch_output(*results):
+    """Sortie de `wp eval-file -`, précédée d'un bruit d'extension."""
+    payload = [
+        {"stdout": stdout, "stderr": stderr, "return_code": code}
+        for stdout, stderr, code in results
+    ]
+    return "Notice: plugin bavard\n" + RESULTS_MARKER + json.dumps(payload) + "\n"
+
+
+def sent_commands(script):
+    """Commandes encodées dans le script PHP envoyé à wp-cli."""
+    payload = re.search(r"base64_decode\('([^']+)'\)", script).group(1)
+    return json.loads(base64.b64decode(payload))
+
+
+class TestFormatCommand:
+    """Tests de la mise en forme pour `WP_CLI::runcommand`."""
+
+    def test_quotes_only_when_needed(self):
+        """Teste les arguments nus, entre guillemets et les options `--nom=valeur`."""
+        assert format_command(["option", "update", "blogname", "Mon site"]) == (
+            'option update blogname "Mon site"'
+        )
+        assert format_command(["search-replace", "--skip-columns=guid"]) == (
+            "search-replace --skip-columns=guid"
+        )
+        assert format_command(["post", "list", '--title=Le "vrai" titre']) == (
+            "post list --title='Le \"vrai\" titre'"
+        )
+        assert format_command(["option", "update", "x", ""]) == 'option update x ""'
+
+    def test_rejects_both_quote_kinds(self):
+        """Teste le refus d'un argument qui ne peut pas être transmis intact."""
+        with pytest.raises(ValueError):
+            format_command(["option", "update", "x", "l'a \"b\""])
+
+
+class TestWpCliBatch:
+    """Tests du lot de commandes."""
+
+    def test_runs_commands_in_one_exec(self):
+        """Teste un seul `docker exec` et la lecture des résultats après le marqueur."""
+        batch = WpCliBatch("wordpress").add("option", "get", "home").add("option", "get", "siteurl")
+
+        with patch("subprocess.run", return_value=completed(batch_output(
+            ("http://a\n", "", 0), ("http://b\n", "", 0),
+        ))) as run:
+            results = batch.run()
+
+        run.assert_called_once()
+        assert run.call_args.args[0][-2:] == ["eval-file", "-"]
+        assert sent_commands(run.call_args.kwargs["input"]) == [
+            "option get home", "option get siteurl",
+        ]
+        assert [(r.command, r.stdout, r.ok) for r in results] == [
+            ("option get home", "http://a", True), ("option get siteurl", "http://b", True),
+        ]
+
+    def test_failed_command_raises(self):
+        """Teste l'erreur de la première commande en échec."""
+        batch = WpCliBatch("wordpress").add("option", "get", "home").add("cache", "flush")
+
+        with patch("subprocess.run", return_value=completed(batch_output(
+            ("", "Error: Could not get 'home' option.", 1),
+        ))):
+            with pytest.raises(RuntimeError, match="option get home.*Could not get"):
+                batch.run()
+            assert [r.ok for r in batch.run(check=False)] == [False]
+
+    def test_unreadable_output_raises(self):
+        """Teste une sortie sans marqueur (PHP arrêté avant la fin)."""
+        batch = WpCliBatch("wordpress").add("option", "get", "home")
+
+        with patch("subprocess.run", return_value=completed("PHP Fatal error")):
+            with pytest.raises(RuntimeError, match="illisible"):
+                batch.run()
+
+
+class TestBatchedCallers:
+    """Tests des appelants regroupés."""
+
+    def test_setup_runs_wp_cli_once(self):
+        """Teste siteurl, home et search-replace dans un seul démarrage de WordPress."""
+        adapter = DockerWordPressAdapter("wordpress", "https://old.example", "http://localhost:8080")
+
+        def run(cmd, **kwargs):
+            if "eval-file" in cmd:
+                return completed(batch_output(("", "", 0), ("", "", 0), ("", "", 0)))
+            return completed()
+
+        with patch.object(adapter, "_configure_filesystem"), \
+                patch("subprocess.run", side_effect=run) as mock_run:
+            success, _ = adapter.setup()
+
+        assert success
+        evals = [c for c in mock_run.call_args_list if "eval-file" in c.args[0]]
+        assert len(evals) == 1
+        assert sent_commands(evals[0].kwargs["input"]) == [
+            "option update siteurl http://localhost:8080",
+            "option update home http://localhost:8080",
+            "search-replace https://old.example http://localhost:8080 --all-tables --skip-columns=guid",
+        ]
+
+    def test_db_config_in_one_call(self):
+        """Teste la lecture des trois constantes par un seul `wp config list`."""
+        loader = DockerDatabaseLoad(container_name="mysql", wordpress_container="wordpress")
+        output = json.dumps([
+            {"name": "DB_NAME", "value": "wp", "type": "constant"},
+            {"name": "DB_USER", "value": "wp_user", "type": "constant"},
+            {"name": "DB_PASSWORD", "value": "s3cret", "type": "constant"},
+        ])
+
+        with patch("subprocess.run", return_value=completed(output)) as run:
+            assert loader._extract_db_config_from_wordpress() == ("wp", "wp_user", "s3cret")
+
+        run.assert_called_once()
+        assert "config" in run.call_args.args[0] and "list" in run.call_args.args[0]
+
+        with patch("subprocess.run", return_value=completed(output.replace("DB_USER", "DB_HOST"))):
+            with pytest.raises(RuntimeError, match="DB_USER"):
+                loader._extract_db_config_from_wordpress()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])